@@ -179,18 +179,22 @@ class AgentManager:
                 "agent_name": agent_name
             }
     
-    def extract_project_info(self, content: str, document_type: str = "auto") -> Dict[str, Any]:
+    def extract_project_info(self, content: str, document_type: str = "auto",
+                             front_content: Optional[str] = None) -> Dict[str, Any]:
         """
         提取项目信息的便捷方法
         
         Args:
             content (str): 文档内容
             document_type (str): 文档类型 ("tender", "bid", "auto")
+            front_content (Optional[str]): 按页码查询得到的文档前几页文本（可选）
             
         Returns:
             Dict[str, Any]: 项目信息提取结果
         """
         context = {"document_type": document_type}
+        if front_content:
+            context["front_content"] = front_content
         return self.process_with_agent("ProjectInfoAgent", content, context)
     
     def match_project_info(self, bid_content: str, tender_info: Dict[str, Any]) -> Dict[str, Any]:
@@ -15,6 +15,7 @@ OCR智能识别代理
     - 继承BaseAgent，遵循统一的Agent接口
     - 支持多种AI模型提供方（Qwen、Doubao等）
     - 自动图像预处理和格式转换
+    - 视觉调用由llm_executor在asyncio事件循环上执行
     - 智能日期解析和有效性判断
     - 结构化的识别结果输出
 
@@ -38,14 +39,19 @@ import os
 import json
 import base64
 import re
+import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List, cast
 from PIL import Image
 import io
 
-from openai import OpenAI
 from dotenv import load_dotenv
 from .base_agent import BaseAgent
+from llm_clients import get_async_client, normalize_provider
+from llm_executor import get_executor
+import llm_cache
+from llm_cache import get_default_cache
+import token_budget
 
 # 确保在独立脚本/测试环境下也能读取 backend/.env
 _env_loaded = False
@@ -60,6 +66,86 @@ except Exception:
     _env_loaded = False
 
 
+# 日期验证提示词
+DATE_VALIDATION_PROMPT = """
+请分析这张图片，识别其中的日期信息并判断有效性。
+
+请重点关注以下类型的日期：
+1. 证书有效期（如营业执照、资质证书）
+2. 授权委托书的授权日期和有效期
+3. 社保证明的时间范围
+4. 其他重要的时间信息
+
+请按照以下JSON格式返回分析结果：
+{
+    "document_type": "文档类型（如：营业执照、授权委托书、社保证明等）",
+    "dates_found": [
+        {
+            "date": "识别到的日期（YYYY-MM-DD格式）",
+            "type": "日期类型（如：发证日期、有效期至、授权日期等）",
+            "original_text": "图片中的原始日期文本",
+            "is_expired": "是否已过期（true/false）",
+            "days_until_expiry": "距离过期天数（负数表示已过期）"
+        }
+    ],
+    "is_valid": "整体有效性判断（true/false）",
+    "confidence": "识别置信度（0-1之间的浮点数）",
+    "notes": "补充说明或注意事项"
+}
+
+请确保返回的是有效的JSON格式。
+"""
+
+# 身份证信息提取提示词
+ID_CARD_PROMPT = """
+请分析这张身份证图片，提取以下信息：
+1. 姓名
+2. 性别  
+3. 身份证号码
+
+请只提取这三项基本信息，不要包含其他内容。
+
+请按照以下JSON格式返回分析结果：
+{
+    "card_side": "身份证正面或反面",
+    "name": "姓名",
+    "gender": "性别",
+    "id_number": "身份证号码",
+    "confidence": "识别置信度（0-1之间的浮点数）",
+    "is_valid_format": "身份证号格式是否有效（true/false）",
+    "notes": "补充说明（如果图片不清晰或信息不完整）"
+}
+
+注意事项：
+- 如果是身份证反面，某些信息可能无法获取，请如实标注
+- 如果图片不清晰或无法识别，请在notes中说明
+- 请确保返回的是有效的JSON格式
+
+请确保返回的是有效的JSON格式。
+"""
+
+# 通用OCR提示词
+GENERAL_OCR_PROMPT = """
+请分析这张图片，识别其中的所有文本内容。
+
+请按照以下JSON格式返回分析结果：
+{
+    "text": "识别到的完整文本内容",
+    "language": "主要语言（如：中文、英文等）",
+    "confidence": "识别置信度（0-1之间的浮点数）",
+    "text_blocks": [
+        {
+            "content": "文本块内容",
+            "position": "在图片中的大致位置（如：左上、中间、右下等）"
+        }
+    ],
+    "notes": "补充说明"
+}
+
+请确保返回的是有效的JSON格式。
+"""
+
+
 class OCRAgent(BaseAgent):
     """
     OCR智能识别代理类
@@ -95,17 +181,18 @@ class OCRAgent(BaseAgent):
         # 设置默认模型提供方
         self.default_provider = (default_provider or os.getenv("LLM_PROVIDER", "qwen")).lower()
         
-        # 初始化Qwen客户端
-        self.qwen_client = OpenAI(
-            api_key=os.getenv("DASHSCOPE_API_KEY"),
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-        )
+        # 获取共享的Qwen异步客户端（与分析服务复用同一连接池与事件循环）
+        self.qwen_client = get_async_client("qwen")
+        self.executor = get_executor()
         self.qwen_model = "qwen-vl-plus"  # 支持视觉的Qwen模型
         
         # 初始化豆包（方舟）客户端配置
         self.ark_base_url = os.getenv("ARK_BASE_URL", "https://ark.cn-beijing.volces.com/api/v3")
         self.doubao_model_id = os.getenv("DOUBAO_MODEL_ID", "doubao-vision-32k")  # 支持视觉的豆包模型
         
+        # 模型响应缓存（缓存键包含图像数据摘要，同一张图片与提示词只识别一次）
+        self.cache = get_default_cache()
+        
         self.logger.info(f"OCR Agent初始化完成，默认使用模型提供方: {self.default_provider}")
     
     def process(self, content: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
@@ -178,34 +265,7 @@ class OCRAgent(BaseAgent):
             provider = provider or self.default_provider
             
             # 构建日期验证提示词
-            prompt = """
-请分析这张图片，识别其中的日期信息并判断有效性。
-
-请重点关注以下类型的日期：
-1. 证书有效期（如营业执照、资质证书）
-2. 授权委托书的授权日期和有效期
-3. 社保证明的时间范围
-4. 其他重要的时间信息
-
-请按照以下JSON格式返回分析结果：
-{
-    "document_type": "文档类型（如：营业执照、授权委托书、社保证明等）",
-    "dates_found": [
-        {
-            "date": "识别到的日期（YYYY-MM-DD格式）",
-            "type": "日期类型（如：发证日期、有效期至、授权日期等）",
-            "original_text": "图片中的原始日期文本",
-            "is_expired": "是否已过期（true/false）",
-            "days_until_expiry": "距离过期天数（负数表示已过期）"
-        }
-    ],
-    "is_valid": "整体有效性判断（true/false）",
-    "confidence": "识别置信度（0-1之间的浮点数）",
-    "notes": "补充说明或注意事项"
-}
-
-请确保返回的是有效的JSON格式。
-"""
+            prompt = DATE_VALIDATION_PROMPT
             
             # 调用视觉AI API
             response = self._call_vision_api(prompt, image_input, provider)
@@ -251,32 +311,7 @@ class OCRAgent(BaseAgent):
             provider = provider or self.default_provider
             
             # 构建身份证信息提取提示词
-            prompt = """
-请分析这张身份证图片，提取以下信息：
-1. 姓名
-2. 性别  
-3. 身份证号码
-
-请只提取这三项基本信息，不要包含其他内容。
-
-请按照以下JSON格式返回分析结果：
-{
-    "card_side": "身份证正面或反面",
-    "name": "姓名",
-    "gender": "性别",
-    "id_number": "身份证号码",
-    "confidence": "识别置信度（0-1之间的浮点数）",
-    "is_valid_format": "身份证号格式是否有效（true/false）",
-    "notes": "补充说明（如果图片不清晰或信息不完整）"
-}
-
-注意事项：
-- 如果是身份证反面，某些信息可能无法获取，请如实标注
-- 如果图片不清晰或无法识别，请在notes中说明
-- 请确保返回的是有效的JSON格式
-
-请确保返回的是有效的JSON格式。
-"""
+            prompt = ID_CARD_PROMPT
             
             # 调用视觉AI API
             response = self._call_vision_api(prompt, image_input, provider)
@@ -314,25 +349,7 @@ class OCRAgent(BaseAgent):
             provider = provider or self.default_provider
             
             # 构建通用OCR提示词
-            prompt = """
-请分析这张图片，识别其中的所有文本内容。
-
-请按照以下JSON格式返回分析结果：
-{
-    "text": "识别到的完整文本内容",
-    "language": "主要语言（如：中文、英文等）",
-    "confidence": "识别置信度（0-1之间的浮点数）",
-    "text_blocks": [
-        {
-            "content": "文本块内容",
-            "position": "在图片中的大致位置（如：左上、中间、右下等）"
-        }
-    ],
-    "notes": "补充说明"
-}
-
-请确保返回的是有效的JSON格式。
-"""
+            prompt = GENERAL_OCR_PROMPT
             
             # 调用视觉AI API
             response = self._call_vision_api(prompt, image_input, provider)
@@ -365,20 +382,35 @@ class OCRAgent(BaseAgent):
             - qwen: 阿里云百炼Qwen视觉模型
             - doubao: 字节跳动豆包视觉模型
         """
-        # 准备图像数据
-        image_data = self._prepare_image_data(image_input)
+        # 同步门面：在llm_executor的事件循环上执行
+        return self.executor.run(self._acall_vision_api(prompt, image_input, provider, llm_cache.bypass_mode()))
+    
+    async def _acall_vision_api(self, prompt: str, image_input: str, provider: str,
+                                cache_mode: Optional[str] = None) -> str:
+        """
+        异步调用视觉AI API（在llm_executor的事件循环上执行）
+        
+        Args:
+            cache_mode (Optional[str]): 响应缓存的绕过模式（调用方线程上的llm_cache.bypass_mode()）
+            其余参数同_call_vision_api()
+            
+        Returns:
+            str: AI模型的响应文本
+        """
+        # 准备图像数据（读文件与缩放在线程池中执行，不阻塞事件循环）
+        image_data = await asyncio.to_thread(self._prepare_image_data, image_input)
         
         # 根据提供方选择API调用方法
-        provider_key = provider.lower()
-        if provider_key in ("qwen", "ali", "dashscope"):
-            return self._call_qwen_vision_api(prompt, image_data)
-        elif provider_key in ("doubao", "ark", "volc", "volcengine"):
-            return self._call_doubao_vision_api(prompt, image_data)
-        else:
-            # 默认使用Qwen
-            return self._call_qwen_vision_api(prompt, image_data)
+        # 未知提供方默认使用Qwen
+        if normalize_provider(provider) == "doubao":
+            return await self.cache.acall("doubao", self.doubao_model_id, 0.1, prompt,
+                                          lambda: self._call_doubao_vision_api(prompt, image_data),
+                                          image=image_data, mode=cache_mode)
+        return await self.cache.acall("qwen", self.qwen_model, 0.1, prompt,
+                                      lambda: self._call_qwen_vision_api(prompt, image_data),
+                                      image=image_data, mode=cache_mode)
     
-    def _call_qwen_vision_api(self, prompt: str, image_data: str) -> str:
+    async def _call_qwen_vision_api(self, prompt: str, image_data: str) -> str:
         """
         调用Qwen视觉API
         ===============
@@ -392,29 +424,20 @@ class OCRAgent(BaseAgent):
         Returns:
             str: Qwen模型的响应文本
         """
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                    {
-                        "type": "image_url",
-                        "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}
-                    }
-                ]
-            }
-        ]
-        
-        completion = self.qwen_client.chat.completions.create(
+        completion = await self.executor.chat(
+            "qwen", self.qwen_client,
             model=self.qwen_model,
-            messages=cast(Any, messages),
+            messages=cast(Any, self._build_vision_messages(prompt, image_data)),
             stream=False,
             temperature=0.1,  # 较低温度确保识别准确性
         )
+        # 预估值只含文本提示词，图像token以接口返回的实际用量为准
+        token_budget.record_usage(self.qwen_model, token_budget.estimate_tokens(prompt),
+                                  getattr(completion, "usage", None))
         
         return completion.choices[0].message.content or ""
     
-    def _call_doubao_vision_api(self, prompt: str, image_data: str) -> str:
+    async def _call_doubao_vision_api(self, prompt: str, image_data: str) -> str:
         """
         调用豆包（方舟）视觉API
         ======================
@@ -432,12 +455,24 @@ class OCRAgent(BaseAgent):
         if not ark_api_key:
             raise ValueError("缺少方舟平台API密钥，请设置环境变量 ARK_API_KEY")
         
-        ark_client = OpenAI(
-            base_url=self.ark_base_url,
-            api_key=ark_api_key,
+        ark_client = get_async_client("doubao", base_url=self.ark_base_url, api_key=ark_api_key)
+        
+        completion = await self.executor.chat(
+            "doubao", ark_client,
+            model=self.doubao_model_id,
+            messages=cast(Any, self._build_vision_messages(prompt, image_data)),
+            stream=False,
+            temperature=0.1,  # 较低温度确保识别准确性
         )
+        token_budget.record_usage(self.doubao_model_id, token_budget.estimate_tokens(prompt),
+                                  getattr(completion, "usage", None))
         
-        messages = [
+        return completion.choices[0].message.content or ""
+    
+    @staticmethod
+    def _build_vision_messages(prompt: str, image_data: str) -> List[Dict[str, Any]]:
+        """构建图文消息（图像以data URL内联）"""
+        return [
             {
                 "role": "user",
                 "content": [
@@ -449,15 +484,6 @@ class OCRAgent(BaseAgent):
                 ]
             }
         ]
-        
-        completion = ark_client.chat.completions.create(
-            model=self.doubao_model_id,
-            messages=cast(Any, messages),
-            stream=False,
-            temperature=0.1,  # 较低温度确保识别准确性
-        )
-        
-        return completion.choices[0].message.content or ""
     
     def _prepare_image_data(self, image_input: str) -> str:
         """
@@ -8,14 +8,23 @@ AI优先的项目编号和项目名称提取及错误检查专家。
 
 import re
 import json
+import bisect
 import sys
 import os
+from contextlib import nullcontext
 from typing import Dict, Any, Optional, List
 
 # 计算 backend 目录路径供后续按路径导入备用
 backend_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 from .base_agent import BaseAgent
+import llm_cache
+import token_budget
+from llm_clients import normalize_provider
+from rate_limiter import RateLimitExhausted
+
+# AI错误检测单次送入的最大token数（控制检测耗时，模型上下文更小时以模型为准）
+DETECTION_MAX_INPUT_TOKENS = int(os.getenv("PROJECT_INFO_MAX_INPUT_TOKENS", "12000"))
 
 class ProjectInfoAgent(BaseAgent):
     """
@@ -36,6 +45,9 @@ class ProjectInfoAgent(BaseAgent):
             description="AI优先的项目编号和项目名称提取及错误检查专家"
         )
         
+        # AI分析服务（首次使用时创建，见_get_ai_service()）
+        self._ai_service = None
+        
         # 项目编号的正则表达式模式
         self.project_id_patterns = [
             r'项目编号[:：]\s*([A-Za-z0-9\u4e00-\u9fff\[\]（）()_\-/]+号?)',
@@ -79,8 +91,12 @@ class ProjectInfoAgent(BaseAgent):
             
             doc_type = context.get("document_type", "unknown") if context else "unknown"
             
+            # 调用方可提供按页码查询的前几页文本与标题大纲（来自file_blocks），避免按字符数估算
+            front_content = context.get("front_content") if context else None
+            outline = context.get("outline") if context else None
+            
             if doc_type == "tender":
-                result = self._extract_tender_info(content)
+                result = self._extract_tender_info(content, front_content)
                 return self.create_success_result(result, "招标文件项目信息提取完成")
             elif doc_type == "bid":
                 # 检查是否需要进行错误检测
@@ -89,24 +105,24 @@ class ProjectInfoAgent(BaseAgent):
                 
                 if tender_project_id or tender_project_name:
                     # 执行错误检测
-                    result = self._check_bid_project_errors(content, tender_project_id, tender_project_name)
+                    result = self._check_bid_project_errors(content, tender_project_id, tender_project_name, outline)
                     return self.create_success_result(result, "投标文件项目信息错误检查完成")
                 else:
                     # 仅提取信息，不进行检测
-                    result = self._auto_extract_info(content)
+                    result = self._auto_extract_info(content, front_content)
                     return self.create_success_result(result, "投标文件项目信息提取完成")
             else:
-                result = self._auto_extract_info(content)
+                result = self._auto_extract_info(content, front_content)
                 return self.create_success_result(result, "项目信息自动提取完成")
                 
         except Exception as e:
             self.logger.error(f"项目信息处理失败: {str(e)}")
             return self.create_error_result(str(e))
     
-    def _extract_tender_info(self, content: str) -> Dict[str, Any]:
+    def _extract_tender_info(self, content: str, front_content: Optional[str] = None) -> Dict[str, Any]:
         """从招标文件中提取项目信息 - AI优先策略"""
-        # 获取文档前几页内容
-        front_content = self._extract_front_pages(content, pages=3, max_length=5000)
+        # 获取文档前几页内容（优先使用按页码查询的结果）
+        front_content = self._extract_front_pages(front_content or content, pages=3, max_length=5000)
         
         # 主要方法：AI模型提取（带重试）
         ai_result = self._extract_by_ai_with_retry(front_content, "tender")
@@ -159,7 +175,9 @@ class ProjectInfoAgent(BaseAgent):
         for attempt in range(max_retries + 1):
             try:
                 self.logger.info(f"开始AI提取，尝试次数: {attempt + 1}/{max_retries + 1}")
-                result = self._extract_by_ai(content, doc_type)
+                # 重试时不读取缓存（否则会拿到同一个不理想的响应），新响应覆盖缓存
+                with llm_cache.bypass(refresh=True) if attempt else nullcontext():
+                    result = self._extract_by_ai(content, doc_type)
                 
                 if result and (result.get("project_id") or result.get("project_name")):
                     confidence = result.get("confidence", 0.0)
@@ -172,6 +190,10 @@ class ProjectInfoAgent(BaseAgent):
                     self.logger.warning("AI提取在所有尝试后仍未成功")
                     return result or {}
                     
+            except RateLimitExhausted as e:
+                # 限流器已按退避重试过，立即再试只会继续触发限流
+                self.logger.error(f"AI提取受限流，停止重试: {str(e)}")
+                return {}
             except Exception as e:
                 self.logger.error(f"AI提取尝试 {attempt + 1} 失败: {str(e)}")
                 if attempt < max_retries:
@@ -181,10 +203,14 @@ class ProjectInfoAgent(BaseAgent):
         
         return {}
     
-    def _extract_by_ai(self, content: str, doc_type: str) -> Dict[str, Any]:
-        """使用AI模型提取项目信息"""
-        try:
-            # 导入AI服务
+    def _get_ai_service(self):
+        """
+        获取AI分析服务（首次使用时创建，之后复用）
+        
+        原实现每次尝试都新建QwenAnalysisService；服务底层的客户端由llm_clients共享，
+        这里再复用服务实例本身，重试与多次检测都走同一个长连接池。
+        """
+        if self._ai_service is None:
             try:
                 from qwen_service import QwenAnalysisService
             except ImportError:
@@ -197,8 +223,13 @@ class ProjectInfoAgent(BaseAgent):
                 qwen_module = importlib.util.module_from_spec(spec)
                 spec.loader.exec_module(qwen_module)
                 QwenAnalysisService = qwen_module.QwenAnalysisService
-
-            ai_service = QwenAnalysisService()
+            self._ai_service = QwenAnalysisService()
+        return self._ai_service
+    
+    def _extract_by_ai(self, content: str, doc_type: str) -> Dict[str, Any]:
+        """使用AI模型提取项目信息"""
+        try:
+            ai_service = self._get_ai_service()
             provider = os.getenv("LLM_PROVIDER", "qwen")
             
             # 构建提示词
@@ -227,6 +258,8 @@ class ProjectInfoAgent(BaseAgent):
                 self.logger.warning("AI响应解析失败，返回空结果")
                 return {}
             
+        except RateLimitExhausted:
+            raise
         except Exception as e:
             self.logger.error(f"AI提取失败: {str(e)}")
             return {}
@@ -361,9 +394,9 @@ class ProjectInfoAgent(BaseAgent):
         else:
             return cutoff_content
     
-    def _auto_extract_info(self, content: str) -> Dict[str, Any]:
+    def _auto_extract_info(self, content: str, front_content: Optional[str] = None) -> Dict[str, Any]:
         """自动提取项目信息"""
-        front_content = self._extract_front_pages(content, pages=3, max_length=5000)
+        front_content = self._extract_front_pages(front_content or content, pages=3, max_length=5000)
         
         # AI优先策略
         ai_result = self._extract_by_ai_with_retry(front_content, "tender")
@@ -403,7 +436,8 @@ class ProjectInfoAgent(BaseAgent):
         }
     
     def _check_bid_project_errors(self, content: str, tender_project_id: Optional[str] = None, 
-                                 tender_project_name: Optional[str] = None) -> Dict[str, Any]:
+                                 tender_project_name: Optional[str] = None,
+                                 outline: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         检查投标文件中的项目信息错误 - AI+正则双重检测策略
         =======================================================
@@ -415,6 +449,7 @@ class ProjectInfoAgent(BaseAgent):
             content (str): 投标文件内容
             tender_project_id (Optional[str]): 招标文件的项目编号
             tender_project_name (Optional[str]): 招标文件的项目名称
+            outline (Optional[List[Dict[str, Any]]]): 文档标题大纲，用于定位错误所在章节
             
         Returns:
             Dict[str, Any]: 检测结果，包含错误列表、置信度等信息
@@ -442,7 +477,7 @@ class ProjectInfoAgent(BaseAgent):
         ai_found_project_info = ai_project_info
         
         # 方法2: 正则表达式检测（补充方法）
-        regex_errors = self._detect_errors_by_regex(content, tender_project_id, tender_project_name)
+        regex_errors = self._detect_errors_by_regex(content, tender_project_id, tender_project_name, outline)
         
         # 合并去重错误（避免AI和正则重复检测相同错误）
         merged_errors = self._merge_and_deduplicate_errors(errors, regex_errors)
@@ -511,10 +546,35 @@ class ProjectInfoAgent(BaseAgent):
     
     def _build_error_detection_prompt(self, content: str, tender_project_id: Optional[str], 
                                     tender_project_name: Optional[str]) -> str:
-        """构建AI错误检测的提示词"""
-        # 截取前部分内容进行分析（避免内容过长）
-        analysis_content = content[:12000] if len(content) > 12000 else content
+        """
+        构建AI错误检测的提示词
         
+        正文按token预算截取前部分（原实现固定截取前12000字符，不区分模型与中英文构成）：
+        预算取模型输入预算与DETECTION_MAX_INPUT_TOKENS（控制单次检测耗时）中较小的一个。
+        """
+        prompt = self._render_error_detection_prompt(content, tender_project_id, tender_project_name)
+        decision = token_budget.plan(
+            self._ai_model_name(), token_budget.estimate_tokens(prompt),
+            can_trim=True, max_input_tokens=DETECTION_MAX_INPUT_TOKENS
+        )
+        if decision["action"] == "trim":
+            template_tokens = token_budget.estimate_tokens(
+                self._render_error_detection_prompt("", tender_project_id, tender_project_name)
+            )
+            analysis_content = token_budget.trim_to_tokens(content, decision["budget"] - template_tokens)
+            prompt = self._render_error_detection_prompt(analysis_content, tender_project_id, tender_project_name)
+        return prompt
+    
+    def _ai_model_name(self) -> str:
+        """当前提供方使用的模型名（用于查询上下文上限）"""
+        ai_service = self._get_ai_service()
+        if normalize_provider(os.getenv("LLM_PROVIDER", "qwen")) == "doubao":
+            return ai_service.doubao_model_id
+        return ai_service.model
+    
+    def _render_error_detection_prompt(self, analysis_content: str, tender_project_id: Optional[str],
+                                       tender_project_name: Optional[str]) -> str:
+        """填充AI错误检测的提示词模板"""
         prompt = f"""
 你是专业的投标文件合规检查专家。请仔细分析以下投标文件内容，检测项目编号和项目名称是否与招标文件要求一致。
 
@@ -581,26 +641,14 @@ class ProjectInfoAgent(BaseAgent):
             try:
                 self.logger.info(f"开始AI错误检测，尝试次数: {attempt + 1}/{max_retries + 1}")
                 
-                # 导入AI服务
-                try:
-                    from qwen_service import QwenAnalysisService
-                except ImportError:
-                    import importlib.util
-                    backend_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                    qwen_path = os.path.join(backend_path, 'qwen_service.py')
-                    spec = importlib.util.spec_from_file_location("qwen_service", qwen_path)
-                    if spec is None or spec.loader is None:
-                        raise ImportError(f"无法加载模块规范: {qwen_path}")
-                    qwen_module = importlib.util.module_from_spec(spec)
-                    spec.loader.exec_module(qwen_module)
-                    QwenAnalysisService = qwen_module.QwenAnalysisService
-
-                ai_service = QwenAnalysisService()
+                ai_service = self._get_ai_service()
                 provider = os.getenv("LLM_PROVIDER", "qwen")
-                try:
-                    response = ai_service._call_model_api(provider, prompt)
-                except AttributeError:
-                    response = ai_service._call_qwen_api(prompt)
+                # 重试时不读取缓存，新响应覆盖缓存
+                with llm_cache.bypass(refresh=True) if attempt else nullcontext():
+                    try:
+                        response = ai_service._call_model_api(provider, prompt)
+                    except AttributeError:
+                        response = ai_service._call_qwen_api(prompt)
                 
                 # 解析响应
                 result = self._parse_ai_response(response)
@@ -615,6 +663,9 @@ class ProjectInfoAgent(BaseAgent):
                     self.logger.warning("AI错误检测在所有尝试后仍未成功")
                     return {"errors": []}
                     
+            except RateLimitExhausted as e:
+                self.logger.error(f"AI错误检测受限流，停止重试: {str(e)}")
+                return {"errors": []}
             except Exception as e:
                 self.logger.error(f"AI错误检测尝试 {attempt + 1} 失败: {str(e)}")
                 if attempt < max_retries:
@@ -625,7 +676,8 @@ class ProjectInfoAgent(BaseAgent):
         return {"errors": []}
     
     def _detect_errors_by_regex(self, content: str, tender_project_id: Optional[str], 
-                              tender_project_name: Optional[str]) -> List[Dict[str, Any]]:
+                              tender_project_name: Optional[str],
+                              outline: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """
         使用正则表达式检测项目信息错误（备选方法）
         =========================================
@@ -634,6 +686,7 @@ class ProjectInfoAgent(BaseAgent):
             content (str): 投标文件内容
             tender_project_id (Optional[str]): 正确的项目编号
             tender_project_name (Optional[str]): 正确的项目名称
+            outline (Optional[List[Dict[str, Any]]]): 文档标题大纲
             
         Returns:
             List[Dict[str, Any]]: 正则检测到的错误列表
@@ -642,15 +695,16 @@ class ProjectInfoAgent(BaseAgent):
         
         # 1. 检查项目编号错误
         if tender_project_id:
-            errors.extend(self._check_project_id_errors_regex(content, tender_project_id))
+            errors.extend(self._check_project_id_errors_regex(content, tender_project_id, outline))
         
         # 2. 检查项目名称错误
         if tender_project_name:
-            errors.extend(self._check_project_name_errors_regex(content, tender_project_name))
+            errors.extend(self._check_project_name_errors_regex(content, tender_project_name, outline))
         
         return errors
     
-    def _check_project_id_errors_regex(self, content: str, tender_project_id: str) -> List[Dict[str, Any]]:
+    def _check_project_id_errors_regex(self, content: str, tender_project_id: str,
+                                      outline: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """使用正则表达式检查项目编号错误"""
         errors = []
         match_count = 0  # 计数器，用于区分不同位置的相同错误
@@ -673,7 +727,7 @@ class ProjectInfoAgent(BaseAgent):
                         if not self._is_in_historical_context(context_text, found_id):
                             # 估算位置描述
                             position = match.start()
-                            estimated_section = self._estimate_document_section(content, position)
+                            estimated_section = self._estimate_document_section(content, position, outline)
                             
                             errors.append({
                                 "type": "wrong_project_id",
@@ -693,7 +747,8 @@ class ProjectInfoAgent(BaseAgent):
         
         return errors
     
-    def _check_project_name_errors_regex(self, content: str, tender_project_name: str) -> List[Dict[str, Any]]:
+    def _check_project_name_errors_regex(self, content: str, tender_project_name: str,
+                                        outline: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """使用正则表达式检查项目名称错误"""
         errors = []
         match_count = 0  # 计数器，用于区分不同位置的相同错误
@@ -716,7 +771,7 @@ class ProjectInfoAgent(BaseAgent):
                         if not self._is_in_historical_context(context_text, found_name):
                             # 估算位置描述
                             position = match.start()
-                            estimated_section = self._estimate_document_section(content, position)
+                            estimated_section = self._estimate_document_section(content, position, outline)
                             
                             severity = "高" if similarity < 0.3 else "中"
                             errors.append({
@@ -738,8 +793,16 @@ class ProjectInfoAgent(BaseAgent):
         
         return errors
     
-    def _estimate_document_section(self, content: str, position: int) -> str:
+    def _estimate_document_section(self, content: str, position: int,
+                                   outline: Optional[List[Dict[str, Any]]] = None) -> str:
         """估算文档位置所在的章节"""
+        # 有标题大纲时直接取位置之前最近的标题
+        if outline:
+            offsets = [heading['char_offset'] for heading in outline]
+            index = bisect.bisect_right(offsets, position) - 1
+            if index >= 0:
+                return outline[index]['text']
+        
         # 简单的位置估算
         total_length = len(content)
         relative_position = position / total_length
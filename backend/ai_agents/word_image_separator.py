@@ -11,12 +11,16 @@ import sys
 from pathlib import Path
 import re
 
+# 大模型客户端与执行器位于backend目录（作为脚本运行时不在导入路径中）
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
 try:
     from docx import Document
     from PIL import Image
     from io import BytesIO
-    from openai import OpenAI
     from dotenv import load_dotenv
+    from llm_clients import get_async_client
+    from llm_executor import get_executor
 except ImportError as e:
     print(f"缺少依赖库: {e}")
     print("请安装: pip install python-docx pillow openai")
@@ -43,7 +47,9 @@ def init_ai_client():
             print("警告: 未设置ARK_API_KEY环境变量")
             return None
             
-        client = OpenAI(
+        # 共享的异步客户端，命名调用在llm_executor的事件循环上执行
+        client = get_async_client(
+            'doubao',
             base_url="https://ark.cn-beijing.volces.com/api/v3",
             api_key=ark_api_key,
         )
@@ -54,6 +60,30 @@ def init_ai_client():
 
 
 def generate_image_name(ai_client, context_text, image_index=1, total_images=1):
+    """
+    使用AI生成图片名称（同步门面，参数与返回值同agenerate_image_name）
+    """
+    return get_executor().run(agenerate_image_name(ai_client, context_text, image_index, total_images))
+
+
+def generate_image_names(ai_client, requests):
+    """
+    批量生成图片名称，各次命名调用在同一个事件循环上并发执行
+    
+    Args:
+        ai_client: AI客户端
+        requests: (上下文内容, 图片索引, 连续图片总数) 的列表
+        
+    Returns:
+        list: 与requests顺序一致的图片名称
+    """
+    return get_executor().run_all(
+        agenerate_image_name(ai_client, context_text, image_index, total_images)
+        for context_text, image_index, total_images in requests
+    )
+
+
+async def agenerate_image_name(ai_client, context_text, image_index=1, total_images=1):
     """
     使用AI生成图片名称
     
@@ -130,7 +160,8 @@ def generate_image_name(ai_client, context_text, image_index=1, total_images=1):
             print(f"📝 上下文长度: {len(context_text)}")
             print(f"📄 上下文内容: {context_text[:100]}...")
         
-        completion = ai_client.chat.completions.create(
+        completion = await get_executor().chat(
+            'doubao', ai_client,
             model=model_id,
             messages=[
                 {"role": "system", "content": "你是一个专业的文件命名助手，擅长根据文档内容生成合适的图片文件名。"},
@@ -138,7 +169,7 @@ def generate_image_name(ai_client, context_text, image_index=1, total_images=1):
             ],
             temperature=0.3,
             max_tokens=50,
-            timeout=10  # 添加10秒超时
+            timeout=10  # 10秒超时（超时后取消调用）
         )
         
         generated_name = completion.choices[0].message.content.strip()
@@ -892,6 +923,94 @@ def convert_doc_to_docx(doc_path):
         raise e
 
 
+def _is_ai_result_valid(ai_name, context_text):
+    """
+    校验AI返回的命名是否合理
+    """
+    if not ai_name or len(ai_name.strip()) == 0:
+        return False
+    ai_name = ai_name.strip()
+    # 如果AI命名为营业执照，但上下文没有营业执照，则判为不合理
+    if '营业执照' in ai_name and '营业执照' not in context_text:
+        return False
+    # 其它简单规则：命名长度合理且不是纯数字
+    if 2 <= len(ai_name) <= 12 and not ai_name.isdigit():
+        return True
+    return False
+
+
+def get_group_position(image_groups, img_info):
+    """返回图片在所属连续组中的序号（从1开始）与组内图片总数，单独图片返回(1, 1)"""
+    if img_info['group_id'] is None:
+        return 1, 1
+    group_images = [img for img in image_groups if img['group_id'] == img_info['group_id']]
+    group_images.sort(key=lambda x: x['para_idx'])
+    return group_images.index(img_info) + 1, len(group_images)
+
+
+def build_naming_context(doc, img_info):
+    """
+    收集图片命名用的上下文
+    
+    Args:
+        doc: Word文档对象
+        img_info: 图片信息（find_continuous_image_groups的返回项）
+        
+    Returns:
+        tuple: (上下文内容, 最近的有效上下文段落列表)
+    """
+    # 1. 获取文档标题
+    doc_title = ""
+    if doc.paragraphs:
+        first_para = doc.paragraphs[0].text.strip()
+        if first_para:
+            doc_title = first_para[:50]  # 取前50个字符作为文档标题
+    
+    # 2. 为每张图片寻找最近的5段有效上下文文字
+    nearest_contexts = find_nearest_context_paragraphs(doc, img_info['para_idx'])
+    
+    # 3. 组合上下文信息（优先使用最近的5段上下文）
+    context_parts = []
+    
+    # 添加文档标题
+    if doc_title:
+        context_parts.append(f"文档标题: {doc_title}")
+    
+    # 添加最近的5段上下文（这是最重要的信息）
+    if nearest_contexts:
+        context_parts.append("最有效上下文:")
+        for i, ctx in enumerate(nearest_contexts, 1):
+            # 限制每段上下文的长度以避免提示词过长
+            ctx_text = ctx['text'][:100] if len(ctx['text']) > 100 else ctx['text']
+            value_info = f"评分{ctx['value_score']}"
+            if ctx['has_key_info']:
+                value_info += ",关键信息"
+            if ctx['is_heading']:
+                value_info += ",标题"
+            context_parts.append(f"  {i}. 段落{ctx['para_idx']}(距离{ctx['distance']},{value_info}): {ctx_text}")
+    
+    # 添加额外的角色关键词（如果空间允许）
+    role_keywords = ["授权代理人", "授权委托人", "法定代表人", "单位负责人", "自然人", "身份证", "营业执照", "执照"]
+    role_context = []
+    
+    for para_idx, para in enumerate(doc.paragraphs):
+        para_text = para.text.strip()
+        if para_text:
+            for keyword in role_keywords:
+                if keyword in para_text:
+                    role_context.append(f"{keyword}: {para_text[:60]}")  # 缩短长度
+                    break
+                    
+    # 只添加最相关的角色上下文（最多2个）
+    if role_context:
+        context_parts.append("角色信息:")
+        for role_ctx in role_context[:2]:
+            context_parts.append(f"  - {role_ctx}")
+        
+    context_text = "\n".join(context_parts)
+    return context_text, nearest_contexts
+
+
 def extract_and_separate(input_file):
     """
     主要功能：提取图片并分离
@@ -939,6 +1058,36 @@ def extract_and_separate(input_file):
     # 识别连续图片组
     image_groups = find_continuous_image_groups(doc, image_parts)
     
+    # 收集每张图片的命名上下文（在替换图片前基于原文档收集），
+    # 单独图片与每个连续组的首张图片的AI命名在同一个事件循环上并发生成
+    naming_contexts = {}
+    ai_requests = []
+    named_groups = set()
+    for img_info in image_groups:
+        embed_id = img_info['embed_id']
+        if embed_id in naming_contexts:
+            continue
+        naming_contexts[embed_id] = build_naming_context(doc, img_info)
+        if img_info['group_id'] is not None:
+            if img_info['group_id'] in named_groups:
+                continue
+            named_groups.add(img_info['group_id'])
+        context_text = naming_contexts[embed_id][0].strip()
+        if ai_client and context_text:
+            ai_requests.append((embed_id, (context_text, *get_group_position(image_groups, img_info))))
+    
+    prefetched_names = {}
+    if ai_requests:
+        if os.getenv('AI_NAME_LOG'):
+            print(f"🤖 批量调用AI命名: {len(ai_requests)} 张图片")
+        ai_names = generate_image_names(ai_client, [request for _, request in ai_requests])
+        for (embed_id, _), ai_name in zip(ai_requests, ai_names):
+            if isinstance(ai_name, Exception):
+                if os.getenv('AI_NAME_LOG'):
+                    print(f"⚠️ AI命名失败: {ai_name}")
+                continue
+            prefetched_names[embed_id] = ai_name
+    
     image_count = 0
     processed_images = set()  # 记录已处理的图片，避免重复处理
     group_base_names = {}  # 缓存每个组的基础名称
@@ -951,17 +1100,9 @@ def extract_and_separate(input_file):
         image_count += 1
         processed_images.add(img_info['embed_id'])
         
-        # 收集上下文 - 改进版本
-        context_text = ""
-        
         # 首先确定图片在组中的位置
+        img_index_in_group, total_in_group = get_group_position(image_groups, img_info)
         if img_info['group_id'] is not None:
-            # 是连续组的一部分，计算在组中的位置
-            group_images = [img for img in image_groups if img['group_id'] == img_info['group_id']]
-            group_images.sort(key=lambda x: x['para_idx'])
-            img_index_in_group = group_images.index(img_info) + 1
-            total_in_group = len(group_images)
-            
             # 检查是否已经为这个组生成了基础名称
             if img_info['group_id'] in group_base_names:
                 # 使用已生成的基础名称
@@ -973,61 +1114,10 @@ def extract_and_separate(input_file):
                 naming_method = ""
         else:
             # 单独图片
-            img_index_in_group = 1
-            total_in_group = 1
             base_name = None
             naming_method = ""
         
-        # 首先收集上下文信息用于AI命名
-        # 1. 获取文档标题
-        doc_title = ""
-        if doc.paragraphs:
-            first_para = doc.paragraphs[0].text.strip()
-            if first_para:
-                doc_title = first_para[:50]  # 取前50个字符作为文档标题
-        
-        # 2. 为每张图片寻找最近的5段有效上下文文字
-        nearest_contexts = find_nearest_context_paragraphs(doc, img_info['para_idx'])
-        
-        # 3. 组合上下文信息（优先使用最近的5段上下文）
-        context_parts = []
-        
-        # 添加文档标题
-        if doc_title:
-            context_parts.append(f"文档标题: {doc_title}")
-        
-        # 添加最近的5段上下文（这是最重要的信息）
-        if nearest_contexts:
-            context_parts.append("最有效上下文:")
-            for i, ctx in enumerate(nearest_contexts, 1):
-                # 限制每段上下文的长度以避免提示词过长
-                ctx_text = ctx['text'][:100] if len(ctx['text']) > 100 else ctx['text']
-                value_info = f"评分{ctx['value_score']}"
-                if ctx['has_key_info']:
-                    value_info += ",关键信息"
-                if ctx['is_heading']:
-                    value_info += ",标题"
-                context_parts.append(f"  {i}. 段落{ctx['para_idx']}(距离{ctx['distance']},{value_info}): {ctx_text}")
-        
-        # 添加额外的角色关键词（如果空间允许）
-        role_keywords = ["授权代理人", "授权委托人", "法定代表人", "单位负责人", "自然人", "身份证", "营业执照", "执照"]
-        role_context = []
-        
-        for para_idx, para in enumerate(doc.paragraphs):
-            para_text = para.text.strip()
-            if para_text:
-                for keyword in role_keywords:
-                    if keyword in para_text:
-                        role_context.append(f"{keyword}: {para_text[:60]}")  # 缩短长度
-                        break
-                        
-        # 只添加最相关的角色上下文（最多2个）
-        if role_context:
-            context_parts.append("角色信息:")
-            for role_ctx in role_context[:2]:
-                context_parts.append(f"  - {role_ctx}")
-            
-        context_text = "\n".join(context_parts)
+        context_text, nearest_contexts = naming_contexts[img_info['embed_id']]
         
         # 优先AI命名，AI不可用或AI命名不合理时fallback为标题名
         ai_available = ai_client is not None
@@ -1039,12 +1129,15 @@ def extract_and_separate(input_file):
                     print(f"   组ID: {img_info['group_id']}")
                     print(f"   上下文长度: {len(context_text)} 字符")
                     print(f"   上下文预览: {context_text[:200]}...")
-                ai_name = generate_image_name(
-                    ai_client, 
-                    context_text.strip(),
-                    img_index_in_group,
-                    total_in_group
-                )
+                # 批量阶段已生成的名称直接使用；组内首张命名不合理时，后续图片逐张补充命名
+                ai_name = prefetched_names.pop(img_info['embed_id'], None)
+                if ai_name is None:
+                    ai_name = generate_image_name(
+                        ai_client, 
+                        context_text.strip(),
+                        img_index_in_group,
+                        total_in_group
+                    )
                 if os.getenv('AI_NAME_LOG'):
                     print(f"🎯 AI返回结果: '{ai_name}'")
                 # 从AI命名中提取基础名称
@@ -1090,38 +1183,21 @@ def extract_and_separate(input_file):
                         base_name = clean_text
                         naming_method = "上下文命名"
 
+        # 如果最近上下文也没有，检查章节标题命名
+        if not base_name:
+            headings = collect_headings(doc)
+            section_info, section_start, section_end = find_section_for_image(headings, img_info['para_idx'], len(doc.paragraphs))
+            if section_info and check_section_content(doc, section_start, section_end, img_info['para_idx']):
+                section_title = section_info['text']
+                base_name = re.sub(r'[^\w\u4e00-\u9fff]', '', section_title)
+                if len(base_name) > 12:
+                    base_name = base_name[:12]
+                naming_method = "章节标题命名"
 
-# --- 保证顶格定义 ---
-def _is_ai_result_valid(ai_name, context_text):
-    """
-    校验AI返回的命名是否合理
-    """
-    if not ai_name or len(ai_name.strip()) == 0:
-        return False
-    ai_name = ai_name.strip()
-    # 如果AI命名为营业执照，但上下文没有营业执照，则判为不合理
-    if '营业执照' in ai_name and '营业执照' not in context_text:
-        return False
-    # 其它简单规则：命名长度合理且不是纯数字
-    if 2 <= len(ai_name) <= 12 and not ai_name.isdigit():
-        return True
-    return False
-
-    # 如果最近上下文也没有，检查章节标题命名
-if not base_name:
-    headings = collect_headings(doc)
-    section_info, section_start, section_end = find_section_for_image(headings, img_info['para_idx'], len(doc.paragraphs))
-    if section_info and check_section_content(doc, section_start, section_end, img_info['para_idx']):
-        section_title = section_info['text']
-        base_name = re.sub(r'[^\w\u4e00-\u9fff]', '', section_title)
-        if len(base_name) > 12:
-            base_name = base_name[:12]
-        naming_method = "章节标题命名"
-
-# 最后的兜底方案
-if not base_name:
-    base_name = "图片"
-    naming_method = "默认命名"
+        # 最后的兜底方案
+        if not base_name:
+            base_name = "图片"
+            naming_method = "默认命名"
         
         # 调试日志
         if os.getenv('AI_NAME_LOG'):
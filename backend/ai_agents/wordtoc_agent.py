@@ -68,6 +68,25 @@ def read_word_toc_docx(input_path):
 
     return toc_items
 
+def read_word_toc_doc_native(input_path, record_positions=False):
+    """
+    直接解析.doc二进制结构（样式表中的内置标题样式），生成目录结构
+    无需Word/COM组件，可在Linux上运行
+    :param input_path: Word文档路径（.doc格式）
+    :param record_positions: 是否记录标题位置信息（段落索引从1开始，起始位置为字符位置，与COM一致）
+    :return: 目录列表，包含{标题文本, 层级, [段落索引, 起始位置]}
+    """
+    from doc_binary_extractor import read_doc_headings
+
+    toc_items = []
+    for heading in read_doc_headings(input_path):
+        item_data = {"标题文本": heading["text"], "层级": heading["level"]}
+        if record_positions:
+            item_data["段落索引"] = heading["index"]
+            item_data["起始位置"] = heading["cp"]
+        toc_items.append(item_data)
+    return toc_items
+
 def read_word_toc_doc(input_path, record_positions=False):
     """
     通过COM组件解析.doc文档标题样式，生成目录结构
@@ -249,8 +268,12 @@ def read_word_toc(input_path, record_positions=False):
             print("检测到.docx格式，使用python-docx解析...")
             return read_word_toc_docx(input_path)
     elif file_ext == '.doc':
-        print("检测到.doc格式，使用COM组件解析...")
-        return read_word_toc_doc(input_path, record_positions)
+        print("检测到.doc格式，直接解析二进制结构...")
+        try:
+            return read_word_toc_doc_native(input_path, record_positions)
+        except Exception as e:
+            print(f"⚠️ .doc原生解析失败，回退到COM组件解析: {e}")
+            return read_word_toc_doc(input_path, record_positions)
     else:
         raise ValueError(f"不支持的文件格式: {file_ext}，仅支持.doc和.docx格式")
 
@@ -8,10 +8,26 @@
 
 API端点：
     POST /api/upload - 文件上传接口
+    POST /api/upload/chunked/init - 创建分片上传会话
+    PUT /api/upload/chunked/<id>/chunks - 上传单个分片
+    GET /api/upload/chunked/<id> - 查询分片上传进度
+    POST /api/upload/chunked/<id>/complete - 完成分片上传
+    GET /api/files - 分页列出文件（元数据）
+    GET /api/files/<id>/status - 查询文件文本提取状态
+    GET /api/files/<id>/outline - 获取文档标题大纲
+    GET /api/files/<id>/history - 分页查询文件分析历史
+    GET /api/search - 全文检索文档内容与分析发现项
+    GET /api/stats - 分析发现项聚合统计
+    GET /api/stats/findings - 分析发现项明细（统计下钻）
     POST /api/analyze/tender - 招标文件分析接口
+    POST /api/analyze/tender/stream - 招标文件流式分析接口（SSE）
     POST /api/analyze/bid - 投标文件分析接口
+    POST /api/analyze/bid/stream - 投标文件流式分析接口（SSE）
+    GET /api/analyses - 分页列出分析记录（元数据）
     GET /api/analysis/<id> - 获取分析结果接口
     GET /api/health - 健康检查接口
+    GET /api/llm/stats - 大模型客户端复用、并发执行与Token用量统计
+    GET /api/maintenance/retention - 查询后台数据清理状态
 
 技术栈：
     - Flask: Web框架
@@ -24,15 +40,25 @@ API端点：
 版本：1.0
 """
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, send_file, g, Response, stream_with_context
 from flask_cors import CORS
 import os
 import uuid
+import json
+import multiprocessing
 from datetime import datetime
 from dotenv import load_dotenv
 from qwen_service import QwenAnalysisService
 from file_handler import FileHandler
+from extraction_cache import ExtractionCache
+import llm_cache
+import llm_clients
+import llm_executor
+import token_budget
 from database import DatabaseManager
+from chunked_upload import ChunkedUploadManager
+from extraction_worker import ExtractionWorker
+from retention_worker import RetentionWorker
 from ai_agents.agent_manager import agent_manager
 from ai_agents.document_processor import document_processor
 
@@ -57,14 +83,60 @@ uploads_path = os.path.join(project_root, 'uploads')
 
 app.config['UPLOAD_FOLDER'] = uploads_path              # 文件上传目录（项目根目录下）
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB 最大文件大小限制
+# 分析接口等待后台文本提取完成的最长时间（秒），超时返回409
+app.config['EXTRACTION_WAIT_TIMEOUT'] = float(os.getenv('EXTRACTION_WAIT_TIMEOUT', '30'))
 
 # 确保上传目录存在，如果不存在则创建
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # === 初始化服务实例 ===
 qwen_service = QwenAnalysisService()  # AI分析服务
-file_handler = FileHandler()          # 文件处理服务
+extraction_cache = ExtractionCache.from_env(project_root)  # 文本提取结果缓存
+file_handler = FileHandler(extraction_cache)  # 文件处理服务
 db_manager = DatabaseManager()        # 数据库管理服务
+chunked_upload_manager = ChunkedUploadManager(  # 分片上传服务
+    file_handler, db_manager, app.config['UPLOAD_FOLDER']
+)
+extraction_worker = ExtractionWorker(file_handler, db_manager)  # 后台文本提取服务
+retention_worker = RetentionWorker(  # 后台数据保留与清理服务
+    db_manager, app.config['UPLOAD_FOLDER'], document_processor.temp_base_dir,
+    staging_dirname=FileHandler.STAGING_DIRNAME
+)
+
+# 重新排队服务重启前未完成的文本提取任务
+# （PDF提取进程池的子进程在spawn模式下会重新导入本模块，只在主进程中执行）
+if multiprocessing.parent_process() is None:
+    extraction_worker.recover_unfinished()
+    retention_worker.start()
+
+# === 模型响应缓存策略 ===
+# 不使用模型响应缓存的接口（Flask端点名，逗号分隔），例如 LLM_CACHE_BYPASS_ENDPOINTS=analyze_bid
+LLM_CACHE_BYPASS_ENDPOINTS = {
+    name.strip() for name in os.getenv('LLM_CACHE_BYPASS_ENDPOINTS', '').split(',') if name.strip()
+}
+
+@app.before_request
+def apply_llm_cache_policy():
+    """
+    按接口决定本次请求是否使用模型响应缓存
+
+    - 端点在LLM_CACHE_BYPASS_ENDPOINTS中：不读也不写缓存
+    - 请求带 ?no_cache=1 或 Cache-Control: no-cache：重新调用模型并刷新缓存
+    """
+    if request.endpoint in LLM_CACHE_BYPASS_ENDPOINTS:
+        g.llm_cache_scope = llm_cache.bypass()
+    elif request.args.get('no_cache') in ('1', 'true') or 'no-cache' in request.headers.get('Cache-Control', ''):
+        g.llm_cache_scope = llm_cache.bypass(refresh=True)
+    else:
+        return
+    g.llm_cache_scope.__enter__()
+
+@app.teardown_request
+def release_llm_cache_policy(exc):
+    """恢复当前线程的缓存模式（与apply_llm_cache_policy()在同一线程中执行）"""
+    scope = g.pop('llm_cache_scope', None)
+    if scope is not None:
+        scope.__exit__(None, None, None)
 
 # === 工具函数 ===
 def handle_api_error(e, default_message="操作失败"):
@@ -84,6 +156,140 @@ def get_file_record_or_error(file_id):
         return None, (jsonify({'error': '文件不存在'}), 404)
     return file_record, None
 
+def parse_findings_filters():
+    """从查询参数中读取发现项筛选条件（统计与下钻接口共用）"""
+    filters = {key: request.args.get(key) for key in ('type', 'category', 'severity', 'file_id', 'since', 'until')}
+    return {key: value for key, value in filters.items() if value}
+
+def parse_keyset_cursor():
+    """
+    读取键集分页游标（列表接口共用）
+
+    Returns:
+        tuple: (游标或None, 错误响应或None)
+    """
+    before_time = request.args.get('before_time')
+    before_id = request.args.get('before_id')
+    if bool(before_time) != bool(before_id):
+        return None, (jsonify({'error': 'before_time与before_id需要同时提供'}), 400)
+    return ((before_time, before_id) if before_time else None), None
+
+def wait_for_extraction(file_record):
+    """
+    确保文件的文本提取已完成
+    
+    提取尚未完成时最多等待 EXTRACTION_WAIT_TIMEOUT 秒；
+    仍未完成返回409，提取失败返回422。
+    
+    Returns:
+        tuple: (最新文件记录（文本内容在访问时加载）, 错误响应)
+    """
+    status = file_record.get('extraction_status') or 'done'
+    if status == 'done':
+        return file_record, None
+    
+    if status != 'failed':
+        status = extraction_worker.wait(file_record['id'], app.config['EXTRACTION_WAIT_TIMEOUT'])
+        if status == 'done':
+            return db_manager.get_file_record(file_record['id']), None
+    
+    if status == 'failed':
+        record = db_manager.get_extraction_status(file_record['id']) or {}
+        return None, (jsonify({
+            'error': f"文件内容提取失败: {record.get('extraction_error') or '未知错误'}",
+            'extraction_status': 'failed'
+        }), 422)
+    
+    return None, (jsonify({
+        'error': '文件内容仍在提取中，请稍后重试',
+        'extraction_status': status
+    }), 409)
+
+def extract_project_info_from_front(file_record, document_type):
+    """
+    从文档前几页提取项目信息（项目信息提取接口共用）
+    
+    ProjectInfoAgent的提取只使用前几页文本：能按文档块查到前几页时不加载全文，
+    只有没有文档块的旧记录才读取（并解压）整篇文本，由Agent按字符数截取。
+    """
+    front_content = db_manager.get_front_text(file_record['id'])
+    return agent_manager.extract_project_info(
+        front_content or file_record['content'] or '',
+        document_type,
+        front_content=front_content
+    )
+
+def sse_event(event, data):
+    """格式化一条Server-Sent Events事件"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def stream_analysis_response(events, save):
+    """
+    把分析事件以SSE形式返回（流式分析接口共用）
+    
+    转发分析服务产出的事件；收到result事件时调用save(result)保存结果，
+    再发送done事件（含analysis_id）。分析出错时发送error事件，不保存结果。
+    生成器在请求上下文中执行，当前请求的模型响应缓存策略保持有效。
+    """
+    def generate():
+        try:
+            for item in events:
+                yield sse_event(item['event'], item['data'])
+                if item['event'] == 'result':
+                    analysis_id = save(item['data']['result'])
+                    yield sse_event('done', {'analysis_id': analysis_id})
+        except Exception as e:
+            print(f"流式分析失败: {e}")
+            yield sse_event('error', {'error': str(e) or '分析失败'})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def register_uploaded_file(file_id, filename, file_path, content_hash):
+    """
+    登记已落盘的上传文件
+    
+    普通上传与分片上传共用的入库流程：按内容摘要查重，
+    不重复时保存文件记录并将文本提取任务交给后台线程池。
+    
+    Returns:
+        dict: 上传接口的响应数据
+    """
+    # 获取文件大小
+    file_size = os.path.getsize(file_path)
+    
+    # 检查是否存在重复文件（基于内容摘要判断）
+    duplicate_file = db_manager.find_duplicate_file(content_hash)
+    if duplicate_file:
+        # 之前提取失败的文件重新排队提取
+        if duplicate_file['extraction_status'] == 'failed':
+            extraction_worker.submit(duplicate_file['id'], duplicate_file['file_path'])
+            duplicate_file['extraction_status'] = 'pending'
+        
+        # 内容寻址存储下重复文件与已有记录共用同一份磁盘文件，无需删除，也无需重新提取内容
+        return {
+            'file_id': duplicate_file['id'],
+            'filename': duplicate_file['filename'],
+            'message': '检测到相同内容的文件已存在，直接使用现有文件',
+            'is_duplicate': True,
+            'original_upload_time': duplicate_file['upload_time'],
+            'file_size': file_size,
+            'extraction_status': duplicate_file['extraction_status']
+        }
+    
+    # 先保存文件记录，文本内容由后台提取后写回
+    if not db_manager.save_file_record(file_id, filename, file_path, None, content_hash,
+                                       extraction_status='pending'):
+        raise RuntimeError('保存文件记录失败')
+    extraction_worker.submit(file_id, file_path)
+    
+    return {
+        'file_id': file_id,
+        'filename': filename,
+        'message': '文件上传成功',
+        'extraction_status': 'pending'
+    }
+
 # === 静态文件路由 ===
 @app.route('/')
 def index():
@@ -120,8 +326,9 @@ def upload_file():
     文件上传接口
     =============
     
-    接收客户端上传的文件，进行安全检查后保存到服务器，
-    并提取文件内容存储到数据库中。
+    接收客户端上传的文件，进行安全检查后保存到服务器。
+    文件落盘后立即返回文件ID，文本内容由后台线程池提取后写入数据库，
+    提取进度可通过 GET /api/files/<file_id>/status 查询。
     
     请求方式：POST
     请求头：Content-Type: multipart/form-data
@@ -132,7 +339,8 @@ def upload_file():
         成功: {
             "file_id": "唯一文件ID",
             "filename": "原始文件名",
-            "message": "文件上传成功"
+            "message": "文件上传成功",
+            "extraction_status": "pending"
         }
         失败: {
             "error": "错误信息"
@@ -142,7 +350,7 @@ def upload_file():
         - PDF (.pdf)
         - Word文档 (.docx)
     
-    文件大小限制：最大50MB
+    文件大小限制：最大50MB（更大的文件请使用分片上传接口）
     
     Returns:
         JSON响应，包含文件ID或错误信息
@@ -171,48 +379,480 @@ def upload_file():
         # 生成唯一的文件ID，用于内部管理和避免文件名冲突
         file_id = str(uuid.uuid4())
         
-        # 保存文件到临时位置以获取文件信息
-        temp_file_path = file_handler.save_file(file, file_id, app.config['UPLOAD_FOLDER'])
+        # 流式保存文件，同时计算内容摘要（内容相同的文件在磁盘上只保存一份）
+        file_path, content_hash = file_handler.save_file(file, file_id, app.config['UPLOAD_FOLDER'])
         
-        # 获取文件大小
-        file_size = os.path.getsize(temp_file_path)
+        # 查重、提取内容并入库
+        return jsonify(register_uploaded_file(file_id, filename, file_path, content_hash))
         
-        # 检查是否存在重复文件（仅基于文件大小判断）
-        duplicate_file = db_manager.find_duplicate_file(file_size)
-        if duplicate_file:
-            # 删除刚上传的临时文件，因为已存在相同大小的文件
-            os.remove(temp_file_path)
-            
-            # 返回已存在文件的信息
-            return jsonify({
-                'file_id': duplicate_file['id'],
-                'filename': duplicate_file['filename'],
-                'message': f'检测到相同大小的文件已存在，直接使用现有文件（大小: {file_size} 字节）',
-                'is_duplicate': True,
-                'original_upload_time': duplicate_file['upload_time'],
-                'file_size': file_size
-            })
+    except Exception as e:
+        # 捕获并返回所有异常
+        return handle_api_error(e)
+
+@app.route('/api/upload/chunked/init', methods=['POST'])
+def init_chunked_upload():
+    """
+    创建分片上传会话接口
+    ====================
+    
+    大文件先创建会话，再分片上传，适用于超过单次请求大小限制或网络不稳定的场景。
+    如果客户端提供了整文件SHA-256且服务器已存在相同文件，直接返回已有文件（秒传）。
+    
+    请求方式：POST
+    请求头：Content-Type: application/json
+    请求参数：
+        {
+            "filename": "原始文件名",
+            "total_size": 文件总大小(字节),
+            "chunk_size": 分片大小(字节，可选，默认8MB),
+            "sha256": "整文件SHA-256（可选）"
+        }
+    
+    响应格式：
+        成功: {
+            "upload_id": "上传会话ID",
+            "chunk_size": 分片大小,
+            "total_chunks": 分片总数,
+            "received_offsets": [],
+            ...
+        }
+        秒传: 与 /api/upload 的重复文件响应一致
+        失败: {
+            "error": "错误信息"
+        }
+    """
+    try:
+        data = request.get_json() or {}
+        filename = data.get('filename') or ''
+        total_size = data.get('total_size')
+        expected_hash = data.get('sha256')
+        
+        if not filename or total_size is None:
+            return jsonify({'error': '缺少文件名或文件大小'}), 400
+        if not isinstance(filename, str) or (expected_hash and not isinstance(expected_hash, str)):
+            return jsonify({'error': '文件名和文件校验值必须是字符串'}), 400
+        
+        # 服务器已有相同内容的文件时直接复用，无需上传
+        if expected_hash:
+            duplicate_file = db_manager.find_duplicate_file(expected_hash.strip().lower())
+            if duplicate_file:
+                return jsonify({
+                    'file_id': duplicate_file['id'],
+                    'filename': duplicate_file['filename'],
+                    'message': '检测到相同内容的文件已存在，直接使用现有文件',
+                    'is_duplicate': True,
+                    'original_upload_time': duplicate_file['upload_time'],
+                    'file_size': duplicate_file['file_size']
+                })
+        
+        session = chunked_upload_manager.init_upload(
+            filename, total_size, data.get('chunk_size'), expected_hash
+        )
+        return jsonify(session)
         
-        # 文件不重复，继续处理
-        file_path = temp_file_path
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return handle_api_error(e)
+
+@app.route('/api/upload/chunked/<upload_id>/chunks', methods=['PUT'])
+def upload_chunk(upload_id):
+    """
+    上传分片接口
+    ============
+    
+    请求体为分片的原始字节，各分片可并行上传、失败后单独重传。
+    
+    请求方式：PUT
+    URL参数：
+        upload_id: 上传会话ID
+        offset: 分片起始偏移（查询参数，必须是分片大小的整数倍）
+    请求头：
+        Content-Type: application/octet-stream
+        X-Chunk-SHA256: 分片的SHA-256
+    
+    响应格式：
+        成功: 会话进度（同 GET /api/upload/chunked/<upload_id>）
+        失败: {
+            "error": "错误信息"
+        }
+    """
+    try:
+        offset = request.args.get('offset', type=int)
+        if offset is None:
+            return jsonify({'error': '缺少分片偏移'}), 400
+        
+        status = chunked_upload_manager.write_chunk(
+            upload_id,
+            offset,
+            request.stream,
+            request.content_length,
+            request.headers.get('X-Chunk-SHA256')
+        )
+        return jsonify(status)
         
-        # 提取文件内容（文本内容）
-        content = file_handler.extract_content(file_path)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return handle_api_error(e)
+
+@app.route('/api/upload/chunked/<upload_id>', methods=['GET'])
+def get_chunked_upload_status(upload_id):
+    """
+    查询分片上传进度接口
+    ====================
+    
+    连接中断后客户端据此获知已接收的分片，只重传缺失部分。
+    
+    请求方式：GET
+    URL参数：
+        upload_id: 上传会话ID
+    """
+    status = chunked_upload_manager.get_status(upload_id)
+    if not status:
+        return jsonify({'error': '上传会话不存在'}), 404
+    return jsonify(status)
+
+@app.route('/api/upload/chunked/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    """
+    完成分片上传接口
+    ================
+    
+    校验全部分片后归档文件，并走与 /api/upload 相同的查重、提取和入库流程。
+    重复提交已完成的会话会直接返回对应的文件ID；入库失败后可直接重试。
+    
+    请求方式：POST
+    URL参数：
+        upload_id: 上传会话ID
+    
+    响应格式：与 /api/upload 一致
+    """
+    try:
+        result = chunked_upload_manager.complete(upload_id, register_uploaded_file)
+        return jsonify(result)
         
-        # 将文件记录保存到数据库
-        db_manager.save_file_record(file_id, filename, file_path, content)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return handle_api_error(e)
+
+@app.route('/api/files', methods=['GET'])
+def list_files():
+    """
+    文件列表接口
+    ============
+
+    按上传时间倒序分页列出文件元数据（不含文本内容），使用键集分页。
+
+    请求方式：GET
+    查询参数（均可选）：
+        type: 文件类型（扩展名，如pdf、docx）
+        status: 文本提取状态（pending/running/done/failed）
+        min_size, max_size: 文件大小范围（字节，含边界）
+        since, until: 上传时间范围（YYYY-MM-DD，since含、until不含）
+        limit: 每页条数，默认50，最大200
+        before_time, before_id: 上一页响应中的next_cursor
+
+    响应格式：
+        {
+            "files": [{"id": "...", "filename": "...", "upload_time": "...", "file_size": 1024, ...}],
+            "next_cursor": {"before_time": "...", "before_id": "..."}  // 没有更多记录时为null
+        }
+    """
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        before, error_response = parse_keyset_cursor()
+        if error_response:
+            return error_response
+
+        filters = {
+            'file_type': request.args.get('type', '').lower().lstrip('.') or None,
+            'extraction_status': request.args.get('status') or None,
+            'min_size': request.args.get('min_size', type=int),
+            'max_size': request.args.get('max_size', type=int),
+            'since': request.args.get('since') or None,
+            'until': request.args.get('until') or None,
+        }
+        files = db_manager.list_files(filters, limit=limit, before=before)
+        next_cursor = None
+        if len(files) == limit:
+            next_cursor = {'before_time': files[-1]['upload_time'], 'before_id': files[-1]['id']}
+
+        return jsonify({'files': files, 'next_cursor': next_cursor})
+
+    except Exception as e:
+        return handle_api_error(e)
+
+
+@app.route('/api/files/<file_id>/status', methods=['GET'])
+def get_file_extraction_status(file_id):
+    """
+    文件文本提取状态接口
+    ====================
+    
+    上传接口立即返回后，客户端通过此接口轮询文本提取进度。
+    
+    请求方式：GET
+    URL参数：
+        file_id: 文件ID
+    
+    响应格式：
+        {
+            "file_id": "文件ID",
+            "filename": "原始文件名",
+            "extraction_status": "pending/running/done/failed",
+            "extraction_error": "失败原因（仅failed时）",
+            "encoding": "检测到的文本编码（仅文本文件）"
+        }
+    """
+    try:
+        record = db_manager.get_extraction_status(file_id)
+        if not record:
+            return jsonify({'error': '文件不存在'}), 404
         
-        # 返回成功响应
+        return jsonify({
+            'file_id': record['id'],
+            'filename': record['filename'],
+            'extraction_status': record['extraction_status'],
+            'extraction_error': record['extraction_error'],
+            'encoding': record['encoding']
+        })
+
+    except Exception as e:
+        return handle_api_error(e)
+
+@app.route('/api/files/<file_id>/outline', methods=['GET'])
+def get_file_outline(file_id):
+    """
+    文档标题大纲接口
+    ================
+
+    返回文档中识别出的标题块，配合/api/preview/<file_id>?section=<seq>按章节预览。
+
+    请求方式：GET
+    URL参数：
+        file_id: 文件ID
+
+    响应格式：
+        {
+            "file_id": "文件ID",
+            "outline": [
+                {"seq": 标题块序号, "level": 标题层级, "page": 页码, "char_offset": 字符偏移, "text": "标题"}
+            ]
+        }
+    """
+    try:
+        if not db_manager.file_exists(file_id):
+            return jsonify({'error': '文件不存在'}), 404
+
         return jsonify({
             'file_id': file_id,
-            'filename': filename,
-            'message': '文件上传成功'
+            'outline': db_manager.get_file_outline(file_id)
         })
-        
+
     except Exception as e:
-        # 捕获并返回所有异常
         return handle_api_error(e)
 
+@app.route('/api/files/<file_id>/history', methods=['GET'])
+def get_file_history(file_id):
+    """
+    文件分析历史接口
+    ================
+
+    按创建时间倒序返回文件的招标/投标分析记录，使用键集分页。
+
+    请求方式：GET
+    URL参数：
+        file_id: 文件ID
+    查询参数（可选）：
+        limit: 每页条数，默认20，最大100
+        before_time, before_id: 上一页响应中的next_cursor，取更早的记录
+
+    响应格式：
+        {
+            "file_id": "文件ID",
+            "history": [{"id": "分析ID", "created_time": "创建时间", "type": "tender/bid"}],
+            "next_cursor": {"before_time": "...", "before_id": "..."}  // 没有更多记录时为null
+        }
+    """
+    try:
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        before, error_response = parse_keyset_cursor()
+        if error_response:
+            return error_response
+
+        if not db_manager.file_exists(file_id):
+            return jsonify({'error': '文件不存在'}), 404
+
+        history = db_manager.get_file_analysis_history(file_id, limit=limit, before=before)
+        next_cursor = None
+        if len(history) == limit:
+            next_cursor = {'before_time': history[-1]['created_time'], 'before_id': history[-1]['id']}
+
+        return jsonify({
+            'file_id': file_id,
+            'history': history,
+            'next_cursor': next_cursor
+        })
+
+    except Exception as e:
+        return handle_api_error(e)
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    """
+    全文检索接口
+    ============
+
+    在文档内容或分析发现项中检索，结果按相关度排序并带高亮片段（HTML：正文已转义，检索词以<mark>标记）。
+    例如检索某个项目编号，找出引用了它的所有投标文件。
+
+    请求方式：GET
+    查询参数：
+        q: 检索词，空格分隔的多个词须同时出现
+        scope: documents（文档内容，默认）或 findings（废标条款/合规问题）
+        type: 可选，tender或bid，只检索招标或投标文件/分析
+        file_id: 可选，只检索指定文件（仅scope=documents）
+        limit: 每页条数，默认20，最大100
+        page: 页码，从1开始
+
+    响应格式：
+        {
+            "query": "检索词",
+            "scope": "documents",
+            "page": 1,
+            "results": [{"file_id": "...", "filename": "...", "page": 3, "snippet": "...<mark>...</mark>..."}],
+            "has_more": false
+        }
+    """
+    try:
+        query = (request.args.get('q') or '').strip()
+        if not query:
+            return jsonify({'error': '缺少检索词'}), 400
+        scope = request.args.get('scope', 'documents')
+        if scope not in ('documents', 'findings'):
+            return jsonify({'error': 'scope只能是documents或findings'}), 400
+        analysis_type = request.args.get('type')
+        if analysis_type not in (None, 'tender', 'bid'):
+            return jsonify({'error': 'type只能是tender或bid'}), 400
+
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        page = max(request.args.get('page', 1, type=int), 1)
+        offset = (page - 1) * limit
+
+        if scope == 'documents':
+            found = db_manager.search_documents(query, role=analysis_type,
+                                                file_id=request.args.get('file_id'),
+                                                limit=limit, offset=offset)
+        else:
+            found = db_manager.search_findings(query, analysis_type=analysis_type,
+                                               limit=limit, offset=offset)
+
+        return jsonify({
+            'query': query,
+            'scope': scope,
+            'page': page,
+            'results': found['results'],
+            'has_more': found['has_more']
+        })
+
+    except Exception as e:
+        return handle_api_error(e)
+
+
+@app.route('/api/stats', methods=['GET'])
+def get_stats():
+    """
+    分析发现项统计接口
+    ==================
+
+    在SQL中聚合废标条款、合规问题与项目信息错误，不需要解析分析结果JSON。
+    例如 ?group_by=quarter,category&since=2025-01-01 统计每个季度各类别的发现项数量。
+
+    请求方式：GET
+    查询参数（均可选）：
+        group_by: 逗号分隔的分组维度：category、severity、type、file_id、day、month、quarter
+                  不提供时只返回总量
+        type: tender、bid或project_info
+        category, severity, file_id: 精确筛选
+        since, until: 创建时间范围（YYYY-MM-DD，since含、until不含）
+        limit: 最多返回的分组数，默认100，最大1000
+
+    响应格式：
+        {
+            "overview": {"files": 文件数, "tender_analyses": ..., "bid_analyses": ..., "findings": ...},
+            "group_by": ["quarter", "category"],
+            "filters": {"since": "2025-01-01"},
+            "groups": [{"quarter": "2025-Q1", "category": "资质要求", "count": 12, "analyses": 8, "files": 6}]
+        }
+    """
+    try:
+        group_by = [d.strip() for d in request.args.get('group_by', '').split(',') if d.strip()]
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        filters = parse_findings_filters()
+
+        try:
+            groups = db_manager.get_findings_stats(group_by, filters, limit=limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'overview': db_manager.get_overview_stats(),
+            'group_by': group_by,
+            'filters': filters,
+            'groups': groups
+        })
+
+    except Exception as e:
+        return handle_api_error(e)
+
+
+@app.route('/api/stats/findings', methods=['GET'])
+def get_stats_findings():
+    """
+    分析发现项明细接口（统计下钻）
+    ==============================
+
+    按创建时间倒序返回符合筛选条件的发现项，使用键集分页。
+
+    请求方式：GET
+    查询参数（均可选）：
+        type, category, severity, file_id, since, until: 筛选条件（同/api/stats）
+        limit: 每页条数，默认50，最大200
+        before_time, before_id: 上一页响应中的next_cursor
+
+    响应格式：
+        {
+            "findings": [{"id": 1, "analysis_id": "...", "analysis_type": "bid", "file_id": "...",
+                          "category": "...", "severity": "...", "description": "...", "detail": "...",
+                          "created_time": "..."}],
+            "next_cursor": {"before_time": "...", "before_id": 1}  // 没有更多记录时为null
+        }
+    """
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        before_time = request.args.get('before_time')
+        before_id = request.args.get('before_id', type=int)
+        if bool(before_time) != (before_id is not None):
+            return jsonify({'error': 'before_time与before_id需要同时提供'}), 400
+
+        before = (before_time, before_id) if before_time else None
+        findings = db_manager.get_findings(parse_findings_filters(), limit=limit, before=before)
+        next_cursor = None
+        if len(findings) == limit:
+            next_cursor = {'before_time': findings[-1]['created_time'], 'before_id': findings[-1]['id']}
+
+        return jsonify({'findings': findings, 'next_cursor': next_cursor})
+
+    except Exception as e:
+        return handle_api_error(e)
+
+
 @app.route('/api/analyze/tender', methods=['POST'])
 def analyze_tender():
     """
@@ -221,12 +861,15 @@ def analyze_tender():
     
     对上传的招标文件进行AI智能分析，提取废标条款和关键要求。
     该接口会调用Qwen大模型来识别可能导致投标无效的条款。
+    超过分段长度的长文档在标题/分页边界处分段并发分析，合并去重后返回，
+    此时result中另含chunking字段（每段的字符范围、耗时与条款数）。
     
     请求方式：POST
     请求头：Content-Type: application/json
     请求参数：
         {
-            "file_id": "已上传文件的ID"
+            "file_id": "已上传文件的ID",
+            "chunk_chars": 每段最大字符数（可选，默认读取环境变量TENDER_CHUNK_CHARS）
         }
     
     响应格式：
@@ -285,14 +928,24 @@ def analyze_tender():
             return error_response
         if not file_record:
             return jsonify({'error': '文件不存在'}), 404
+        # 等待后台文本提取完成
+        file_record, error_response = wait_for_extraction(file_record)
+        if error_response:
+            return error_response
+        
+        chunk_chars = data.get('chunk_chars')
+        if chunk_chars is not None and (not isinstance(chunk_chars, int) or chunk_chars <= qwen_service.chunk_overlap):
+            return jsonify({'error': f'chunk_chars必须是大于{qwen_service.chunk_overlap}的整数'}), 400
         
         # 使用AI分析招标文件内容（可选模型路由，默认Qwen）
-        if provider:
-            analysis_result = qwen_service.analyze_tender_document_with_model(
-                file_record['content'], provider=provider
-            )
-        else:
-            analysis_result = qwen_service.analyze_tender_document(file_record['content'])
+        # 长文档按标题/分页边界分段并发分析；不超过分段长度时与整篇分析一致
+        content = file_record['content'] or ''
+        boundaries = []
+        if len(content) > (chunk_chars or qwen_service.chunk_chars):
+            boundaries = db_manager.get_chunk_boundaries(file_id)
+        analysis_result = qwen_service.analyze_tender_document_chunked(
+            content, provider=provider or 'qwen', boundaries=boundaries, chunk_chars=chunk_chars
+        )
         
         # 将分析结果保存到数据库
         analysis_id = db_manager.save_tender_analysis(file_id, analysis_result)
@@ -308,6 +961,60 @@ def analyze_tender():
         # 捕获并返回所有异常
         return handle_api_error(e)
 
+@app.route('/api/analyze/tender/stream', methods=['POST'])
+def analyze_tender_stream():
+    """
+    招标文件流式分析接口（Server-Sent Events）
+    ==========================================
+    
+    请求参数与 /api/analyze/tender 相同，另可传 "tokens": true 同时接收模型输出的原始文本。
+    模型以流式输出，废标条款一解析出就推送，不必等待整篇分析完成；
+    分析结束后与非流式接口一样保存结果。
+    
+    事件（data均为JSON）：
+        start:  {"mode": "stream" 或 "chunked", "chunks": 段数}
+        token:  {"text": "模型输出片段"}（仅tokens为true时）
+        item:   {"item": 废标条款}
+        chunk:  分段模式下一段完成时的统计
+        result: {"result": 最终分析结果，结构同 /api/analyze/tender}
+        done:   {"analysis_id": "分析结果ID"}
+        error:  {"error": "错误信息"}
+    
+    Raises:
+        400/404/409/422: 与 /api/analyze/tender 相同（在开始推送前返回）
+    """
+    try:
+        data = request.get_json()
+        file_id = data.get('file_id')
+        provider = os.getenv('LLM_PROVIDER', 'qwen')
+        
+        error_response = validate_file_id(file_id)
+        if error_response:
+            return error_response
+        file_record, error_response = get_file_record_or_error(file_id)
+        if error_response:
+            return error_response
+        file_record, error_response = wait_for_extraction(file_record)
+        if error_response:
+            return error_response
+        
+        chunk_chars = data.get('chunk_chars')
+        if chunk_chars is not None and (not isinstance(chunk_chars, int) or chunk_chars <= qwen_service.chunk_overlap):
+            return jsonify({'error': f'chunk_chars必须是大于{qwen_service.chunk_overlap}的整数'}), 400
+        
+        content = file_record['content'] or ''
+        boundaries = []
+        if len(content) > (chunk_chars or qwen_service.chunk_chars):
+            boundaries = db_manager.get_chunk_boundaries(file_id)
+        events = qwen_service.stream_tender_analysis(
+            content, provider=provider or 'qwen', boundaries=boundaries, chunk_chars=chunk_chars,
+            include_tokens=bool(data.get('tokens'))
+        )
+        return stream_analysis_response(events, lambda result: db_manager.save_tender_analysis(file_id, result))
+        
+    except Exception as e:
+        return handle_api_error(e)
+
 @app.route('/api/analyze/bid', methods=['POST'])
 def analyze_bid():
     """
@@ -387,6 +1094,10 @@ def analyze_bid():
             return error_response
         if not file_record:
             return jsonify({'error': '文件不存在'}), 404
+        # 等待后台文本提取完成
+        file_record, error_response = wait_for_extraction(file_record)
+        if error_response:
+            return error_response
         
         # 获取招标文件的分析结果（如果提供了分析ID）
         # 这将用于更精确的合规性检查
@@ -418,6 +1129,50 @@ def analyze_bid():
         # 捕获并返回所有异常
         return handle_api_error(e)
 
+@app.route('/api/analyze/bid/stream', methods=['POST'])
+def analyze_bid_stream():
+    """
+    投标文件流式分析接口（Server-Sent Events）
+    ==========================================
+    
+    请求参数与 /api/analyze/bid 相同，另可传 "tokens": true 同时接收模型输出的原始文本。
+    问题项一解析出就以item事件推送（data: {"item": 问题项}），
+    其余事件与 /api/analyze/tender/stream 相同；结束后与非流式接口一样保存结果。
+    
+    Raises:
+        400/404/409/422: 与 /api/analyze/bid 相同（在开始推送前返回）
+    """
+    try:
+        data = request.get_json()
+        file_id = data.get('file_id')
+        tender_analysis_id = data.get('tender_analysis_id')
+        provider = data.get('provider') or os.getenv('LLM_PROVIDER', 'qwen')
+        
+        error_response = validate_file_id(file_id)
+        if error_response:
+            return error_response
+        file_record, error_response = get_file_record_or_error(file_id)
+        if error_response:
+            return error_response
+        file_record, error_response = wait_for_extraction(file_record)
+        if error_response:
+            return error_response
+        
+        tender_analysis = None
+        if tender_analysis_id:
+            tender_analysis = db_manager.get_tender_analysis(tender_analysis_id)
+        
+        events = qwen_service.stream_bid_analysis(
+            file_record['content'], tender_analysis, provider=provider or 'qwen',
+            include_tokens=bool(data.get('tokens'))
+        )
+        return stream_analysis_response(
+            events, lambda result: db_manager.save_bid_analysis(file_id, result, tender_analysis_id)
+        )
+        
+    except Exception as e:
+        return handle_api_error(e)
+
 @app.route('/api/process-bid-document', methods=['POST'])
 def process_bid_document():
     """
@@ -529,6 +1284,55 @@ def get_bid_document_status(file_id):
     except Exception as e:
         return handle_api_error(e)
 
+@app.route('/api/analyses', methods=['GET'])
+def list_analyses():
+    """
+    分析记录列表接口
+    ================
+
+    按创建时间倒序分页列出招标/投标分析的元数据（不含分析结果），使用键集分页。
+
+    请求方式：GET
+    查询参数（均可选）：
+        type: tender或bid
+        file_id: 只列出指定文件的分析
+        since, until: 创建时间范围（YYYY-MM-DD，since含、until不含）
+        limit: 每页条数，默认50，最大200
+        before_time, before_id: 上一页响应中的next_cursor
+
+    响应格式：
+        {
+            "analyses": [{"id": "...", "type": "bid", "file_id": "...", "filename": "...",
+                          "tender_analysis_id": "...", "created_time": "..."}],
+            "next_cursor": {"before_time": "...", "before_id": "..."}  // 没有更多记录时为null
+        }
+    """
+    try:
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 200)
+        before, error_response = parse_keyset_cursor()
+        if error_response:
+            return error_response
+        analysis_type = request.args.get('type') or None
+        if analysis_type not in (None, 'tender', 'bid'):
+            return jsonify({'error': 'type只能是tender或bid'}), 400
+
+        filters = {
+            'type': analysis_type,
+            'file_id': request.args.get('file_id') or None,
+            'since': request.args.get('since') or None,
+            'until': request.args.get('until') or None,
+        }
+        analyses = db_manager.list_analyses(filters, limit=limit, before=before)
+        next_cursor = None
+        if len(analyses) == limit:
+            next_cursor = {'before_time': analyses[-1]['created_time'], 'before_id': analyses[-1]['id']}
+
+        return jsonify({'analyses': analyses, 'next_cursor': next_cursor})
+
+    except Exception as e:
+        return handle_api_error(e)
+
+
 @app.route('/api/analysis/<analysis_id>', methods=['GET'])
 def get_analysis_result(analysis_id):
     """
@@ -617,6 +1421,122 @@ def health_check():
     })
 
 
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """
+    缓存统计接口
+    ============
+    
+    返回文本提取结果缓存与模型响应缓存的命中情况与占用空间，用于评估缓存容量配置。
+    
+    请求方式：GET
+    无需参数
+    
+    响应格式：
+        {
+            "extraction": {
+                "enabled": true,
+                "hits": 命中次数,
+                "misses": 未命中次数,
+                "hit_rate": 命中率,
+                "writes": 写入次数,
+                "evictions": 淘汰次数,
+                "entries": 缓存条目数,
+                "size_bytes": 当前占用字节数,
+                "max_bytes": 容量上限
+            },
+            "llm": {
+                ...同上,
+                "bypassed": 绕过缓存的调用次数,
+                "refreshed": 强制刷新缓存的调用次数,
+                "expired": 过期未命中次数,
+                "saved_ms": 命中节省的模型调用耗时（毫秒）,
+                "ttl_seconds": 有效期
+            }
+        }
+    """
+    try:
+        return jsonify({
+            'extraction': extraction_cache.get_stats(),
+            'llm': llm_cache.get_default_cache().get_stats()
+        })
+    except Exception as e:
+        return handle_api_error(e)
+
+
+@app.route('/api/llm/stats', methods=['GET'])
+def get_llm_stats():
+    """
+    大模型调用统计接口
+    ==================
+    
+    返回共享客户端的复用情况、异步执行器的并发统计与Token预算统计（调用前的预估token数与接口返回的实际用量），
+    用于核对并发上限、估算系数与各模型的上下文上限配置。
+    
+    请求方式：GET
+    无需参数
+    
+    响应格式：
+        {
+            "clients": {"clients": 客户端数, "created": 新建次数, "reused": 复用次数, ...},
+            "executor": {
+                "running": 事件循环是否运行, "timeout": 单次调用超时秒数,
+                "providers": {"qwen": {"limit": 并发上限, "in_flight": 进行中, "started": 已开始,
+                                       "timeouts": 超时次数, "cancelled": 取消次数}},
+                "rate_limits": {"提供方/模型": {"limit": 当前自适应并发上限, "max_concurrency": 最大并发,
+                                               "rpm": RPM配额, "tpm": TPM配额, "waiting": 排队数,
+                                               "retries": 重试次数, "throttled": 429/5xx次数, ...}}
+            },
+            "tokens": {
+                "plans": {"send": 次数, "route": 次数, "chunk": 次数, "trim": 次数, "over_budget": 次数},
+                "models": {
+                    "模型名": {"calls": 调用次数, "estimated_tokens": 预估输入, "prompt_tokens": 实际输入,
+                               "completion_tokens": 输出, "ratio": 实际/预估}
+                },
+                "recent": [最近的调用记录]
+            }
+        }
+    """
+    try:
+        return jsonify({
+            'clients': llm_clients.get_stats(),
+            'executor': llm_executor.get_executor().get_stats(),
+            'tokens': token_budget.get_stats(),
+        })
+    except Exception as e:
+        return handle_api_error(e)
+
+
+@app.route('/api/maintenance/retention', methods=['GET'])
+def get_retention_stats():
+    """
+    后台数据清理状态接口
+    ====================
+
+    返回数据保留策略配置、累计清理量与最近一次清理报告。
+
+    请求方式：GET
+    无需参数
+
+    响应格式：
+        {
+            "enabled": true,
+            "running": true,
+            "retention_days": 保留天数,
+            "interval_minutes": 执行间隔,
+            "batch_size": 每批删除的记录数,
+            "totals": {"runs": 执行次数, "analyses_deleted": ..., "files_deleted": ...,
+                       "upload_files_removed": ..., "work_dirs_removed": ...,
+                       "disk_bytes_reclaimed": ..., "db_bytes_reclaimed": ...},
+            "last_report": 最近一次清理报告（尚未执行时为null）
+        }
+    """
+    try:
+        return jsonify(retention_worker.get_stats())
+    except Exception as e:
+        return handle_api_error(e)
+
+
 @app.route('/api/check-project-info', methods=['POST'])
 def check_project_info():
     """
@@ -693,6 +1613,10 @@ def check_project_info():
             return jsonify({'success': False, 'error': '投标文件不存在'}), 404
         if not bid_file:
             return jsonify({'success': False, 'error': '投标文件不存在'}), 404
+        # 等待后台文本提取完成
+        bid_file, error_response = wait_for_extraction(bid_file)
+        if error_response:
+            return error_response
         
         # 获取招标文件信息（如果提供了招标文件ID）
         tender_info = None
@@ -704,12 +1628,13 @@ def check_project_info():
                 return jsonify({'success': False, 'error': '招标文件不存在'}), 404
             if not tender_file:
                 return jsonify({'success': False, 'error': '招标文件不存在'}), 404
+            # 等待后台文本提取完成
+            tender_file, error_response = wait_for_extraction(tender_file)
+            if error_response:
+                return error_response
             
             # 从招标文件提取项目信息
-            tender_extract_result = agent_manager.extract_project_info(
-                tender_file['content'], 
-                'tender'
-            )
+            tender_extract_result = extract_project_info_from_front(tender_file, 'tender')
             
             if tender_extract_result.get('success'):
                 tender_info = {
@@ -733,7 +1658,8 @@ def check_project_info():
         context = {
             'document_type': 'bid',
             'tender_project_id': tender_info.get('project_id'),
-            'tender_project_name': tender_info.get('project_name')
+            'tender_project_name': tender_info.get('project_name'),
+            'outline': db_manager.get_file_outline(bid_file_id)
         }
         
         # 调用agent进行检测
@@ -755,6 +1681,9 @@ def check_project_info():
         # 获取从错误检测过程中同时提取的投标文件信息（避免重复AI调用）
         bid_info = detection_data.get('bid_info', {})
         
+        # 检测到的错误写入发现项表，参与统计
+        db_manager.save_project_info_findings(bid_file_id, detection_data.get('errors', []))
+        
         # 整合检测结果
         response_data = {
             'has_errors': detection_data.get('has_errors', False),
@@ -829,12 +1758,13 @@ def extract_project_info():
             return error_response
         if not file_record:
             return jsonify({'error': '文件不存在'}), 404
+        # 等待后台文本提取完成
+        file_record, error_response = wait_for_extraction(file_record)
+        if error_response:
+            return error_response
         
         # 使用Agent提取项目信息
-        result = agent_manager.extract_project_info(
-            file_record['content'], 
-            document_type
-        )
+        result = extract_project_info_from_front(file_record, document_type)
         
         # 如果提取成功，返回结果
         return jsonify(result)
@@ -906,6 +1836,10 @@ def match_project_info():
             return error_response
         if not bid_file:
             return jsonify({'error': '投标文件不存在'}), 404
+        # 等待后台文本提取完成
+        bid_file, error_response = wait_for_extraction(bid_file)
+        if error_response:
+            return error_response
         
         # 获取招标文件信息
         tender_info = data.get('tender_info')
@@ -918,12 +1852,13 @@ def match_project_info():
                     return tender_error
                 if not tender_file:
                     return jsonify({'error': '招标文件不存在'}), 404
+                # 等待后台文本提取完成
+                tender_file, error_response = wait_for_extraction(tender_file)
+                if error_response:
+                    return error_response
                 
                 # 提取招标文件的项目信息
-                tender_result = agent_manager.extract_project_info(
-                    tender_file['content'], 
-                    'tender'
-                )
+                tender_result = extract_project_info_from_front(tender_file, 'tender')
                 if tender_result.get('success'):
                     tender_info = tender_result['data']
                 else:
@@ -997,6 +1932,9 @@ def preview_file(file_id):
     请求方式：GET
     路径参数：
         file_id: 文件ID
+    查询参数（可选）：
+        pages: 只预览前N页
+        section: 只预览某个标题下的章节（标题块序号，见/api/files/<file_id>/outline）
     
     响应格式：
         成功: 返回文件内容（HTML格式用于预览）
@@ -1016,6 +1954,24 @@ def preview_file(file_id):
             return jsonify({'error': '文件不存在'}), 404
         if not file_record:
             return jsonify({'error': '文件不存在'}), 404
+        # 等待后台文本提取完成
+        file_record, error_response = wait_for_extraction(file_record)
+        if error_response:
+            return error_response
+        
+        # 按页或按章节预览时只查询对应的文档块，不加载全文
+        preview_content = None
+        pages = request.args.get('pages', type=int)
+        section = request.args.get('section', type=int)
+        if section is not None:
+            section_record = db_manager.get_section_text(file_id, section)
+            if not section_record:
+                return jsonify({'error': '章节不存在'}), 404
+            preview_content = section_record['text']
+        elif pages:
+            preview_content = db_manager.get_front_text(file_id, pages=pages)
+        if preview_content is None:
+            preview_content = file_record['content']
         
         # 生成预览HTML
         html_content = f"""
@@ -1086,7 +2042,7 @@ def preview_file(file_id):
                         文件大小: {file_record['file_size']} 字节
                     </div>
                 </div>
-                <div class="content">{file_record['content']}</div>
+                <div class="content">{preview_content}</div>
                 <div class="footer">
                     <p>BidAnalysis Tool - 文件预览服务</p>
                 </div>
@@ -1107,7 +2063,7 @@ def download_file(file_id):
     文件下载接口
     ============
     
-    提供文件下载功能，返回原始文件内容。
+    提供文件下载功能，返回上传的原始文件。
     
     请求方式：GET
     路径参数：
@@ -1130,28 +2086,13 @@ def download_file(file_id):
         if not file_record:
             return jsonify({'error': '文件不存在'}), 404
         
-        # 确定文件类型
-        filename = file_record['filename']
-        if filename.lower().endswith('.pdf'):
-            mimetype = 'application/pdf'
-        elif filename.lower().endswith(('.doc', '.docx')):
-            mimetype = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        elif filename.lower().endswith('.txt'):
-            mimetype = 'text/plain'
-        else:
-            mimetype = 'application/octet-stream'
-        
-        # 创建响应
-        response = app.response_class(
-            file_record['content'],
-            mimetype=mimetype,
-            headers={
-                'Content-Disposition': f'attachment; filename="{filename}"',
-                'Content-Length': str(len(file_record['content']))
-            }
-        )
+        # 返回存储的原始文件（不依赖后台提取的文本内容，提取未完成或失败时同样可以下载）
+        file_path = file_record['file_path']
+        if not file_path or not os.path.isfile(file_path):
+            return jsonify({'error': '文件已不存在于服务器'}), 404
         
-        return response
+        # MIME类型按原始文件名推断，Content-Length取磁盘文件大小
+        return send_file(file_path, as_attachment=True, download_name=file_record['filename'])
         
     except Exception as e:
         return handle_api_error(e)
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+分片上传服务模块
+================
+
+本模块为大体积招投标文件提供可断点续传的分片上传能力。
+客户端先创建上传会话，再按偏移量并行上传各个分片，最后提交完成请求。
+
+上传协议：
+    1. init     - 创建会话，服务端预分配目标文件
+    2. PUT 分片 - 按偏移量写入分片，校验分片SHA-256
+    3. complete - 校验分片完整性，归档到内容寻址存储并入库（可安全重试）
+
+技术特点：
+    - 分片直接写入最终文件的对应偏移，无需二次拼接
+    - 每个分片独立校验，失败只需重传该分片
+    - 已接收分片持久化到数据库，连接中断后可查询进度续传
+    - 完成后复用FileHandler/DatabaseManager的常规入库流程
+    - 移动暂存文件前先记录整文件摘要，入库失败或并发提交时重试可复用已归档的文件
+
+依赖库：
+    - hashlib: 分片与整文件摘要计算
+    - uuid: 会话ID生成
+    - os: 文件操作
+    - threading: 同一会话的完成请求串行执行
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import os
+import uuid
+import hashlib
+import threading
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, BinaryIO
+
+
+class ChunkedUploadManager:
+    """
+    分片上传管理器
+    ==============
+
+    负责分片上传会话的创建、分片写入校验和最终合并归档。
+    会话与分片状态保存在数据库中，文件内容直接写入暂存目录下的目标文件。
+
+    类属性：
+        DEFAULT_CHUNK_SIZE: 默认分片大小
+        MAX_CHUNK_SIZE: 单个分片最大大小（需小于Flask的MAX_CONTENT_LENGTH）
+        MAX_TOTAL_SIZE: 分片上传允许的最大文件大小
+        SESSION_TTL_HOURS: 未完成会话的保留时长
+
+    使用示例：
+        manager = ChunkedUploadManager(file_handler, db_manager, upload_folder)
+        session = manager.init_upload("投标文件.pdf", total_size)
+        manager.write_chunk(session['upload_id'], 0, stream, length, chunk_hash)
+        result = manager.complete(session['upload_id'], register_uploaded_file)
+    """
+
+    # 默认分片大小（8MB）
+    DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+    # 单个分片最大大小（32MB），必须小于单次请求体限制
+    MAX_CHUNK_SIZE = 32 * 1024 * 1024
+
+    # 分片上传最大文件大小（2GB）
+    MAX_TOTAL_SIZE = 2 * 1024 * 1024 * 1024
+
+    # 未完成会话保留时长（小时）
+    SESSION_TTL_HOURS = 24
+
+    # 写入分片时的读取块大小（1MB）
+    IO_BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, file_handler, db_manager, upload_folder: str):
+        """
+        初始化分片上传管理器
+
+        Args:
+            file_handler: FileHandler实例，用于文件类型检查和内容寻址归档
+            db_manager: DatabaseManager实例，用于保存会话与分片状态
+            upload_folder (str): 文件上传目录路径
+        """
+        self.file_handler = file_handler
+        self.db_manager = db_manager
+        self.upload_folder = upload_folder
+        self.staging_dir = os.path.join(upload_folder, file_handler.STAGING_DIRNAME)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        # 每个会话一把锁，会话完成后随引用释放
+        self._session_locks: 'weakref.WeakValueDictionary[str, threading.Lock]' = weakref.WeakValueDictionary()
+        self._session_locks_guard = threading.Lock()
+
+    def init_upload(self, filename: str, total_size: int, chunk_size: Optional[int] = None,
+                    expected_hash: Optional[str] = None) -> Dict:
+        """
+        创建分片上传会话
+        ================
+
+        校验参数并在暂存目录中预分配目标文件，之后各分片直接写入对应偏移。
+
+        Args:
+            filename (str): 原始文件名
+            total_size (int): 文件总大小(字节)
+            chunk_size (Optional[int]): 分片大小，未指定时使用默认值
+            expected_hash (Optional[str]): 客户端声明的整文件SHA-256（可选）
+
+        Returns:
+            Dict: 会话状态，见get_status()
+
+        Raises:
+            ValueError: 文件类型不支持或参数不合法
+        """
+        if not self.file_handler.is_allowed_file(filename):
+            raise ValueError("不支持的文件类型")
+
+        try:
+            total_size = int(total_size)
+            chunk_size = int(chunk_size or self.DEFAULT_CHUNK_SIZE)
+        except (TypeError, ValueError):
+            raise ValueError("文件大小和分片大小必须是整数")
+        if total_size <= 0:
+            raise ValueError("文件大小必须大于0")
+        if total_size > self.MAX_TOTAL_SIZE:
+            raise ValueError(f"文件大小超过限制（最大 {self.MAX_TOTAL_SIZE} 字节）")
+
+        if chunk_size <= 0 or chunk_size > self.MAX_CHUNK_SIZE:
+            raise ValueError(f"分片大小必须在 1 到 {self.MAX_CHUNK_SIZE} 字节之间")
+
+        if expected_hash:
+            if not isinstance(expected_hash, str):
+                raise ValueError("文件校验值必须是字符串")
+            expected_hash = expected_hash.strip().lower()
+
+        # 顺带清理过期的未完成会话，避免暂存目录无限增长
+        self.expire_stale_sessions()
+
+        upload_id = str(uuid.uuid4())
+        file_ext = Path(filename).suffix.lower()
+        partial_path = os.path.join(self.staging_dir, f"{upload_id}{file_ext}.part")
+
+        # 预分配目标文件，分片可按任意顺序并行写入
+        with open(partial_path, 'wb') as f:
+            f.truncate(total_size)
+
+        if not self.db_manager.create_upload_session(
+            upload_id, filename, total_size, chunk_size, partial_path, expected_hash
+        ):
+            self.file_handler.delete_file(partial_path)
+            raise RuntimeError("创建上传会话失败")
+
+        status = self.get_status(upload_id)
+        assert status is not None
+        return status
+
+    def write_chunk(self, upload_id: str, offset: int, stream: BinaryIO, content_length: Optional[int],
+                    chunk_hash: Optional[str]) -> Dict:
+        """
+        写入一个分片
+        ============
+
+        按偏移量将请求体流式写入目标文件，写入同时计算SHA-256，
+        与客户端提供的分片摘要一致时才记录为已接收。
+
+        Args:
+            upload_id (str): 上传会话ID
+            offset (int): 分片起始偏移，必须是分片大小的整数倍
+            stream (BinaryIO): 分片数据流
+            content_length (Optional[int]): 请求体长度
+            chunk_hash (Optional[str]): 客户端计算的分片SHA-256
+
+        Returns:
+            Dict: 写入后的会话状态
+
+        Raises:
+            LookupError: 会话不存在
+            ValueError: 参数不合法、数据不完整或校验失败
+        """
+        session = self._get_active_session(upload_id)
+        if session['content_hash']:
+            raise ValueError("上传会话正在完成，不能再写入分片")
+
+        if not chunk_hash:
+            raise ValueError("缺少分片校验值")
+        chunk_hash = chunk_hash.strip().lower()
+
+        try:
+            offset = int(offset)
+            content_length = None if content_length is None else int(content_length)
+        except (TypeError, ValueError):
+            raise ValueError("分片偏移和长度必须是整数")
+        total_size = session['total_size']
+        chunk_size = session['chunk_size']
+        if offset < 0 or offset >= total_size or offset % chunk_size != 0:
+            raise ValueError(f"非法的分片偏移: {offset}")
+
+        expected_length = min(chunk_size, total_size - offset)
+        if content_length is not None and content_length != expected_length:
+            raise ValueError(f"分片长度不正确，期望 {expected_length} 字节")
+
+        hasher = hashlib.sha256()
+        written = 0
+        with open(session['partial_path'], 'r+b') as f:
+            f.seek(offset)
+            while written < expected_length:
+                block = stream.read(min(self.IO_BLOCK_SIZE, expected_length - written))
+                if not block:
+                    break
+                hasher.update(block)
+                f.write(block)
+                written += len(block)
+
+        # 数据不完整或校验失败时，该区域可能已被部分覆盖，
+        # 撤销此前对同一偏移的接收记录，要求客户端重传
+        if written != expected_length:
+            self.db_manager.delete_upload_chunk(upload_id, offset)
+            raise ValueError(f"分片数据不完整，收到 {written}/{expected_length} 字节")
+
+        if hasher.hexdigest() != chunk_hash:
+            self.db_manager.delete_upload_chunk(upload_id, offset)
+            raise ValueError("分片校验失败，请重新上传该分片")
+
+        if not self.db_manager.record_upload_chunk(upload_id, offset, written, chunk_hash):
+            raise RuntimeError("记录上传分片失败")
+
+        status = self.get_status(upload_id)
+        assert status is not None
+        return status
+
+    def get_status(self, upload_id: str) -> Optional[Dict]:
+        """
+        查询上传会话进度
+
+        Args:
+            upload_id (str): 上传会话ID
+
+        Returns:
+            Optional[Dict]: 会话状态，不存在时返回None
+                - upload_id: 会话ID
+                - filename: 原始文件名
+                - total_size: 文件总大小
+                - chunk_size: 分片大小
+                - total_chunks: 分片总数
+                - received_offsets: 已接收分片偏移列表
+                - received_bytes: 已接收字节数
+                - status: 会话状态
+                - file_id: 完成后的文件ID
+        """
+        session = self.db_manager.get_upload_session(upload_id)
+        if not session:
+            return None
+
+        chunks = self.db_manager.get_upload_chunks(upload_id)
+        return {
+            'upload_id': session['id'],
+            'filename': session['filename'],
+            'total_size': session['total_size'],
+            'chunk_size': session['chunk_size'],
+            'total_chunks': self._total_chunks(session),
+            'received_offsets': [c['chunk_offset'] for c in chunks],
+            'received_bytes': sum(c['chunk_size'] for c in chunks),
+            'status': session['status'],
+            'file_id': session['file_id'],
+        }
+
+    def complete(self, upload_id: str, register: Callable[[str, str, str, str], Dict]) -> Dict:
+        """
+        完成分片上传并入库
+        ==================
+
+        同一会话的完成请求串行执行：已完成的会话直接返回对应的文件ID；
+        归档或入库中途失败时会话保持上传中状态，重试会复用已归档的文件。
+
+        Args:
+            upload_id (str): 上传会话ID
+            register (Callable): 入库函数 register(file_id, filename, file_path, content_hash)，
+                返回含file_id的响应数据；会话ID同时作为文件ID
+
+        Returns:
+            Dict: register的返回值；会话已完成时为 {file_id, filename, message}
+
+        Raises:
+            LookupError: 会话不存在
+            ValueError: 分片不完整或整文件校验失败
+        """
+        with self._session_lock(upload_id):
+            session = self.db_manager.get_upload_session(upload_id)
+            if not session:
+                raise LookupError(f"上传会话不存在: {upload_id}")
+            if session['status'] == 'completed':
+                return {
+                    'file_id': session['file_id'],
+                    'filename': session['filename'],
+                    'message': '文件上传成功'
+                }
+
+            file_path, content_hash, session = self.finalize(upload_id)
+            result = register(upload_id, session['filename'], file_path, content_hash)
+            if not self.mark_completed(upload_id, result['file_id']):
+                raise RuntimeError("更新上传会话状态失败")
+            return result
+
+    def finalize(self, upload_id: str) -> Tuple[str, str, Dict]:
+        """
+        归档分片上传的文件
+        ==================
+
+        检查所有分片均已接收，计算整文件摘要并归档到内容寻址存储。
+        移动暂存文件前先把摘要与归档路径记录到会话上，之后再次调用时直接复用，
+        不再读取已被移走的暂存文件。
+
+        Args:
+            upload_id (str): 上传会话ID
+
+        Returns:
+            Tuple[str, str, Dict]: (归档后的文件路径, 文件内容SHA-256, 会话记录)
+
+        Raises:
+            LookupError: 会话不存在
+            ValueError: 分片不完整、整文件校验失败或已归档的文件丢失
+        """
+        session = self._get_active_session(upload_id)
+        file_ext = Path(session['filename']).suffix.lower()
+
+        content_hash = session['content_hash']
+        if not content_hash:
+            received = {c['chunk_offset'] for c in self.db_manager.get_upload_chunks(upload_id)}
+            expected = set(range(0, session['total_size'], session['chunk_size']))
+            missing = sorted(expected - received)
+            if missing:
+                raise ValueError(f"仍有 {len(missing)} 个分片未上传，首个缺失偏移: {missing[0]}")
+
+            content_hash = self.file_handler.hash_file(session['partial_path'])
+            if session['expected_hash'] and session['expected_hash'] != content_hash:
+                # 分片均已单独校验，整文件不一致说明客户端声明有误，会话作废
+                self.abort(upload_id)
+                raise ValueError("文件整体校验失败，请重新上传")
+
+            blob_path = self.file_handler.get_blob_path(content_hash, file_ext, self.upload_folder)
+            if not self.db_manager.record_upload_blob(upload_id, content_hash, blob_path):
+                raise RuntimeError("记录上传文件摘要失败")
+            session = dict(session, content_hash=content_hash, file_path=blob_path)
+
+        if os.path.exists(session['partial_path']):
+            file_path = self.file_handler.store_blob(
+                session['partial_path'], content_hash, file_ext, self.upload_folder
+            )
+        elif os.path.exists(session['file_path']):
+            # 上次已归档但未完成入库
+            file_path = session['file_path']
+        else:
+            self.abort(upload_id)
+            raise ValueError("上传的文件已丢失，请重新上传")
+        return file_path, content_hash, session
+
+    def mark_completed(self, upload_id: str, file_id: str) -> bool:
+        """
+        将会话标记为已完成
+
+        Args:
+            upload_id (str): 上传会话ID
+            file_id (str): 入库后的文件ID
+
+        Returns:
+            bool: 是否成功
+        """
+        return self.db_manager.complete_upload_session(upload_id, file_id)
+
+    def abort(self, upload_id: str) -> bool:
+        """
+        放弃上传会话，删除暂存文件与会话记录
+
+        Args:
+            upload_id (str): 上传会话ID
+
+        Returns:
+            bool: 是否成功
+        """
+        session = self.db_manager.get_upload_session(upload_id)
+        if not session:
+            return False
+        if session['status'] == 'uploading':
+            self.file_handler.delete_file(session['partial_path'])
+        return self.db_manager.delete_upload_session(upload_id)
+
+    def expire_stale_sessions(self) -> int:
+        """
+        清理超过保留时长仍未完成的上传会话
+
+        Returns:
+            int: 清理的会话数量
+        """
+        stale = self.db_manager.get_stale_upload_sessions(self.SESSION_TTL_HOURS)
+        for session in stale:
+            self.file_handler.delete_file(session['partial_path'])
+            self.db_manager.delete_upload_session(session['id'])
+        return len(stale)
+
+    def _get_active_session(self, upload_id: str) -> Dict:
+        """
+        获取处于上传中状态的会话
+
+        Raises:
+            LookupError: 会话不存在
+            ValueError: 会话已完成
+        """
+        session = self.db_manager.get_upload_session(upload_id)
+        if not session:
+            raise LookupError(f"上传会话不存在: {upload_id}")
+        if session['status'] != 'uploading':
+            raise ValueError("上传会话已完成")
+        return session
+
+    def _session_lock(self, upload_id: str) -> threading.Lock:
+        """获取会话的完成锁（同一会话的并发完成请求串行执行）"""
+        with self._session_locks_guard:
+            lock = self._session_locks.get(upload_id)
+            if lock is None:
+                lock = threading.Lock()
+                self._session_locks[upload_id] = lock
+            return lock
+
+    def _total_chunks(self, session: Dict) -> int:
+        """计算会话的分片总数"""
+        return (session['total_size'] + session['chunk_size'] - 1) // session['chunk_size']
@@ -10,6 +10,10 @@
     - files: 文件记录表
     - tender_analysis: 招标文件分析结果表  
     - bid_analysis: 投标文件分析结果表
+    - upload_sessions: 分片上传会话表
+    - upload_chunks: 分片上传已接收分片表
+    - analysis_findings: 分析发现项表（废标条款/合规问题/项目信息错误，每项一行）
+    - file_blocks_fts / analysis_findings_fts: FTS5全文索引（trigram分词）
 
 主要功能：
     1. 数据库初始化和表结构创建
@@ -19,7 +23,10 @@
     5. 数据清理和维护
 
 技术特点：
-    - 使用SQLite轻量级数据库
+    - 使用SQLite轻量级数据库（WAL模式）
+    - 连接池复用读连接，写操作由单个写线程批量提交（见db_pool.py）
+    - files.content与analysis_result透明压缩存储（见storage_codec.py）
+    - 文档块与分析发现项的全文检索（FTS5，由触发器保持同步）
     - 支持事务处理
     - 完整的异常处理
     - JSON数据存储支持
@@ -27,6 +34,7 @@
 
 依赖库：
     - sqlite3: SQLite数据库接口
+    - db_pool: 连接池与写队列
     - json: JSON数据处理
     - uuid: 唯一标识生成
     - datetime: 时间处理
@@ -41,9 +49,332 @@
 import sqlite3
 import json
 import uuid
-from typing import Dict, Optional, List
+import re
+import html
+from typing import Dict, Optional, List, Tuple
 import os
 
+from db_pool import ConnectionPool
+from storage_codec import encode_text, decode_text, is_compressed
+
+# files表中除content以外的元数据列（查询时显式投影，避免加载大段文本）
+FILE_METADATA_COLUMNS = (
+    'id', 'filename', 'file_path', 'upload_time', 'file_size', 'file_type', 'content_hash',
+    'extraction_status', 'extraction_error', 'page_offsets', 'encoding'
+)
+
+
+# 各分析类型的结果中存放发现项的键
+FINDING_SOURCE_KEYS = {'tender': 'invalid_items', 'bid': 'issues', 'project_info': 'errors'}
+
+
+def extract_findings(analysis_type: str, analysis_result: Dict) -> List[Dict]:
+    """
+    从分析结果中取出发现项
+    
+    招标分析取invalid_items（废标条款），投标分析取issues（合规问题），
+    项目信息检测取errors（ProjectInfoAgent发现的项目名称/编号错误）。
+    
+    Args:
+        analysis_type: 分析类型(tender/bid/project_info)
+        analysis_result: 分析结果字典
+        
+    Returns:
+        发现项列表，每项包含category、severity、description、detail
+    """
+    if not isinstance(analysis_result, dict):
+        return []
+    items = analysis_result.get(FINDING_SOURCE_KEYS.get(analysis_type, 'issues')) or []
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        return []
+    
+    findings = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        if analysis_type == 'tender':
+            detail = str(item.get('requirement') or '')
+        elif analysis_type == 'project_info':
+            detail = '\n'.join(f"{label}: {item[key]}" for key, label in
+                               (('found_value', '发现值'), ('correct_value', '正确值'), ('location', '位置'))
+                               if item.get(key))
+        else:
+            detail = '\n'.join(str(item[key]) for key in ('suggestion', 'location') if item.get(key))
+        findings.append({
+            'category': str(item.get('category') or item.get('type') or '未分类'),
+            'severity': str(item.get('severity') or '中'),
+            'description': str(item.get('description') or ''),
+            'detail': detail,
+        })
+    return findings
+
+
+def _insert_findings(cursor, analysis_type: str, analysis_id: str, findings: List[Dict]):
+    """写入一条分析记录的发现项（file_id与created_time取自分析记录本身）"""
+    table = 'tender_analysis' if analysis_type == 'tender' else 'bid_analysis'
+    cursor.executemany(f'''
+        INSERT INTO analysis_findings
+            (analysis_id, analysis_type, file_id, seq, category, severity, description, detail, created_time)
+        SELECT id, ?, file_id, ?, ?, ?, ?, ?, created_time FROM {table} WHERE id = ?
+    ''', [(analysis_type, seq, f['category'], f['severity'], f['description'], f['detail'], analysis_id)
+          for seq, f in enumerate(findings)])
+
+
+def _backfill_findings(cursor):
+    """迁移：从已有分析结果中提取发现项（分析结果可能已压缩，只能在Python中解析）"""
+    rows = cursor.execute('SELECT id, type, analysis_result FROM analyses').fetchall()
+    for analysis_id, analysis_type, raw_result in rows:
+        try:
+            findings = extract_findings(analysis_type, json.loads(decode_text(raw_result)))
+        except ValueError:
+            continue
+        _insert_findings(cursor, analysis_type, analysis_id, findings)
+
+
+# 版本化的表结构迁移：(版本号, 说明, 语句列表)
+# 语句为SQL字符串，或接受游标的函数（用于需要在Python中处理数据的迁移）。
+# 已执行到的版本记录在 PRAGMA user_version 中，启动时按版本号顺序执行未执行的迁移。
+# 新增迁移只能追加到列表末尾，不要修改已发布的迁移。
+SCHEMA_MIGRATIONS = [
+    (1, '分析表索引：按文件查历史、按关联招标分析查询、按时间清理', [
+        # 覆盖索引：按文件查分析历史时只读索引，不回表
+        'CREATE INDEX IF NOT EXISTS idx_tender_analysis_file_time '
+        'ON tender_analysis (file_id, created_time, id)',
+        'CREATE INDEX IF NOT EXISTS idx_bid_analysis_file_time '
+        'ON bid_analysis (file_id, created_time, id)',
+        'CREATE INDEX IF NOT EXISTS idx_bid_analysis_tender '
+        'ON bid_analysis (tender_analysis_id)',
+        # 按时间清理旧记录
+        'CREATE INDEX IF NOT EXISTS idx_tender_analysis_created '
+        'ON tender_analysis (created_time)',
+        'CREATE INDEX IF NOT EXISTS idx_bid_analysis_created '
+        'ON bid_analysis (created_time)',
+        'CREATE INDEX IF NOT EXISTS idx_files_upload_time '
+        'ON files (upload_time)',
+    ]),
+    (2, '统一分析登记视图：按analysis_id一次查询定位招标/投标分析', [
+        # 查询条件会被下推到两个分支的主键上，一次查询完成两次主键探测
+        '''CREATE VIEW IF NOT EXISTS analyses AS
+           SELECT id, 'tender' AS type, file_id, NULL AS tender_analysis_id, created_time, analysis_result
+           FROM tender_analysis
+           UNION ALL
+           SELECT id, 'bid' AS type, file_id, tender_analysis_id, created_time, analysis_result
+           FROM bid_analysis''',
+    ]),
+    (3, '全文检索：文档块与分析发现项的FTS5索引（trigram分词，支持中文子串检索）', [
+        # 分析发现项：从分析结果JSON中拆出的废标条款/合规问题，每项一行
+        '''CREATE TABLE IF NOT EXISTS analysis_findings (
+               id INTEGER PRIMARY KEY,
+               analysis_id TEXT NOT NULL,
+               analysis_type TEXT NOT NULL,
+               file_id TEXT NOT NULL,
+               seq INTEGER NOT NULL,
+               category TEXT NOT NULL,
+               severity TEXT NOT NULL,
+               description TEXT NOT NULL,
+               detail TEXT NOT NULL,
+               created_time TIMESTAMP
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_analysis_findings_analysis '
+        'ON analysis_findings (analysis_id, seq)',
+        # 分析记录删除时一并删除其发现项
+        '''CREATE TRIGGER IF NOT EXISTS tender_analysis_findings_ad AFTER DELETE ON tender_analysis BEGIN
+               DELETE FROM analysis_findings WHERE analysis_id = old.id;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS bid_analysis_findings_ad AFTER DELETE ON bid_analysis BEGIN
+               DELETE FROM analysis_findings WHERE analysis_id = old.id;
+           END''',
+        # 外部内容FTS表：索引数据只存一份倒排表，原文仍从file_blocks/analysis_findings读取，
+        # 由触发器保持同步。file_blocks是未压缩的分块文本，因此不直接索引files.content
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS file_blocks_fts USING fts5(
+               text, content='file_blocks', content_rowid='id', tokenize='trigram'
+           )''',
+        '''CREATE TRIGGER IF NOT EXISTS file_blocks_fts_ai AFTER INSERT ON file_blocks BEGIN
+               INSERT INTO file_blocks_fts (rowid, text) VALUES (new.id, new.text);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS file_blocks_fts_ad AFTER DELETE ON file_blocks BEGIN
+               INSERT INTO file_blocks_fts (file_blocks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS file_blocks_fts_au AFTER UPDATE ON file_blocks BEGIN
+               INSERT INTO file_blocks_fts (file_blocks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+               INSERT INTO file_blocks_fts (rowid, text) VALUES (new.id, new.text);
+           END''',
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS analysis_findings_fts USING fts5(
+               category, description, detail,
+               content='analysis_findings', content_rowid='id', tokenize='trigram'
+           )''',
+        '''CREATE TRIGGER IF NOT EXISTS analysis_findings_fts_ai AFTER INSERT ON analysis_findings BEGIN
+               INSERT INTO analysis_findings_fts (rowid, category, description, detail)
+               VALUES (new.id, new.category, new.description, new.detail);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS analysis_findings_fts_ad AFTER DELETE ON analysis_findings BEGIN
+               INSERT INTO analysis_findings_fts (analysis_findings_fts, rowid, category, description, detail)
+               VALUES ('delete', old.id, old.category, old.description, old.detail);
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS analysis_findings_fts_au AFTER UPDATE ON analysis_findings BEGIN
+               INSERT INTO analysis_findings_fts (analysis_findings_fts, rowid, category, description, detail)
+               VALUES ('delete', old.id, old.category, old.description, old.detail);
+               INSERT INTO analysis_findings_fts (rowid, category, description, detail)
+               VALUES (new.id, new.category, new.description, new.detail);
+           END''',
+        # 已有数据：文档块直接重建索引，发现项从分析结果中提取（插入时由触发器写入索引）
+        "INSERT INTO file_blocks_fts (file_blocks_fts) VALUES ('rebuild')",
+        _backfill_findings,
+    ]),
+    (4, '按存储路径查询文件记录（后台清理判断磁盘文件是否仍被引用）', [
+        'CREATE INDEX IF NOT EXISTS idx_files_file_path ON files (file_path)',
+    ]),
+    (5, '分析发现项统计索引：按类型/时间、类别、严重程度、文件聚合与下钻', [
+        'CREATE INDEX IF NOT EXISTS idx_analysis_findings_type_time '
+        'ON analysis_findings (analysis_type, created_time)',
+        'CREATE INDEX IF NOT EXISTS idx_analysis_findings_category '
+        'ON analysis_findings (category, severity, created_time)',
+        'CREATE INDEX IF NOT EXISTS idx_analysis_findings_severity '
+        'ON analysis_findings (severity, created_time)',
+        'CREATE INDEX IF NOT EXISTS idx_analysis_findings_file '
+        'ON analysis_findings (file_id, created_time)',
+        'CREATE INDEX IF NOT EXISTS idx_analysis_findings_time '
+        'ON analysis_findings (created_time, id)',
+    ]),
+    (6, '列表接口索引：文件与分析记录按时间键集分页', [
+        # (时间, id) 复合索引替代迁移1中的单列时间索引，按时间清理时同样可用
+        'CREATE INDEX IF NOT EXISTS idx_files_upload_time_id ON files (upload_time, id)',
+        'CREATE INDEX IF NOT EXISTS idx_files_type_time ON files (file_type, upload_time, id)',
+        'CREATE INDEX IF NOT EXISTS idx_tender_analysis_created_id ON tender_analysis (created_time, id)',
+        'CREATE INDEX IF NOT EXISTS idx_bid_analysis_created_id ON bid_analysis (created_time, id)',
+        'DROP INDEX IF EXISTS idx_files_upload_time',
+        'DROP INDEX IF EXISTS idx_tender_analysis_created',
+        'DROP INDEX IF EXISTS idx_bid_analysis_created',
+    ]),
+    (7, '文件记录删除时一并删除其发现项（项目信息错误只关联file_id）', [
+        # 项目信息错误没有对应的分析记录，分析表上的删除触发器覆盖不到
+        '''CREATE TRIGGER IF NOT EXISTS files_findings_ad AFTER DELETE ON files BEGIN
+               DELETE FROM analysis_findings WHERE file_id = old.id;
+           END''',
+        # 清理此前删除文件后遗留的发现项
+        '''DELETE FROM analysis_findings
+           WHERE NOT EXISTS (SELECT 1 FROM files WHERE files.id = analysis_findings.file_id)''',
+    ]),
+]
+
+# 发现项统计可用的分组维度：维度名 -> SQL表达式
+FINDING_STAT_DIMENSIONS = {
+    'category': 'category',
+    'severity': 'severity',
+    'type': 'analysis_type',
+    'file_id': 'file_id',
+    'day': "strftime('%Y-%m-%d', created_time)",
+    'month': "strftime('%Y-%m', created_time)",
+    'quarter': "strftime('%Y', created_time) || '-Q' || ((CAST(strftime('%m', created_time) AS INTEGER) + 2) / 3)",
+}
+
+# 发现项明细的列
+FINDING_COLUMNS = ('id', 'analysis_id', 'analysis_type', 'file_id', 'seq', 'category', 'severity',
+                   'description', 'detail', 'created_time')
+
+# 全文检索的高亮标记（片段中其余文本均已HTML转义）
+SEARCH_HIGHLIGHT = ('<mark>', '</mark>')
+
+# snippet()使用的临时标记（Unicode私用区字符），片段转义后再替换为SEARCH_HIGHLIGHT
+SNIPPET_MARKERS = ('\ue000', '\ue001')
+
+# trigram分词器要求检索词至少3个字符，更短的词退化为LIKE子串匹配
+FTS_MIN_TERM_CHARS = 3
+
+
+def _highlight(text: Optional[str], terms: List[str]) -> Optional[str]:
+    """HTML转义文本，并用SEARCH_HIGHLIGHT标记包裹其中出现的检索词（短词检索时使用）"""
+    if not text:
+        return text
+    start, end = SEARCH_HIGHLIGHT
+    # 一次匹配所有检索词（长词优先），已插入的标记不会再被匹配
+    pattern = re.compile('|'.join(map(re.escape, sorted(set(terms), key=len, reverse=True))))
+    parts, last = [], 0
+    for match in pattern.finditer(text):
+        parts.append(html.escape(text[last:match.start()]))
+        parts.append(f'{start}{html.escape(match.group(0))}{end}')
+        last = match.end()
+    parts.append(html.escape(text[last:]))
+    return ''.join(parts)
+
+
+def _escape_snippet(text: Optional[str]) -> Optional[str]:
+    """HTML转义snippet()生成的片段，再把其中的临时标记替换为SEARCH_HIGHLIGHT"""
+    if not text:
+        return text
+    marker_start, marker_end = SNIPPET_MARKERS
+    start, end = SEARCH_HIGHLIGHT
+    return html.escape(text).replace(marker_start, start).replace(marker_end, end)
+
+# 分析记录的元数据列（不含analysis_result）
+ANALYSIS_METADATA_COLUMNS = ('id', 'type', 'file_id', 'tender_analysis_id', 'created_time')
+
+
+class FileRecord(dict):
+    """
+    文件记录（文本内容按需加载）
+    ============================
+    
+    元数据列在查询时一并取出；content在第一次通过record['content']或
+    record.get('content')访问时才从数据库读取，并缓存在记录中。
+    只需要路径或文件名的调用方因此不会加载整篇提取文本。
+    """
+    
+    def __init__(self, metadata: Dict, content_loader):
+        super().__init__(metadata)
+        self._content_loader = content_loader
+    
+    def __missing__(self, key):
+        if key != 'content':
+            raise KeyError(key)
+        content = self._content_loader(self['id'])
+        self['content'] = content
+        return content
+    
+    def get(self, key, default=None):
+        if key == 'content' and not self.content_loaded:
+            self['content']
+        return super().get(key, default)
+    
+    @property
+    def content_loaded(self) -> bool:
+        """文本内容是否已加载"""
+        return dict.__contains__(self, 'content')
+
+
+class AnalysisRecord(dict):
+    """
+    分析记录（分析结果JSON按需解析）
+    ================================
+    
+    元数据列直接可用；analysis_result在第一次访问时才执行json.loads，
+    只需要类型、文件ID、时间的调用方不必解析整份分析结果。
+    """
+    
+    def __init__(self, metadata: Dict, raw_result: str):
+        super().__init__(metadata)
+        self._raw_result = raw_result
+    
+    def __missing__(self, key):
+        if key != 'analysis_result':
+            raise KeyError(key)
+        value = json.loads(decode_text(self._raw_result))
+        self['analysis_result'] = value
+        return value
+    
+    def get(self, key, default=None):
+        if key == 'analysis_result' and not dict.__contains__(self, key):
+            self['analysis_result']
+        return super().get(key, default)
+    
+    def decoded(self) -> Dict:
+        """返回解析了分析结果的普通字典（用于序列化）"""
+        self['analysis_result']
+        return dict(self)
+
+
 class DatabaseManager:
     """
     数据库管理器类
@@ -61,6 +392,10 @@ class DatabaseManager:
             - upload_time: 上传时间
             - file_size: 文件大小
             - file_type: 文件类型
+            - content_hash: 文件内容SHA-256摘要（用于去重）
+            - extraction_status: 文本提取状态(pending/running/done/failed)
+            - extraction_error: 文本提取失败原因
+            - page_offsets: 每页起始字符偏移(JSON数组，仅PDF)
             
         tender_analysis: 招标文件分析结果
             - id: 分析记录ID
@@ -103,9 +438,15 @@ class DatabaseManager:
             db_path = os.path.join(project_root, "bid_analysis.db")
         
         self.db_path = db_path
+        # 连接池：复用读连接，写操作交给单个写线程批量提交
+        self.pool = ConnectionPool(db_path)
         # 初始化数据库表结构
         self.init_database()
     
+    def close(self):
+        """关闭连接池（等待已排队的写操作完成）"""
+        self.pool.close()
+    
     def init_database(self):
         """
         初始化数据库表结构
@@ -139,7 +480,7 @@ class DatabaseManager:
             - 权限不足
             - 磁盘空间不足
         """
-        with sqlite3.connect(self.db_path) as conn:
+        def create_tables(conn):
             cursor = conn.cursor()
             
             # 创建文件记录表
@@ -152,9 +493,56 @@ class DatabaseManager:
                     content TEXT,                     -- 提取的文本内容
                     upload_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- 上传时间
                     file_size INTEGER,                -- 文件大小(字节)
-                    file_type TEXT                    -- 文件类型(扩展名)
+                    file_type TEXT,                   -- 文件类型(扩展名)
+                    content_hash TEXT,                -- 文件内容SHA-256摘要
+                    extraction_status TEXT NOT NULL DEFAULT 'done',  -- 文本提取状态(pending/running/done/failed)
+                    extraction_error TEXT,            -- 文本提取失败原因
+                    page_offsets TEXT,                -- 每页起始字符偏移(JSON数组，仅PDF)
+                    encoding TEXT                     -- 检测到的文本编码(仅文本文件)
+                )
+            ''')
+            
+            # 兼容旧数据库：补充后续版本新增的列
+            self._ensure_column(cursor, 'files', 'content_hash', 'TEXT')
+            self._ensure_column(cursor, 'files', 'extraction_status', "TEXT NOT NULL DEFAULT 'done'")
+            self._ensure_column(cursor, 'files', 'extraction_error', 'TEXT')
+            self._ensure_column(cursor, 'files', 'page_offsets', 'TEXT')
+            self._ensure_column(cursor, 'files', 'encoding', 'TEXT')
+            
+            # 按内容摘要查重的索引
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_files_content_hash
+                ON files (content_hash)
+            ''')
+            
+            # 创建文档块表
+            # 按正文顺序存储提取结果的段落/表格行/页，支持按页码和章节的索引查询
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS file_blocks (
+                    id INTEGER PRIMARY KEY,           -- 块行ID
+                    file_id TEXT NOT NULL,            -- 关联的文件ID
+                    seq INTEGER NOT NULL,             -- 块序号(正文顺序)
+                    kind TEXT NOT NULL,               -- 块类型(paragraph/table_row/page)
+                    level INTEGER,                    -- 标题层级(1-9，非标题为NULL)
+                    page INTEGER,                     -- 页码(无法确定时为NULL)
+                    char_offset INTEGER NOT NULL,     -- 在files.content中的起始字符偏移
+                    text TEXT NOT NULL,               -- 块文本
+                    UNIQUE (file_id, seq),
+                    FOREIGN KEY (file_id) REFERENCES files (id)
                 )
             ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_file_blocks_page
+                ON file_blocks (file_id, page)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_file_blocks_offset
+                ON file_blocks (file_id, char_offset)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_file_blocks_heading
+                ON file_blocks (file_id, seq, level) WHERE level IS NOT NULL
+            ''')
             
             # 创建招标文件分析结果表
             # 存储AI对招标文件的分析结果
@@ -182,10 +570,91 @@ class DatabaseManager:
                 )
             ''')
             
-            # 提交事务，确保表创建成功
-            conn.commit()
+            # 创建分片上传会话表
+            # 记录断点续传上传的目标文件信息与进度
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS upload_sessions (
+                    id TEXT PRIMARY KEY,              -- 上传会话ID
+                    filename TEXT NOT NULL,           -- 原始文件名
+                    total_size INTEGER NOT NULL,      -- 文件总大小(字节)
+                    chunk_size INTEGER NOT NULL,      -- 分片大小(字节)
+                    partial_path TEXT NOT NULL,       -- 分片写入的目标文件路径
+                    expected_hash TEXT,               -- 客户端声明的整文件SHA-256(可选)
+                    status TEXT NOT NULL DEFAULT 'uploading',  -- 状态(uploading/completed)
+                    file_id TEXT,                     -- 完成后对应的文件ID
+                    content_hash TEXT,                -- 整文件SHA-256(完成时计算，重试完成时复用)
+                    file_path TEXT,                   -- 内容寻址存储路径(完成时确定，重试完成时复用)
+                    created_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- 创建时间
+                    updated_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP   -- 最近一次写入时间
+                )
+            ''')
+            self._ensure_column(cursor, 'upload_sessions', 'content_hash', 'TEXT')
+            self._ensure_column(cursor, 'upload_sessions', 'file_path', 'TEXT')
+            
+            # 创建分片记录表
+            # 每个已校验通过的分片一行，用于断点续传和完整性检查
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS upload_chunks (
+                    upload_id TEXT NOT NULL,          -- 上传会话ID
+                    chunk_offset INTEGER NOT NULL,    -- 分片起始偏移(字节)
+                    chunk_size INTEGER NOT NULL,      -- 分片长度(字节)
+                    chunk_hash TEXT NOT NULL,         -- 分片SHA-256
+                    PRIMARY KEY (upload_id, chunk_offset),
+                    FOREIGN KEY (upload_id) REFERENCES upload_sessions (id)
+                )
+            ''')
+            
+            # 执行尚未执行的结构迁移（与建表在同一事务中）
+            self._apply_migrations(cursor)
+        
+        self.pool.write(create_tables)
+    
+    def _apply_migrations(self, cursor):
+        """
+        按版本号顺序执行SCHEMA_MIGRATIONS中尚未执行的迁移
+        
+        Args:
+            cursor: 数据库游标（写线程事务内）
+        """
+        current_version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        for version, description, statements in SCHEMA_MIGRATIONS:
+            if version <= current_version:
+                continue
+            for statement in statements:
+                if callable(statement):
+                    statement(cursor)
+                else:
+                    cursor.execute(statement)
+            cursor.execute(f'PRAGMA user_version = {int(version)}')
+            print(f"数据库结构迁移到版本 {version}: {description}")
+    
+    def get_schema_version(self) -> int:
+        """
+        获取当前数据库结构版本
+        
+        Returns:
+            PRAGMA user_version的值
+        """
+        with self.pool.connection() as conn:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
+    
+    def _ensure_column(self, cursor, table: str, column: str, definition: str):
+        """
+        确保表中存在指定列，不存在时通过ALTER TABLE补充
+        
+        Args:
+            cursor: 数据库游标
+            table: 表名
+            column: 列名
+            definition: 列定义（类型及约束）
+        """
+        cursor.execute(f'PRAGMA table_info({table})')
+        existing = {row[1] for row in cursor.fetchall()}
+        if column not in existing:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
     
-    def save_file_record(self, file_id: str, filename: str, file_path: str, content: str) -> bool:
+    def save_file_record(self, file_id: str, filename: str, file_path: str, content: Optional[str],
+                         content_hash: Optional[str] = None, extraction_status: str = 'done') -> bool:
         """
         保存文件记录到数据库
         ====================
@@ -197,7 +666,9 @@ class DatabaseManager:
             file_id (str): 系统生成的文件唯一标识符
             filename (str): 用户上传的原始文件名
             file_path (str): 文件在服务器上的存储路径
-            content (str): 从文件中提取的文本内容
+            content (Optional[str]): 从文件中提取的文本内容，后台提取时先传None
+            content_hash (Optional[str]): 文件内容SHA-256摘要，用于后续去重
+            extraction_status (str): 文本提取状态，后台提取时为'pending'
             
         Returns:
             bool: 保存操作结果
@@ -207,7 +678,7 @@ class DatabaseManager:
         存储信息：
             - 基础信息：ID、文件名、路径
             - 内容信息：提取的文本内容
-            - 元数据：文件大小、类型、上传时间
+            - 元数据：文件大小、类型、上传时间、内容摘要
             
         异常处理：
             - 数据库连接失败
@@ -227,18 +698,13 @@ class DatabaseManager:
             # 提取文件类型（扩展名），无扩展名时设为'unknown'
             file_type = filename.split('.')[-1].lower() if '.' in filename else 'unknown'
             
-            # 使用事务确保数据一致性
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 插入文件记录
-                cursor.execute('''
-                    INSERT INTO files (id, filename, file_path, content, file_size, file_type)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (file_id, filename, file_path, content, file_size, file_type))
-                
-                # 提交事务
-                conn.commit()
+            # 插入文件记录（由写线程提交）
+            self.pool.execute_write('''
+                INSERT INTO files (id, filename, file_path, content, file_size, file_type,
+                                   content_hash, extraction_status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (file_id, filename, file_path, encode_text(content), file_size, file_type,
+                  content_hash, extraction_status))
             
             return True
             
@@ -247,16 +713,17 @@ class DatabaseManager:
             print(f"保存文件记录失败: {e}")
             return False
     
-    def find_duplicate_file(self, file_size: int) -> Optional[Dict]:
+    def find_duplicate_file(self, content_hash: str) -> Optional[Dict]:
         """
         查找重复文件
         =============
         
-        根据文件大小查找是否已存在相同的文件。
-        当文件大小完全相同时，认为是同一个文件。
+        根据文件内容的SHA-256摘要查找是否已存在相同的文件。
+        摘要相同即内容完全相同，与文件名、上传时间无关。
+        只查询元数据列，不加载提取的文本内容。
         
         Args:
-            file_size (int): 文件大小（字节）
+            content_hash (str): 文件内容SHA-256摘要
             
         Returns:
             Optional[Dict]: 如果找到重复文件返回文件记录，否则返回None
@@ -266,25 +733,30 @@ class DatabaseManager:
                 - file_size: 文件大小
                 - upload_time: 上传时间
                 - file_type: 文件类型
+                - content_hash: 内容摘要
+                - extraction_status: 文本提取状态
         """
+        if not content_hash:
+            return None
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 
-                # 查找具有相同文件大小的文件
+                # 通过内容摘要索引查找
                 cursor.execute('''
-                    SELECT * FROM files 
-                    WHERE file_size = ?
+                    SELECT id, filename, file_path, file_size, upload_time, file_type, content_hash,
+                           extraction_status
+                    FROM files 
+                    WHERE content_hash = ?
                     ORDER BY upload_time DESC
                     LIMIT 1
-                ''', (file_size,))
+                ''', (content_hash,))
                 
                 row = cursor.fetchone()
                 if row:
                     result = dict(row)
                     # 验证文件是否确实存在于磁盘上
-                    import os
                     if os.path.exists(result['file_path']):
                         return result
                     else:
@@ -309,39 +781,56 @@ class DatabaseManager:
         Args:
             file_id (str): 要清理的文件ID
         """
+        def delete_records(conn):
+            cursor = conn.cursor()
+            
+            # 删除相关的分析记录与文档块
+            cursor.execute('DELETE FROM tender_analysis WHERE file_id = ?', (file_id,))
+            cursor.execute('DELETE FROM bid_analysis WHERE file_id = ?', (file_id,))
+            cursor.execute('DELETE FROM file_blocks WHERE file_id = ?', (file_id,))
+            
+            # 删除文件记录（其余发现项由files_findings_ad触发器删除）
+            cursor.execute('DELETE FROM files WHERE id = ?', (file_id,))
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # 删除相关的分析记录
-                cursor.execute('DELETE FROM tender_analysis WHERE file_id = ?', (file_id,))
-                cursor.execute('DELETE FROM bid_analysis WHERE file_id = ?', (file_id,))
-                
-                # 删除文件记录
-                cursor.execute('DELETE FROM files WHERE id = ?', (file_id,))
-                
-                conn.commit()
-                print(f"已清理缺失文件的数据库记录: {file_id}")
+            self.pool.write(delete_records)
+            print(f"已清理缺失文件的数据库记录: {file_id}")
                 
         except Exception as e:
             print(f"清理缺失文件记录失败: {e}")
     
-    def get_file_record(self, file_id: str) -> Optional[Dict]:
+    def get_file_record(self, file_id: str) -> Optional[FileRecord]:
         """
         获取文件记录
         
+        只查询元数据列，文本内容在访问record['content']时才加载（见FileRecord）。
+        
         Args:
             file_id: 文件ID
             
         Returns:
             文件记录字典或None
         """
+        metadata = self.get_file_metadata(file_id)
+        if metadata is None:
+            return None
+        return FileRecord(metadata, self.get_file_content)
+    
+    def get_file_metadata(self, file_id: str) -> Optional[Dict]:
+        """
+        获取文件元数据（不含文本内容）
+        
+        Args:
+            file_id: 文件ID
+            
+        Returns:
+            包含FILE_METADATA_COLUMNS各列的字典或None
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM files WHERE id = ?
+                cursor.execute(f'''
+                    SELECT {', '.join(FILE_METADATA_COLUMNS)} FROM files WHERE id = ?
                 ''', (file_id,))
                 
                 row = cursor.fetchone()
@@ -349,9 +838,271 @@ class DatabaseManager:
                     return dict(row)
                 return None
         except Exception as e:
-            print(f"获取文件记录失败: {e}")
+            print(f"获取文件元数据失败: {e}")
+            return None
+    
+    def get_file_content(self, file_id: str) -> Optional[str]:
+        """
+        获取文件的提取文本
+        
+        Args:
+            file_id: 文件ID
+            
+        Returns:
+            文本内容，文件不存在或尚未提取完成时返回None
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT content FROM files WHERE id = ?', (file_id,))
+                row = cursor.fetchone()
+                return decode_text(row[0]) if row else None
+        except Exception as e:
+            print(f"获取文件内容失败: {e}")
+            return None
+    
+    def file_exists(self, file_id: str) -> bool:
+        """
+        判断文件记录是否存在（只走主键索引，不读取任何列）
+        
+        Args:
+            file_id: 文件ID
+            
+        Returns:
+            是否存在
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT 1 FROM files WHERE id = ?', (file_id,))
+                return cursor.fetchone() is not None
+        except Exception as e:
+            print(f"查询文件记录失败: {e}")
+            return False
+    
+    def update_extraction_status(self, file_id: str, status: str, content: Optional[str] = None,
+                                 error: Optional[str] = None,
+                                 page_offsets: Optional[List[int]] = None,
+                                 encoding: Optional[str] = None,
+                                 blocks: Optional[List[Dict]] = None) -> bool:
+        """
+        更新文件的文本提取状态
+        
+        Args:
+            file_id: 文件ID
+            status: 提取状态(pending/running/done/failed)
+            content: 提取完成时的文本内容（仅status为done时写入）
+            error: 提取失败原因（仅status为failed时写入）
+            page_offsets: 每页起始字符偏移（仅status为done时写入）
+            encoding: 检测到的文本编码（仅status为done时写入）
+            blocks: 文档块列表（仅status为done时写入，与文本内容在同一事务中替换）
+            
+        Returns:
+            是否更新成功
+        """
+        # 在调用方线程中压缩，写线程只负责写入
+        stored_content = encode_text(content) if status == 'done' else None
+        
+        def update(conn):
+            cursor = conn.cursor()
+            if status == 'done':
+                offsets_json = json.dumps(page_offsets) if page_offsets is not None else None
+                cursor.execute('''
+                    UPDATE files
+                    SET extraction_status = ?, content = ?, page_offsets = ?, encoding = ?,
+                        extraction_error = NULL
+                    WHERE id = ?
+                ''', (status, stored_content, offsets_json, encoding, file_id))
+                if blocks is not None:
+                    cursor.execute('DELETE FROM file_blocks WHERE file_id = ?', (file_id,))
+                    cursor.executemany('''
+                        INSERT INTO file_blocks (file_id, seq, kind, level, page, char_offset, text)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', [(file_id, b['seq'], b['kind'], b['level'], b['page'], b['char_offset'], b['text'])
+                          for b in blocks])
+            else:
+                cursor.execute('''
+                    UPDATE files
+                    SET extraction_status = ?, extraction_error = ?
+                    WHERE id = ?
+                ''', (status, error, file_id))
+        
+        try:
+            self.pool.write(update)
+            return True
+        except Exception as e:
+            print(f"更新文本提取状态失败: {e}")
+            return False
+    
+    def get_extraction_status(self, file_id: str) -> Optional[Dict]:
+        """
+        获取文件的文本提取状态（不加载文本内容）
+        
+        Args:
+            file_id: 文件ID
+            
+        Returns:
+            包含id、filename、file_path、extraction_status、extraction_error、encoding的字典或None
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, filename, file_path, extraction_status, extraction_error, encoding
+                    FROM files WHERE id = ?
+                ''', (file_id,))
+                row = cursor.fetchone()
+                return dict(row) if row else None
+        except Exception as e:
+            print(f"获取文本提取状态失败: {e}")
+            return None
+    
+    def get_unfinished_extractions(self) -> List[Dict]:
+        """
+        获取尚未完成文本提取的文件（服务重启后重新排队）
+        
+        Returns:
+            包含id、file_path的字典列表
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT id, file_path FROM files
+                    WHERE extraction_status IN ('pending', 'running')
+                    ORDER BY upload_time
+                ''')
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"获取未完成提取的文件失败: {e}")
+            return []
+    
+    def get_front_text(self, file_id: str, pages: int = 3, chars_per_page: int = 1800) -> Optional[str]:
+        """
+        获取文档前几页的文本
+        ====================
+        
+        有页码的块（PDF、带分页记录的docx）按页码筛选；
+        没有页码的块按字符偏移估算（每页chars_per_page个字符）。
+        
+        Args:
+            file_id: 文件ID
+            pages: 页数
+            chars_per_page: 无页码时每页的估算字符数
+            
+        Returns:
+            前几页文本，文件没有文档块时返回None（调用方回退到files.content）
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT text FROM file_blocks
+                    WHERE file_id = ?
+                      AND (page <= ? OR (page IS NULL AND char_offset < ?))
+                    ORDER BY seq
+                ''', (file_id, pages, pages * chars_per_page))
+                rows = cursor.fetchall()
+                if not rows:
+                    return None
+                return '\n'.join(row[0] for row in rows)
+        except Exception as e:
+            print(f"获取文档前几页文本失败: {e}")
+            return None
+    
+    def get_file_outline(self, file_id: str) -> List[Dict]:
+        """
+        获取文档标题大纲
+        
+        Args:
+            file_id: 文件ID
+            
+        Returns:
+            按正文顺序排列的标题块列表，包含seq、level、page、char_offset、text
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT seq, level, page, char_offset, text FROM file_blocks
+                    WHERE file_id = ? AND level IS NOT NULL
+                    ORDER BY seq
+                ''', (file_id,))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"获取文档大纲失败: {e}")
+            return []
+    
+    def get_section_text(self, file_id: str, heading_seq: int) -> Optional[Dict]:
+        """
+        获取某个标题下的整章文本
+        ========================
+        
+        章节范围：从该标题块开始，到下一个同级或更高级标题之前为止。
+        
+        Args:
+            file_id: 文件ID
+            heading_seq: 标题块序号（见get_file_outline()）
+            
+        Returns:
+            包含heading、level、page、char_offset、text的字典，标题不存在时返回None
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT seq, level, page, char_offset, text FROM file_blocks
+                    WHERE file_id = ? AND seq = ? AND level IS NOT NULL
+                ''', (file_id, heading_seq))
+                heading = cursor.fetchone()
+                if not heading:
+                    return None
+                
+                cursor.execute('''
+                    SELECT MIN(seq) FROM file_blocks
+                    WHERE file_id = ? AND seq > ? AND level IS NOT NULL AND level <= ?
+                ''', (file_id, heading_seq, heading['level']))
+                end_seq = cursor.fetchone()[0]
+                
+                cursor.execute('''
+                    SELECT text FROM file_blocks
+                    WHERE file_id = ? AND seq >= ? AND seq < ?
+                    ORDER BY seq
+                ''', (file_id, heading_seq, end_seq if end_seq is not None else 2 ** 62))
+                return {
+                    'heading': heading['text'],
+                    'level': heading['level'],
+                    'page': heading['page'],
+                    'char_offset': heading['char_offset'],
+                    'text': '\n'.join(row['text'] for row in cursor.fetchall())
+                }
+        except Exception as e:
+            print(f"获取章节文本失败: {e}")
             return None
     
+    def get_chunk_boundaries(self, file_id: str) -> List[int]:
+        """
+        获取分段分析可用的结构边界（标题块与PDF页块的起始字符偏移）
+        
+        Args:
+            file_id: 文件ID
+            
+        Returns:
+            按正文顺序排列的字符偏移列表，没有文档块时返回空列表
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT char_offset FROM file_blocks
+                    WHERE file_id = ? AND (level IS NOT NULL OR kind = 'page')
+                    ORDER BY seq
+                ''', (file_id,))
+                return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"获取分段边界失败: {e}")
+            return []
+    
     def save_tender_analysis(self, file_id: str, analysis_result: Dict) -> str:
         """
         保存招标文件分析结果
@@ -365,14 +1116,20 @@ class DatabaseManager:
         """
         analysis_id = str(uuid.uuid4())
         
+        stored_result = encode_text(json.dumps(analysis_result, ensure_ascii=False))
+        findings = extract_findings('tender', analysis_result)
+        
+        def insert(conn):
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO tender_analysis (id, file_id, analysis_result)
+                VALUES (?, ?, ?)
+            ''', (analysis_id, file_id, stored_result))
+            # 发现项与分析记录在同一事务中写入
+            _insert_findings(cursor, 'tender', analysis_id, findings)
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO tender_analysis (id, file_id, analysis_result)
-                    VALUES (?, ?, ?)
-                ''', (analysis_id, file_id, json.dumps(analysis_result, ensure_ascii=False)))
-                conn.commit()
+            self.pool.write(insert)
             
             return analysis_id
         except Exception as e:
@@ -393,14 +1150,20 @@ class DatabaseManager:
         """
         analysis_id = str(uuid.uuid4())
         
+        stored_result = encode_text(json.dumps(analysis_result, ensure_ascii=False))
+        findings = extract_findings('bid', analysis_result)
+        
+        def insert(conn):
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO bid_analysis (id, file_id, analysis_result, tender_analysis_id)
+                VALUES (?, ?, ?, ?)
+            ''', (analysis_id, file_id, stored_result, tender_analysis_id))
+            # 发现项与分析记录在同一事务中写入
+            _insert_findings(cursor, 'bid', analysis_id, findings)
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO bid_analysis (id, file_id, analysis_result, tender_analysis_id)
-                    VALUES (?, ?, ?, ?)
-                ''', (analysis_id, file_id, json.dumps(analysis_result, ensure_ascii=False), tender_analysis_id))
-                conn.commit()
+            self.pool.write(insert)
             
             return analysis_id
         except Exception as e:
@@ -418,8 +1181,7 @@ class DatabaseManager:
             分析结果字典或None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT * FROM tender_analysis WHERE id = ?
@@ -428,7 +1190,7 @@ class DatabaseManager:
                 row = cursor.fetchone()
                 if row:
                     result = dict(row)
-                    result['analysis_result'] = json.loads(result['analysis_result'])
+                    result['analysis_result'] = json.loads(decode_text(result['analysis_result']))
                     return result
                 return None
         except Exception as e:
@@ -446,8 +1208,7 @@ class DatabaseManager:
             分析结果字典或None
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     SELECT * FROM bid_analysis WHERE id = ?
@@ -456,135 +1217,964 @@ class DatabaseManager:
                 row = cursor.fetchone()
                 if row:
                     result = dict(row)
-                    result['analysis_result'] = json.loads(result['analysis_result'])
+                    result['analysis_result'] = json.loads(decode_text(result['analysis_result']))
                     return result
                 return None
         except Exception as e:
             print(f"获取投标文件分析结果失败: {e}")
             return None
     
-    def get_analysis_result(self, analysis_id: str) -> Optional[Dict]:
+    def get_analysis_result(self, analysis_id: str, decode: bool = True) -> Optional[Dict]:
         """
         获取分析结果（自动判断类型）
         
+        通过analyses视图一次查询完成，不再先查招标表、未命中再查投标表。
+        
         Args:
             analysis_id: 分析ID
+            decode: 是否立即解析analysis_result；为False时返回AnalysisRecord，
+                    访问analysis_result时才解析
             
         Returns:
-            分析结果字典或None
+            分析结果字典（含type）或None
         """
-        # 先尝试获取招标文件分析结果
-        result = self.get_tender_analysis(analysis_id)
-        if result:
-            result['type'] = 'tender'
-            return result
-        
-        # 再尝试获取投标文件分析结果
-        result = self.get_bid_analysis(analysis_id)
-        if result:
-            result['type'] = 'bid'
-            return result
-        
-        return None
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {', '.join(ANALYSIS_METADATA_COLUMNS)}, analysis_result
+                    FROM analyses WHERE id = ?
+                ''', (analysis_id,))
+                row = cursor.fetchone()
+        except Exception as e:
+            print(f"获取分析结果失败: {e}")
+            return None
+        
+        if not row:
+            return None
+        metadata = {column: row[column] for column in ANALYSIS_METADATA_COLUMNS}
+        if metadata['type'] == 'tender':
+            # 招标分析没有关联分析ID，保持与原返回结构一致
+            del metadata['tender_analysis_id']
+        record = AnalysisRecord(metadata, row['analysis_result'])
+        return record.decoded() if decode else record
+    
+    def get_analysis_metadata(self, analysis_id: str) -> Optional[Dict]:
+        """
+        获取分析记录的元数据（不读取、不解析分析结果）
+        
+        Args:
+            analysis_id: 分析ID
+            
+        Returns:
+            包含id、type、file_id、tender_analysis_id、created_time的字典或None
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {', '.join(ANALYSIS_METADATA_COLUMNS)} FROM analyses WHERE id = ?
+                ''', (analysis_id,))
+                row = cursor.fetchone()
+                return dict(row) if row else None
+        except Exception as e:
+            print(f"获取分析记录失败: {e}")
+            return None
     
-    def get_file_analysis_history(self, file_id: str) -> List[Dict]:
+    def get_file_analysis_history(self, file_id: str, limit: Optional[int] = None,
+                                  before: Optional[Tuple[str, str]] = None) -> List[Dict]:
         """
         获取文件的分析历史
+        ==================
+        
+        招标与投标分析合并为一条UNION ALL查询，两个分支都按
+        (file_id, created_time, id) 覆盖索引倒序读取，由SQLite归并排序，
+        配合LIMIT只读取需要的行。
+        
+        分页使用键集（keyset）方式：把上一页最后一条的 (created_time, id)
+        作为before传入，取时间更早的记录，翻页深度不影响查询耗时。
         
         Args:
             file_id: 文件ID
+            limit: 最多返回条数，None表示全部
+            before: 上一页最后一条记录的 (created_time, id)
             
         Returns:
-            分析历史列表
+            分析历史列表（按创建时间倒序），每项包含id、created_time、type
         """
-        history = []
+        keyset_filter = 'AND (created_time, id) < (?, ?)' if before else ''
+        branch_params = [file_id] + (list(before) if before else [])
+        params = branch_params * 2 + [limit if limit is not None else -1]
         
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.pool.connection() as conn:
                 cursor = conn.cursor()
-                
-                # 获取招标文件分析历史
-                cursor.execute('''
-                    SELECT id, created_time, 'tender' as type 
-                    FROM tender_analysis 
-                    WHERE file_id = ?
-                    ORDER BY created_time DESC
-                ''', (file_id,))
-                
-                for row in cursor.fetchall():
-                    history.append(dict(row))
-                
-                # 获取投标文件分析历史
-                cursor.execute('''
-                    SELECT id, created_time, 'bid' as type 
-                    FROM bid_analysis 
-                    WHERE file_id = ?
-                    ORDER BY created_time DESC
-                ''', (file_id,))
-                
-                for row in cursor.fetchall():
-                    history.append(dict(row))
-                
-                # 按时间排序
-                history.sort(key=lambda x: x['created_time'], reverse=True)
-                
+                cursor.execute(f'''
+                    SELECT id, created_time, 'tender' AS type
+                    FROM tender_analysis
+                    WHERE file_id = ? {keyset_filter}
+                    UNION ALL
+                    SELECT id, created_time, 'bid' AS type
+                    FROM bid_analysis
+                    WHERE file_id = ? {keyset_filter}
+                    ORDER BY created_time DESC, id DESC
+                    LIMIT ?
+                ''', params)
+                return [dict(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"获取分析历史失败: {e}")
+            return []
+    
+    def list_files(self, filters: Optional[Dict] = None, limit: int = 50,
+                   before: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        """
+        分页列出文件记录（只含元数据，不读取content）
+        ============================================
+        
+        按上传时间倒序，键集分页：把上一页最后一条的 (upload_time, id) 作为before传入。
+        按 (upload_time, id) 索引倒序读取；指定file_type时走 (file_type, upload_time, id) 索引。
         
-        return history
+        Args:
+            filters: 筛选条件：file_type、extraction_status、min_size、max_size（字节，含）、
+                     since（含）、until（不含），时间按'YYYY-MM-DD[ HH:MM:SS]'字符串比较
+            limit: 每页条数
+            before: 上一页最后一条记录的 (upload_time, id)
+            
+        Returns:
+            文件元数据列表
+        """
+        filters = filters or {}
+        conditions, params = [], []
+        for key, condition in (('file_type', 'file_type = ?'), ('extraction_status', 'extraction_status = ?'),
+                               ('min_size', 'file_size >= ?'), ('max_size', 'file_size <= ?'),
+                               ('since', 'upload_time >= ?'), ('until', 'upload_time < ?')):
+            if filters.get(key) is not None:
+                conditions.append(condition)
+                params.append(filters[key])
+        if before:
+            conditions.append('(upload_time, id) < (?, ?)')
+            params.extend(before)
+        where = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+        
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {', '.join(FILE_METADATA_COLUMNS)} FROM files
+                    {where}
+                    ORDER BY upload_time DESC, id DESC
+                    LIMIT ?
+                ''', params + [limit])
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"列出文件记录失败: {e}")
+            return []
+    
+    def list_analyses(self, filters: Optional[Dict] = None, limit: int = 50,
+                      before: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        """
+        分页列出分析记录（只含元数据，不读取analysis_result）
+        ====================================================
+        
+        招标与投标分析按 (created_time, id) 索引倒序读取后由SQLite归并，
+        键集分页方式同get_file_analysis_history()。结果附带文件名（只对本页的行回表）。
+        
+        Args:
+            filters: 筛选条件：type（tender/bid）、file_id、since（含）、until（不含）
+            limit: 每页条数
+            before: 上一页最后一条记录的 (created_time, id)
+            
+        Returns:
+            分析元数据列表，每项包含id、type、file_id、tender_analysis_id、created_time、filename
+        """
+        filters = filters or {}
+        conditions, params = [], []
+        for key, condition in (('file_id', 'file_id = ?'), ('since', 'created_time >= ?'),
+                               ('until', 'created_time < ?')):
+            if filters.get(key) is not None:
+                conditions.append(condition)
+                params.append(filters[key])
+        if before:
+            conditions.append('(created_time, id) < (?, ?)')
+            params.extend(before)
+        where = ('WHERE ' + ' AND '.join(conditions)) if conditions else ''
+        
+        branches, branch_params = [], []
+        if filters.get('type') in (None, 'tender'):
+            branches.append(f'''
+                SELECT id, 'tender' AS type, file_id, NULL AS tender_analysis_id, created_time
+                FROM tender_analysis {where}''')
+            branch_params += params
+        if filters.get('type') in (None, 'bid'):
+            branches.append(f'''
+                SELECT id, 'bid' AS type, file_id, tender_analysis_id, created_time
+                FROM bid_analysis {where}''')
+            branch_params += params
+        if not branches:
+            return []
+        
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT page.*, f.filename FROM (
+                        {' UNION ALL '.join(branches)}
+                        ORDER BY created_time DESC, id DESC
+                        LIMIT ?
+                    ) AS page
+                    LEFT JOIN files f ON f.id = page.file_id
+                    ORDER BY page.created_time DESC, page.id DESC
+                ''', branch_params + [limit])
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"列出分析记录失败: {e}")
+            return []
+    
+    def search_documents(self, query: str, role: Optional[str] = None, file_id: Optional[str] = None,
+                         limit: int = 20, offset: int = 0) -> Dict:
+        """
+        全文检索文档内容
+        ================
+        
+        在file_blocks_fts中检索，按bm25相关度排序，每条结果是命中的一个文档块，
+        附带文件名、页码与高亮片段。例如检索某个项目编号，可以找出引用了它的所有投标文件。
+        
+        Args:
+            query: 检索词，空格分隔的多个词按AND组合，每个词按短语匹配
+            role: 只检索招标文件(tender)或投标文件(bid)，None表示全部
+            file_id: 只检索指定文件
+            limit: 每页条数
+            offset: 跳过的条数
+            
+        Returns:
+            {'results': 结果列表, 'has_more': 是否还有下一页}
+        """
+        conditions, params = [], []
+        if role in ('tender', 'bid'):
+            table = 'tender_analysis' if role == 'tender' else 'bid_analysis'
+            conditions.append(f'EXISTS (SELECT 1 FROM {table} a WHERE a.file_id = b.file_id)')
+        if file_id:
+            conditions.append('b.file_id = ?')
+            params.append(file_id)
+        
+        sql = '''
+            SELECT b.file_id, f.filename, b.seq, b.page, b.char_offset, {snippet} AS snippet, {rank} AS rank
+            FROM file_blocks_fts
+            JOIN file_blocks b ON b.id = file_blocks_fts.rowid
+            JOIN files f ON f.id = b.file_id
+            WHERE {where}
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+        '''
+        return self._run_search(sql, 'file_blocks_fts', ['text'], query, conditions, params,
+                                snippet_column=0, limit=limit, offset=offset, error_label='检索文档')
     
-    def cleanup_old_records(self, days: int = 30):
+    def search_findings(self, query: str, analysis_type: Optional[str] = None,
+                        limit: int = 20, offset: int = 0) -> Dict:
+        """
+        全文检索分析发现项（招标废标条款、投标合规问题）
+        
+        Args:
+            query: 检索词（规则同search_documents()）
+            analysis_type: 只检索招标(tender)或投标(bid)分析的发现项
+            limit: 每页条数
+            offset: 跳过的条数
+            
+        Returns:
+            {'results': 结果列表, 'has_more': 是否还有下一页}
+        """
+        conditions, params = [], []
+        if analysis_type in ('tender', 'bid'):
+            conditions.append('af.analysis_type = ?')
+            params.append(analysis_type)
+        
+        sql = '''
+            SELECT af.analysis_id, af.analysis_type, af.file_id, af.category, af.severity,
+                   {snippet} AS snippet, af.description, af.detail, af.created_time, {rank} AS rank
+            FROM analysis_findings_fts
+            JOIN analysis_findings af ON af.id = analysis_findings_fts.rowid
+            WHERE {where}
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+        '''
+        return self._run_search(sql, 'analysis_findings_fts', ['category', 'description', 'detail'],
+                                query, conditions, params, snippet_column=-1, limit=limit, offset=offset,
+                                error_label='检索分析发现项')
+    
+    def _run_search(self, sql: str, fts_table: str, columns: List[str], query: str,
+                    conditions: List[str], params: List, snippet_column: int,
+                    limit: int, offset: int, error_label: str) -> Dict:
+        """
+        执行全文检索查询
+        
+        不少于3个字符的词组成FTS5 MATCH表达式（走倒排索引，按bm25排序）；
+        更短的词（如两个字的中文词）用LIKE在FTS表上做子串过滤。
+        全部是短词时没有相关度，按写入顺序返回。
+        """
+        terms = query.split()
+        if not terms:
+            return {'results': [], 'has_more': False}
+        long_terms = [t for t in terms if len(t) >= FTS_MIN_TERM_CHARS]
+        short_terms = [t for t in terms if len(t) < FTS_MIN_TERM_CHARS]
+        
+        where, where_params = [], []
+        if long_terms:
+            # 每个词作为短语加引号，检索词中的FTS5语法字符不会被解释
+            where.append(f'{fts_table} MATCH ?')
+            where_params.append(' AND '.join('"' + t.replace('"', '""') + '"' for t in long_terms))
+        for term in short_terms:
+            escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            where.append('(' + ' OR '.join(f"{fts_table}.{c} LIKE ? ESCAPE '\\'" for c in columns) + ')')
+            where_params.extend([f'%{escaped}%'] * len(columns))
+        where.extend(conditions)
+        where_params.extend(params)
+        
+        if long_terms:
+            start, end = SNIPPET_MARKERS
+            snippet = f"snippet({fts_table}, {snippet_column}, '{start}', '{end}', '…', 24)"
+            snippet_params = []
+            rank, order = f'bm25({fts_table})', 'rank'
+        else:
+            # 截取第一个检索词附近的文本作为片段
+            source = " || ' ' || ".join(f'{fts_table}.{c}' for c in columns)
+            snippet = f'substr({source}, max(1, instr({source}, ?) - 24), 96)'
+            snippet_params = [short_terms[0]]
+            rank, order = 'NULL', f'{fts_table}.rowid'
+        
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(sql.format(snippet=snippet, rank=rank, where=' AND '.join(where), order=order),
+                               snippet_params + where_params + [limit + 1, offset])
+                rows = [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"{error_label}失败: {e}")
+            return {'results': [], 'has_more': False}
+        
+        # 文档内容与发现项来自上传文件和模型输出，片段转义后才能作为HTML使用
+        for row in rows:
+            if long_terms:
+                row['snippet'] = _escape_snippet(row['snippet'])
+            else:
+                row['snippet'] = _highlight(row['snippet'], short_terms)
+        return {'results': rows[:limit], 'has_more': len(rows) > limit}
+    
+    def save_project_info_findings(self, file_id: str, errors: List[Dict]) -> Optional[str]:
+        """
+        保存项目信息检测发现的错误（ProjectInfoAgent）
+        
+        项目信息检测没有单独的分析记录，以本次检测ID作为analysis_id写入发现项表，
+        与招标/投标分析的发现项一起参与统计。
+        
+        Args:
+            file_id: 投标文件ID
+            errors: 检测结果中的errors列表
+            
+        Returns:
+            检测ID，没有错误时不写入并返回None
+        """
+        findings = extract_findings('project_info', {'errors': errors})
+        if not findings:
+            return None
+        check_id = str(uuid.uuid4())
+        
+        try:
+            self.pool.write(lambda conn: conn.executemany('''
+                INSERT INTO analysis_findings
+                    (analysis_id, analysis_type, file_id, seq, category, severity, description, detail, created_time)
+                VALUES (?, 'project_info', ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ''', [(check_id, file_id, seq, f['category'], f['severity'], f['description'], f['detail'])
+                  for seq, f in enumerate(findings)]))
+            return check_id
+        except Exception as e:
+            print(f"保存项目信息检测结果失败: {e}")
+            return None
+    
+    def _findings_filter(self, filters: Optional[Dict]) -> Tuple[str, List]:
+        """
+        把统计/下钻的筛选条件转换为WHERE子句
+        
+        支持的条件：type、category、severity、file_id、since（含）、until（不含），
+        时间按'YYYY-MM-DD[ HH:MM:SS]'字符串比较。
+        """
+        conditions, params = [], []
+        for key, column in (('type', 'analysis_type'), ('category', 'category'),
+                            ('severity', 'severity'), ('file_id', 'file_id')):
+            if filters and filters.get(key):
+                conditions.append(f'{column} = ?')
+                params.append(filters[key])
+        if filters and filters.get('since'):
+            conditions.append('created_time >= ?')
+            params.append(filters['since'])
+        if filters and filters.get('until'):
+            conditions.append('created_time < ?')
+            params.append(filters['until'])
+        return ('WHERE ' + ' AND '.join(conditions)) if conditions else '', params
+    
+    def get_findings_stats(self, group_by: List[str], filters: Optional[Dict] = None,
+                           limit: Optional[int] = None) -> List[Dict]:
+        """
+        按维度聚合分析发现项
+        ====================
+        
+        例如 group_by=['quarter', 'category'] 统计每个季度各类别的发现项数量。
+        
+        Args:
+            group_by: 分组维度，取值见FINDING_STAT_DIMENSIONS
+            filters: 筛选条件（见_findings_filter()）
+            limit: 最多返回的分组数（按数量倒序）
+            
+        Returns:
+            分组列表，每项包含各维度的值、count（发现项数）、analyses（涉及的分析/检测次数）、
+            files（涉及的文件数）
+            
+        Raises:
+            ValueError: 分组维度不支持
+        """
+        unknown = [d for d in group_by if d not in FINDING_STAT_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"不支持的统计维度: {', '.join(unknown)}")
+        where, params = self._findings_filter(filters)
+        select = ''.join(f'{FINDING_STAT_DIMENSIONS[d]} AS {d}, ' for d in group_by)
+        group = f"GROUP BY {', '.join(FINDING_STAT_DIMENSIONS[d] for d in group_by)}" if group_by else ''
+        
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {select}COUNT(*) AS count,
+                           COUNT(DISTINCT analysis_id) AS analyses,
+                           COUNT(DISTINCT file_id) AS files
+                    FROM analysis_findings
+                    {where}
+                    {group}
+                    ORDER BY count DESC{''.join(f', {d}' for d in group_by)}
+                    LIMIT ?
+                ''', params + [limit if limit is not None else -1])
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"统计分析发现项失败: {e}")
+            return []
+    
+    def get_findings(self, filters: Optional[Dict] = None, limit: int = 50,
+                     before: Optional[Tuple[str, int]] = None) -> List[Dict]:
+        """
+        查询分析发现项明细（统计结果的下钻）
+        
+        按创建时间倒序，键集分页：把上一页最后一条的 (created_time, id) 作为before传入。
+        
+        Args:
+            filters: 筛选条件（见_findings_filter()）
+            limit: 每页条数
+            before: 上一页最后一条的 (created_time, id)
+            
+        Returns:
+            发现项列表
+        """
+        where, params = self._findings_filter(filters)
+        if before:
+            where = f"{where} {'AND' if where else 'WHERE'} (created_time, id) < (?, ?)"
+            params += list(before)
+        
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {', '.join(FINDING_COLUMNS)} FROM analysis_findings
+                    {where}
+                    ORDER BY created_time DESC, id DESC
+                    LIMIT ?
+                ''', params + [limit])
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"查询分析发现项失败: {e}")
+            return []
+    
+    def get_overview_stats(self) -> Dict[str, int]:
+        """
+        获取数据总量概览
+        
+        Returns:
+            {'files': 文件数, 'tender_analyses': 招标分析数, 'bid_analyses': 投标分析数, 'findings': 发现项数}
+        """
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute('''
+                    SELECT (SELECT COUNT(*) FROM files) AS files,
+                           (SELECT COUNT(*) FROM tender_analysis) AS tender_analyses,
+                           (SELECT COUNT(*) FROM bid_analysis) AS bid_analyses,
+                           (SELECT COUNT(*) FROM analysis_findings) AS findings
+                ''').fetchone()
+                return dict(row)
+        except Exception as e:
+            print(f"获取数据概览失败: {e}")
+            return {}
+    
+    def cleanup_old_records(self, days: int = 30) -> Dict[str, int]:
         """
         清理旧记录
         
+        按批删除，每批一个短事务，期间其他写操作可以穿插执行。
+        只删除数据库记录，磁盘文件由RetentionWorker清理（见retention_worker.py）。
+        
+        Args:
+            days: 保留天数
+            
+        Returns:
+            {'analyses': 删除的分析记录数, 'files': 删除的文件记录数}
+        """
+        removed = {'analyses': 0, 'files': 0}
+        while True:
+            deleted = self.delete_expired_analyses(days)
+            removed['analyses'] += deleted
+            if not deleted:
+                break
+        while True:
+            deleted = self.delete_stale_files(days)
+            removed['files'] += len(deleted['file_ids'])
+            if not deleted['file_ids']:
+                break
+        return removed
+    
+    def delete_expired_analyses(self, days: int, batch_size: int = 200) -> int:
+        """
+        删除一批超过保留期的分析记录（发现项由触发器一并删除）
+        以及超过保留期的项目信息检测发现项
+        
         Args:
             days: 保留天数
+            batch_size: 每张分析表本批最多删除的条数
+            
+        Returns:
+            本批删除的条数，为0表示已删除完
         """
+        cutoff = f'-{int(days)} days'
+        
+        def delete_batch(conn):
+            deleted = 0
+            # 先删投标分析，再删它可能引用的招标分析（走created_time索引）
+            for table in ('bid_analysis', 'tender_analysis'):
+                cursor = conn.execute(f'''
+                    DELETE FROM {table} WHERE id IN (
+                        SELECT id FROM {table} WHERE created_time < datetime('now', ?) LIMIT ?
+                    )
+                ''', (cutoff, batch_size))
+                deleted += cursor.rowcount
+            cursor = conn.execute('''
+                DELETE FROM analysis_findings WHERE id IN (
+                    SELECT id FROM analysis_findings
+                    WHERE analysis_type = 'project_info' AND created_time < datetime('now', ?) LIMIT ?
+                )
+            ''', (cutoff, batch_size))
+            deleted += cursor.rowcount
+            return deleted
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            return self.pool.write(delete_batch)
+        except Exception as e:
+            print(f"删除过期分析记录失败: {e}")
+            return 0
+    
+    def delete_stale_files(self, days: int, batch_size: int = 100) -> Dict[str, List[str]]:
+        """
+        删除一批超过保留期且没有分析记录的文件记录及其文档块
+        
+        Args:
+            days: 保留天数
+            batch_size: 本批最多删除的文件数
+            
+        Returns:
+            {'file_ids': 删除的文件ID, 'unreferenced_paths': 不再被任何文件记录引用的存储路径}
+        """
+        cutoff = f'-{int(days)} days'
+        
+        def delete_batch(conn):
+            cursor = conn.cursor()
+            # 按upload_time索引取候选，再用NOT EXISTS逐个探测file_id索引
+            cursor.execute('''
+                SELECT id, file_path FROM files
+                WHERE upload_time < datetime('now', ?)
+                  AND NOT EXISTS (SELECT 1 FROM tender_analysis t WHERE t.file_id = files.id)
+                  AND NOT EXISTS (SELECT 1 FROM bid_analysis b WHERE b.file_id = files.id)
+                LIMIT ?
+            ''', (cutoff, batch_size))
+            stale = cursor.fetchall()
+            stale_ids = [(row['id'],) for row in stale]
+            cursor.executemany('DELETE FROM file_blocks WHERE file_id = ?', stale_ids)
+            # 项目信息发现项由files_findings_ad触发器随文件记录删除
+            cursor.executemany('DELETE FROM files WHERE id = ?', stale_ids)
+            
+            # 内容寻址存储下多条记录可能共用一份磁盘文件，只返回已无引用的路径
+            unreferenced = []
+            for path in {row['file_path'] for row in stale}:
+                cursor.execute('SELECT 1 FROM files WHERE file_path = ? LIMIT 1', (path,))
+                if cursor.fetchone() is None:
+                    unreferenced.append(path)
+            return {'file_ids': [row[0] for row in stale_ids], 'unreferenced_paths': unreferenced}
+        
+        try:
+            return self.pool.write(delete_batch)
+        except Exception as e:
+            print(f"删除过期文件记录失败: {e}")
+            return {'file_ids': [], 'unreferenced_paths': []}
+    
+    def get_referenced_paths(self, paths: List[str]) -> set:
+        """
+        找出仍被文件记录引用的存储路径
+        
+        按路径或内容摘要（内容寻址存储的文件名即摘要）任一匹配即视为引用，
+        项目目录移动后路径前缀变化也不会把仍在使用的文件误判为孤立文件。
+        已归档但尚未完成入库的分片上传会话同样视为引用。
+        
+        Args:
+            paths: 存储路径列表
+            
+        Returns:
+            仍被引用的路径集合；查询失败时返回全部路径（宁可不删）
+        """
+        referenced = set()
+        try:
+            with self.pool.connection() as conn:
+                for i in range(0, len(paths), 400):
+                    chunk = paths[i:i + 400]
+                    stems = {os.path.splitext(os.path.basename(p))[0]: p for p in chunk}
+                    placeholders = ', '.join('?' * len(chunk))
+                    rows = conn.execute(
+                        f'SELECT file_path FROM files WHERE file_path IN ({placeholders})', chunk
+                    ).fetchall()
+                    referenced.update(row[0] for row in rows)
+                    placeholders = ', '.join('?' * len(stems))
+                    rows = conn.execute(
+                        f'SELECT content_hash FROM files WHERE content_hash IN ({placeholders})', list(stems)
+                    ).fetchall()
+                    referenced.update(stems[row[0]] for row in rows)
+                    rows = conn.execute(
+                        f'SELECT content_hash FROM upload_sessions '
+                        f"WHERE status = 'uploading' AND content_hash IN ({placeholders})", list(stems)
+                    ).fetchall()
+                    referenced.update(stems[row[0]] for row in rows)
+            return referenced
+        except Exception as e:
+            print(f"查询文件引用失败: {e}")
+            return set(paths)
+    
+    def get_existing_file_ids(self, file_ids: List[str]) -> set:
+        """
+        找出仍存在文件记录的文件ID
+        
+        Args:
+            file_ids: 文件ID列表
+            
+        Returns:
+            存在记录的文件ID集合；查询失败时返回全部ID（宁可不删）
+        """
+        existing = set()
+        try:
+            with self.pool.connection() as conn:
+                for i in range(0, len(file_ids), 400):
+                    chunk = file_ids[i:i + 400]
+                    rows = conn.execute(
+                        f"SELECT id FROM files WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    existing.update(row[0] for row in rows)
+            return existing
+        except Exception as e:
+            print(f"查询文件记录失败: {e}")
+            return set(file_ids)
+    
+    def incremental_vacuum(self, max_pages: int = 256) -> Dict[str, int]:
+        """
+        回收一批数据库空闲页
+        
+        需要数据库为auto_vacuum=INCREMENTAL模式（新建数据库默认如此，
+        旧数据库执行一次 compress_db.py --vacuum 转换），否则不回收。
+        
+        Args:
+            max_pages: 本批最多回收的页数
+            
+        Returns:
+            {'pages': 回收页数, 'bytes': 回收字节数, 'free_pages': 剩余空闲页数}
+        """
+        def vacuum(conn):
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                return 0, conn.execute('PRAGMA freelist_count').fetchone()[0]
+            before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            # Python驱动对不返回行的语句只执行一步，incremental_vacuum每一步回收一页
+            for _ in range(min(before, max_pages)):
+                conn.execute('PRAGMA incremental_vacuum(1)')
+            after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            return before - after, after
+        
+        try:
+            pages, free_pages = self.pool.write(vacuum)
+            with self.pool.connection() as conn:
+                page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            return {'pages': pages, 'bytes': pages * page_size, 'free_pages': free_pages}
+        except Exception as e:
+            print(f"回收数据库空闲页失败: {e}")
+            return {'pages': 0, 'bytes': 0, 'free_pages': 0}
+    
+    def compress_existing_records(self, batch_size: int = 200) -> Dict[str, Dict[str, int]]:
+        """
+        压缩旧版本写入的未压缩文本
+        ==========================
+        
+        逐表按rowid分批读取仍以TEXT存储的files.content与analysis_result，
+        压缩后写回。每批一个事务，可以在服务运行时执行，中断后重新执行会跳过已压缩的行。
+        压缩后释放的页面需要VACUUM才会归还给文件系统（见compress_db.py）。
+        
+        Args:
+            batch_size: 每批处理的行数
+            
+        Returns:
+            各列的统计：{'表.列': {'rows': 压缩行数, 'bytes_before': 原大小, 'bytes_after': 压缩后大小}}
+        """
+        report = {}
+        for table, column in (('files', 'content'), ('tender_analysis', 'analysis_result'),
+                              ('bid_analysis', 'analysis_result')):
+            stats = {'rows': 0, 'bytes_before': 0, 'bytes_after': 0}
+            last_rowid = 0
+            while True:
+                with self.pool.connection() as conn:
+                    rows = conn.execute(f'''
+                        SELECT rowid, {column} FROM {table}
+                        WHERE rowid > ? AND typeof({column}) = 'text'
+                        ORDER BY rowid LIMIT ?
+                    ''', (last_rowid, batch_size)).fetchall()
+                if not rows:
+                    break
+                last_rowid = rows[-1][0]
                 
-                # 删除旧的分析记录
+                updates = []
+                for rowid, value in rows:
+                    encoded = encode_text(value)
+                    if is_compressed(encoded):
+                        updates.append((encoded, rowid, value))
+                        stats['bytes_before'] += len(value.encode('utf-8'))
+                        stats['bytes_after'] += len(encoded)
+                if updates:
+                    # 只更新内容未变化的行，避免覆盖读取后被重新写入的数据
+                    self.pool.write(lambda conn, batch=updates: conn.executemany(f'''
+                        UPDATE {table} SET {column} = ? WHERE rowid = ? AND {column} = ?
+                    ''', batch))
+                    stats['rows'] += len(updates)
+            report[f'{table}.{column}'] = stats
+        return report
+    
+    def create_upload_session(self, upload_id: str, filename: str, total_size: int, chunk_size: int,
+                              partial_path: str, expected_hash: Optional[str] = None) -> bool:
+        """
+        创建分片上传会话
+        
+        Args:
+            upload_id: 上传会话ID
+            filename: 原始文件名
+            total_size: 文件总大小(字节)
+            chunk_size: 分片大小(字节)
+            partial_path: 分片写入的目标文件路径
+            expected_hash: 客户端声明的整文件SHA-256（可选）
+            
+        Returns:
+            是否创建成功
+        """
+        try:
+            self.pool.execute_write('''
+                INSERT INTO upload_sessions (id, filename, total_size, chunk_size, partial_path, expected_hash)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (upload_id, filename, total_size, chunk_size, partial_path, expected_hash))
+            return True
+        except Exception as e:
+            print(f"创建分片上传会话失败: {e}")
+            return False
+    
+    def get_upload_session(self, upload_id: str) -> Optional[Dict]:
+        """
+        获取分片上传会话
+        
+        Args:
+            upload_id: 上传会话ID
+            
+        Returns:
+            会话字典或None
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
                 cursor.execute('''
-                    DELETE FROM tender_analysis 
-                    WHERE created_time < datetime('now', '-{} days')
-                '''.format(days))
-                
+                    SELECT * FROM upload_sessions WHERE id = ?
+                ''', (upload_id,))
+                row = cursor.fetchone()
+                return dict(row) if row else None
+        except Exception as e:
+            print(f"获取分片上传会话失败: {e}")
+            return None
+    
+    def record_upload_chunk(self, upload_id: str, chunk_offset: int, chunk_size: int, chunk_hash: str) -> bool:
+        """
+        记录一个已校验通过的分片（重复上传同一偏移时覆盖）
+        
+        Args:
+            upload_id: 上传会话ID
+            chunk_offset: 分片起始偏移
+            chunk_size: 分片长度
+            chunk_hash: 分片SHA-256
+            
+        Returns:
+            是否记录成功
+        """
+        def record(conn):
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO upload_chunks (upload_id, chunk_offset, chunk_size, chunk_hash)
+                VALUES (?, ?, ?, ?)
+            ''', (upload_id, chunk_offset, chunk_size, chunk_hash))
+            cursor.execute('''
+                UPDATE upload_sessions SET updated_time = CURRENT_TIMESTAMP WHERE id = ?
+            ''', (upload_id,))
+        
+        try:
+            self.pool.write(record)
+            return True
+        except Exception as e:
+            print(f"记录上传分片失败: {e}")
+            return False
+    
+    def delete_upload_chunk(self, upload_id: str, chunk_offset: int) -> bool:
+        """
+        撤销一个分片的接收记录
+        
+        Args:
+            upload_id: 上传会话ID
+            chunk_offset: 分片起始偏移
+            
+        Returns:
+            是否删除成功
+        """
+        try:
+            self.pool.execute_write('''
+                DELETE FROM upload_chunks WHERE upload_id = ? AND chunk_offset = ?
+            ''', (upload_id, chunk_offset))
+            return True
+        except Exception as e:
+            print(f"删除上传分片记录失败: {e}")
+            return False
+    
+    def get_upload_chunks(self, upload_id: str) -> List[Dict]:
+        """
+        获取会话已接收的分片列表（按偏移排序）
+        
+        Args:
+            upload_id: 上传会话ID
+            
+        Returns:
+            分片列表，每项包含chunk_offset、chunk_size、chunk_hash
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
                 cursor.execute('''
-                    DELETE FROM bid_analysis 
-                    WHERE created_time < datetime('now', '-{} days')
-                '''.format(days))
-                
-                # 删除没有关联分析记录的文件记录
+                    SELECT chunk_offset, chunk_size, chunk_hash
+                    FROM upload_chunks
+                    WHERE upload_id = ?
+                    ORDER BY chunk_offset
+                ''', (upload_id,))
+                return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"获取上传分片失败: {e}")
+            return []
+    
+    def record_upload_blob(self, upload_id: str, content_hash: str, file_path: str) -> bool:
+        """
+        记录上传会话的整文件摘要与归档路径（在移动暂存文件之前调用）
+        
+        归档后入库失败时，重试完成请求据此复用已归档的文件，而不必重新读取已被移走的暂存文件。
+        
+        Args:
+            upload_id: 上传会话ID
+            content_hash: 整文件SHA-256
+            file_path: 内容寻址存储路径
+            
+        Returns:
+            是否记录成功
+        """
+        try:
+            self.pool.execute_write('''
+                UPDATE upload_sessions
+                SET content_hash = ?, file_path = ?, updated_time = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (content_hash, file_path, upload_id))
+            return True
+        except Exception as e:
+            print(f"记录上传文件摘要失败: {e}")
+            return False
+    
+    def complete_upload_session(self, upload_id: str, file_id: str) -> bool:
+        """
+        将上传会话标记为已完成，并清理分片记录
+        
+        Args:
+            upload_id: 上传会话ID
+            file_id: 最终对应的文件ID
+            
+        Returns:
+            是否更新成功
+        """
+        def complete(conn):
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE upload_sessions
+                SET status = 'completed', file_id = ?, updated_time = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (file_id, upload_id))
+            cursor.execute('DELETE FROM upload_chunks WHERE upload_id = ?', (upload_id,))
+        
+        try:
+            self.pool.write(complete)
+            return True
+        except Exception as e:
+            print(f"完成分片上传会话失败: {e}")
+            return False
+    
+    def get_stale_upload_sessions(self, hours: int = 24) -> List[Dict]:
+        """
+        获取长时间未更新且未完成的上传会话
+        
+        Args:
+            hours: 超过多少小时未更新视为过期
+            
+        Returns:
+            过期会话列表
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
                 cursor.execute('''
-                    DELETE FROM files 
-                    WHERE id NOT IN (
-                        SELECT DISTINCT file_id FROM tender_analysis
-                        UNION
-                        SELECT DISTINCT file_id FROM bid_analysis
-                    ) AND upload_time < datetime('now', '-{} days')
-                '''.format(days))
-                
-                conn.commit()
-                
+                    SELECT id, partial_path FROM upload_sessions
+                    WHERE status = 'uploading' AND updated_time < datetime('now', ?)
+                ''', (f'-{int(hours)} hours',))
+                return [dict(row) for row in cursor.fetchall()]
         except Exception as e:
-            print(f"清理旧记录失败: {e}")
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+            print(f"获取过期上传会话失败: {e}")
+            return []
+    
+    def delete_upload_session(self, upload_id: str) -> bool:
+        """
+        删除上传会话及其分片记录
+        
+        Args:
+            upload_id: 上传会话ID
+            
+        Returns:
+            是否删除成功
+        """
+        def delete_session(conn):
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM upload_chunks WHERE upload_id = ?', (upload_id,))
+            cursor.execute('DELETE FROM upload_sessions WHERE id = ?', (upload_id,))
+        
+        try:
+            self.pool.write(delete_session)
+            return True
+        except Exception as e:
+            print(f"删除上传会话失败: {e}")
+            return False
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+SQLite连接池模块
+================
+
+本模块为DatabaseManager提供复用的SQLite连接和单写线程队列。
+原实现每次调用都新建连接、且未设置任何PRAGMA（默认回滚日志模式），
+多个请求线程同时写入时容易出现 "database is locked"。
+
+技术特点：
+    - WAL日志模式：读写互不阻塞，读操作不再因写事务等待
+    - synchronous=NORMAL：WAL模式下仍保证数据库一致性，提交时少一次fsync
+    - busy_timeout：偶发的锁等待由SQLite内部重试，而不是直接报错
+    - mmap_size：读操作走内存映射，减少read()系统调用
+    - 语句缓存：每个连接缓存已编译的SQL语句，重复查询无需重新解析
+    - 读连接池：连接用完归还，Flask每个请求一个线程时也能复用；
+      同一线程内嵌套调用复用同一个连接
+    - 单写线程：所有写操作排队交给一个线程执行，
+      队列中积压的多个写操作合并为一个事务提交（group commit），
+      每个写操作包在SAVEPOINT中，单个失败不影响同批其他写操作
+
+使用示例：
+    pool = ConnectionPool(db_path)
+    with pool.connection() as conn:
+        row = conn.execute('SELECT ...').fetchone()
+    pool.write(lambda conn: conn.execute('INSERT ...', params))
+
+依赖库：
+    - sqlite3: SQLite数据库接口
+    - threading/queue: 写线程与任务队列
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+class _WriteJob:
+    """写队列中的一个写操作"""
+
+    __slots__ = ('func', 'args', 'done', 'result', 'error')
+
+    def __init__(self, func: Callable, args: tuple):
+        self.func = func
+        self.args = args
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ConnectionPool:
+    """
+    SQLite连接池
+    ============
+
+    读操作通过connection()借用池中的连接；
+    写操作通过write()提交给写线程，调用方阻塞到所在批次提交完成后返回，
+    因此write()返回时数据已经落库，与原先逐个提交的语义一致。
+
+    写操作函数的约定：
+        - 第一个参数是写线程的连接，其余参数由write()透传
+        - 不要调用conn.commit()/rollback()，事务由写线程统一管理
+    """
+
+    # 默认锁等待时间（毫秒）
+    DEFAULT_BUSY_TIMEOUT_MS = 5000
+
+    # 默认内存映射大小（256MB）
+    DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+
+    # 每个连接缓存的已编译语句数
+    DEFAULT_CACHED_STATEMENTS = 256
+
+    # 空闲读连接上限
+    DEFAULT_MAX_IDLE = 8
+
+    # 单个批次最多合并的写操作数
+    MAX_BATCH_SIZE = 64
+
+    def __init__(self, db_path: str, busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+                 mmap_size: int = DEFAULT_MMAP_SIZE,
+                 cached_statements: int = DEFAULT_CACHED_STATEMENTS,
+                 max_idle: int = DEFAULT_MAX_IDLE):
+        """
+        初始化连接池并启动写线程
+
+        Args:
+            db_path (str): 数据库文件路径
+            busy_timeout_ms (int): 锁等待时间（毫秒）
+            mmap_size (int): 内存映射大小（字节），0表示不使用
+            cached_statements (int): 每个连接缓存的语句数
+            max_idle (int): 空闲读连接上限，超出的连接归还时直接关闭
+        """
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.max_idle = max_idle
+
+        self._lock = threading.Lock()
+        self._idle: List[sqlite3.Connection] = []
+        self._local = threading.local()
+        self._closed = False
+        self._stats = {'connections_opened': 0, 'reads': 0, 'writes': 0, 'write_batches': 0, 'write_errors': 0}
+
+        # 写线程独占的连接（在写线程中创建后只由写线程使用）
+        self._writer_conn = self._open_connection()
+        self._queue: 'queue.Queue[Optional[_WriteJob]]' = queue.Queue()
+        self._writer = threading.Thread(target=self._writer_loop, name='sqlite-writer', daemon=True)
+        self._writer.start()
+
+    def _open_connection(self) -> sqlite3.Connection:
+        """创建并配置一个新连接"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,           # 自动提交，事务由写线程显式管理
+            check_same_thread=False,        # 连接会在线程间归还复用，同一时刻只被一个线程使用
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row
+        # 增量回收空闲页（只对新建的数据库生效，旧数据库需执行一次VACUUM转换，见compress_db.py）
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout_ms)}')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        with self._lock:
+            self._stats['connections_opened'] += 1
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        借用一个读连接
+
+        同一线程嵌套调用时复用外层借到的连接；最外层退出时归还到空闲列表。
+        读连接处于自动提交模式，不要通过它写入数据（写入请使用write()）。
+
+        Yields:
+            sqlite3.Connection: 数据库连接（row_factory为sqlite3.Row）
+        """
+        if self._closed:
+            raise RuntimeError('连接池已关闭')
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            self._stats['reads'] += 1
+        if conn is None:
+            conn = self._open_connection()
+
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+
+    def _release(self, conn: sqlite3.Connection):
+        """归还读连接，空闲连接过多或连接池已关闭时直接关闭"""
+        if conn.in_transaction:
+            # 调用方误开了事务，回滚后再复用
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                conn.close()
+                return
+        with self._lock:
+            if not self._closed and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def write(self, func: Callable[..., Any], *args) -> Any:
+        """
+        提交一个写操作并等待其所在批次提交
+
+        Args:
+            func (Callable): 写操作函数，签名为func(conn, *args)
+            *args: 透传给写操作函数的参数
+
+        Returns:
+            Any: 写操作函数的返回值
+
+        Raises:
+            Exception: 写操作函数或批次提交抛出的异常
+        """
+        if threading.current_thread() is self._writer:
+            # 写操作内部再次调用write()时直接执行，避免自己等待自己
+            return func(self._writer_conn, *args)
+        if self._closed:
+            raise RuntimeError('连接池已关闭')
+
+        job = _WriteJob(func, args)
+        self._queue.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def execute_write(self, sql: str, params: tuple = ()) -> int:
+        """
+        执行单条写SQL
+
+        Args:
+            sql (str): SQL语句
+            params (tuple): 参数
+
+        Returns:
+            int: 受影响的行数
+        """
+        return self.write(lambda conn: conn.execute(sql, params).rowcount)
+
+    def _writer_loop(self):
+        """写线程：取出队列中积压的写操作，合并为一个事务提交"""
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+
+            batch = [job]
+            stop = False
+            while len(batch) < self.MAX_BATCH_SIZE:
+                try:
+                    next_job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_job is None:
+                    stop = True
+                    break
+                batch.append(next_job)
+
+            self._run_batch(batch)
+            if stop:
+                break
+
+        self._writer_conn.close()
+
+    def _run_batch(self, batch: List[_WriteJob]):
+        """在一个事务中执行一批写操作，每个写操作使用独立的SAVEPOINT"""
+        conn = self._writer_conn
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for job in batch:
+                conn.execute('SAVEPOINT write_job')
+                try:
+                    job.result = job.func(conn, *job.args)
+                    conn.execute('RELEASE write_job')
+                except Exception as e:
+                    job.error = e
+                    conn.execute('ROLLBACK TO write_job')
+                    conn.execute('RELEASE write_job')
+            conn.execute('COMMIT')
+        except Exception as e:
+            # 开始或提交事务失败，整批写操作都视为失败
+            if conn.in_transaction:
+                try:
+                    conn.execute('ROLLBACK')
+                except sqlite3.Error:
+                    pass
+            for job in batch:
+                if job.error is None:
+                    job.error = e
+        finally:
+            with self._lock:
+                self._stats['write_batches'] += 1
+                self._stats['writes'] += len(batch)
+                self._stats['write_errors'] += sum(1 for job in batch if job.error is not None)
+            for job in batch:
+                job.done.set()
+
+    def get_stats(self) -> Dict:
+        """
+        获取连接池统计信息
+
+        Returns:
+            Dict: 统计信息
+                - connections_opened: 累计创建的连接数
+                - idle_connections: 当前空闲读连接数
+                - reads: 读连接借用次数
+                - writes/write_batches: 写操作数/提交批次数
+                - avg_batch_size: 平均每批写操作数
+                - write_errors: 失败的写操作数
+                - pending_writes: 队列中等待的写操作数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle_connections'] = len(self._idle)
+        batches = stats['write_batches']
+        stats['avg_batch_size'] = round(stats['writes'] / batches, 2) if batches else 0.0
+        stats['pending_writes'] = self._queue.qsize()
+        return stats
+
+    def close(self):
+        """等待已排队的写操作完成，关闭写线程和空闲连接"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            idle, self._idle = self._idle, []
+        self._queue.put(None)
+        self._writer.join()
+        for conn in idle:
+            conn.close()
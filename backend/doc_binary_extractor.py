@@ -0,0 +1,677 @@
+#!/usr/bin/env python3
+"""
+Word 97-2003 (.doc) 二进制文档文本提取器
+========================================
+
+本模块使用纯Python直接解析.doc文件，不依赖Word/COM组件，可在Linux服务器上运行。
+
+文件结构（MS-CFB / MS-DOC）：
+    .doc文件是一个OLE复合文档，其中：
+    - WordDocument 流：文件信息块(FIB)、正文字符、段落属性页(PAPX FKP)
+    - 0Table/1Table 流：片段表(Clx/PlcPcd)、段落属性索引(PlcBtePapx)、样式表(STSH)
+
+解析流程：
+    1. 读取复合文档扇区分配表，定位 WordDocument 与 Table 流
+    2. 解析FIB，得到正文字符数(ccpText)与各结构在Table流中的位置
+    3. 按片段表将字符位置(CP)映射到文件偏移(FC)，逐片段解码文本
+       （压缩片段为cp1252单字节，非压缩片段为UTF-16LE）
+    4. 通过PAPX FKP查询每个段落标记的样式(istd)与表格属性，
+       再由样式表中的内置样式编号(sti 1-9)确定标题层级
+
+输出结构与docx_stream_extractor一致：
+    {
+        "text": "全文文本",
+        "blocks": [{"kind": "paragraph", "level": 1, "text": "...", "char_offset": 0}, ...]
+    }
+
+局限性：
+    - 不支持加密文档和Word 6.0/95格式
+    - 只提取正文，不含页眉页脚、脚注、批注
+    - 域代码只保留域结果（如目录域只输出目录文本）
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import re
+import struct
+from bisect import bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from docx_stream_extractor import HEADING_NAME_PATTERN, join_blocks
+
+# 提取器标识与版本，提取逻辑变化时递增版本号
+EXTRACTOR_NAME = 'doc-binary'
+EXTRACTOR_VERSION = '1'
+
+# === 复合文档(CFB)常量 ===
+CFB_SIGNATURE = b'\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1'
+END_OF_CHAIN = 0xFFFFFFFE
+MAX_REGULAR_SECTOR = 0xFFFFFFFA
+NO_STREAM = 0xFFFFFFFF
+DIR_ENTRY_SIZE = 128
+
+# === Word文档常量 ===
+WORD_IDENT = 0xA5EC
+MIN_WORD97_NFIB = 0x00C1
+
+FIB_FLAG_ENCRYPTED = 0x0100
+FIB_FLAG_WHICH_TABLE = 0x0200
+
+# FibRgLw97中ccpText的下标
+FIB_LW_CCP_TEXT = 3
+
+# FibRgFcLcb97中各结构(fc, lcb)的下标
+FIB_STSHF = 1
+FIB_PLCF_BTE_PAPX = 13
+FIB_CLX = 33
+
+FKP_PAGE_SIZE = 512
+
+# 段落属性修改符(sprm)
+SPRM_P_FIN_TABLE = 0x2416
+SPRM_P_FTTP = 0x2417
+SPRM_P_OUT_LVL = 0x2640
+SPRM_P_ITAP = 0x6649
+SPRM_P_FINNER_TTP = 0x244C
+SPRM_P_CHG_TABS = 0xC615
+SPRM_T_DEF_TABLE = 0xD608
+
+# 正文中的特殊字符：段落标记、单元格/行结束标记、域开始/分隔/结束
+PARAGRAPH_MARK = '\r'
+CELL_MARK = '\x07'
+FIELD_BEGIN = '\x13'
+FIELD_SEPARATOR = '\x14'
+FIELD_END = '\x15'
+SPECIAL_CHARS = re.compile('[\r\x07\x13\x14\x15]')
+
+# 其余控制字符的转换：手动换行/分页转为换行，不间断连字符转为"-"，其余删除
+CONTROL_CHAR_TABLE = {code: None for code in range(0x20) if code not in (0x09,)}
+CONTROL_CHAR_TABLE.update({0x0B: '\n', 0x0C: '\n', 0x1E: '-'})
+
+
+def _u16(data: bytes, offset: int) -> int:
+    return struct.unpack_from('<H', data, offset)[0]
+
+
+def _u32(data: bytes, offset: int) -> int:
+    return struct.unpack_from('<I', data, offset)[0]
+
+
+class CompoundFile:
+    """
+    OLE复合文档（MS-CFB）只读解析器
+    ===============================
+
+    只实现读取根存储下流的功能，足以读取Word文档所需的 WordDocument 与 Table 流。
+
+    使用示例：
+        cfb = CompoundFile(data)
+        word_stream = cfb.read_stream('WordDocument')
+    """
+
+    def __init__(self, data: bytes):
+        """
+        解析复合文档头、扇区分配表与目录
+
+        Args:
+            data (bytes): 文件内容
+
+        Raises:
+            ValueError: 不是有效的复合文档
+        """
+        if len(data) < 512 or data[:8] != CFB_SIGNATURE:
+            raise ValueError("不是有效的OLE复合文档")
+
+        self.data = data
+        self.major_version = _u16(data, 26)
+        self.sector_size = 1 << _u16(data, 30)
+        self.mini_sector_size = 1 << _u16(data, 32)
+        self.mini_stream_cutoff = _u32(data, 56)
+
+        self.fat = self._load_fat()
+        self.entries = self._load_directory(_u32(data, 48))
+        if not self.entries:
+            raise ValueError("复合文档目录为空")
+
+        root = self.entries[0]
+        self.mini_fat = self._load_mini_fat(_u32(data, 60))
+        self.mini_stream = self._read_chain(root['start'], root['size'])
+
+    def read_stream(self, name: str) -> Optional[bytes]:
+        """
+        读取根存储下的指定流
+
+        Args:
+            name (str): 流名称（不区分大小写）
+
+        Returns:
+            Optional[bytes]: 流内容，不存在时返回None
+        """
+        for entry in self._root_children():
+            if entry['type'] == 2 and entry['name'].lower() == name.lower():
+                if entry['size'] < self.mini_stream_cutoff:
+                    return self._read_mini_chain(entry['start'], entry['size'])
+                return self._read_chain(entry['start'], entry['size'])
+        return None
+
+    def _sector(self, sector_id: int) -> bytes:
+        """读取一个常规扇区"""
+        offset = (sector_id + 1) * self.sector_size
+        return self.data[offset:offset + self.sector_size]
+
+    def _load_fat(self) -> List[int]:
+        """根据DIFAT读取扇区分配表(FAT)"""
+        data = self.data
+        fat_sector_count = _u32(data, 44)
+        difat = list(struct.unpack_from('<109I', data, 76))
+
+        # DIFAT超过109项时，其余项位于DIFAT扇区链中
+        next_difat = _u32(data, 68)
+        per_sector = self.sector_size // 4 - 1
+        guard = 0
+        while next_difat <= MAX_REGULAR_SECTOR and guard < fat_sector_count + 1:
+            values = struct.unpack(f'<{per_sector + 1}I', self._sector(next_difat))
+            difat.extend(values[:per_sector])
+            next_difat = values[per_sector]
+            guard += 1
+
+        fat_bytes = b''.join(
+            self._sector(sid) for sid in difat[:fat_sector_count] if sid <= MAX_REGULAR_SECTOR
+        )
+        return list(struct.unpack(f'<{len(fat_bytes) // 4}I', fat_bytes))
+
+    def _chain(self, start: int, table: List[int]) -> List[int]:
+        """沿分配表读取扇区链，防止循环引用"""
+        chain: List[int] = []
+        sector_id = start
+        while sector_id <= MAX_REGULAR_SECTOR:
+            if sector_id >= len(table) or len(chain) > len(table):
+                raise ValueError("复合文档扇区链损坏")
+            chain.append(sector_id)
+            sector_id = table[sector_id]
+        return chain
+
+    def _read_chain(self, start: int, size: int) -> bytes:
+        """读取常规扇区链中的数据"""
+        if start > MAX_REGULAR_SECTOR:
+            return b''
+        data = b''.join(self._sector(sid) for sid in self._chain(start, self.fat))
+        return data[:size]
+
+    def _read_mini_chain(self, start: int, size: int) -> bytes:
+        """读取迷你流中的数据（小于截断大小的流）"""
+        if start > MAX_REGULAR_SECTOR:
+            return b''
+        unit = self.mini_sector_size
+        data = b''.join(
+            self.mini_stream[sid * unit:(sid + 1) * unit] for sid in self._chain(start, self.mini_fat)
+        )
+        return data[:size]
+
+    def _load_mini_fat(self, start: int) -> List[int]:
+        """读取迷你扇区分配表"""
+        if start > MAX_REGULAR_SECTOR:
+            return []
+        data = b''.join(self._sector(sid) for sid in self._chain(start, self.fat))
+        return list(struct.unpack(f'<{len(data) // 4}I', data))
+
+    def _load_directory(self, start: int) -> List[Dict]:
+        """读取目录项"""
+        data = b''.join(self._sector(sid) for sid in self._chain(start, self.fat))
+        entries: List[Dict] = []
+        for offset in range(0, len(data) - DIR_ENTRY_SIZE + 1, DIR_ENTRY_SIZE):
+            name_length = _u16(data, offset + 64)
+            size = struct.unpack_from('<Q', data, offset + 120)[0]
+            if self.major_version == 3:
+                size &= 0xFFFFFFFF
+            entries.append({
+                'name': data[offset:offset + max(name_length - 2, 0)].decode('utf-16-le', errors='replace'),
+                'type': data[offset + 66],
+                'left': _u32(data, offset + 68),
+                'right': _u32(data, offset + 72),
+                'child': _u32(data, offset + 76),
+                'start': _u32(data, offset + 116),
+                'size': size,
+            })
+        return entries
+
+    def _root_children(self) -> Iterator[Dict]:
+        """遍历根存储的直接子项（目录项以红黑树组织）"""
+        pending = [self.entries[0]['child']]
+        visited = set()
+        while pending:
+            index = pending.pop()
+            if index == NO_STREAM or index >= len(self.entries) or index in visited:
+                continue
+            visited.add(index)
+            entry = self.entries[index]
+            yield entry
+            pending.append(entry['left'])
+            pending.append(entry['right'])
+
+
+class _ParagraphProperties:
+    """段落属性（只保留文本提取需要的字段）"""
+
+    __slots__ = ('istd', 'in_table', 'row_end', 'outline_level')
+
+    def __init__(self, istd: int = 0, in_table: bool = False, row_end: bool = False,
+                 outline_level: Optional[int] = None):
+        self.istd = istd
+        self.in_table = in_table
+        self.row_end = row_end
+        self.outline_level = outline_level
+
+
+def _iter_sprms(grpprl: bytes) -> Iterator[Tuple[int, bytes]]:
+    """
+    解析属性修改符列表(grpprl)
+
+    操作数长度由sprm的spra字段决定，spra=6为变长，其中两个特殊sprm需要单独计算长度。
+    """
+    pos = 0
+    length = len(grpprl)
+    while pos + 2 <= length:
+        sprm = _u16(grpprl, pos)
+        pos += 2
+        spra = sprm >> 13
+        if spra in (0, 1):
+            size = 1
+        elif spra in (2, 4, 5):
+            size = 2
+        elif spra == 3:
+            size = 4
+        elif spra == 7:
+            size = 3
+        elif sprm == SPRM_T_DEF_TABLE:
+            if pos + 2 > length:
+                return
+            size = _u16(grpprl, pos) + 1
+        elif sprm == SPRM_P_CHG_TABS and pos < length and grpprl[pos] == 255:
+            # cb=255时实际长度由删除/添加的制表位数量决定
+            deleted = grpprl[pos + 1] if pos + 1 < length else 0
+            add_pos = pos + 2 + deleted * 4
+            added = grpprl[add_pos] if add_pos < length else 0
+            size = 2 + deleted * 4 + 1 + added * 3
+        else:
+            if pos >= length:
+                return
+            size = grpprl[pos] + 1
+        yield sprm, grpprl[pos:pos + size]
+        pos += size
+
+
+def _parse_paragraph_properties(data: bytes) -> _ParagraphProperties:
+    """解析GrpPrlAndIstd：样式索引 + 段落属性修改符"""
+    if len(data) < 2:
+        return _ParagraphProperties()
+    props = _ParagraphProperties(istd=_u16(data, 0))
+    for sprm, operand in _iter_sprms(data[2:]):
+        if not operand:
+            continue
+        if sprm == SPRM_P_FIN_TABLE:
+            props.in_table = operand[0] != 0
+        elif sprm == SPRM_P_ITAP:
+            props.in_table = props.in_table or struct.unpack('<i', operand[:4].ljust(4, b'\0'))[0] > 0
+        elif sprm in (SPRM_P_FTTP, SPRM_P_FINNER_TTP):
+            props.row_end = props.row_end or operand[0] != 0
+        elif sprm == SPRM_P_OUT_LVL:
+            props.outline_level = operand[0] + 1 if operand[0] <= 8 else None
+    return props
+
+
+class WordBinaryDocument:
+    """
+    Word 97-2003 文档解析器
+    =======================
+
+    使用示例：
+        document = WordBinaryDocument.open("招标文件.doc")
+        for paragraph in document.iter_paragraphs():
+            print(paragraph['level'], paragraph['text'])
+    """
+
+    def __init__(self, data: bytes):
+        """
+        解析FIB、片段表、段落属性与样式表
+
+        Args:
+            data (bytes): .doc文件内容
+
+        Raises:
+            ValueError: 文件格式不支持（非Word 97+、加密文档等）
+        """
+        cfb = CompoundFile(data)
+        word = cfb.read_stream('WordDocument')
+        if word is None or len(word) < 34:
+            raise ValueError("复合文档中缺少WordDocument流")
+
+        if _u16(word, 0) != WORD_IDENT:
+            raise ValueError("WordDocument流标识不正确")
+        if _u16(word, 2) < MIN_WORD97_NFIB:
+            raise ValueError("不支持Word 6.0/95及更早格式")
+
+        flags = _u16(word, 0x0A)
+        if flags & FIB_FLAG_ENCRYPTED:
+            raise ValueError("不支持加密的.doc文档")
+
+        table_name = '1Table' if flags & FIB_FLAG_WHICH_TABLE else '0Table'
+        table = cfb.read_stream(table_name)
+        if table is None:
+            raise ValueError(f"复合文档中缺少{table_name}流")
+
+        self.word = word
+        self.table = table
+
+        # FIB: FibBase(32字节) -> csw + FibRgW -> cslw + FibRgLw -> cbRgFcLcb + FibRgFcLcb
+        csw = _u16(word, 32)
+        lw_offset = 34 + csw * 2
+        cslw = _u16(word, lw_offset)
+        self.ccp_text = struct.unpack_from('<i', word, lw_offset + 2 + FIB_LW_CCP_TEXT * 4)[0]
+        fc_lcb_offset = lw_offset + 2 + cslw * 4
+        self._fc_lcb_count = _u16(word, fc_lcb_offset)
+        self._fc_lcb_base = fc_lcb_offset + 2
+
+        self.pieces = self._load_pieces()
+        self._papx_starts, self._papx_runs = self._load_papx()
+        self.heading_levels = self._load_style_levels()
+
+    @classmethod
+    def open(cls, file_path: str) -> 'WordBinaryDocument':
+        """读取文件并解析"""
+        with open(file_path, 'rb') as f:
+            return cls(f.read())
+
+    def _fc_lcb(self, index: int) -> Tuple[int, int]:
+        """读取FibRgFcLcb中的(fc, lcb)"""
+        if index >= self._fc_lcb_count:
+            return 0, 0
+        return struct.unpack_from('<II', self.word, self._fc_lcb_base + index * 8)
+
+    def _load_pieces(self) -> List[Tuple[int, int, int, bool]]:
+        """
+        解析片段表(Clx -> PlcPcd)
+
+        Returns:
+            List[Tuple[int, int, int, bool]]: (起始CP, 结束CP, 文件偏移, 是否压缩)
+        """
+        fc, lcb = self._fc_lcb(FIB_CLX)
+        clx = self.table[fc:fc + lcb]
+
+        pos = 0
+        while pos < len(clx):
+            clxt = clx[pos]
+            if clxt == 0x01:
+                # Prc：跳过属性修改符
+                pos += 3 + struct.unpack_from('<h', clx, pos + 1)[0]
+            elif clxt == 0x02:
+                plc_size = _u32(clx, pos + 1)
+                plc = clx[pos + 5:pos + 5 + plc_size]
+                break
+            else:
+                raise ValueError("片段表格式错误")
+        else:
+            raise ValueError("文档中缺少片段表")
+
+        count = (len(plc) - 4) // 12
+        cps = struct.unpack_from(f'<{count + 1}I', plc, 0)
+        pieces = []
+        for i in range(count):
+            fc_value = _u32(plc, 4 * (count + 1) + 8 * i + 2)
+            compressed = bool(fc_value & 0x40000000)
+            file_offset = fc_value & 0x3FFFFFFF
+            if compressed:
+                file_offset //= 2
+            pieces.append((cps[i], cps[i + 1], file_offset, compressed))
+        return pieces
+
+    def _load_papx(self) -> Tuple[List[int], List[Tuple[int, _ParagraphProperties]]]:
+        """
+        读取全部段落属性页(PAPX FKP)
+
+        Returns:
+            Tuple: (按起始FC排序的列表, [(结束FC, 段落属性)])，用于二分查找
+        """
+        fc, lcb = self._fc_lcb(FIB_PLCF_BTE_PAPX)
+        plc = self.table[fc:fc + lcb]
+        count = (len(plc) - 4) // 8 if len(plc) >= 4 else 0
+
+        runs: List[Tuple[int, int, _ParagraphProperties]] = []
+        cache: Dict[int, _ParagraphProperties] = {}
+        for i in range(count):
+            page_number = _u32(plc, 4 * (count + 1) + 4 * i) & 0x3FFFFF
+            page = self.word[page_number * FKP_PAGE_SIZE:(page_number + 1) * FKP_PAGE_SIZE]
+            if len(page) < FKP_PAGE_SIZE:
+                continue
+            crun = page[511]
+            boundaries = struct.unpack_from(f'<{crun + 1}I', page, 0)
+            for j in range(crun):
+                b_offset = page[4 * (crun + 1) + 13 * j] * 2
+                props = cache.get(b_offset) if b_offset else _ParagraphProperties()
+                if props is None:
+                    cb = page[b_offset]
+                    if cb:
+                        start, size = b_offset + 1, cb * 2 - 1
+                    else:
+                        start, size = b_offset + 2, page[b_offset + 1] * 2
+                    props = _parse_paragraph_properties(page[start:start + size])
+                    cache[b_offset] = props
+                runs.append((boundaries[j], boundaries[j + 1], props))
+            cache.clear()
+
+        runs.sort(key=lambda run: run[0])
+        return [run[0] for run in runs], [(run[1], run[2]) for run in runs]
+
+    def _load_style_levels(self) -> Dict[int, int]:
+        """
+        解析样式表(STSH)，得到样式索引(istd)到标题层级的映射
+
+        内置标题样式的sti为1-9；自定义样式按名称（"标题 1"、"Heading 1"）判断。
+        """
+        fc, lcb = self._fc_lcb(FIB_STSHF)
+        stsh = self.table[fc:fc + lcb]
+        if len(stsh) < 6:
+            return {}
+
+        cb_stshi = _u16(stsh, 0)
+        style_count = _u16(stsh, 2)
+        base_size = _u16(stsh, 4)
+
+        levels: Dict[int, int] = {}
+        pos = 2 + cb_stshi
+        for istd in range(style_count):
+            if pos + 2 > len(stsh):
+                break
+            cb_std = _u16(stsh, pos)
+            pos += 2
+            if cb_std >= 2:
+                std = stsh[pos:pos + cb_std]
+                sti = _u16(std, 0) & 0x0FFF
+                if 1 <= sti <= 9:
+                    levels[istd] = sti
+                elif base_size + 2 <= len(std):
+                    name_length = _u16(std, base_size)
+                    name = std[base_size + 2:base_size + 2 + name_length * 2].decode('utf-16-le', errors='replace')
+                    match = HEADING_NAME_PATTERN.match(name.strip())
+                    if match:
+                        levels[istd] = int(match.group(1))
+            pos += cb_std
+        return levels
+
+    def _properties_at(self, fc: int) -> Optional[_ParagraphProperties]:
+        """查询文件偏移处段落标记对应的段落属性"""
+        index = bisect_right(self._papx_starts, fc) - 1
+        if index >= 0 and fc < self._papx_runs[index][0]:
+            return self._papx_runs[index][1]
+        return None
+
+    def iter_paragraphs(self) -> Iterator[Dict]:
+        """
+        按顺序产出正文中的段落
+        ======================
+
+        Yields:
+            Dict: 段落信息
+                - index (int): 段落序号（从1开始，含表格单元格中的段落）
+                - cp (int): 段落起始字符位置
+                - text (str): 段落文本（已去除域代码与控制字符）
+                - level (Optional[int]): 标题层级
+                - in_table (bool): 是否位于表格中
+                - mark (str): 结束标记，'paragraph'、'cell' 或 'row'
+        """
+        parts: List[str] = []
+        paragraph_cp = 0
+        index = 0
+        # 域状态栈：True表示处于域代码部分（不输出），False表示处于域结果部分
+        fields: List[bool] = []
+        hidden = 0
+        previous_mark = ''
+
+        for cp_start, cp_end, file_offset, compressed in self.pieces:
+            if cp_start >= self.ccp_text:
+                break
+            cp_end = min(cp_end, self.ccp_text)
+            width = 1 if compressed else 2
+            raw = self.word[file_offset:file_offset + (cp_end - cp_start) * width]
+            text = raw.decode('cp1252' if compressed else 'utf-16-le', errors='replace')
+
+            pos = 0
+            for match in SPECIAL_CHARS.finditer(text):
+                if not hidden and match.start() > pos:
+                    parts.append(text[pos:match.start()])
+                pos = match.end()
+                char = match.group()
+
+                if char == FIELD_BEGIN:
+                    fields.append(True)
+                    hidden += 1
+                elif char == FIELD_SEPARATOR:
+                    if fields and fields[-1]:
+                        fields[-1] = False
+                        hidden -= 1
+                elif char == FIELD_END:
+                    if fields and fields.pop():
+                        hidden -= 1
+                else:
+                    mark_fc = file_offset + match.start() * width
+                    props = self._properties_at(mark_fc)
+                    paragraph_text = ''.join(parts).translate(CONTROL_CHAR_TABLE)
+                    index += 1
+
+                    if char == CELL_MARK:
+                        if props is not None:
+                            mark = 'row' if props.row_end else 'cell'
+                        else:
+                            # 缺少段落属性时，紧跟单元格标记的空段落视为行结束
+                            mark = 'row' if not paragraph_text and previous_mark == CELL_MARK else 'cell'
+                        in_table = True
+                    else:
+                        mark = 'paragraph'
+                        in_table = props.in_table if props is not None else False
+
+                    level = None
+                    if props is not None and not in_table:
+                        level = props.outline_level or self.heading_levels.get(props.istd)
+
+                    yield {
+                        'index': index,
+                        'cp': paragraph_cp,
+                        'text': paragraph_text,
+                        'level': level,
+                        'in_table': in_table,
+                        'mark': mark,
+                    }
+                    parts = []
+                    paragraph_cp = cp_start + match.end()
+                    previous_mark = char
+
+            if not hidden and pos < len(text):
+                parts.append(text[pos:])
+
+        if parts:
+            index += 1
+            yield {
+                'index': index,
+                'cp': paragraph_cp,
+                'text': ''.join(parts).translate(CONTROL_CHAR_TABLE),
+                'level': None,
+                'in_table': False,
+                'mark': 'paragraph',
+            }
+
+    def iter_blocks(self) -> Iterator[Dict]:
+        """
+        按正文顺序产出段落与表格行（与docx_stream_extractor的块结构一致）
+
+        单元格内的多个段落以换行连接，表格行以" | "连接单元格。
+        """
+        cell_parts: List[str] = []
+        cells: List[str] = []
+
+        for paragraph in self.iter_paragraphs():
+            mark = paragraph['mark']
+            if mark == 'row':
+                yield {'kind': 'table_row', 'level': None, 'text': ' | '.join(cells)}
+                cells = []
+                cell_parts = []
+            elif mark == 'cell':
+                cell_parts.append(paragraph['text'])
+                cells.append('\n'.join(cell_parts).strip())
+                cell_parts = []
+            elif paragraph['in_table']:
+                cell_parts.append(paragraph['text'])
+            else:
+                if cells:
+                    # 表格没有行结束标记时，仍输出已收集的单元格
+                    yield {'kind': 'table_row', 'level': None, 'text': ' | '.join(cells)}
+                    cells = []
+                yield {'kind': 'paragraph', 'level': paragraph['level'], 'text': paragraph['text']}
+
+        if cells:
+            yield {'kind': 'table_row', 'level': None, 'text': ' | '.join(cells)}
+
+
+def extract_doc(file_path: str) -> Dict:
+    """
+    提取.doc全文及块结构
+    ====================
+
+    Args:
+        file_path (str): .doc文件路径
+
+    Returns:
+        Dict: 提取结果，结构同docx_stream_extractor.extract_docx()
+
+    Raises:
+        ValueError: 文件不是受支持的Word 97-2003文档
+    """
+    document = WordBinaryDocument.open(file_path)
+    return join_blocks(document.iter_blocks())
+
+
+def read_doc_headings(file_path: str) -> List[Dict]:
+    """
+    读取.doc文档中的标题段落
+
+    Args:
+        file_path (str): .doc文件路径
+
+    Returns:
+        List[Dict]: 标题列表，每项包含text、level、index（段落序号）、cp（起始字符位置）
+    """
+    document = WordBinaryDocument.open(file_path)
+    headings = []
+    for paragraph in document.iter_paragraphs():
+        if paragraph['level'] is None:
+            continue
+        text = paragraph['text'].strip()
+        if text:
+            headings.append({
+                'text': text,
+                'level': paragraph['level'],
+                'index': paragraph['index'],
+                'cp': paragraph['cp'],
+            })
+    return headings
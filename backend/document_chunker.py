@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+长文档分段模块
+==============
+
+将超出模型上下文的长文档切分为若干段，供分段（map-reduce）分析使用。
+
+切分规则：
+    - 每段不超过max_chars个字符
+    - 优先在结构边界处切分（标题块、PDF页的起始偏移，来自file_blocks）；
+      段内没有合适的结构边界时退到换行处，仍没有时按长度硬切
+    - 相邻段之间保留overlap_chars个字符的重叠（对齐到行首），
+      避免跨段的条款被截断后两段都识别不完整
+
+分段长度与重叠长度由调用方传入（QwenAnalysisService读取环境变量
+TENDER_CHUNK_CHARS、TENDER_CHUNK_OVERLAP），这里只提供默认值。
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import bisect
+from typing import Dict, List, Optional
+
+# 默认每段最大字符数（约1.6万token，留出提示词与输出的余量）
+DEFAULT_CHUNK_CHARS = 24000
+
+# 默认相邻段重叠字符数
+DEFAULT_OVERLAP_CHARS = 800
+
+
+def split_document(content: str, boundaries: Optional[List[int]] = None,
+                   max_chars: Optional[int] = None, overlap_chars: Optional[int] = None) -> List[Dict]:
+    """
+    将文档切分为带重叠的段
+    ======================
+
+    Args:
+        content (str): 文档全文
+        boundaries (Optional[List[int]]): 结构边界的字符偏移（标题、页起始）
+        max_chars (Optional[int]): 每段最大字符数，默认DEFAULT_CHUNK_CHARS
+        overlap_chars (Optional[int]): 相邻段重叠字符数，默认DEFAULT_OVERLAP_CHARS
+
+    Returns:
+        List[Dict]: 按正文顺序排列的段，每段包含：
+            - index: 段序号（从0开始）
+            - start/end: 本段负责的字符范围 [start, end)（不含重叠部分，各段首尾相接）
+            - text_start: 实际送入模型的起始偏移（含与上一段的重叠）
+            - text: 段文本
+
+    Raises:
+        ValueError: max_chars不为正数，或重叠不小于段长
+    """
+    max_chars = DEFAULT_CHUNK_CHARS if max_chars is None else max_chars
+    overlap_chars = DEFAULT_OVERLAP_CHARS if overlap_chars is None else overlap_chars
+    if max_chars <= 0:
+        raise ValueError("分段长度必须为正数")
+    if not 0 <= overlap_chars < max_chars:
+        raise ValueError("重叠长度必须小于分段长度")
+
+    length = len(content)
+    cuts = sorted({offset for offset in (boundaries or []) if 0 < offset < length})
+
+    chunks: List[Dict] = []
+    start = 0
+    while start < length or not chunks:
+        # 为重叠部分预留长度，保证送入模型的文本不超过max_chars
+        budget = max_chars - (overlap_chars if chunks else 0)
+        end = _find_cut(content, cuts, start, budget)
+        text_start = _overlap_start(content, start, overlap_chars) if chunks else start
+        chunks.append({
+            'index': len(chunks),
+            'start': start,
+            'end': end,
+            'text_start': text_start,
+            'text': content[text_start:end],
+        })
+        start = end
+    return chunks
+
+
+def _find_cut(content: str, cuts: List[int], start: int, budget: int) -> int:
+    """在 (start + budget/2, start + budget] 内选择切分点：结构边界 > 换行 > 硬切"""
+    limit = start + budget
+    if limit >= len(content):
+        return len(content)
+    floor = start + budget // 2
+
+    index = bisect.bisect_right(cuts, limit) - 1
+    if index >= 0 and cuts[index] > floor:
+        return cuts[index]
+
+    newline = content.rfind('\n', floor, limit)
+    if newline != -1:
+        return newline + 1
+    return limit
+
+
+def _overlap_start(content: str, start: int, overlap_chars: int) -> int:
+    """重叠部分的起始偏移，对齐到行首（重叠范围内没有换行时按字符数截取）"""
+    if overlap_chars <= 0:
+        return start
+    begin = max(0, start - overlap_chars)
+    newline = content.find('\n', begin, start)
+    return newline + 1 if newline != -1 and begin > 0 else begin
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+文本提取结果缓存模块
+====================
+
+本模块将文件文本提取结果压缩后保存在磁盘上，
+以 (文件内容SHA-256, 提取器名称, 提取器版本) 作为缓存键。
+
+同一份招标文件被多人重复上传，或数据库被quick_clean.py清空后重新入库时，
+只需计算一次文件摘要即可直接取回提取结果，无需再次解析文档。
+
+技术特点：
+    - 提取器版本变化后自动使用新键，旧结果不会被误用
+    - JSON + zlib压缩存储，写入时先写临时文件再原子替换
+    - 超过容量上限时按最近访问时间淘汰（LRU，命中时刷新文件修改时间）
+    - 线程安全，提供命中/未命中等统计
+
+配置（环境变量）：
+    - EXTRACTION_CACHE_DIR: 缓存目录，默认项目根目录下的 cache/extraction
+    - EXTRACTION_CACHE_MAX_MB: 缓存容量上限(MB)，默认1024，0表示禁用缓存
+
+依赖库：
+    - zlib: 压缩
+    - json: 序列化
+    - threading: 统计与索引加锁
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import os
+import json
+import zlib
+import threading
+from typing import Dict, Optional
+
+
+class ExtractionCache:
+    """
+    文本提取结果磁盘缓存
+    ====================
+
+    缓存文件路径：{cache_dir}/{hash[0:2]}/{hash}.{extractor}.v{version}.json.z
+
+    使用示例：
+        cache = ExtractionCache.from_env(project_root)
+        document = cache.get(content_hash, 'pdf-parallel', '1')
+        if document is None:
+            document = extract(...)
+            cache.put(content_hash, 'pdf-parallel', '1', document)
+    """
+
+    # 缓存文件扩展名
+    FILE_SUFFIX = '.json.z'
+
+    # zlib压缩级别（兼顾速度与压缩率）
+    COMPRESS_LEVEL = 6
+
+    # 默认容量上限（MB）
+    DEFAULT_MAX_MB = 1024
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        初始化提取结果缓存
+
+        Args:
+            cache_dir (str): 缓存目录
+            max_bytes (int): 容量上限（字节），小于等于0表示禁用缓存
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = max_bytes > 0
+
+        self._lock = threading.Lock()
+        # 缓存文件索引：路径 -> 文件大小（首次使用时扫描目录建立）
+        self._index: Optional[Dict[str, int]] = None
+        self._total_bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'errors': 0}
+
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, project_root: str) -> 'ExtractionCache':
+        """
+        根据环境变量创建缓存实例
+
+        Args:
+            project_root (str): 项目根目录，用于确定默认缓存目录
+
+        Returns:
+            ExtractionCache: 缓存实例
+        """
+        cache_dir = os.getenv('EXTRACTION_CACHE_DIR') or os.path.join(project_root, 'cache', 'extraction')
+        max_mb = float(os.getenv('EXTRACTION_CACHE_MAX_MB', str(cls.DEFAULT_MAX_MB)))
+        return cls(cache_dir, int(max_mb * 1024 * 1024))
+
+    def get(self, content_hash: str, extractor: str, version: str) -> Optional[Dict]:
+        """
+        读取缓存的提取结果
+
+        Args:
+            content_hash (str): 文件内容SHA-256
+            extractor (str): 提取器名称
+            version (str): 提取器版本
+
+        Returns:
+            Optional[Dict]: 提取结果，未命中时返回None
+        """
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(content_hash, extractor, version)
+        try:
+            with open(path, 'rb') as f:
+                document = json.loads(zlib.decompress(f.read()).decode('utf-8'))
+        except FileNotFoundError:
+            self._count('misses')
+            return None
+        except Exception as e:
+            # 缓存文件损坏时删除，按未命中处理
+            print(f"读取提取缓存失败: {e}")
+            self._count('errors')
+            self._count('misses')
+            self._drop(path)
+            return None
+
+        # 刷新修改时间，作为LRU淘汰依据
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._count('hits')
+        return document
+
+    def put(self, content_hash: str, extractor: str, version: str, document: Dict) -> bool:
+        """
+        写入提取结果
+
+        Args:
+            content_hash (str): 文件内容SHA-256
+            extractor (str): 提取器名称
+            version (str): 提取器版本
+            document (Dict): 提取结果
+
+        Returns:
+            bool: 是否写入成功
+        """
+        if not self.enabled:
+            return False
+
+        path = self._entry_path(content_hash, extractor, version)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            payload = zlib.compress(
+                json.dumps(document, ensure_ascii=False).encode('utf-8'), self.COMPRESS_LEVEL
+            )
+            if len(payload) > self.max_bytes:
+                return False
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"写入提取缓存失败: {e}")
+            self._count('errors')
+            self._remove(tmp_path)
+            return False
+
+        with self._lock:
+            index = self._load_index()
+            self._total_bytes += len(payload) - index.get(path, 0)
+            index[path] = len(payload)
+            self._stats['writes'] += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        return True
+
+    def get_stats(self) -> Dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            Dict: 统计信息
+                - enabled: 是否启用
+                - hits/misses: 命中/未命中次数
+                - hit_rate: 命中率
+                - writes/evictions/errors: 写入/淘汰/错误次数
+                - entries: 缓存条目数
+                - size_bytes/max_bytes: 当前占用/容量上限
+        """
+        with self._lock:
+            index = self._load_index() if self.enabled else {}
+            stats = dict(self._stats)
+            lookups = stats['hits'] + stats['misses']
+            stats.update({
+                'enabled': self.enabled,
+                'hit_rate': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+                'entries': len(index),
+                'size_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            })
+            return stats
+
+    def _entry_path(self, content_hash: str, extractor: str, version: str) -> str:
+        """计算缓存文件路径"""
+        return os.path.join(
+            self.cache_dir, content_hash[:2], f"{content_hash}.{extractor}.v{version}{self.FILE_SUFFIX}"
+        )
+
+    def _load_index(self) -> Dict[str, int]:
+        """扫描缓存目录建立索引（需持有锁）"""
+        if self._index is None:
+            index: Dict[str, int] = {}
+            for root, _dirs, files in os.walk(self.cache_dir):
+                for name in files:
+                    if name.endswith(self.FILE_SUFFIX):
+                        path = os.path.join(root, name)
+                        try:
+                            index[path] = os.path.getsize(path)
+                        except OSError:
+                            pass
+            self._index = index
+            self._total_bytes = sum(index.values())
+        return self._index
+
+    def _evict(self):
+        """按修改时间从旧到新淘汰，直到占用降到上限的90%以下（需持有锁）"""
+        index = self._load_index()
+        target = int(self.max_bytes * 0.9)
+
+        entries = []
+        for path in index:
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                entries.append((0.0, path))
+        entries.sort()
+
+        for _mtime, path in entries:
+            if self._total_bytes <= target:
+                break
+            self._remove(path)
+            self._total_bytes -= index.pop(path, 0)
+            self._stats['evictions'] += 1
+
+    def _drop(self, path: str):
+        """删除缓存条目并同步更新索引"""
+        self._remove(path)
+        with self._lock:
+            if self._index is not None and path in self._index:
+                self._total_bytes -= self._index.pop(path)
+
+    def _remove(self, path: str):
+        """删除缓存文件，忽略不存在的情况"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _count(self, name: str):
+        """统计计数加一"""
+        with self._lock:
+            self._stats[name] += 1
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+后台文本提取服务模块
+====================
+
+本模块将文件文本提取从请求线程移到有界的后台线程池中执行。
+上传接口在文件落盘后立即返回文件ID，提取结果异步写回数据库。
+
+提取状态流转：
+    pending -> running -> done
+                       -> failed
+
+主要功能：
+    1. 提交提取任务（有界线程池，避免大文件占满Web工作线程）
+    2. 在数据库中维护提取状态与失败原因，并写入文档块(file_blocks)
+    3. 等待指定文件提取完成（分析接口使用）
+    4. 服务重启后重新排队未完成的任务
+
+依赖库：
+    - concurrent.futures: 线程池
+    - threading: 任务表加锁
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Optional
+
+from document_blocks import build_blocks
+
+
+class ExtractionWorker:
+    """
+    后台文本提取工作器
+    ==================
+
+    使用固定大小的线程池执行FileHandler.extract_document，
+    并通过DatabaseManager更新files表中的提取状态。
+
+    使用示例：
+        worker = ExtractionWorker(file_handler, db_manager)
+        worker.submit(file_id, file_path)
+        status = worker.wait(file_id, timeout=30)
+    """
+
+    # 默认并发提取任务数
+    DEFAULT_MAX_WORKERS = 2
+
+    def __init__(self, file_handler, db_manager, max_workers: Optional[int] = None):
+        """
+        初始化后台提取工作器
+
+        Args:
+            file_handler: FileHandler实例
+            db_manager: DatabaseManager实例
+            max_workers (Optional[int]): 线程池大小，默认读取环境变量EXTRACTION_WORKERS
+        """
+        if max_workers is None:
+            max_workers = int(os.getenv('EXTRACTION_WORKERS', self.DEFAULT_MAX_WORKERS))
+
+        self.file_handler = file_handler
+        self.db_manager = db_manager
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix='extraction'
+        )
+        self._futures: Dict[str, Future] = {}
+        # 可重入：任务在add_done_callback之前已完成时，回调_forget在submit持锁的线程中立即执行
+        self._lock = threading.RLock()
+
+    def submit(self, file_id: str, file_path: str) -> Future:
+        """
+        提交文本提取任务
+
+        同一文件已有未完成任务时直接返回该任务，不会重复提交。
+
+        Args:
+            file_id (str): 文件ID
+            file_path (str): 文件路径
+
+        Returns:
+            Future: 提取任务
+        """
+        with self._lock:
+            future = self._futures.get(file_id)
+            if future is not None and not future.done():
+                return future
+
+            self.db_manager.update_extraction_status(file_id, 'pending')
+            future = self.executor.submit(self._run, file_id, file_path)
+            self._futures[file_id] = future
+            future.add_done_callback(lambda _f, fid=file_id: self._forget(fid, _f))
+            return future
+
+    def wait(self, file_id: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        等待文件提取完成
+
+        Args:
+            file_id (str): 文件ID
+            timeout (Optional[float]): 最长等待秒数，None表示一直等待
+
+        Returns:
+            Optional[str]: 等待结束时的提取状态，文件不存在时返回None
+        """
+        with self._lock:
+            future = self._futures.get(file_id)
+
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except FutureTimeoutError:
+                pass
+            except Exception:
+                # 失败原因已写入数据库
+                pass
+
+        record = self.db_manager.get_extraction_status(file_id)
+        return record['extraction_status'] if record else None
+
+    def recover_unfinished(self) -> int:
+        """
+        重新排队服务重启前未完成的提取任务
+
+        Returns:
+            int: 重新提交的任务数
+        """
+        pending = self.db_manager.get_unfinished_extractions()
+        for record in pending:
+            self.submit(record['id'], record['file_path'])
+        return len(pending)
+
+    def shutdown(self, wait: bool = True):
+        """
+        关闭线程池
+
+        Args:
+            wait (bool): 是否等待正在执行的任务完成
+        """
+        self.executor.shutdown(wait=wait)
+
+    def _run(self, file_id: str, file_path: str) -> str:
+        """
+        执行单个提取任务（线程池中运行）
+
+        Returns:
+            str: 最终提取状态
+        """
+        self.db_manager.update_extraction_status(file_id, 'running')
+        try:
+            document = self.file_handler.extract_document(file_path)
+        except Exception as e:
+            print(f"文件 {file_id} 文本提取失败: {e}")
+            self.db_manager.update_extraction_status(file_id, 'failed', error=str(e))
+            return 'failed'
+
+        self.db_manager.update_extraction_status(
+            file_id, 'done', content=document['text'], page_offsets=document.get('page_offsets'),
+            encoding=document.get('encoding'), blocks=build_blocks(document)
+        )
+        return 'done'
+
+    def _forget(self, file_id: str, future: Future):
+        """任务结束后从任务表移除（仅当仍是同一任务时）"""
+        with self._lock:
+            if self._futures.get(file_id) is future:
+                del self._futures[file_id]
@@ -13,12 +13,13 @@
     4. Word文档内容提取
     5. 文本文件内容提取
     6. 文件信息获取和管理
+    7. 基于内容哈希的内容寻址存储（去重）
 
 支持格式：
-    - PDF (.pdf) - 使用PyPDF2库
-    - Word文档 (.docx) - 使用python-docx库
+    - PDF (.pdf) - 使用PyPDF2库，按页码区间多进程并行提取
+    - Word文档 (.docx) - 流式解析OOXML，失败时回退到python-docx库
+    - Word文档 (.doc) - 纯Python解析OLE复合文档片段表，失败时回退到docx2txt/COM
     - 文本文件 (.txt) - 支持多种编码
-    - 计划支持 (.doc) - 需要额外转换工具
 
 安全特性：
     - 文件名安全化处理
@@ -33,6 +34,7 @@
     - PyPDF2: PDF文档处理
     - os: 系统操作
     - uuid: 唯一标识生成
+    - hashlib: 内容哈希计算
 
 作者：BidAnalysis Team
 创建时间：2025年
@@ -40,10 +42,19 @@
 """
 
 import os
+import hashlib
+from typing import Dict, Optional, Tuple
 from werkzeug.utils import secure_filename
 from pathlib import Path
 import docx
-import PyPDF2
+import pdf_extractor
+import docx_stream_extractor
+import doc_binary_extractor
+import text_encoding
+from pdf_extractor import extract_pdf
+from docx_stream_extractor import extract_docx
+from doc_binary_extractor import extract_doc
+from text_encoding import decode_file
 # import fitz  # PyMuPDF - 可选的PDF处理库，如果安装失败可注释掉
 
 # 尝试导入doc文件处理库
@@ -75,20 +86,37 @@ class FileHandler:
     使用示例：
         handler = FileHandler()
         if handler.is_allowed_file(filename):
-            path = handler.save_file(file, file_id, upload_dir)
+            path, content_hash = handler.save_file(file, file_id, upload_dir)
             content = handler.extract_content(path)
     """
     
     # 定义允许上传的文件扩展名（白名单策略）
     ALLOWED_EXTENSIONS = {'.pdf', '.doc', '.docx', '.txt'}
     
-    def __init__(self):
+    # 流式读写与哈希计算的块大小（1MB）
+    HASH_CHUNK_SIZE = 1024 * 1024
+    
+    # 上传暂存目录名（位于上传目录下）
+    STAGING_DIRNAME = '.staging'
+    
+    # 各文件类型使用的提取器 (名称, 版本)，作为提取结果缓存键的一部分
+    EXTRACTORS = {
+        '.pdf': (pdf_extractor.EXTRACTOR_NAME, pdf_extractor.EXTRACTOR_VERSION),
+        '.docx': (docx_stream_extractor.EXTRACTOR_NAME, docx_stream_extractor.EXTRACTOR_VERSION),
+        '.doc': (doc_binary_extractor.EXTRACTOR_NAME, doc_binary_extractor.EXTRACTOR_VERSION),
+        '.txt': (text_encoding.EXTRACTOR_NAME, text_encoding.EXTRACTOR_VERSION),
+    }
+    
+    def __init__(self, extraction_cache=None):
         """
         初始化文件处理服务
         
         设置基本配置和初始化必要的组件。
+        
+        Args:
+            extraction_cache: ExtractionCache实例（可选），提供时提取前先按文件摘要查询缓存
         """
-        pass
+        self.extraction_cache = extraction_cache
     
     def is_allowed_file(self, filename: str) -> bool:
         """
@@ -112,7 +140,7 @@ class FileHandler:
         支持格式：
             - .pdf: PDF文档
             - .docx: Word 2007+文档
-            - .doc: Word 97-2003文档（计划支持）
+            - .doc: Word 97-2003文档
             - .txt: 纯文本文件
             
         安全考虑：
@@ -130,56 +158,127 @@ class FileHandler:
         # 检查扩展名是否在允许列表中
         return file_ext in self.ALLOWED_EXTENSIONS
     
-    def save_file(self, file, file_id: str, upload_folder: str) -> str:
+    def save_file(self, file, file_id: str, upload_folder: str) -> Tuple[str, str]:
         """
-        安全保存上传的文件
-        ==================
+        安全保存上传的文件（内容寻址存储）
+        ==================================
         
-        将上传的文件保存到指定目录，使用UUID作为文件名避免冲突。
-        应用安全文件名处理防止路径遍历攻击。
+        将上传的文件以流式方式写入暂存区，写入的同时计算SHA-256摘要，
+        然后按摘要归档到内容寻址目录。相同内容的文件在磁盘上只保存一份。
         
         Args:
             file: Flask上传的文件对象
-            file_id (str): 系统生成的唯一文件标识符
+            file_id (str): 系统生成的唯一文件标识符（用于暂存文件命名）
             upload_folder (str): 文件上传目录路径
             
         Returns:
-            str: 保存后的完整文件路径
+            Tuple[str, str]: (保存后的完整文件路径, 文件内容SHA-256摘要)
             
         安全措施：
-            1. 使用secure_filename()处理原始文件名
-            2. 使用UUID作为实际存储文件名
-            3. 保留原始文件扩展名
-            4. 避免文件名冲突
+            1. 不使用用户提供的文件名作为存储路径
+            2. 仅保留原始文件扩展名
+            3. 存储路径完全由内容摘要决定，避免路径遍历
             
         文件命名规则：
             原文件名: "投标文件.docx"
-            存储文件名: "{uuid}.docx"
+            存储路径: "uploads/{sha[0:2]}/{sha[2:4]}/{sha}.docx"
             
         异常处理：
             - 目录不存在会自动创建
-            - 文件保存失败会抛出异常
+            - 文件保存失败会抛出异常，并清理暂存文件
         """
         # 从原始文件名直接提取扩展名，避免secure_filename移除中文字符
-        file_ext = Path(file.filename).suffix.lower()
+        file_ext = Path(file.filename or "").suffix.lower()
         
-        # 使用werkzeug安全处理文件名，防止路径遍历攻击
-        filename = secure_filename(file.filename)
+        # 暂存目录与正式存储目录位于同一文件系统，保证os.replace为原子操作
+        staging_dir = os.path.join(upload_folder, self.STAGING_DIRNAME)
+        os.makedirs(staging_dir, exist_ok=True)
+        staging_path = os.path.join(staging_dir, f"{file_id}{file_ext}.part")
         
-        # 如果secure_filename移除了所有字符（比如中文文件名），使用默认名称
-        if not filename:
-            filename = "file"
+        # 边写入边计算摘要，整个文件只读取一次
+        hasher = hashlib.sha256()
+        try:
+            with open(staging_path, 'wb') as out:
+                while True:
+                    chunk = file.stream.read(self.HASH_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    out.write(chunk)
+        except Exception:
+            self.delete_file(staging_path)
+            raise
         
-        # 使用UUID生成唯一的存储文件名，避免冲突
-        new_filename = f"{file_id}{file_ext}"
+        content_hash = hasher.hexdigest()
+        file_path = self.store_blob(staging_path, content_hash, file_ext, upload_folder)
+        return file_path, content_hash
+    
+    def get_blob_path(self, content_hash: str, file_ext: str, upload_folder: str) -> str:
+        """
+        根据内容摘要计算内容寻址存储路径
         
-        # 构建完整的文件存储路径
-        file_path = os.path.join(upload_folder, new_filename)
+        使用摘要前两级各两个字符作为子目录，避免单目录下文件过多。
         
-        # 保存文件到指定路径
-        file.save(file_path)
+        Args:
+            content_hash (str): 文件内容SHA-256摘要
+            file_ext (str): 文件扩展名（含点号）
+            upload_folder (str): 文件上传目录路径
+            
+        Returns:
+            str: 存储路径
+        """
+        return os.path.join(
+            upload_folder, content_hash[:2], content_hash[2:4], f"{content_hash}{file_ext.lower()}"
+        )
+    
+    def store_blob(self, source_path: str, content_hash: str, file_ext: str, upload_folder: str) -> str:
+        """
+        将暂存文件归档到内容寻址存储
+        
+        如果相同内容的文件已经存在，直接删除暂存文件，不再重复写盘，
+        并刷新已有文件的修改时间，使后台清理的宽限期从本次复用重新计算。
+        
+        Args:
+            source_path (str): 暂存文件路径
+            content_hash (str): 文件内容SHA-256摘要
+            file_ext (str): 文件扩展名（含点号）
+            upload_folder (str): 文件上传目录路径
+            
+        Returns:
+            str: 归档后的文件路径
+        """
+        blob_path = self.get_blob_path(content_hash, file_ext, upload_folder)
+        if os.path.exists(blob_path):
+            # 内容已存在，丢弃暂存文件
+            self.delete_file(source_path)
+            try:
+                os.utime(blob_path)
+            except OSError:
+                pass
+            return blob_path
+        
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(source_path, blob_path)
+        return blob_path
+    
+    def hash_file(self, file_path: str) -> str:
+        """
+        流式计算已有文件的SHA-256摘要
         
-        return file_path
+        Args:
+            file_path (str): 文件路径
+            
+        Returns:
+            str: 十六进制摘要字符串
+        """
+        hasher = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(self.HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+        return hasher.hexdigest()
     
     def extract_content(self, file_path: str) -> str:
         """
@@ -197,8 +296,8 @@ class FileHandler:
             
         支持格式：
             - PDF (.pdf): 使用PyPDF2提取文本
-            - Word (.docx): 使用python-docx提取文本和表格
-            - Word (.doc): 计划支持，当前会抛出异常
+            - Word (.docx): 流式解析OOXML，按正文顺序提取段落和表格
+            - Word (.doc): 直接解析二进制片段表提取正文和表格
             - Text (.txt): 直接读取文本内容
             
         提取内容：
@@ -216,17 +315,82 @@ class FileHandler:
             - 扫描版PDF需要OCR技术（未实现）
             - 加密文档需要密码（未实现）
         """
+        return self.extract_document(file_path)['text']
+    
+    def extract_document(self, file_path: str) -> Dict:
+        """
+        提取文件文本内容及版面信息
+        ==========================
+        
+        与extract_content()相同的提取流程，额外返回提取过程中得到的结构信息。
+        配置了提取结果缓存时，先按 (文件摘要, 提取器名称, 提取器版本) 查询缓存。
+        
+        Args:
+            file_path (str): 文件的完整路径
+            
+        Returns:
+            Dict: 提取结果
+                - text (str): 提取的文本内容
+                - page_offsets (List[int], 可选): 每页起始字符偏移（仅PDF）
+                - blocks (List[Dict], 可选): 按正文顺序排列的段落/表格行（仅.doc/.docx）
+                - encoding (str, 可选): 检测到的文本编码（仅.txt）
+        """
         # 获取文件扩展名
         file_ext = Path(file_path).suffix.lower()
         
+        # 已知文档只需计算一次摘要即可取回提取结果
+        cache_key = self._get_cache_key(file_path, file_ext)
+        if cache_key is not None:
+            cached = self.extraction_cache.get(*cache_key)
+            if cached is not None:
+                return cached
+        
+        document = self._extract_document_uncached(file_path, file_ext)
+        
+        if cache_key is not None:
+            self.extraction_cache.put(*cache_key, document)
+        return document
+    
+    def _get_cache_key(self, file_path: str, file_ext: str) -> Optional[Tuple[str, str, str]]:
+        """
+        计算提取结果缓存键（私有方法）
+        
+        Returns:
+            Optional[Tuple[str, str, str]]: (文件SHA-256, 提取器名称, 提取器版本)，
+            未启用缓存、文件类型不支持或文件无法读取时返回None
+        """
+        if self.extraction_cache is None or not self.extraction_cache.enabled:
+            return None
+        extractor = self.EXTRACTORS.get(file_ext)
+        if extractor is None:
+            return None
+        try:
+            content_hash = self.hash_file(file_path)
+        except OSError:
+            return None
+        return content_hash, extractor[0], extractor[1]
+    
+    def _extract_document_uncached(self, file_path: str, file_ext: str) -> Dict:
+        """
+        按文件类型执行实际的内容提取（私有方法，不经过缓存）
+        
+        Args:
+            file_path (str): 文件的完整路径
+            file_ext (str): 小写的文件扩展名
+            
+        Returns:
+            Dict: 提取结果，结构见extract_document()
+        """
         try:
             # 根据文件类型选择相应的提取方法
             if file_ext == '.pdf':
-                return self._extract_pdf_content(file_path)
-            elif file_ext in ['.doc', '.docx']:
-                return self._extract_word_content(file_path)
+                return self._extract_pdf_document(file_path)
+            elif file_ext == '.docx':
+                return self._extract_docx_document(file_path)
+            elif file_ext == '.doc':
+                return self._extract_doc_document(file_path)
             elif file_ext == '.txt':
-                return self._extract_text_content(file_path)
+                return self._extract_text_document(file_path)
             else:
                 raise ValueError(f"不支持的文件类型: {file_ext}")
         except Exception as e:
@@ -236,23 +400,37 @@ class FileHandler:
     def _extract_pdf_content(self, file_path: str) -> str:
         """
         提取PDF文件内容（私有方法）
-        ===========================
-        
-        使用PyPDF2库提取PDF文档的文本内容。
-        逐页提取文本并合并为完整内容。
         
         Args:
             file_path (str): PDF文件路径
             
         Returns:
             str: 提取的文本内容
+        """
+        return self._extract_pdf_document(file_path)['text']
+    
+    def _extract_pdf_document(self, file_path: str) -> Dict:
+        """
+        提取PDF文件内容及每页偏移（私有方法）
+        =====================================
+        
+        使用pdf_extractor引擎提取PDF文档的文本内容。
+        长文档按页码区间分发到进程池并行提取，各页文本只拼接一次。
+        
+        Args:
+            file_path (str): PDF文件路径
+            
+        Returns:
+            Dict: 提取结果
+                - text (str): 提取的文本内容
+                - page_count (int): 总页数
+                - page_offsets (List[int]): 每页在text中的起始字符偏移
             
         提取过程：
-            1. 打开PDF文件（二进制模式）
-            2. 创建PdfReader对象
-            3. 遍历所有页面
-            4. 提取每页文本内容
-            5. 合并所有文本
+            1. 读取页数，少于阈值时在当前进程串行提取
+            2. 否则按页码区间切分，分发到进程池
+            3. 按页序收集各页文本
+            4. 一次性拼接并计算每页偏移
             
         局限性：
             - 无法处理扫描版PDF（需要OCR）
@@ -266,34 +444,18 @@ class FileHandler:
             - 权限不足
             - 内存不足（大文件）
         """
-        content = ""
-        
         try:
-            # 以二进制模式打开PDF文件
-            with open(file_path, 'rb') as file:
-                # 创建PDF读取器对象
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # 遍历所有页面提取文本
-                for page in pdf_reader.pages:
-                    # 提取当前页面的文本内容
-                    page_text = page.extract_text()
-                    if page_text:
-                        # 添加页面文本到总内容，页面间用换行分隔
-                        content += page_text + "\n"
+            return extract_pdf(file_path)
         except Exception as e:
             # 抛出详细的错误信息
             raise Exception(f"PDF内容提取失败: {str(e)}")
-        
-        # 返回清理后的文本内容
-        return content.strip()
     
     def _extract_word_content(self, file_path: str) -> str:
         """
         提取Word文档内容（私有方法）
         ============================
         
-        使用python-docx库提取Word文档的文本内容。
+        提取Word文档的文本内容（.docx使用流式OOXML解析）。
         支持 .docx 和 .doc 格式文件。
         
         Args:
@@ -330,47 +492,12 @@ class FileHandler:
         try:
             # 检查文件扩展名
             if file_path.lower().endswith('.docx'):
-                # 处理.docx格式文件（完全支持）
-                doc = docx.Document(file_path)
-                content = ""
-                
-                # 提取段落文本
-                for paragraph in doc.paragraphs:
-                    content += paragraph.text + "\n"
-                
-                # 提取表格文本
-                for table in doc.tables:
-                    for row in table.rows:
-                        # 收集当前行的所有单元格文本
-                        row_text = []
-                        for cell in row.cells:
-                            # 清理单元格文本并添加到行文本列表
-                            cell_text = cell.text.strip()
-                            row_text.append(cell_text)
-                        # 将行文本用"|"连接并添加到内容中
-                        content += " | ".join(row_text) + "\n"
-                
-                return content.strip()
+                # 处理.docx格式文件（流式解析，失败时回退到python-docx）
+                return self._extract_docx_document(file_path)['text']
             
             elif file_path.lower().endswith('.doc'):
-                # 处理.doc格式文件
-                if DOC_SUPPORT:
-                    try:
-                        # 使用docx2txt库提取.doc文件内容
-                        content = docx2txt.process(file_path)
-                        if content and content.strip():
-                            return content.strip()
-                        else:
-                            # 如果docx2txt返回空内容，尝试备选方案
-                            print("docx2txt返回空内容，尝试备选方案...")
-                            return self._extract_doc_fallback(file_path)
-                    except Exception as e:
-                        # docx2txt失败时，尝试备选方案
-                        print(f"docx2txt处理失败: {e}")
-                        return self._extract_doc_fallback(file_path)
-                else:
-                    # 如果没有安装docx2txt库，直接使用备选方案
-                    return self._extract_doc_fallback(file_path)
+                # 处理.doc格式文件（纯Python解析，失败时依次尝试docx2txt与COM）
+                return self._extract_doc_document(file_path)['text']
             
             else:
                 # 不支持的文件格式
@@ -380,6 +507,103 @@ class FileHandler:
             # 抛出详细的错误信息
             raise Exception(f"Word文档内容提取失败: {str(e)}")
     
+    def _extract_docx_document(self, file_path: str) -> Dict:
+        """
+        提取.docx文件内容及块结构（私有方法）
+        =====================================
+        
+        优先使用docx_stream_extractor流式解析word/document.xml，
+        段落与表格按正文顺序输出，合并单元格只输出一次。
+        流式解析失败时回退到python-docx实现。
+        
+        Args:
+            file_path (str): .docx文件路径
+            
+        Returns:
+            Dict: 提取结果
+                - text (str): 提取的文本内容
+                - blocks (List[Dict], 可选): 段落/表格行块列表（仅流式解析成功时）
+        """
+        try:
+            return extract_docx(file_path)
+        except Exception as e:
+            print(f"流式解析docx失败，回退到python-docx: {e}")
+            return {'text': self._extract_docx_with_python_docx(file_path)}
+    
+    def _extract_docx_with_python_docx(self, file_path: str) -> str:
+        """
+        使用python-docx提取.docx文件内容（私有方法，备选方案）
+        
+        先输出全部段落，再逐行输出全部表格，单元格以"|"分隔。
+        
+        Args:
+            file_path (str): .docx文件路径
+            
+        Returns:
+            str: 提取的文本内容
+        """
+        doc = docx.Document(file_path)
+        content = ""
+        
+        # 提取段落文本
+        for paragraph in doc.paragraphs:
+            content += paragraph.text + "\n"
+        
+        # 提取表格文本
+        for table in doc.tables:
+            for row in table.rows:
+                # 收集当前行的所有单元格文本
+                row_text = []
+                for cell in row.cells:
+                    # 清理单元格文本并添加到行文本列表
+                    cell_text = cell.text.strip()
+                    row_text.append(cell_text)
+                # 将行文本用"|"连接并添加到内容中
+                content += " | ".join(row_text) + "\n"
+        
+        return content.strip()
+    
+    def _extract_doc_document(self, file_path: str) -> Dict:
+        """
+        提取.doc文件内容及块结构（私有方法）
+        ====================================
+        
+        优先使用doc_binary_extractor直接解析OLE复合文档中的片段表，
+        无需启动Word进程，可在Linux上运行。
+        解析失败时（如加密文档、Word 95格式、扩展名为.doc的docx文件），
+        依次回退到docx2txt和COM备选方案。
+        
+        Args:
+            file_path (str): .doc文件路径
+            
+        Returns:
+            Dict: 提取结果
+                - text (str): 提取的文本内容
+                - blocks (List[Dict], 可选): 段落/表格行块列表（仅原生解析成功时）
+        """
+        try:
+            return extract_doc(file_path)
+        except Exception as e:
+            print(f"原生解析.doc失败，尝试备选方案: {e}")
+        
+        if DOC_SUPPORT:
+            try:
+                # 使用docx2txt库提取.doc文件内容
+                content = docx2txt.process(file_path)
+                if content and content.strip():
+                    return {'text': content.strip()}
+                else:
+                    # 如果docx2txt返回空内容，尝试备选方案
+                    print("docx2txt返回空内容，尝试备选方案...")
+                    return {'text': self._extract_doc_fallback(file_path)}
+            except Exception as e:
+                # docx2txt失败时，尝试备选方案
+                print(f"docx2txt处理失败: {e}")
+                return {'text': self._extract_doc_fallback(file_path)}
+        else:
+            # 如果没有安装docx2txt库，直接使用备选方案
+            return {'text': self._extract_doc_fallback(file_path)}
+    
     def _extract_doc_fallback(self, file_path: str) -> str:
         """
         .doc文件的备选提取方法
@@ -455,8 +679,7 @@ class FileHandler:
         提取文本文件内容（私有方法）
         ============================
         
-        直接读取纯文本文件的内容。
-        支持多种字符编码自动检测。
+        只读取一遍文件：对字节流采样判断编码后，使用增量解码器边读边解码。
         
         Args:
             file_path (str): 文本文件路径
@@ -464,16 +687,17 @@ class FileHandler:
         Returns:
             str: 提取的文本内容
             
-        编码支持：
-            1. UTF-8 - 优先尝试（现代标准）
-            2. GBK - 中文编码支持
-            3. UTF-16 - Unicode编码
-            4. Latin-1 - 兜底编码（几乎不会失败）
+        编码检测（见text_encoding模块）：
+            1. BOM - UTF-8/UTF-16/UTF-32
+            2. UTF-16 - 无BOM时按空字节分布判断
+            3. UTF-8 - 样本合法即采用（现代标准）
+            4. GB18030 - 按双字节序列统计判断（兼容GBK）
+            5. Latin-1 - 兜底编码（几乎不会失败）
             
         特性：
-            - 自动编码检测和转换
+            - 单遍读取，大文件分块解码
             - 保持原始文本格式
-            - 错误处理和降级策略
+            - 个别非法字节以替换字符输出，不再整体失败
             
         局限性：
             - 无法处理二进制文件
@@ -485,33 +709,26 @@ class FileHandler:
             - 编码错误
             - 文件损坏
         """
-        try:
-            # 编码尝试列表，按优先级排序
-            encodings = ['utf-8', 'gbk', 'utf-16', 'latin-1']
-            
-            for encoding in encodings:
-                try:
-                    # 尝试使用当前编码读取文件
-                    with open(file_path, 'r', encoding=encoding) as file:
-                        content = file.read()
-                        
-                    # 如果成功读取且内容不为空，返回内容
-                    if content is not None:
-                        return content.strip()
-                        
-                except UnicodeDecodeError:
-                    # 当前编码失败，尝试下一个
-                    continue
-                except Exception as e:
-                    # 其他错误（如文件不存在、权限问题）
-                    raise Exception(f"读取文本文件时发生错误: {str(e)}")
-            
-            # 所有编码都失败
-            raise Exception("无法识别文件编码，请确认文件是有效的文本文件")
+        return self._extract_text_document(file_path)['text']
+    
+    def _extract_text_document(self, file_path: str) -> Dict:
+        """
+        提取文本文件内容及编码（私有方法）
+        
+        Args:
+            file_path (str): 文本文件路径
             
+        Returns:
+            Dict: 提取结果
+                - text (str): 提取的文本内容
+                - encoding (str): 检测到的编码
+        """
+        try:
+            result = decode_file(file_path)
         except Exception as e:
             # 抛出详细的错误信息
             raise Exception(f"文本文件内容提取失败: {str(e)}")
+        return {'text': result['text'].strip(), 'encoding': result['encoding']}
     
     def get_file_info(self, file_path: str) -> dict:
         """
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+流式JSON增量解析模块
+====================
+
+模型以流式输出JSON时，逐段喂入文本，尽早取出指定数组（如invalid_items、issues）中
+已经完整输出的对象，不必等待整段JSON生成完毕再解析。
+
+只跟踪字符串与括号嵌套状态，每个字符只扫描一次；对象闭合后用json.loads解析该对象，
+解析失败的对象跳过（最终结果仍以完整响应的解析为准）。
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import re
+import json
+from typing import Dict, List, Optional
+
+
+class ArrayItemParser:
+    """
+    流式JSON数组元素解析器
+    ======================
+
+    使用示例：
+        parser = ArrayItemParser("invalid_items")
+        for text in stream:
+            for item in parser.feed(text):
+                handle(item)
+    """
+
+    def __init__(self, key: str):
+        """
+        Args:
+            key (str): 要解析的数组字段名
+        """
+        self.key = key
+        self.buffer = ''
+        self.done = False
+        self._key_re = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._pos: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, text: str) -> List[Dict]:
+        """
+        喂入新输出的文本
+
+        Args:
+            text (str): 新增的文本片段
+
+        Returns:
+            List[Dict]: 本次新完成的数组对象
+        """
+        self.buffer += text
+        if self.done:
+            return []
+        if self._pos is None:
+            # 字段名可能被切在两个片段之间，每次从头查找（找到之前缓冲区通常很短）
+            match = self._key_re.search(self.buffer)
+            if not match:
+                return []
+            self._pos = match.end()
+
+        items = []
+        buffer = self.buffer
+        pos = self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                if self._depth == 0 and char == '{':
+                    self._item_start = pos
+                self._depth += 1
+            elif char in '}]':
+                if self._depth == 0:
+                    # 数组结束
+                    self.done = True
+                    pos += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start is not None:
+                    try:
+                        item = json.loads(buffer[self._item_start:pos + 1])
+                        if isinstance(item, dict):
+                            items.append(item)
+                    except json.JSONDecodeError:
+                        pass
+                    self._item_start = None
+            pos += 1
+        self._pos = pos
+        return items
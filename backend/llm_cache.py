@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""
+大模型响应缓存模块
+==================
+
+以 (提供方, 模型, temperature, 提示词摘要, 图像摘要) 作为缓存键，把模型响应持久化到
+SQLite中。同一份招标文件被重复分析、项目信息检测反复提取招标项目信息时，
+相同的提示词直接返回缓存的响应，不再请求模型。
+
+技术特点：
+    - 独立的SQLite文件（WAL模式，复用db_pool.ConnectionPool），不占用业务数据库的写队列
+    - 响应文本按storage_codec压缩存储
+    - 条目超过有效期(TTL)后视为未命中；超过容量上限时按最近访问时间淘汰（LRU）
+    - 当前线程内可临时绕过或强制刷新缓存（bypass()），用于重新分析与解析失败后的重试
+    - 统计命中率与命中节省的模型调用耗时
+
+配置（环境变量）：
+    - LLM_CACHE_PATH: 缓存数据库路径，默认项目根目录下的 cache/llm_cache.db
+    - LLM_CACHE_MAX_MB: 容量上限(MB)，默认256，0表示禁用缓存
+    - LLM_CACHE_TTL_HOURS: 有效期（小时），默认168（7天）
+
+依赖库：
+    - hashlib: 缓存键摘要
+    - db_pool: SQLite连接池与写队列
+    - storage_codec: 压缩编解码
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Iterator, Optional, Union
+
+from db_pool import ConnectionPool
+from storage_codec import encode_text, decode_text
+
+# 当前线程的缓存绕过模式（栈，支持嵌套）
+_bypass = threading.local()
+
+_default_cache: Optional['LLMResponseCache'] = None
+_default_lock = threading.Lock()
+
+
+def hash_content(content: Union[str, bytes, None]) -> Optional[str]:
+    """计算提示词或图像数据的SHA-256摘要"""
+    if content is None:
+        return None
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+@contextmanager
+def bypass(refresh: bool = False) -> Iterator[None]:
+    """
+    在当前线程内绕过缓存
+
+    Args:
+        refresh (bool): False时既不读取也不写入缓存；
+            True时不读取缓存，但用新的响应覆盖缓存（重新分析、解析失败后的重试）
+
+    使用示例：
+        with llm_cache.bypass(refresh=True):
+            result = service.analyze_tender_document(content)
+    """
+    stack = _bypass.__dict__.setdefault('modes', [])
+    stack.append('refresh' if refresh else 'bypass')
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def bypass_mode() -> Optional[str]:
+    """
+    当前线程的绕过模式：None、'bypass'或'refresh'（嵌套时以最内层为准）
+
+    线程局部的模式不会传到llm_executor的事件循环线程上：调用方在提交协程前取得本值，
+    经协程的cache_mode参数（如QwenAnalysisService._acall_model_api()）传给acall()的mode。
+    """
+    stack = getattr(_bypass, 'modes', None)
+    return stack[-1] if stack else None
+
+
+def get_default_cache() -> 'LLMResponseCache':
+    """
+    获取进程内共享的缓存实例（首次调用时按环境变量创建）
+
+    Returns:
+        LLMResponseCache: 缓存实例
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            _default_cache = LLMResponseCache.from_env(project_root)
+        return _default_cache
+
+
+class LLMResponseCache:
+    """
+    大模型响应持久化缓存
+    ====================
+
+    使用示例：
+        cache = get_default_cache()
+        text = cache.call('qwen', model, 0.3, prompt, lambda: client_call(prompt))
+    """
+
+    # 默认容量上限（MB）
+    DEFAULT_MAX_MB = 256
+
+    # 默认有效期（小时）
+    DEFAULT_TTL_HOURS = 168
+
+    # 命中时刷新访问时间的最小间隔（秒），避免每次命中都写库
+    TOUCH_INTERVAL_SECONDS = 60
+
+    def __init__(self, db_path: str, max_bytes: int, ttl_seconds: float):
+        """
+        初始化响应缓存
+
+        Args:
+            db_path (str): 缓存数据库路径
+            max_bytes (int): 容量上限（字节），小于等于0表示禁用缓存
+            ttl_seconds (float): 有效期（秒）
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = max_bytes > 0
+
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'bypassed': 0, 'refreshed': 0, 'writes': 0, 'evictions': 0,
+                       'expired': 0, 'errors': 0, 'saved_ms': 0.0}
+        self.pool: Optional[ConnectionPool] = None
+
+        if self.enabled:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self.pool = ConnectionPool(db_path)
+            self.pool.write(self._create_table)
+
+    @classmethod
+    def from_env(cls, project_root: str) -> 'LLMResponseCache':
+        """
+        根据环境变量创建缓存实例
+
+        Args:
+            project_root (str): 项目根目录，用于确定默认缓存路径
+
+        Returns:
+            LLMResponseCache: 缓存实例
+        """
+        db_path = os.getenv('LLM_CACHE_PATH') or os.path.join(project_root, 'cache', 'llm_cache.db')
+        max_mb = float(os.getenv('LLM_CACHE_MAX_MB', str(cls.DEFAULT_MAX_MB)))
+        ttl_hours = float(os.getenv('LLM_CACHE_TTL_HOURS', str(cls.DEFAULT_TTL_HOURS)))
+        return cls(db_path, int(max_mb * 1024 * 1024), ttl_hours * 3600)
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, prompt: str,
+                 image_hash: Optional[str] = None) -> str:
+        """
+        计算缓存键
+
+        Args:
+            provider (str): 提供方
+            model (str): 模型名或接入点ID
+            temperature (float): 采样温度
+            prompt (str): 提示词
+            image_hash (Optional[str]): 图像数据摘要（视觉调用）
+
+        Returns:
+            str: 缓存键（SHA-256）
+        """
+        parts = [provider, model, repr(float(temperature)), hash_content(prompt), image_hash or '']
+        return hash_content('\x1f'.join(parts))
+
+    def call(self, provider: str, model: str, temperature: float, prompt: str,
+             fetch: Callable[[], str], image: Union[str, bytes, None] = None) -> str:
+        """
+        先查缓存，未命中时调用模型并写入缓存
+
+        Args:
+            provider (str): 提供方
+            model (str): 模型名或接入点ID
+            temperature (float): 采样温度
+            prompt (str): 提示词
+            fetch (Callable[[], str]): 实际调用模型的函数
+            image (Union[str, bytes, None]): 图像数据（视觉调用，参与缓存键）
+
+        Returns:
+            str: 模型响应文本
+        """
+        if not self.enabled:
+            return fetch()
+        mode = bypass_mode()
+        if mode == 'bypass':
+            self._count('bypassed')
+            return fetch()
+
+        key = self.make_key(provider, model, temperature, prompt, hash_content(image))
+        if mode == 'refresh':
+            self._count('refreshed')
+        else:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+
+        start = time.perf_counter()
+        response = fetch()
+        if response:
+            self.put(key, provider, model, response, (time.perf_counter() - start) * 1000)
+        return response
+
+    async def acall(self, provider: str, model: str, temperature: float, prompt: str,
+                    fetch: Callable[[], Awaitable[str]], image: Union[str, bytes, None] = None,
+                    mode: Optional[str] = None) -> str:
+        """
+        call()的异步版本（在llm_executor的事件循环上使用）
+
+        事件循环线程上取不到请求线程的绕过模式，由调用方在提交协程前记录bypass_mode()并传入mode；
+        缓存读写在线程池中执行，不阻塞事件循环。
+
+        Args:
+            fetch (Callable[[], Awaitable[str]]): 实际调用模型的协程函数
+            mode (Optional[str]): 绕过模式，取值同bypass_mode()
+            其余参数同call()
+
+        Returns:
+            str: 模型响应文本
+        """
+        if not self.enabled:
+            return await fetch()
+        if mode == 'bypass':
+            self._count('bypassed')
+            return await fetch()
+
+        key = self.make_key(provider, model, temperature, prompt, hash_content(image))
+        if mode == 'refresh':
+            self._count('refreshed')
+        else:
+            cached = await asyncio.to_thread(self.get, key)
+            if cached is not None:
+                return cached
+
+        start = time.perf_counter()
+        response = await fetch()
+        if response:
+            await asyncio.to_thread(self.put, key, provider, model, response,
+                                    (time.perf_counter() - start) * 1000)
+        return response
+
+    def stream(self, provider: str, model: str, temperature: float, prompt: str,
+               fetch_stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """
+        流式调用的缓存：命中时一次性产出缓存的响应，未命中时边转发边累积，
+        完整结束后写入缓存（调用方中途停止迭代时不写入）
+
+        Args:
+            provider (str): 提供方
+            model (str): 模型名或接入点ID
+            temperature (float): 采样温度
+            prompt (str): 提示词
+            fetch_stream (Callable[[], Iterator[str]]): 实际发起流式调用、逐段产出文本的函数
+
+        Yields:
+            str: 响应文本片段
+        """
+        mode = bypass_mode() if self.enabled else 'disabled'
+        if mode in ('disabled', 'bypass'):
+            if mode == 'bypass':
+                self._count('bypassed')
+            yield from fetch_stream()
+            return
+
+        key = self.make_key(provider, model, temperature, prompt)
+        if mode == 'refresh':
+            self._count('refreshed')
+        else:
+            cached = self.get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        start = time.perf_counter()
+        parts = []
+        for part in fetch_stream():
+            parts.append(part)
+            yield part
+        response = ''.join(parts)
+        if response:
+            self.put(key, provider, model, response, (time.perf_counter() - start) * 1000)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的响应
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Optional[str]: 响应文本，未命中或已过期时返回None
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self.pool.connection() as conn:
+                row = conn.execute(
+                    'SELECT response, created_at, last_access, latency_ms FROM llm_cache WHERE key = ?', (key,)
+                ).fetchone()
+        except Exception as e:
+            print(f"读取模型响应缓存失败: {e}")
+            self._count('errors')
+            self._count('misses')
+            return None
+
+        if row is None:
+            self._count('misses')
+            return None
+        if now - row['created_at'] > self.ttl_seconds:
+            self._count('expired')
+            self._count('misses')
+            self._delete(key)
+            return None
+
+        if now - row['last_access'] > self.TOUCH_INTERVAL_SECONDS:
+            try:
+                self.pool.execute_write('UPDATE llm_cache SET last_access = ? WHERE key = ?', (now, key))
+            except Exception:
+                pass
+        with self._lock:
+            self._stats['hits'] += 1
+            self._stats['saved_ms'] += row['latency_ms'] or 0.0
+        return decode_text(row['response'])
+
+    def put(self, key: str, provider: str, model: str, response: str, latency_ms: float = 0.0) -> bool:
+        """
+        写入响应
+
+        Args:
+            key (str): 缓存键
+            provider (str): 提供方
+            model (str): 模型名
+            response (str): 响应文本
+            latency_ms (float): 本次模型调用耗时（命中时计入节省的耗时）
+
+        Returns:
+            bool: 是否写入成功
+        """
+        if not self.enabled:
+            return False
+        stored = encode_text(response)
+        size = len(stored) if isinstance(stored, bytes) else len(stored.encode('utf-8'))
+        if size > self.max_bytes:
+            return False
+        now = time.time()
+
+        def insert(conn):
+            # 用UPSERT而不是INSERT OR REPLACE：REPLACE删除旧行时不触发删除触发器，占用统计会偏大
+            conn.execute('''
+                INSERT INTO llm_cache
+                    (key, provider, model, response, size, latency_ms, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    provider = excluded.provider, model = excluded.model, response = excluded.response,
+                    size = excluded.size, latency_ms = excluded.latency_ms,
+                    created_at = excluded.created_at, last_access = excluded.last_access
+            ''', (key, provider, model, stored, size, latency_ms, now, now))
+            return self._evict(conn)
+
+        try:
+            evicted = self.pool.write(insert)
+        except Exception as e:
+            print(f"写入模型响应缓存失败: {e}")
+            self._count('errors')
+            return False
+        with self._lock:
+            self._stats['writes'] += 1
+            self._stats['evictions'] += evicted
+        return True
+
+    def get_stats(self) -> Dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            Dict: 统计信息
+                - enabled: 是否启用
+                - hits/misses/hit_rate: 命中/未命中次数与命中率
+                - bypassed/refreshed: 绕过缓存、强制刷新缓存的调用次数
+                - writes/evictions/expired/errors: 写入/淘汰/过期/错误次数
+                - saved_ms: 命中节省的模型调用耗时（按写入时记录的耗时累计）
+                - entries/size_bytes/max_bytes/ttl_seconds: 条目数、当前占用、容量上限与有效期
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        entries, size = 0, 0
+        if self.enabled:
+            try:
+                with self.pool.connection() as conn:
+                    entries = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+                    size = self._total_size(conn)
+            except Exception as e:
+                print(f"读取模型响应缓存统计失败: {e}")
+        stats.update({
+            'enabled': self.enabled,
+            'hit_rate': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+            'saved_ms': round(stats['saved_ms'], 1),
+            'entries': entries,
+            'size_bytes': size,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
+        })
+        return stats
+
+    def clear(self):
+        """清空缓存"""
+        if self.enabled:
+            self.pool.execute_write('DELETE FROM llm_cache')
+
+    def close(self):
+        """关闭连接池"""
+        if self.pool is not None:
+            self.pool.close()
+
+    @staticmethod
+    def _create_table(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,             -- 缓存键（见make_key()）
+                provider TEXT NOT NULL,           -- 提供方
+                model TEXT NOT NULL,              -- 模型名
+                response BLOB NOT NULL,           -- 响应文本（storage_codec编码）
+                size INTEGER NOT NULL,            -- 存储字节数
+                latency_ms REAL,                  -- 写入时的模型调用耗时
+                created_at REAL NOT NULL,         -- 写入时间（用于TTL）
+                last_access REAL NOT NULL         -- 最近访问时间（用于LRU）
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access)')
+        # 当前占用的总字节数（单行），由触发器随条目的写入、替换与删除同步更新，
+        # 写入时判断是否需要淘汰不必每次对全表求和
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache_meta (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                total_size INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS llm_cache_size_ai AFTER INSERT ON llm_cache BEGIN
+                UPDATE llm_cache_meta SET total_size = total_size + new.size WHERE id = 0;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS llm_cache_size_ad AFTER DELETE ON llm_cache BEGIN
+                UPDATE llm_cache_meta SET total_size = total_size - old.size WHERE id = 0;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS llm_cache_size_au AFTER UPDATE OF size ON llm_cache BEGIN
+                UPDATE llm_cache_meta SET total_size = total_size - old.size + new.size WHERE id = 0;
+            END
+        ''')
+        # 首次创建（或从没有统计行的旧缓存库升级）时按现有条目初始化
+        conn.execute('''
+            INSERT OR IGNORE INTO llm_cache_meta (id, total_size)
+            SELECT 0, COALESCE(SUM(size), 0) FROM llm_cache
+        ''')
+
+    @staticmethod
+    def _total_size(conn) -> int:
+        """当前占用的总字节数（读取llm_cache_meta的统计行）"""
+        return conn.execute('SELECT total_size FROM llm_cache_meta WHERE id = 0').fetchone()[0]
+
+    def _evict(self, conn) -> int:
+        """超过容量上限时删除过期条目，再按访问时间淘汰到上限的90%（写线程中执行）"""
+        if self._total_size(conn) <= self.max_bytes:
+            return 0
+        evicted = conn.execute('DELETE FROM llm_cache WHERE created_at < ?',
+                               (time.time() - self.ttl_seconds,)).rowcount
+        total = self._total_size(conn)
+        target = int(self.max_bytes * 0.9)
+        for key, size in conn.execute('SELECT key, size FROM llm_cache ORDER BY last_access').fetchall():
+            if total <= target:
+                break
+            conn.execute('DELETE FROM llm_cache WHERE key = ?', (key,))
+            total -= size
+            evicted += 1
+        return evicted
+
+    def _delete(self, key: str):
+        try:
+            self.pool.execute_write('DELETE FROM llm_cache WHERE key = ?', (key,))
+        except Exception:
+            pass
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
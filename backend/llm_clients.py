@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+大模型客户端共享模块
+====================
+
+进程内按 (提供方, base_url, API Key) 共享OpenAI兼容客户端。
+异步客户端（AsyncOpenAI）另行登记，只在llm_executor的事件循环上使用。
+
+原实现中QwenAnalysisService、OCRAgent在每次调用豆包接口时新建OpenAI客户端，
+ProjectInfoAgent每次尝试都新建QwenAnalysisService，每次请求都要重新建立TCP/TLS连接，
+HTTP keep-alive完全失效。共享客户端后同一提供方的请求复用连接池中的长连接。
+
+连接池参数（环境变量）：
+    LLM_MAX_CONNECTIONS: 每个客户端的最大连接数，默认20
+    LLM_MAX_KEEPALIVE: 保持的空闲长连接数，默认10
+    LLM_KEEPALIVE_EXPIRY: 空闲长连接保留秒数，默认60
+    LLM_CONNECT_TIMEOUT: 建立连接超时秒数，默认10
+    LLM_READ_TIMEOUT: 读取响应超时秒数，默认300（长文档分析耗时较长）
+    LLM_HTTP2: 设为1时启用HTTP/2（需要安装h2，未安装时自动使用HTTP/1.1）
+
+依赖库：
+    - openai: OpenAI Python SDK（自带httpx）
+    - threading: 注册表加锁
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import os
+import asyncio
+import hashlib
+import threading
+import importlib.util
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAI, DefaultHttpxClient
+
+# 各提供方的默认接口地址与API Key环境变量
+PROVIDERS = {
+    'qwen': {
+        'base_url': 'https://dashscope.aliyuncs.com/compatible-mode/v1',
+        'api_key_env': 'DASHSCOPE_API_KEY',
+    },
+    'doubao': {
+        'base_url_env': 'ARK_BASE_URL',
+        'base_url': 'https://ark.cn-beijing.volces.com/api/v3',
+        'api_key_env': 'ARK_API_KEY',
+    },
+}
+
+# 提供方别名
+PROVIDER_ALIASES = {
+    'qwen': 'qwen', 'ali': 'qwen', 'dashscope': 'qwen',
+    'doubao': 'doubao', 'ark': 'doubao', 'volc': 'doubao', 'volcengine': 'doubao',
+}
+
+_clients: Dict[Tuple[str, str, str], OpenAI] = {}
+_async_clients: Dict[Tuple[str, str, str], AsyncOpenAI] = {}
+_lock = threading.Lock()
+_stats = {'created': 0, 'reused': 0}
+
+
+def normalize_provider(provider: Optional[str]) -> str:
+    """
+    归一化提供方名称（未知提供方回退到qwen，与原路由逻辑一致）
+
+    Args:
+        provider (Optional[str]): 提供方名称或别名
+
+    Returns:
+        str: 'qwen' 或 'doubao'
+    """
+    return PROVIDER_ALIASES.get((provider or 'qwen').lower(), 'qwen')
+
+
+def get_client(provider: str = 'qwen', base_url: Optional[str] = None,
+               api_key: Optional[str] = None) -> OpenAI:
+    """
+    获取共享的OpenAI兼容客户端
+
+    Args:
+        provider (str): 提供方名称或别名
+        base_url (Optional[str]): 接口地址，默认取提供方配置
+        api_key (Optional[str]): API Key，默认读取提供方对应的环境变量
+
+    Returns:
+        OpenAI: 共享客户端（线程安全，可跨线程复用）
+
+    Raises:
+        openai.OpenAIError: 没有可用的API Key
+    """
+    _, base_url, api_key, key = _resolve(provider, base_url, api_key)
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            _stats['reused'] += 1
+            return client
+        client = OpenAI(api_key=api_key, base_url=base_url, http_client=_build_http_client())
+        _clients[key] = client
+        _stats['created'] += 1
+        return client
+
+
+def get_async_client(provider: str = 'qwen', base_url: Optional[str] = None,
+                     api_key: Optional[str] = None) -> AsyncOpenAI:
+    """
+    获取共享的AsyncOpenAI客户端
+
+    异步客户端的连接池绑定首次使用它的事件循环，只能在llm_executor的事件循环上调用，
+    参数与get_client()相同。
+
+    Returns:
+        AsyncOpenAI: 共享的异步客户端
+
+    Raises:
+        openai.OpenAIError: 没有可用的API Key
+    """
+    _, base_url, api_key, key = _resolve(provider, base_url, api_key)
+    with _lock:
+        client = _async_clients.get(key)
+        if client is not None:
+            _stats['reused'] += 1
+            return client
+        # 关闭SDK自带的重试，429/5xx由rate_limiter统一退避重试
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=_build_async_http_client(),
+                             max_retries=0)
+        _async_clients[key] = client
+        _stats['created'] += 1
+        return client
+
+
+def get_stats() -> Dict:
+    """
+    获取注册表统计
+
+    Returns:
+        Dict: 客户端数量、新建次数、复用次数与连接池配置
+    """
+    with _lock:
+        return {
+            'clients': len(_clients),
+            'async_clients': len(_async_clients),
+            'created': _stats['created'],
+            'reused': _stats['reused'],
+            'http2': _http2_enabled(),
+            'max_connections': _env_int('LLM_MAX_CONNECTIONS', 20),
+            'max_keepalive': _env_int('LLM_MAX_KEEPALIVE', 10),
+        }
+
+
+def close_all():
+    """
+    关闭并清空所有共享客户端（测试与进程退出时使用）
+
+    异步客户端只从注册表移除；其连接由llm_executor在自己的事件循环上关闭（aclose_async_clients()）。
+    """
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _async_clients.clear()
+    for client in clients:
+        client.close()
+
+
+async def aclose_async_clients():
+    """在异步客户端所在的事件循环上关闭并清空它们"""
+    with _lock:
+        clients = list(_async_clients.values())
+        _async_clients.clear()
+    if clients:
+        await asyncio.gather(*(client.close() for client in clients), return_exceptions=True)
+
+
+def _resolve(provider: str, base_url: Optional[str], api_key: Optional[str]) -> Tuple[str, str, Optional[str], Tuple[str, str, str]]:
+    """补全接口地址与API Key，返回 (提供方, base_url, API Key, 注册表键)；注册表中只保存Key的摘要"""
+    name = normalize_provider(provider)
+    config = PROVIDERS[name]
+    if base_url is None:
+        base_url = os.getenv(config.get('base_url_env', ''), '') or config['base_url']
+    if api_key is None:
+        api_key = os.getenv(config['api_key_env'])
+    key = (name, base_url, hashlib.sha256((api_key or '').encode('utf-8')).hexdigest())
+    return name, base_url, api_key, key
+
+
+def _build_http_client() -> httpx.Client:
+    """按环境变量配置连接池与超时，保留OpenAI SDK的默认设置（重定向等）"""
+    return DefaultHttpxClient(limits=_limits(), timeout=_timeout(), http2=_http2_enabled())
+
+
+def _build_async_http_client() -> httpx.AsyncClient:
+    """异步客户端使用与同步客户端相同的连接池与超时配置"""
+    return DefaultAsyncHttpxClient(limits=_limits(), timeout=_timeout(), http2=_http2_enabled())
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=_env_int('LLM_MAX_CONNECTIONS', 20),
+        max_keepalive_connections=_env_int('LLM_MAX_KEEPALIVE', 10),
+        keepalive_expiry=_env_float('LLM_KEEPALIVE_EXPIRY', 60.0),
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        _env_float('LLM_READ_TIMEOUT', 300.0),
+        connect=_env_float('LLM_CONNECT_TIMEOUT', 10.0),
+    )
+
+
+def _http2_enabled() -> bool:
+    """LLM_HTTP2=1且已安装h2时启用HTTP/2"""
+    return os.getenv('LLM_HTTP2', '0') == '1' and importlib.util.find_spec('h2') is not None
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
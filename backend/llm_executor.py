@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+大模型异步执行核心
+==================
+
+所有模型调用都在一个后台线程的asyncio事件循环上用AsyncOpenAI执行：
+
+    1. 每个提供方一个信号量，限制同时进行的调用数（超出的调用在事件循环上排队，不占用线程）
+    2. 每次调用有超时；超时或调用方放弃时取消协程，连接随之释放
+    3. 同步门面run()/run_all()/iterate()供Flask请求线程等同步代码使用，原有调用方式不变
+    4. 每次调用先经过rate_limiter：按 (提供方, 模型) 的RPM/TPM令牌桶与自适应并发排队，
+       429/5xx按带抖动的指数退避重试
+    5. 分段分析、OCR批量识别、图片命名等多次调用在同一个事件循环上并发执行，
+       不再为每次调用占用一个线程
+
+原实现中_call_qwen_api、_call_doubao_api、OCR视觉调用与generate_image_name都在请求线程上
+同步调用OpenAI客户端，多次调用只能串行（或各占一个线程）。
+
+配置（环境变量）：
+    LLM_CONCURRENCY: 每个提供方同时进行的调用数上限，默认8
+    LLM_CONCURRENCY_QWEN / LLM_CONCURRENCY_DOUBAO: 按提供方覆盖上限
+    LLM_CALL_TIMEOUT: 单次调用超时秒数，默认300（流式调用为相邻两个数据块之间的超时）
+
+依赖库：
+    - asyncio: 事件循环、信号量与超时
+    - threading: 运行事件循环的后台线程
+    - llm_clients: 共享的AsyncOpenAI客户端
+    - rate_limiter: 限流、自适应并发与退避重试
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import os
+import asyncio
+import inspect
+import threading
+import concurrent.futures
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, Iterator, List, Optional, TypeVar
+
+import llm_clients
+import token_budget
+from llm_clients import normalize_provider
+from rate_limiter import RateLimiter
+
+T = TypeVar('T')
+
+_default_executor: Optional['LLMExecutor'] = None
+_default_lock = threading.Lock()
+
+
+def get_executor() -> 'LLMExecutor':
+    """
+    获取进程内共享的执行器（首次调用时按环境变量创建）
+
+    Returns:
+        LLMExecutor: 执行器实例
+    """
+    global _default_executor
+    with _default_lock:
+        if _default_executor is None:
+            _default_executor = LLMExecutor()
+        return _default_executor
+
+
+class LLMExecutor:
+    """
+    大模型异步执行器
+    ================
+
+    使用示例：
+        executor = get_executor()
+        client = llm_clients.get_async_client('qwen')
+        completion = executor.run(executor.chat('qwen', client, model=model, messages=messages))
+        results = executor.run_all([service._acall_model_api('qwen', prompt) for prompt in prompts])
+    """
+
+    # 默认每个提供方的并发上限
+    DEFAULT_CONCURRENCY = 8
+
+    # 默认单次调用超时（秒）
+    DEFAULT_TIMEOUT = 300.0
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, timeout: Optional[float] = None):
+        """
+        初始化执行器（事件循环线程在首次使用时启动）
+
+        Args:
+            limits (Optional[Dict[str, int]]): 各提供方的并发上限，默认读取环境变量
+            timeout (Optional[float]): 单次调用超时秒数，默认读取环境变量LLM_CALL_TIMEOUT
+        """
+        if timeout is None:
+            timeout = float(os.getenv('LLM_CALL_TIMEOUT', self.DEFAULT_TIMEOUT))
+        self.timeout = timeout
+        self._limits = {normalize_provider(name): max(1, int(value)) for name, value in (limits or {}).items()}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        # 各模型的自适应并发上限不超过提供方的并发上限
+        self.limiter = RateLimiter(default_concurrency=self.limit)
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """执行器的事件循环（首次访问时启动后台线程）"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name='llm-executor', daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    def limit(self, provider: str) -> int:
+        """提供方的并发上限"""
+        name = normalize_provider(provider)
+        if name not in self._limits:
+            default = os.getenv('LLM_CONCURRENCY', self.DEFAULT_CONCURRENCY)
+            self._limits[name] = max(1, int(os.getenv(f'LLM_CONCURRENCY_{name.upper()}', default)))
+        return self._limits[name]
+
+    async def chat(self, provider: str, client: Any, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        经限流器调用 client.chat.completions.create（非流式），并发不超过提供方上限
+
+        Args:
+            provider (str): 提供方名称或别名
+            client: AsyncOpenAI客户端
+            timeout (Optional[float]): 单次尝试的超时秒数，默认为执行器的超时（排队与退避时间不计入）
+            **kwargs: 传给chat.completions.create的参数
+
+        Returns:
+            ChatCompletion: 模型响应
+
+        Raises:
+            TimeoutError: 调用超时（协程已取消）
+            rate_limiter.RateLimitExhausted: 429/5xx重试次数用尽
+        """
+        name = normalize_provider(provider)
+
+        async def attempt() -> Any:
+            async with self._semaphore(name):
+                self._count(name, 'started')
+                try:
+                    return await self._wait(name, client.chat.completions.create(**kwargs), timeout)
+                finally:
+                    self._count(name, 'in_flight', -1)
+
+        return await self.limiter.call(name, kwargs.get('model', ''), request_tokens(kwargs), attempt)
+
+    async def stream_chat(self, provider: str, client: Any, timeout: Optional[float] = None,
+                          **kwargs) -> AsyncIterator[Any]:
+        """
+        流式调用（stream=True），逐个产出数据块；整个流式过程占用一个并发名额
+
+        建立流式连接时遇到429/5xx按限流器退避重试，开始输出后不再重试。
+
+        Args:
+            timeout (Optional[float]): 相邻两个数据块之间的超时秒数
+
+        Yields:
+            ChatCompletionChunk: 数据块
+        """
+        name = normalize_provider(provider)
+        semaphore = self._semaphore(name)
+
+        async def open_stream() -> Any:
+            await semaphore.acquire()
+            self._count(name, 'started')
+            try:
+                return await self._wait(name, client.chat.completions.create(stream=True, **kwargs), timeout)
+            except BaseException:
+                self._count(name, 'in_flight', -1)
+                semaphore.release()
+                raise
+
+        stream, lease = await self.limiter.acquire(name, kwargs.get('model', ''), request_tokens(kwargs), open_stream)
+        usage = None
+        outcome = 'failed'
+        try:
+            iterator = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await self._wait(name, iterator.__anext__(), timeout)
+                except StopAsyncIteration:
+                    break
+                if getattr(chunk, 'usage', None):
+                    usage = chunk.usage
+                yield chunk
+            outcome = 'success'
+        finally:
+            self._count(name, 'in_flight', -1)
+            semaphore.release()
+            lease.release(outcome, usage)
+            close = getattr(stream, 'close', None)
+            if close:
+                result = close()
+                if inspect.isawaitable(result):
+                    await result
+
+    def submit(self, coro: Awaitable[T]) -> 'concurrent.futures.Future[T]':
+        """把协程提交到事件循环，返回可在其他线程等待的Future（可配合as_completed使用）"""
+        return asyncio.run_coroutine_threadsafe(_as_coroutine(coro), self.loop)
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """
+        同步门面：在事件循环上执行协程并等待结果
+
+        Args:
+            coro: 协程
+            timeout (Optional[float]): 等待的总超时秒数，默认不限（单次调用已有超时）
+
+        Returns:
+            协程的返回值
+
+        Raises:
+            RuntimeError: 在事件循环线程上调用（会造成死锁，协程内应直接await）
+            TimeoutError: 等待超时（协程已取消）
+        """
+        if threading.current_thread() is self._thread:
+            _close_awaitable(coro)
+            raise RuntimeError('不能在大模型事件循环线程上同步等待，请直接await')
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            if future.done():
+                # 协程自身抛出的超时（单次调用超时）
+                raise
+            future.cancel()
+            raise TimeoutError(f'大模型调用超时（{timeout}秒）')
+        except BaseException:
+            # 调用方被中断（如KeyboardInterrupt）时取消仍在运行的协程
+            future.cancel()
+            raise
+
+    def run_all(self, coros: Iterable[Awaitable[Any]], timeout: Optional[float] = None) -> List[Any]:
+        """
+        在同一个事件循环上并发执行多个协程，按提交顺序返回结果
+
+        某个协程抛出的异常作为该位置的结果返回，不影响其他协程；
+        总超时或调用方中断时取消全部未完成的协程。
+
+        Returns:
+            List[Any]: 结果或异常
+        """
+        coros = list(coros)
+        if not coros:
+            return []
+        return self.run(_gather(coros), timeout)
+
+    def iterate(self, agen: AsyncIterator[T], timeout: Optional[float] = None) -> Iterator[T]:
+        """
+        把异步生成器转换为同步迭代器（流式调用的同步门面）
+
+        调用方中途停止迭代（如SSE客户端断开）时关闭异步生成器，取消进行中的流式调用。
+        """
+        finished = False
+        try:
+            while True:
+                try:
+                    item = self.run(_anext(agen), timeout)
+                except StopAsyncIteration:
+                    finished = True
+                    return
+                yield item
+        finally:
+            if not finished:
+                aclose = getattr(agen, 'aclose', None)
+                if aclose and self._loop is not None and self._loop.is_running():
+                    self.run(aclose())
+
+    def get_stats(self) -> Dict:
+        """
+        获取执行统计
+
+        Returns:
+            Dict: 各提供方的并发上限、进行中/已开始/超时/取消的调用数，
+                以及rate_limits（各模型的限流统计，见RateLimiter.get_stats()）
+        """
+        with self._lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+        return {
+            'running': self._loop is not None and self._loop.is_running(),
+            'timeout': self.timeout,
+            'providers': {name: dict(values, limit=self.limit(name)) for name, values in stats.items()},
+            'rate_limits': self.limiter.get_stats(),
+        }
+
+    def shutdown(self, timeout: float = 5.0):
+        """关闭异步客户端并停止事件循环线程（测试与进程退出时使用）"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+            self._semaphores = {}
+        if loop is None or not loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(llm_clients.aclose_async_clients(), loop).result(timeout)
+        except Exception:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+        loop.close()
+
+    def _semaphore(self, name: str) -> asyncio.Semaphore:
+        """提供方的信号量（只在事件循环线程上创建与使用）"""
+        semaphore = self._semaphores.get(name)
+        if semaphore is None:
+            semaphore = self._semaphores[name] = asyncio.Semaphore(self.limit(name))
+        return semaphore
+
+    async def _wait(self, name: str, awaitable: Awaitable[T], timeout: Optional[float]) -> T:
+        """带超时等待，统计超时与取消"""
+        try:
+            return await asyncio.wait_for(awaitable, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            self._count(name, 'timeouts')
+            raise TimeoutError(f'大模型调用超时（{timeout or self.timeout}秒）')
+        except asyncio.CancelledError:
+            self._count(name, 'cancelled')
+            raise
+
+    def _count(self, name: str, field: str, delta: int = 1):
+        with self._lock:
+            stats = self._stats.setdefault(name, {'in_flight': 0, 'started': 0, 'timeouts': 0, 'cancelled': 0})
+            stats[field] += delta
+            if field == 'started':
+                stats['in_flight'] += 1
+
+
+def request_tokens(kwargs: Dict[str, Any]) -> int:
+    """
+    预估一次请求占用的token数：消息中文本部分的预估值加输出上限（max_tokens）
+
+    图像部分无法预估，调用结束后由限流器按usage的实际用量修正。
+    """
+    total = 0
+    for message in kwargs.get('messages') or []:
+        content = message.get('content') if isinstance(message, dict) else None
+        if isinstance(content, str):
+            total += token_budget.estimate_tokens(content)
+        elif isinstance(content, list):
+            total += sum(token_budget.estimate_tokens(part.get('text')) for part in content
+                         if isinstance(part, dict) and part.get('type') == 'text')
+    return total + int(kwargs.get('max_tokens') or 0)
+
+
+async def _as_coroutine(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+async def _gather(coros: List[Awaitable[Any]]) -> List[Any]:
+    return list(await asyncio.gather(*coros, return_exceptions=True))
+
+
+async def _anext(agen: AsyncIterator[T]) -> T:
+    return await agen.__anext__()
+
+
+def _close_awaitable(awaitable: Any):
+    """关闭未执行的协程，避免“never awaited”警告"""
+    close = getattr(awaitable, 'close', None)
+    if close:
+        close()
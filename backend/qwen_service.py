@@ -11,8 +11,12 @@ Qwen AI 文档分析服务
     2. 投标文件分析 - 检查合规性、评估风险等级、提供改进建议
 
 技术特点：
-    - 使用OpenAI SDK兼容模式调用阿里云百炼API
-    - 支持流式和非流式响应
+    - 使用OpenAI SDK兼容模式调用阿里云百炼API（客户端由llm_clients共享，复用长连接）
+    - 模型调用由llm_executor在asyncio事件循环上执行（AsyncOpenAI），按提供方限制并发并设置超时；
+      同步方法是其门面，分段分析的各段在同一个事件循环上并发执行
+    - 相同提示词的模型响应由llm_cache持久化缓存
+    - 调用前由token_budget估算token数并决定发送、改用长上下文模型或分段
+    - 支持流式和非流式响应（流式分析边输出边解析废标条款/问题项）
     - 智能JSON解析和错误处理
     - 结构化的分析结果输出
 
@@ -31,13 +35,23 @@ Qwen AI 文档分析服务
 版本：1.0
 """
 
-from openai import OpenAI
 import os
 import json
 import re
-from typing import Dict, List, Optional, Any, cast
+import time
+import asyncio
+from difflib import SequenceMatcher
+from typing import AsyncIterator, Callable, Dict, Generator, Iterator, List, Optional, Any, Tuple, cast
 from dotenv import load_dotenv
 
+from llm_clients import get_async_client, normalize_provider
+from llm_executor import get_executor
+import llm_cache
+import token_budget
+from llm_cache import get_default_cache
+from document_chunker import split_document, DEFAULT_CHUNK_CHARS, DEFAULT_OVERLAP_CHARS
+from json_stream import ArrayItemParser
+
 # 确保在独立脚本/测试环境下也能读取 backend/.env
 _env_loaded = False
 try:
@@ -50,6 +64,12 @@ except Exception:
     # 静默失败，不影响后续从系统环境读取
     _env_loaded = False
 
+# 严重程度排序（合并重复条款时保留更高的一条）
+SEVERITY_RANK = {"低": 1, "中": 2, "高": 3}
+
+# 分段分析合并时，同类别描述相似度不低于该值的条款视为重复
+DEDUP_SIMILARITY = float(os.getenv("TENDER_DEDUP_SIMILARITY", "0.85"))
+
 class QwenAnalysisService:
     """
     基于Qwen大模型的文档分析服务类
@@ -79,13 +99,10 @@ class QwenAnalysisService:
         Raises:
             ValueError: 当API密钥未设置时
         """
-        # 初始化OpenAI客户端，使用阿里云百炼的兼容模式
-        self.client = OpenAI(
-            # 从环境变量获取API密钥，确保安全性
-            api_key=os.getenv("DASHSCOPE_API_KEY"),
-            # 阿里云百炼平台的API端点
-            base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
-        )
+        # 获取共享的AsyncOpenAI客户端（阿里云百炼兼容模式，API密钥取自DASHSCOPE_API_KEY），
+        # 进程内所有服务与代理复用同一连接池，调用在llm_executor的事件循环上执行
+        self.async_client = get_async_client("qwen")
+        self.executor = get_executor()
         # 使用的模型版本，可根据需要调整
         self.model = "qwen-plus-2025-04-28"
         # 默认大模型提供方（仅作为可选属性，不改变现有行为）
@@ -96,6 +113,12 @@ class QwenAnalysisService:
         # 模型ID优先取环境变量，若未配置则回退到示例模型名
         # 如您有专属推理接入点ID（UUID），请设置 DOUBAO_MODEL_ID=您的接入点ID
         self.doubao_model_id = os.getenv("DOUBAO_MODEL_ID", "doubao-seed-1-6-250615")
+        # 模型响应缓存（进程内共享，相同提示词不重复调用模型）
+        self.cache = get_default_cache()
+        # 长招标文件分段分析配置：每段最大字符数、相邻段重叠字符数、并发分析的段数上限
+        self.chunk_chars = int(os.getenv("TENDER_CHUNK_CHARS", str(DEFAULT_CHUNK_CHARS)))
+        self.chunk_overlap = int(os.getenv("TENDER_CHUNK_OVERLAP", str(DEFAULT_OVERLAP_CHARS)))
+        self.chunk_concurrency = int(os.getenv("TENDER_CHUNK_CONCURRENCY", "4"))
     
     def analyze_tender_document(self, content: str) -> Dict:
         """
@@ -329,18 +352,8 @@ class QwenAnalysisService:
             - 降低temperature以提高分析结果的一致性
             - 非流式调用确保获得完整的结构化响应
         """
-        # 构建符合OpenAI格式的消息列表
-        messages: List[Dict[str, Any]] = [{"role": "user", "content": prompt}]
-        # 调用阿里云百炼API（作类型转换，满足SDK类型定义）
-        completion = self.client.chat.completions.create(
-            model=self.model,
-            messages=cast(Any, messages),
-            stream=False,
-            temperature=0.3,
-        )
-        
-        # 提取并返回响应内容
-        return completion.choices[0].message.content or ""
+        # 同步门面：在llm_executor的事件循环上执行_acall_model_api()
+        return self._call_model_api("qwen", prompt)
 
     def _call_doubao_api(self, prompt: str) -> str:
         """
@@ -355,25 +368,7 @@ class QwenAnalysisService:
             - ARK_BASE_URL: 可选，自定义方舟API地址（默认华北）
             - DOUBAO_MODEL_ID: 可选，推理接入点ID或模型名
         """
-        ark_api_key = os.getenv("ARK_API_KEY")
-        if not ark_api_key:
-            raise ValueError("缺少方舟平台API密钥，请设置环境变量 ARK_API_KEY")
-
-        ark_client = OpenAI(
-            base_url=self.ark_base_url,
-            api_key=ark_api_key,
-        )
-
-        # 与Qwen一致，使用纯文本对话
-        messages: List[Dict[str, Any]] = [{"role": "user", "content": prompt}]
-        completion = ark_client.chat.completions.create(
-            model=self.doubao_model_id,
-            messages=cast(Any, messages),
-            stream=False,
-            temperature=0.3,
-        )
-        # Ark返回结构与OpenAI兼容
-        return completion.choices[0].message.content or ""
+        return self._call_model_api("doubao", prompt)
 
     def _call_model_api(self, provider: str, prompt: str) -> str:
         """
@@ -381,6 +376,7 @@ class QwenAnalysisService:
         ==============
 
         根据provider选择调用Qwen或豆包API。上游提示词与下游解析逻辑不变。
+        这是_acall_model_api()的同步门面，调用方线程上的缓存绕过模式随调用传入事件循环。
 
         Args:
             provider (str): "qwen" 或 "doubao"（别名：ali/dashscope、ark/volc）
@@ -389,13 +385,59 @@ class QwenAnalysisService:
         Returns:
             str: 模型原始响应文本
         """
-        key = (provider or "qwen").lower()
-        if key in ("qwen", "ali", "dashscope"):
-            return self._call_qwen_api(prompt)
-        if key in ("doubao", "ark", "volc", "volcengine"):
-            return self._call_doubao_api(prompt)
-        # 未知提供方时回退到Qwen
-        return self._call_qwen_api(prompt)
+        return self.executor.run(self._acall_model_api(provider, prompt, llm_cache.bypass_mode()))
+
+    async def _acall_model_api(self, provider: str, prompt: str, cache_mode: Optional[str] = None) -> str:
+        """
+        异步调用模型（在llm_executor的事件循环上执行）
+
+        调用前估算token数；超出上下文且配置了长上下文模型时改用该模型。
+        相同提示词优先返回缓存的响应。
+
+        Args:
+            provider (str): 提供方（未知提供方时回退到Qwen）
+            prompt (str): 提示词
+            cache_mode (Optional[str]): 响应缓存的绕过模式（提交前在调用方线程上取llm_cache.bypass_mode()）
+
+        Returns:
+            str: 模型原始响应文本
+        """
+        provider = normalize_provider(provider)
+        client, base_model = self._model_client(provider)
+        estimated = token_budget.estimate_tokens(prompt)
+        model = token_budget.plan(
+            base_model, estimated, route_model=token_budget.long_context_model(provider)
+        )["model"]
+
+        async def fetch() -> str:
+            # 构建符合OpenAI格式的消息列表（作类型转换，满足SDK类型定义）
+            messages: List[Dict[str, Any]] = [{"role": "user", "content": prompt}]
+            completion = await self.executor.chat(
+                provider, client,
+                model=model,
+                messages=cast(Any, messages),
+                stream=False,
+                temperature=0.3,
+            )
+            token_budget.record_usage(model, estimated, getattr(completion, "usage", None))
+            # 提取并返回响应内容（Ark返回结构与OpenAI兼容）
+            return completion.choices[0].message.content or ""
+
+        return await self.cache.acall(provider, model, 0.3, prompt, fetch, mode=cache_mode)
+
+    def _model_client(self, provider: str) -> Tuple[Any, str]:
+        """
+        提供方对应的异步客户端与默认模型
+
+        Raises:
+            ValueError: 调用豆包但未设置ARK_API_KEY
+        """
+        if provider == "doubao":
+            ark_api_key = os.getenv("ARK_API_KEY")
+            if not ark_api_key:
+                raise ValueError("缺少方舟平台API密钥，请设置环境变量 ARK_API_KEY")
+            return get_async_client("doubao", base_url=self.ark_base_url, api_key=ark_api_key), self.doubao_model_id
+        return self.async_client, self.model
 
     # 新增：带模型选择的分析方法（保持原有方法不变，便于后续选择）
     def analyze_tender_document_with_model(self, content: str, provider: str = "qwen") -> Dict:
@@ -403,9 +445,36 @@ class QwenAnalysisService:
         分析招标文件（可选择模型提供方）
         保持提示词与解析逻辑一致，仅切换底层模型调用。
         """
+        prompt = self._build_tender_prompt(content)
+
+        try:
+            response = self._call_model_api(provider, prompt)
+            return self._parse_tender_response(response)
+        except Exception as e:
+            return {
+                "summary": f"分析过程中出现错误：{str(e)}",
+                "invalid_items": [],
+                "suggestions": ["请检查文件内容或重新尝试分析"],
+            }
+
+    def _build_tender_prompt(self, content: str, part: Optional[Tuple[int, int]] = None) -> str:
+        """
+        构建招标文件分析提示词
+
+        Args:
+            content (str): 招标文件内容（或其中一段）
+            part (Optional[Tuple[int, int]]): 分段分析时的 (段序号, 总段数)，从1开始
+
+        Returns:
+            str: 提示词（不分段时与原提示词一致，不影响已有的响应缓存）
+        """
+        note = ""
+        if part:
+            note = (f"注意：以下内容是招标文件的第{part[0]}/{part[1]}部分，与相邻部分首尾有少量重叠，"
+                    f"只需提取本部分中出现的条款，摘要只概括本部分内容。")
         prompt = f"""
         请分析以下招标文件内容，提取出所有可能导致投标无效的条款（废标条款）。
-        
+        {note}
         招标文件内容：
         {content}
         
@@ -437,21 +506,268 @@ class QwenAnalysisService:
         
         请确保返回的是有效的JSON格式。
         """
+        return prompt
+
+    def analyze_tender_document_chunked(self, content: str, provider: str = "qwen",
+                                        boundaries: Optional[List[int]] = None,
+                                        chunk_chars: Optional[int] = None,
+                                        overlap_chars: Optional[int] = None,
+                                        max_workers: Optional[int] = None) -> Dict:
+        """
+        分段（map-reduce）分析招标文件
+        ==============================
+
+        长文档整篇放进一个提示词会超出模型上下文，或者一次调用耗时过长。
+        这里在标题/分页边界处切分为带重叠的若干段，并发分析各段（map），
+        再合并各段的废标条款并去重（reduce），最后统一归一化。
+
+        Args:
+            content (str): 招标文件全文
+            provider (str): 模型提供方
+            boundaries (Optional[List[int]]): 结构边界的字符偏移（见DatabaseManager.get_chunk_boundaries()）
+            chunk_chars (Optional[int]): 每段最大字符数，默认读取环境变量TENDER_CHUNK_CHARS
+                （不超过按模型输入预算折算的字符数，见token_budget）
+            overlap_chars (Optional[int]): 相邻段重叠字符数，默认读取环境变量TENDER_CHUNK_OVERLAP
+            max_workers (Optional[int]): 并发分析的段数上限，默认读取环境变量TENDER_CHUNK_CONCURRENCY
+
+        Returns:
+            Dict: 与analyze_tender_document_with_model()结构相同；
+                文档被切分为多段时另含chunking字段：
+                    - chunk_chars/overlap_chars/concurrency: 本次使用的配置
+                    - total_seconds: 总耗时
+                    - chunks: 每段的 index、start、end、chars、seconds、items、error
+        """
+        chunks, chunk_chars, overlap_chars = self._plan_tender_chunks(
+            content, provider, boundaries, chunk_chars, overlap_chars
+        )
+        if not chunks:
+            # 不超过分段长度（或整篇改用长上下文模型）时与整篇分析完全一致
+            return self.analyze_tender_document_with_model(content, provider=provider)
+
+        workers = max(1, min(max_workers or self.chunk_concurrency, len(chunks)))
+        # 事件循环上的各段沿用当前请求的缓存绕过模式
+        cache_mode = llm_cache.bypass_mode()
+        started = time.perf_counter()
+
+        outcomes = list(self.executor.iterate(self._analyze_tender_chunks(provider, chunks, workers, cache_mode)))
+
+        return self._finish_chunked_tender(outcomes, {
+            "chunk_chars": chunk_chars,
+            "overlap_chars": overlap_chars,
+            "concurrency": workers,
+            "total_seconds": round(time.perf_counter() - started, 3),
+        })
+
+    def _plan_tender_chunks(self, content: str, provider: str, boundaries: Optional[List[int]],
+                            chunk_chars: Optional[int], overlap_chars: Optional[int]) -> Tuple[List[Dict], int, int]:
+        """
+        确定分段方案
+
+        按模型的输入预算折算每段可容纳的字符数：整篇超出预算时，配置了长上下文模型则整篇改用该模型，
+        否则分段；分段长度取配置值与预算折算值中较小的一个。
+
+        Returns:
+            Tuple[List[Dict], int, int]: (分段列表, 分段长度, 重叠长度)；应整篇分析时分段列表为空
+        """
+        overlap_chars = self.chunk_overlap if overlap_chars is None else overlap_chars
+        provider = normalize_provider(provider)
+        model = self.doubao_model_id if provider == "doubao" else self.model
+        template_tokens = token_budget.estimate_tokens(self._build_tender_prompt("", (1, 1)))
+        fit_chars = token_budget.chars_for_tokens(content, token_budget.input_budget(model) - template_tokens)
+        if len(content) > fit_chars:
+            decision = token_budget.plan(
+                model, template_tokens + token_budget.estimate_tokens(content), can_chunk=True,
+                route_model=token_budget.long_context_model(provider),
+            )
+            if decision["action"] == "route":
+                return [], 0, overlap_chars
+        chunk_chars = min(chunk_chars or self.chunk_chars, fit_chars)
+
+        chunks = split_document(content, boundaries, chunk_chars, overlap_chars)
+        return (chunks if len(chunks) > 1 else []), chunk_chars, overlap_chars
+
+    async def _analyze_tender_chunks(self, provider: str, chunks: List[Dict], workers: int,
+                                     cache_mode: Optional[str]) -> AsyncIterator[Dict]:
+        """
+        在事件循环上并发分析各段（同时进行的段数不超过workers），按完成顺序产出各段结果
 
+        调用方停止迭代时取消尚未完成的段。
+        """
+        limiter = asyncio.Semaphore(workers)
+
+        async def bounded(chunk: Dict) -> Dict:
+            async with limiter:
+                return await self._analyze_tender_chunk(provider, chunk, len(chunks), cache_mode)
+
+        tasks = [asyncio.ensure_future(bounded(chunk)) for chunk in chunks]
         try:
-            response = self._call_model_api(provider, prompt)
-            return self._parse_tender_response(response)
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _analyze_tender_chunk(self, provider: str, chunk: Dict, total: int, cache_mode: Optional[str]) -> Dict:
+        """分析一段，返回 {"stats": 本段统计, "result": 未归一化的结果或None}"""
+        chunk_start = time.perf_counter()
+        stats = {
+            "index": chunk["index"],
+            "start": chunk["start"],
+            "end": chunk["end"],
+            "chars": len(chunk["text"]),
+        }
+        try:
+            response = await self._acall_model_api(
+                provider, self._build_tender_prompt(chunk["text"], (chunk["index"] + 1, total)), cache_mode
+            )
+            parsed = self._load_tender_json(response)
+            if parsed is None:
+                parsed = {
+                    "summary": "",
+                    "invalid_items": self._extract_invalid_items_from_text(response),
+                    "suggestions": self._extract_suggestions_from_text(response),
+                }
+            stats["error"] = None
         except Exception as e:
+            parsed = None
+            stats["error"] = str(e)
+        items = (parsed or {}).get("invalid_items")
+        stats["items"] = len(items) if isinstance(items, list) else 0
+        stats["seconds"] = round(time.perf_counter() - chunk_start, 3)
+        return {"stats": stats, "result": parsed}
+
+    def _finish_chunked_tender(self, outcomes: List[Dict], chunking: Dict) -> Dict:
+        """合并各段结果（按段序号）并归一化，附上分段统计"""
+        outcomes = sorted(outcomes, key=lambda outcome: outcome["stats"]["index"])
+        results = [outcome["result"] for outcome in outcomes if outcome["result"] is not None]
+        if not results:
             return {
-                "summary": f"分析过程中出现错误：{str(e)}",
+                "summary": f"分析过程中出现错误：{outcomes[0]['stats']['error']}",
                 "invalid_items": [],
                 "suggestions": ["请检查文件内容或重新尝试分析"],
             }
 
+        merged = self._normalize_tender_result(self._merge_tender_results(results))
+        merged["chunking"] = dict(chunking, chunks=[outcome["stats"] for outcome in outcomes])
+        return merged
+
+    def _merge_tender_results(self, results: List[Dict]) -> Dict:
+        """
+        合并各段的招标分析结果（归一化之前）
+
+        废标条款按 (类别, 描述) 去重：描述去掉空白与标点后相同，或同类别下相似度
+        不低于DEDUP_SIMILARITY的视为同一条款（重叠部分常被相邻两段各识别一次），
+        保留严重程度更高的一条并合并关键词。摘要按段拼接，建议去重保序。
+        """
+        merged_items: List[Dict] = []
+        seen: Dict[str, int] = {}
+        for result in results:
+            items = result.get("invalid_items", [])
+            if isinstance(items, dict):
+                items = [items]
+            for item in items if isinstance(items, list) else []:
+                if not isinstance(item, dict):
+                    continue
+                category = str(item.get("category", "")).strip()
+                description = self._dedup_text(item.get("description", "")) or self._dedup_text(item.get("requirement", ""))
+                key = f"{category}\x1f{description}"
+                index = seen.get(key)
+                if index is None:
+                    index = self._find_similar_item(merged_items, category, description)
+                if index is None:
+                    seen[key] = len(merged_items)
+                    merged_items.append(dict(item))
+                    continue
+                seen[key] = index
+                kept = merged_items[index]
+                if SEVERITY_RANK.get(str(item.get("severity", "")).strip(), 0) > \
+                        SEVERITY_RANK.get(str(kept.get("severity", "")).strip(), 0):
+                    kept["severity"] = item.get("severity")
+                keywords = kept.get("keywords") if isinstance(kept.get("keywords"), list) else []
+                extra = item.get("keywords") if isinstance(item.get("keywords"), list) else []
+                kept["keywords"] = keywords + [word for word in extra if word not in keywords]
+
+        summaries = [str(result.get("summary", "")).strip() for result in results]
+        suggestions: List[str] = []
+        seen_suggestions = set()
+        for result in results:
+            values = result.get("suggestions", [])
+            for value in [values] if isinstance(values, str) else values if isinstance(values, list) else []:
+                text = value if isinstance(value, str) else (value.get("text") or value.get("suggestion") or "") \
+                    if isinstance(value, dict) else ""
+                key = self._dedup_text(text)
+                if key and key not in seen_suggestions:
+                    seen_suggestions.add(key)
+                    suggestions.append(str(text))
+
+        return {
+            "summary": "\n".join(summary for summary in summaries if summary),
+            "invalid_items": merged_items,
+            "suggestions": suggestions,
+        }
+
+    def _find_similar_item(self, items: List[Dict], category: str, description: str) -> Optional[int]:
+        """在已合并的条款中查找同类别且描述相似的条款，返回其下标"""
+        if not description:
+            return None
+        for index, item in enumerate(items):
+            if str(item.get("category", "")).strip() != category:
+                continue
+            other = self._dedup_text(item.get("description", "")) or self._dedup_text(item.get("requirement", ""))
+            if other and SequenceMatcher(None, description, other).ratio() >= DEDUP_SIMILARITY:
+                return index
+        return None
+
+    @staticmethod
+    def _dedup_text(text: Any) -> str:
+        """去重用的文本形式：去掉空白与标点"""
+        return re.sub(r"[\s\W_]+", "", str(text or ""))
+
     def analyze_bid_document_with_model(self, content: str, tender_analysis: Optional[Dict] = None, provider: str = "qwen") -> Dict:
         """
         分析投标文件（可选择模型提供方）
         保持提示词与解析逻辑一致，仅切换底层模型调用。
+        正文超出模型输入预算时截取前部分（见_fit_bid_prompt()）。
+        """
+        try:
+            prompt = self._fit_bid_prompt(content, tender_analysis, provider)
+            response = self._call_model_api(provider, prompt)
+            return self._parse_bid_response(response)
+        except Exception as e:
+            return {
+                "summary": f"分析过程中出现错误：{str(e)}",
+                "compliance_check": {
+                    "overall_status": "未知",
+                    "risk_level": "未知",
+                    "score": 0,
+                },
+                "issues": [],
+                "recommendations": ["请检查文件内容或重新尝试分析"],
+            }
+    
+    def _fit_bid_prompt(self, content: str, tender_analysis: Optional[Dict], provider: str) -> str:
+        """
+        构建不超出输入预算的投标文件分析提示词
+
+        投标分析需要整篇对照招标要求，不分段：超出预算时配置了长上下文模型则整篇发送
+        （由_acall_model_api()改用该模型），否则把正文截到预算减去模板部分的token数。
+        """
+        prompt = self._build_bid_prompt(content, tender_analysis)
+        provider = normalize_provider(provider)
+        _client, model = self._model_client(provider)
+        decision = token_budget.plan(
+            model, token_budget.estimate_tokens(prompt), can_trim=True,
+            route_model=token_budget.long_context_model(provider),
+        )
+        if decision["action"] == "trim":
+            template_tokens = token_budget.estimate_tokens(self._build_bid_prompt("", tender_analysis))
+            trimmed = token_budget.trim_to_tokens(content, decision["budget"] - template_tokens)
+            prompt = self._build_bid_prompt(trimmed, tender_analysis)
+        return prompt
+
+    def _build_bid_prompt(self, content: str, tender_analysis: Optional[Dict] = None) -> str:
+        """
+        构建投标文件分析提示词（提供招标分析结果时加入废标条款对比）
         """
         base_prompt = f"""
         请分析以下投标文件内容，检查是否存在可能导致废标的问题。
@@ -509,22 +825,141 @@ class QwenAnalysisService:
         
         请确保返回的是有效的JSON格式。
         """
-
-        try:
-            response = self._call_model_api(provider, prompt)
-            return self._parse_bid_response(response)
-        except Exception as e:
-            return {
-                "summary": f"分析过程中出现错误：{str(e)}",
-                "compliance_check": {
-                    "overall_status": "未知",
-                    "risk_level": "未知",
-                    "score": 0,
-                },
-                "issues": [],
-                "recommendations": ["请检查文件内容或重新尝试分析"],
-            }
+        return prompt
     
+    def stream_tender_analysis(self, content: str, provider: str = "qwen",
+                               boundaries: Optional[List[int]] = None,
+                               chunk_chars: Optional[int] = None,
+                               include_tokens: bool = False) -> Iterator[Dict]:
+        """
+        流式分析招标文件
+        ================
+
+        与analyze_tender_document_chunked()的分析方式相同，但边分析边产出事件：
+        整篇分析时以stream=True调用模型，从输出中增量解析出完整的废标条款后立即产出；
+        分段分析时每段完成即产出该段中新出现的条款。
+
+        Args:
+            content (str): 招标文件全文
+            provider (str): 模型提供方
+            boundaries (Optional[List[int]]): 结构边界的字符偏移
+            chunk_chars (Optional[int]): 每段最大字符数
+            include_tokens (bool): 是否同时产出模型输出的原始文本片段
+
+        Yields:
+            Dict: 事件 {"event": 事件名, "data": 数据}
+                - start: {"mode": "stream" 或 "chunked", "chunks": 段数}
+                - token: {"text": 新输出的文本}（仅include_tokens为True时）
+                - item: {"item": 归一化后的废标条款}
+                - chunk: 分段模式下一段完成时的统计（同chunking.chunks中的一项）
+                - result: {"result": 最终结果}（与非流式接口的结果结构相同，条款已合并去重）
+        """
+        chunks, chunk_chars, overlap_chars = self._plan_tender_chunks(
+            content, provider, boundaries, chunk_chars, None
+        )
+        if not chunks:
+            yield {"event": "start", "data": {"mode": "stream", "chunks": 1}}
+            response = yield from self._stream_items(
+                provider, self._build_tender_prompt(content), "invalid_items",
+                lambda item: self._normalize_tender_result({"invalid_items": [item]})["invalid_items"][0],
+                include_tokens,
+            )
+            yield {"event": "result", "data": {"result": self._parse_tender_response(response)}}
+            return
+
+        workers = max(1, min(self.chunk_concurrency, len(chunks)))
+        cache_mode = llm_cache.bypass_mode()
+        started = time.perf_counter()
+        yield {"event": "start", "data": {"mode": "chunked", "chunks": len(chunks)}}
+
+        outcomes: List[Dict] = []
+        seen = set()
+        # 客户端断开时停止迭代，取消事件循环上尚未完成的段
+        for outcome in self.executor.iterate(self._analyze_tender_chunks(provider, chunks, workers, cache_mode)):
+            outcomes.append(outcome)
+            yield {"event": "chunk", "data": outcome["stats"]}
+            items = (outcome["result"] or {}).get("invalid_items", [])
+            for item in self._normalize_tender_result({"invalid_items": items})["invalid_items"]:
+                key = (item["category"], self._dedup_text(item["description"]))
+                if key not in seen:
+                    seen.add(key)
+                    yield {"event": "item", "data": {"item": item}}
+
+        yield {"event": "result", "data": {"result": self._finish_chunked_tender(outcomes, {
+            "chunk_chars": chunk_chars,
+            "overlap_chars": overlap_chars,
+            "concurrency": workers,
+            "total_seconds": round(time.perf_counter() - started, 3),
+        })}}
+
+    def stream_bid_analysis(self, content: str, tender_analysis: Optional[Dict] = None,
+                            provider: str = "qwen", include_tokens: bool = False) -> Iterator[Dict]:
+        """
+        流式分析投标文件
+
+        以stream=True调用模型，从输出中增量解析出完整的问题项后立即产出。
+
+        Yields:
+            Dict: 事件，同stream_tender_analysis()；item事件的数据为 {"item": 归一化后的问题项}
+        """
+        prompt = self._fit_bid_prompt(content, tender_analysis, provider)
+        yield {"event": "start", "data": {"mode": "stream", "chunks": 1}}
+        response = yield from self._stream_items(
+            provider, prompt, "issues",
+            lambda item: self._normalize_bid_result({"issues": [item]})["issues"][0],
+            include_tokens,
+        )
+        yield {"event": "result", "data": {"result": self._parse_bid_response(response)}}
+
+    def _stream_items(self, provider: str, prompt: str, key: str, normalize: Callable[[Dict], Dict],
+                      include_tokens: bool) -> Generator[Dict, None, str]:
+        """转发流式输出并增量解析key数组中的对象，返回完整的响应文本"""
+        parser = ArrayItemParser(key)
+        parts: List[str] = []
+        for text in self._stream_model_api(provider, prompt):
+            parts.append(text)
+            if include_tokens:
+                yield {"event": "token", "data": {"text": text}}
+            for item in parser.feed(text):
+                yield {"event": "item", "data": {"item": normalize(item)}}
+        return "".join(parts)
+
+    def _stream_model_api(self, provider: str, prompt: str) -> Iterator[str]:
+        """
+        流式调用模型（stream=True），逐段产出响应文本
+
+        与_call_model_api()使用相同的客户端、并发上限、模型选择（Token预算）与响应缓存；
+        缓存命中时一次性产出完整响应。
+        """
+        provider = normalize_provider(provider)
+        client, base_model = self._model_client(provider)
+
+        estimated = token_budget.estimate_tokens(prompt)
+        model = token_budget.plan(
+            base_model, estimated, route_model=token_budget.long_context_model(provider)
+        )["model"]
+
+        def fetch_stream() -> Iterator[str]:
+            messages: List[Dict[str, Any]] = [{"role": "user", "content": prompt}]
+            stream = self.executor.stream_chat(
+                provider, client,
+                model=model,
+                messages=cast(Any, messages),
+                temperature=0.3,
+                stream_options={"include_usage": True},
+            )
+            usage = None
+            # 中途停止迭代时iterate()关闭异步生成器，取消进行中的流式调用
+            for chunk in self.executor.iterate(stream):
+                # 最后一个数据块只携带usage，choices为空
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            token_budget.record_usage(model, estimated, usage)
+
+        return self.cache.stream(provider, model, 0.3, prompt, fetch_stream)
+
     def _parse_tender_response(self, response: str) -> Dict:
         """
         解析招标文件分析的AI响应
@@ -549,10 +984,26 @@ class QwenAnalysisService:
             - 提取关键信息构建默认结构
             - 确保返回结果符合预期格式
         """
+        parsed = self._load_tender_json(response)
+        if parsed is not None:
+            return self._normalize_tender_result(parsed)
+
+        # 兜底：文本启发式提取（避免把模板/JSON属性当作条款）
+        return {
+            "summary": "解析响应时出现错误，但分析已完成",
+            "invalid_items": self._extract_invalid_items_from_text(response),
+            "suggestions": self._extract_suggestions_from_text(response),
+        }
+    
+    def _load_tender_json(self, response: str) -> Optional[Dict]:
+        """
+        从招标分析响应中取出JSON对象（未归一化），无法解析时返回None
+        """
         # 优先尝试严格JSON解析
         try:
             parsed = json.loads(response)
-            return self._normalize_tender_result(parsed)
+            if isinstance(parsed, dict):
+                return parsed
         except json.JSONDecodeError:
             pass
 
@@ -560,7 +1011,8 @@ class QwenAnalysisService:
         for fenced in reversed(self._extract_all_fenced_json(response)):
             try:
                 parsed = json.loads(fenced)
-                return self._normalize_tender_result(parsed)
+                if isinstance(parsed, dict):
+                    return parsed
             except json.JSONDecodeError:
                 continue
 
@@ -568,16 +1020,11 @@ class QwenAnalysisService:
         for balanced in reversed(self._extract_all_balanced_json_objects(response)):
             try:
                 parsed = json.loads(balanced)
-                return self._normalize_tender_result(parsed)
+                if isinstance(parsed, dict):
+                    return parsed
             except json.JSONDecodeError:
                 continue
-
-        # 兜底：文本启发式提取（避免把模板/JSON属性当作条款）
-        return {
-            "summary": "解析响应时出现错误，但分析已完成",
-            "invalid_items": self._extract_invalid_items_from_text(response),
-            "suggestions": self._extract_suggestions_from_text(response),
-        }
+        return None
     
     def _parse_bid_response(self, response: str) -> Dict:
         """
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+大模型调用限流模块
+==================
+
+按 (提供方, 模型) 对所有模型调用限流，使吞吐量贴近配额上限而不触发限流错误：
+
+    1. 令牌桶：每分钟请求数(RPM)与每分钟token数(TPM)各一个桶。调用前按预估token数扣减，
+       返回后按接口usage的实际用量多退少补
+    2. 自适应并发（AIMD）：每次成功把并发上限加 1/当前上限（约每轮并发加1），
+       遇到429或5xx时减半（同一轮内的多个失败只减一次），不超过配置的最大并发
+    3. 429、5xx与连接错误按带抖动的指数退避重试（响应带Retry-After时至少等待该时长），
+       重试次数用尽后抛出RateLimitExhausted
+
+原实现中限流错误或被吞进“分析过程中出现错误”的摘要，或被ProjectInfoAgent立即重试。
+异步客户端关闭了OpenAI SDK自带的重试（见llm_clients），统一由本模块退避。
+所有状态只在llm_executor的事件循环线程上读写，不加锁。
+
+配置（环境变量）：
+    LLM_RATE_LIMITS: 按提供方或模型配置配额，如
+        "qwen:rpm=600:tpm=1000000,doubao:rpm=1000,qwen/qwen-vl-plus:rpm=60:concurrency=4"
+        键为提供方或“提供方/模型”（模型按最长前缀匹配，模型配置覆盖提供方配置）；
+        rpm/tpm未配置时不限，concurrency默认取执行器的提供方并发上限
+    LLM_MAX_RETRIES: 429/5xx/连接错误的最大重试次数，默认4
+    LLM_BACKOFF_BASE: 退避基数（秒），默认1
+    LLM_BACKOFF_MAX: 单次退避上限（秒），默认30
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from openai import APIConnectionError
+
+from llm_clients import normalize_provider
+
+T = TypeVar('T')
+
+# AIMD：失败时并发上限乘以该系数
+DECREASE_FACTOR = 0.5
+
+# Retry-After的最长遵守时间（秒）
+MAX_RETRY_AFTER = 60.0
+
+
+class RateLimitExhausted(Exception):
+    """限流或服务端错误在重试次数用尽后仍未成功"""
+
+    def __init__(self, provider: str, model: str, attempts: int, error: Exception):
+        super().__init__(f"模型调用受限流或服务端错误，{attempts}次尝试均失败（{provider}/{model}）：{error}")
+        self.provider = provider
+        self.model = model
+        self.attempts = attempts
+        self.error = error
+
+
+class TokenBucket:
+    """
+    令牌桶：容量为每分钟配额，按配额匀速补充
+
+    单次请求超过容量时只要求桶满即可放行，余额变为负数（透支），之后的请求等待补足。
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def delay(self, amount: float) -> float:
+        """取出amount个令牌前需要等待的秒数"""
+        self._refill()
+        need = min(amount, self.capacity)
+        return 0.0 if self.tokens >= need else (need - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        """取出令牌（可透支）"""
+        self._refill()
+        self.tokens -= amount
+
+    def give(self, amount: float):
+        """退回令牌（不超过容量）；amount为负数时补扣"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class Lease:
+    """一次调用占用的并发名额与预扣的token数；release()可重复调用"""
+
+    def __init__(self, limiter: 'ModelLimiter', tokens: int, epoch: int):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.epoch = epoch
+        self.released = False
+
+    def release(self, outcome: str = 'success', usage: Any = None):
+        """
+        归还并发名额
+
+        Args:
+            outcome (str): 'success'（并发上限加性增长）、'throttled'（遇到429/5xx，并发上限减半）
+                或'failed'（其他错误与取消，不调整上限）
+            usage: 接口返回的usage（按实际用量多退少补TPM令牌）
+        """
+        if self.released:
+            return
+        self.released = True
+        self.limiter.finish(self, outcome, usage)
+
+
+class ModelLimiter:
+    """单个 (提供方, 模型) 的令牌桶与自适应并发"""
+
+    def __init__(self, provider: str, model: str, rpm: Optional[float], tpm: Optional[float], concurrency: int):
+        self.provider = provider
+        self.model = model
+        self.rpm = TokenBucket(rpm) if rpm else None
+        self.tpm = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max(1, concurrency)
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.epoch = 0
+        self._waiters: deque = deque()
+        self.stats = {'calls': 0, 'succeeded': 0, 'throttled': 0, 'retries': 0, 'exhausted': 0,
+                      'wait_seconds': 0.0}
+
+    async def acquire(self, tokens: int) -> Lease:
+        """等待并发名额与RPM/TPM令牌，返回Lease"""
+        started = time.monotonic()
+        await self._enter()
+        try:
+            while True:
+                delay = max(self.rpm.delay(1) if self.rpm else 0.0,
+                            self.tpm.delay(tokens) if self.tpm else 0.0)
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+        except BaseException:
+            self._leave()
+            raise
+        if self.rpm:
+            self.rpm.take(1)
+        if self.tpm:
+            self.tpm.take(tokens)
+        self.stats['calls'] += 1
+        self.stats['wait_seconds'] += time.monotonic() - started
+        return Lease(self, tokens, self.epoch)
+
+    def finish(self, lease: Lease, outcome: str, usage: Any):
+        """调用结束：调整并发上限、按实际用量修正TPM令牌并归还名额"""
+        if outcome == 'throttled':
+            self.stats['throttled'] += 1
+            # 同一轮（上次减半之后发出）的多个失败只减半一次
+            if lease.epoch == self.epoch:
+                self.limit = max(1.0, self.limit * DECREASE_FACTOR)
+                self.epoch += 1
+        elif outcome == 'success':
+            self.stats['succeeded'] += 1
+            self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+        actual = _usage_tokens(usage)
+        if self.tpm and actual is not None:
+            self.tpm.give(lease.tokens - actual)
+        self._leave()
+
+    def get_stats(self) -> Dict:
+        return dict(
+            self.stats,
+            wait_seconds=round(self.stats['wait_seconds'], 3),
+            limit=round(self.limit, 2),
+            max_concurrency=self.max_concurrency,
+            in_flight=self.in_flight,
+            waiting=len(self._waiters),
+            rpm=self.rpm.capacity if self.rpm else None,
+            tpm=self.tpm.capacity if self.tpm else None,
+        )
+
+    async def _enter(self):
+        """占用一个并发名额（名额按先来后到分配）"""
+        if not self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # 已分配到名额但调用方被取消：归还
+                self._leave()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def _leave(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+
+class RateLimiter:
+    """
+    大模型调用限流器
+    ================
+
+    使用示例（在事件循环上）：
+        limiter = RateLimiter(default_concurrency=8)
+        completion = await limiter.call('qwen', model, estimated_tokens, lambda: client.chat.completions.create(...))
+    """
+
+    # 默认最大重试次数
+    DEFAULT_MAX_RETRIES = 4
+
+    # 默认退避基数（秒）
+    DEFAULT_BACKOFF_BASE = 1.0
+
+    # 默认单次退避上限（秒）
+    DEFAULT_BACKOFF_MAX = 30.0
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None,
+                 default_concurrency: Any = 8, max_retries: Optional[int] = None,
+                 backoff_base: Optional[float] = None, backoff_max: Optional[float] = None):
+        """
+        初始化限流器
+
+        Args:
+            limits (Optional[Dict[str, Dict[str, float]]]): 配额配置，键同LLM_RATE_LIMITS，
+                值为 {"rpm": ..., "tpm": ..., "concurrency": ...}；默认读取环境变量
+            default_concurrency: 未配置concurrency时的最大并发，整数或 provider -> 整数 的函数
+            max_retries (Optional[int]): 最大重试次数，默认读取环境变量LLM_MAX_RETRIES
+            backoff_base (Optional[float]): 退避基数，默认读取环境变量LLM_BACKOFF_BASE
+            backoff_max (Optional[float]): 单次退避上限，默认读取环境变量LLM_BACKOFF_MAX
+        """
+        if limits is None:
+            limits = parse_limits(os.getenv('LLM_RATE_LIMITS', ''))
+        if max_retries is None:
+            max_retries = int(os.getenv('LLM_MAX_RETRIES', self.DEFAULT_MAX_RETRIES))
+        if backoff_base is None:
+            backoff_base = float(os.getenv('LLM_BACKOFF_BASE', self.DEFAULT_BACKOFF_BASE))
+        if backoff_max is None:
+            backoff_max = float(os.getenv('LLM_BACKOFF_MAX', self.DEFAULT_BACKOFF_MAX))
+        self.limits = {_normalize_key(key): value for key, value in limits.items()}
+        self.default_concurrency = default_concurrency
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._models: Dict[Tuple[str, str], ModelLimiter] = {}
+
+    def for_model(self, provider: str, model: str) -> ModelLimiter:
+        """获取 (提供方, 模型) 的限流状态（首次使用时按配置创建）"""
+        provider = normalize_provider(provider)
+        limiter = self._models.get((provider, model))
+        if limiter is None:
+            config = self.config(provider, model)
+            concurrency = config.get('concurrency')
+            if concurrency is None:
+                default = self.default_concurrency
+                concurrency = default(provider) if callable(default) else default
+            limiter = ModelLimiter(provider, model, config.get('rpm'), config.get('tpm'), int(concurrency))
+            self._models[(provider, model)] = limiter
+        return limiter
+
+    def config(self, provider: str, model: str) -> Dict[str, float]:
+        """合并后的配额配置（提供方配置 < 最长前缀匹配的模型配置）"""
+        config = dict(self.limits.get(provider, {}))
+        prefix = f'{provider}/'
+        matches = [key for key in self.limits if key.startswith(prefix) and model.startswith(key[len(prefix):])]
+        if matches:
+            config.update(self.limits[max(matches, key=len)])
+        return config
+
+    async def call(self, provider: str, model: str, tokens: int, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        限流调用fn，失败时退避重试，成功后按返回结果的usage修正TPM令牌
+
+        Args:
+            provider (str): 提供方
+            model (str): 模型名或接入点ID
+            tokens (int): 预估token数（输入预估加输出上限）
+            fn (Callable[[], Awaitable[T]]): 发起一次调用的协程函数
+
+        Returns:
+            fn的返回值
+
+        Raises:
+            RateLimitExhausted: 重试次数用尽
+        """
+        result, lease = await self.acquire(provider, model, tokens, fn)
+        lease.release(usage=getattr(result, 'usage', None))
+        return result
+
+    async def acquire(self, provider: str, model: str, tokens: int,
+                      fn: Callable[[], Awaitable[T]]) -> Tuple[T, Lease]:
+        """
+        与call()相同，但成功后不归还并发名额，由调用方在用完结果后调用lease.release()
+        （流式调用在整个输出过程中占用名额）
+        """
+        limiter = self.for_model(provider, model)
+        attempt = 0
+        while True:
+            lease = await limiter.acquire(tokens)
+            try:
+                result = await fn()
+            except Exception as error:
+                kind = classify_error(error)
+                lease.release('throttled' if kind == 'throttle' else 'failed')
+                if kind is None:
+                    raise
+                if attempt >= self.max_retries:
+                    limiter.stats['exhausted'] += 1
+                    raise RateLimitExhausted(limiter.provider, model, attempt + 1, error) from error
+                delay = self.backoff(attempt, retry_after(error))
+                attempt += 1
+                limiter.stats['retries'] += 1
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                lease.release('failed')
+                raise
+            return result, lease
+
+    def backoff(self, attempt: int, retry_after_seconds: Optional[float] = None) -> float:
+        """
+        第attempt次重试前的等待秒数：全抖动指数退避，有Retry-After时不少于该值
+
+        Args:
+            attempt (int): 已重试次数（从0开始）
+            retry_after_seconds (Optional[float]): 响应头Retry-After的秒数
+
+        Returns:
+            float: 等待秒数
+        """
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after_seconds is not None:
+            delay = max(delay, min(retry_after_seconds, MAX_RETRY_AFTER) + random.uniform(0, self.backoff_base))
+        return delay
+
+    def get_stats(self) -> Dict:
+        """
+        获取限流统计
+
+        Returns:
+            Dict: "提供方/模型" -> 当前并发上限、进行中/排队数、重试与限流次数、配额
+        """
+        return {f'{provider}/{model}': limiter.get_stats()
+                for (provider, model), limiter in list(self._models.items())}
+
+
+def classify_error(error: Exception) -> Optional[str]:
+    """
+    判断错误是否应重试
+
+    Returns:
+        Optional[str]: 'throttle'（429/5xx，降低并发并重试）、'retry'（连接错误，只重试）、None（不重试）
+    """
+    status = getattr(error, 'status_code', None)
+    if status == 429 or (isinstance(status, int) and status >= 500):
+        return 'throttle'
+    if isinstance(error, APIConnectionError):
+        return 'retry'
+    return None
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """从错误响应头读取Retry-After（秒），没有时返回None"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def parse_limits(text: str) -> Dict[str, Dict[str, float]]:
+    """
+    解析LLM_RATE_LIMITS
+
+    Args:
+        text (str): 如 "qwen:rpm=600:tpm=1000000,qwen/qwen-vl-plus:rpm=60"
+
+    Returns:
+        Dict[str, Dict[str, float]]: 键 -> {"rpm"/"tpm"/"concurrency": 数值}
+    """
+    limits: Dict[str, Dict[str, float]] = {}
+    for item in text.split(','):
+        key, *fields = [part.strip() for part in item.split(':')]
+        if not key:
+            continue
+        config = {}
+        for field in fields:
+            name, _, value = field.partition('=')
+            try:
+                if name in ('rpm', 'tpm', 'concurrency') and float(value) > 0:
+                    config[name] = float(value)
+            except ValueError:
+                continue
+        if config:
+            limits.setdefault(key, {}).update(config)
+    return limits
+
+
+def _normalize_key(key: str) -> str:
+    """配置键中的提供方别名归一化（qwen、ark/ep-xxx -> doubao/ep-xxx）"""
+    provider, slash, model = key.partition('/')
+    return normalize_provider(provider) + (slash + model if slash else '')
+
+
+def _usage_tokens(usage: Any) -> Optional[int]:
+    """usage中的实际总token数（没有usage时返回None）"""
+    if not usage:
+        return None
+    total = getattr(usage, 'total_tokens', None)
+    if total is None:
+        total = (getattr(usage, 'prompt_tokens', 0) or 0) + (getattr(usage, 'completion_tokens', 0) or 0)
+    return int(total)
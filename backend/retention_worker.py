@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+后台数据保留与清理服务模块
+==========================
+
+本模块在后台线程中定期执行数据保留策略，代替手动运行quick_clean.py：
+
+    1. 按批删除超过保留期的分析记录与无分析记录的旧文件记录
+       （每批一个短事务，写队列中的其他写操作可以穿插执行，不会长时间持有写锁）
+    2. 删除已无记录引用的上传文件，以及 temp/<file_id> 下已无文件记录的工作目录
+    3. 增量回收数据库空闲页（PRAGMA incremental_vacuum），并统计回收的字节数
+
+磁盘上的文件与目录（包括过期记录不再引用的文件）需超过宽限期未修改才会删除，
+避免误删正在上传、处理中或刚被相同内容的上传复用的文件。
+
+环境变量：
+    RETENTION_DAYS: 数据保留天数，默认30，0表示不删除数据库记录（仍清理孤立文件）
+    RETENTION_INTERVAL_MINUTES: 执行间隔（分钟），默认60，0表示不启动后台线程
+    RETENTION_BATCH_SIZE: 每批删除的记录数，默认100
+
+依赖库：
+    - threading: 后台线程与停止事件
+    - shutil: 删除工作目录
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import os
+import time
+import shutil
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class RetentionWorker:
+    """
+    后台数据保留工作器
+    ==================
+
+    使用示例：
+        worker = RetentionWorker(db_manager, upload_folder, temp_dir)
+        worker.start()
+        report = worker.run_once()
+    """
+
+    # 默认保留天数
+    DEFAULT_RETENTION_DAYS = 30
+
+    # 默认执行间隔（分钟）
+    DEFAULT_INTERVAL_MINUTES = 60
+
+    # 默认每批删除的记录数
+    DEFAULT_BATCH_SIZE = 100
+
+    # 孤立文件/目录的宽限期（秒），最近修改过的不删除
+    ORPHAN_GRACE_SECONDS = 3600
+
+    # 两批之间的停顿（秒），让出写线程
+    BATCH_PAUSE_SECONDS = 0.05
+
+    # 每批回收的数据库空闲页数
+    VACUUM_PAGES_PER_BATCH = 256
+
+    # 每次执行最多回收的数据库空闲页批数
+    MAX_VACUUM_BATCHES = 64
+
+    def __init__(self, db_manager, upload_folder: str, temp_dir: str,
+                 retention_days: Optional[int] = None, interval_minutes: Optional[float] = None,
+                 batch_size: Optional[int] = None, staging_dirname: str = '.staging'):
+        """
+        初始化后台数据保留工作器
+
+        Args:
+            db_manager: DatabaseManager实例
+            upload_folder (str): 上传目录
+            temp_dir (str): 文档处理工作目录（其下每个子目录以文件ID命名）
+            retention_days (Optional[int]): 保留天数，默认读取环境变量RETENTION_DAYS
+            interval_minutes (Optional[float]): 执行间隔，默认读取环境变量RETENTION_INTERVAL_MINUTES
+            batch_size (Optional[int]): 每批删除的记录数，默认读取环境变量RETENTION_BATCH_SIZE
+            staging_dirname (str): 上传暂存目录名（由分片上传自行过期清理，这里跳过）
+        """
+        if retention_days is None:
+            retention_days = int(os.getenv('RETENTION_DAYS', self.DEFAULT_RETENTION_DAYS))
+        if interval_minutes is None:
+            interval_minutes = float(os.getenv('RETENTION_INTERVAL_MINUTES', self.DEFAULT_INTERVAL_MINUTES))
+        if batch_size is None:
+            batch_size = int(os.getenv('RETENTION_BATCH_SIZE', self.DEFAULT_BATCH_SIZE))
+
+        self.db_manager = db_manager
+        self.upload_folder = upload_folder
+        self.temp_dir = temp_dir
+        self.retention_days = retention_days
+        self.interval_minutes = interval_minutes
+        self.batch_size = max(1, batch_size)
+        self.staging_dirname = staging_dirname
+
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._last_report: Optional[Dict] = None
+        self._totals = {'runs': 0, 'analyses_deleted': 0, 'files_deleted': 0,
+                        'upload_files_removed': 0, 'work_dirs_removed': 0,
+                        'disk_bytes_reclaimed': 0, 'db_bytes_reclaimed': 0}
+
+    @property
+    def enabled(self) -> bool:
+        """是否按间隔定期执行"""
+        return self.interval_minutes > 0
+
+    def start(self) -> bool:
+        """
+        启动后台线程（间隔为0时不启动）
+
+        Returns:
+            bool: 是否已启动
+        """
+        if not self.enabled:
+            return False
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='retention', daemon=True)
+            self._thread.start()
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        停止后台线程（正在执行的清理会在当前批次结束后退出）
+
+        Args:
+            timeout (Optional[float]): 等待线程退出的最长秒数
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self) -> Dict:
+        """
+        执行一次完整的清理
+
+        Returns:
+            Dict: 本次清理报告
+        """
+        with self._run_lock:
+            start = time.perf_counter()
+            report = {
+                'started_at': datetime.now().isoformat(),
+                'retention_days': self.retention_days,
+                'analyses_deleted': 0,
+                'files_deleted': 0,
+                'upload_files_removed': 0,
+                'work_dirs_removed': 0,
+                'disk_bytes_reclaimed': 0,
+                'db_bytes_reclaimed': 0,
+                'errors': []
+            }
+
+            if self.retention_days > 0:
+                self._purge_records(report)
+            self._remove_orphan_uploads(report)
+            self._remove_orphan_work_dirs(report)
+            self._vacuum(report)
+
+            report['duration_seconds'] = round(time.perf_counter() - start, 3)
+            self._last_report = report
+            self._totals['runs'] += 1
+            for key in self._totals:
+                if key != 'runs':
+                    self._totals[key] += report[key]
+            return report
+
+    def get_stats(self) -> Dict:
+        """
+        获取运行状态与累计清理量
+
+        Returns:
+            Dict: 包含配置、累计统计与最近一次报告
+        """
+        return {
+            'enabled': self.enabled,
+            'running': self._thread is not None and self._thread.is_alive(),
+            'retention_days': self.retention_days,
+            'interval_minutes': self.interval_minutes,
+            'batch_size': self.batch_size,
+            'totals': dict(self._totals),
+            'last_report': self._last_report
+        }
+
+    def _loop(self):
+        """后台线程主循环：启动后先等待一个间隔，避免与服务启动争抢资源"""
+        while not self._stop.wait(self.interval_minutes * 60):
+            try:
+                report = self.run_once()
+                print(f"数据清理完成: 删除分析记录 {report['analyses_deleted']} 条、"
+                      f"文件记录 {report['files_deleted']} 条，"
+                      f"回收磁盘 {report['disk_bytes_reclaimed']} 字节、"
+                      f"数据库 {report['db_bytes_reclaimed']} 字节")
+            except Exception as e:
+                print(f"数据清理失败: {e}")
+
+    def _purge_records(self, report: Dict):
+        """按批删除过期的数据库记录，并删除不再被引用的磁盘文件"""
+        while not self._stop.is_set():
+            deleted = self.db_manager.delete_expired_analyses(self.retention_days, self.batch_size)
+            report['analyses_deleted'] += deleted
+            if not deleted:
+                break
+            self._stop.wait(self.BATCH_PAUSE_SECONDS)
+
+        while not self._stop.is_set():
+            deleted = self.db_manager.delete_stale_files(self.retention_days, self.batch_size)
+            if not deleted['file_ids']:
+                break
+            report['files_deleted'] += len(deleted['file_ids'])
+            for path in deleted['unreferenced_paths']:
+                # 同一内容可能刚被重新上传（store_blob复用已有文件并刷新修改时间），
+                # 宽限期内的文件留给孤立文件清理在之后按引用重新判断
+                if self._is_within(path, self.upload_folder) and self._is_expired(path):
+                    self._remove_path(path, report, 'upload_files_removed')
+            for file_id in deleted['file_ids']:
+                work_dir = os.path.join(self.temp_dir, file_id)
+                if os.path.isdir(work_dir):
+                    self._remove_path(work_dir, report, 'work_dirs_removed')
+            self._stop.wait(self.BATCH_PAUSE_SECONDS)
+
+    def _remove_orphan_uploads(self, report: Dict):
+        """删除上传目录中没有任何文件记录引用的文件"""
+        if not os.path.isdir(self.upload_folder):
+            return
+        candidates = []
+        for root, dirs, files in os.walk(self.upload_folder):
+            if root == self.upload_folder and self.staging_dirname in dirs:
+                dirs.remove(self.staging_dirname)
+            candidates.extend(os.path.join(root, name) for name in files)
+
+        candidates = [path for path in candidates if self._is_expired(path)]
+        for i in range(0, len(candidates), self.batch_size):
+            if self._stop.is_set():
+                return
+            batch = candidates[i:i + self.batch_size]
+            referenced = self.db_manager.get_referenced_paths(batch)
+            for path in batch:
+                if path not in referenced:
+                    self._remove_path(path, report, 'upload_files_removed')
+
+    def _remove_orphan_work_dirs(self, report: Dict):
+        """删除temp下已没有对应文件记录的工作目录"""
+        if not os.path.isdir(self.temp_dir):
+            return
+        candidates = [name for name in os.listdir(self.temp_dir)
+                      if os.path.isdir(os.path.join(self.temp_dir, name))
+                      and self._is_expired(os.path.join(self.temp_dir, name))]
+        for i in range(0, len(candidates), self.batch_size):
+            if self._stop.is_set():
+                return
+            batch = candidates[i:i + self.batch_size]
+            existing = self.db_manager.get_existing_file_ids(batch)
+            for name in batch:
+                if name not in existing:
+                    self._remove_path(os.path.join(self.temp_dir, name), report, 'work_dirs_removed')
+
+    def _vacuum(self, report: Dict):
+        """分批回收数据库空闲页"""
+        for _ in range(self.MAX_VACUUM_BATCHES):
+            if self._stop.is_set():
+                return
+            result = self.db_manager.incremental_vacuum(self.VACUUM_PAGES_PER_BATCH)
+            report['db_bytes_reclaimed'] += result['bytes']
+            if not result['pages'] or not result['free_pages']:
+                return
+            self._stop.wait(self.BATCH_PAUSE_SECONDS)
+
+    def _is_expired(self, path: str) -> bool:
+        """是否超过宽限期未修改"""
+        try:
+            return time.time() - os.path.getmtime(path) > self.ORPHAN_GRACE_SECONDS
+        except OSError:
+            return False
+
+    @staticmethod
+    def _is_within(path: str, folder: str) -> bool:
+        """路径是否位于指定目录下（只删除自己管理的目录中的文件）"""
+        folder = os.path.abspath(folder)
+        try:
+            return os.path.commonpath([os.path.abspath(path), folder]) == folder
+        except ValueError:
+            # Windows下不同盘符的路径
+            return False
+
+    def _remove_path(self, path: str, report: Dict, counter: str):
+        """删除文件或目录，累计删除数量与回收的字节数"""
+        try:
+            if os.path.isdir(path):
+                size = sum(os.path.getsize(os.path.join(root, name))
+                           for root, _dirs, files in os.walk(path) for name in files)
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                size = os.path.getsize(path)
+                os.remove(path)
+            else:
+                return
+        except OSError as e:
+            report['errors'].append(f"{path}: {e}")
+            return
+        report[counter] += 1
+        report['disk_bytes_reclaimed'] += size
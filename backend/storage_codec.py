@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+存储压缩编解码模块
+==================
+
+DatabaseManager在写入files.content和analysis_result时调用encode_text()压缩，
+读取时调用decode_text()还原，调用方看到的始终是普通字符串。
+
+存储格式：
+    - 压缩后的值以BLOB存储，前3字节为格式标记 b'\\x00Z1'，其后是zlib数据
+    - 较短的文本（压缩收益很小）和旧版本写入的数据仍以TEXT存储
+    - 读取时按值的类型区分：str原样返回，带标记的bytes解压后按UTF-8解码
+      因此旧数据无需迁移即可读取，迁移命令见项目根目录的compress_db.py
+
+中文文本与JSON的zlib压缩率通常在3-5倍。标准库即可使用，不增加部署依赖；
+以后需要更换算法时新增一个格式标记即可，旧标记的数据仍可读取。
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import zlib
+from typing import Optional, Union
+
+# 格式标记：NUL开头，不会与正常文本混淆
+ZLIB_MARKER = b'\x00Z1'
+
+# zlib压缩级别（6为默认级别，兼顾速度与压缩率）
+COMPRESS_LEVEL = 6
+
+# 小于该字节数的文本不压缩
+MIN_COMPRESS_BYTES = 512
+
+
+def encode_text(text: Optional[str]) -> Optional[Union[str, bytes]]:
+    """
+    压缩待存储的文本
+
+    Args:
+        text (Optional[str]): 原始文本
+
+    Returns:
+        Optional[Union[str, bytes]]: 压缩后的BLOB；文本过短或压缩无收益时返回原文本
+    """
+    if text is None:
+        return None
+    raw = text.encode('utf-8')
+    if len(raw) < MIN_COMPRESS_BYTES:
+        return text
+    compressed = ZLIB_MARKER + zlib.compress(raw, COMPRESS_LEVEL)
+    if len(compressed) >= len(raw):
+        return text
+    return compressed
+
+
+def decode_text(value: Optional[Union[str, bytes]]) -> Optional[str]:
+    """
+    还原存储的文本
+
+    Args:
+        value (Optional[Union[str, bytes]]): 数据库中读出的值
+
+    Returns:
+        Optional[str]: 原始文本
+
+    Raises:
+        ValueError: BLOB的格式标记无法识别
+    """
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value.startswith(ZLIB_MARKER):
+        return zlib.decompress(value[len(ZLIB_MARKER):]).decode('utf-8')
+    raise ValueError(f"无法识别的存储格式标记: {value[:3]!r}")
+
+
+def is_compressed(value: Optional[Union[str, bytes]]) -> bool:
+    """判断数据库中的值是否已压缩"""
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:len(ZLIB_MARKER)]) == ZLIB_MARKER
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+文本编码检测与解码模块
+======================
+
+本模块只读取一次文本文件：先对字节流采样判断编码，再用增量解码器边读边解码。
+原实现按 utf-8、gbk、utf-16、latin-1 依次整文件重读，大文件最多会被读取四次。
+
+检测顺序：
+    1. BOM（UTF-8/UTF-16/UTF-32）
+    2. 无BOM的UTF-16（奇偶位置的空字节比例）
+    3. UTF-8合法性（采样末尾被截断的多字节字符不视为错误）
+    4. GB18030双字节/四字节序列统计（兼容GBK/GB2312）
+    5. 以上都不满足时使用latin-1兜底（任何字节序列都可解码）
+
+纯ASCII开头的文件（如日志头部）在各编码下解码结果相同，
+检测会顺延到第一个包含非ASCII字节的数据块，仍然只读一遍文件。
+
+依赖库：
+    - codecs: 增量解码器
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import codecs
+from typing import BinaryIO, Dict, List, Tuple
+
+# 提取器标识与版本，提取逻辑变化时递增版本号
+EXTRACTOR_NAME = 'text-stream'
+EXTRACTOR_VERSION = '1'
+
+# 采样/读取块大小（64KB）
+SAMPLE_SIZE = 64 * 1024
+
+# GB18030判定允许的非法字节比例
+GB18030_MAX_INVALID_RATIO = 0.01
+
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+def _detect_utf16_without_bom(sample: bytes) -> str:
+    """
+    根据空字节分布判断无BOM的UTF-16
+
+    以中英文混排为主的文本，UTF-16LE的奇数位置（高字节）会出现大量空字节。
+
+    Returns:
+        str: 'utf-16-le'、'utf-16-be'，不像UTF-16时返回空字符串
+    """
+    length = len(sample) - len(sample) % 2
+    if length < 4:
+        return ''
+    even_zero = sample[0:length:2].count(0)
+    odd_zero = sample[1:length:2].count(0)
+    pairs = length // 2
+    if odd_zero > pairs * 0.3 and even_zero < pairs * 0.05:
+        return 'utf-16-le'
+    if even_zero > pairs * 0.3 and odd_zero < pairs * 0.05:
+        return 'utf-16-be'
+    return ''
+
+
+def _is_valid_utf8(sample: bytes, is_final: bool) -> bool:
+    """检查样本是否为合法UTF-8（样本末尾截断的多字节字符视为合法）"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        decoder.decode(sample, final=is_final)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _gb18030_stats(sample: bytes) -> Tuple[int, int]:
+    """
+    统计样本中的GB18030多字节序列
+
+    双字节：首字节0x81-0xFE，尾字节0x40-0x7E或0x80-0xFE
+    四字节：0x81-0xFE, 0x30-0x39, 0x81-0xFE, 0x30-0x39
+
+    Returns:
+        Tuple[int, int]: (合法多字节序列数, 非法高位字节数)
+    """
+    valid = 0
+    invalid = 0
+    i = 0
+    length = len(sample)
+    while i < length:
+        byte = sample[i]
+        if byte < 0x80:
+            i += 1
+            continue
+        if not 0x81 <= byte <= 0xFE:
+            invalid += 1
+            i += 1
+            continue
+        if i + 1 >= length:
+            # 样本末尾被截断
+            break
+        trail = sample[i + 1]
+        if 0x40 <= trail <= 0x7E or 0x80 <= trail <= 0xFE:
+            valid += 1
+            i += 2
+        elif 0x30 <= trail <= 0x39:
+            if i + 3 >= length:
+                break
+            if 0x81 <= sample[i + 2] <= 0xFE and 0x30 <= sample[i + 3] <= 0x39:
+                valid += 1
+                i += 4
+            else:
+                invalid += 1
+                i += 1
+        else:
+            invalid += 1
+            i += 1
+    return valid, invalid
+
+
+def detect_encoding(sample: bytes, is_final: bool = True) -> str:
+    """
+    根据字节样本判断文本编码
+    ========================
+
+    Args:
+        sample (bytes): 文件开头的字节样本
+        is_final (bool): 样本是否已包含文件全部内容
+
+    Returns:
+        str: Python编解码器名称
+    """
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    utf16 = _detect_utf16_without_bom(sample)
+    if utf16:
+        return utf16
+
+    if _is_valid_utf8(sample, is_final):
+        return 'utf-8'
+
+    valid, invalid = _gb18030_stats(sample)
+    if valid and invalid <= (valid + invalid) * GB18030_MAX_INVALID_RATIO:
+        return 'gb18030'
+
+    return 'latin-1'
+
+
+def decode_stream(stream: BinaryIO, block_size: int = SAMPLE_SIZE) -> Dict:
+    """
+    单遍读取并解码字节流
+    ====================
+
+    Args:
+        stream (BinaryIO): 二进制输入流
+        block_size (int): 每次读取的字节数
+
+    Returns:
+        Dict: 解码结果
+            - text (str): 解码后的文本
+            - encoding (str): 检测到的编码（全部为ASCII时为'utf-8'）
+    """
+    # 纯ASCII前缀在各编码下结果相同，缓存起来等待第一个非ASCII数据块再做判断
+    # （空字节较多时可能是无BOM的UTF-16，不能按ASCII处理）
+    ascii_prefix: List[bytes] = []
+    block = stream.read(block_size)
+    while block and block.isascii() and not _detect_utf16_without_bom(block):
+        ascii_prefix.append(block)
+        block = stream.read(block_size)
+
+    if not block:
+        return {'text': b''.join(ascii_prefix).decode('ascii'), 'encoding': 'utf-8'}
+
+    next_block = stream.read(block_size)
+    encoding = detect_encoding(block, is_final=not next_block)
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    parts: List[str] = [prefix.decode('ascii') for prefix in ascii_prefix]
+    parts.append(decoder.decode(block))
+    while next_block:
+        parts.append(decoder.decode(next_block))
+        next_block = stream.read(block_size)
+    parts.append(decoder.decode(b'', final=True))
+
+    return {'text': ''.join(parts), 'encoding': encoding}
+
+
+def decode_file(file_path: str) -> Dict:
+    """
+    读取并解码文本文件
+
+    Args:
+        file_path (str): 文件路径
+
+    Returns:
+        Dict: 解码结果，结构见decode_stream()
+    """
+    with open(file_path, 'rb') as f:
+        return decode_stream(f)
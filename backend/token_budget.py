@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+大模型Token预算模块
+===================
+
+在调用模型之前估算提示词的token数，并按模型的上下文上限决定如何发送：
+
+    - send:  预算内，直接发送
+    - route: 超出当前模型的上下文，改用配置的长上下文模型
+    - chunk: 调用方支持分段时，分段分析（见qwen_service.analyze_tender_document_chunked）
+    - trim:  调用方支持截断时，把正文截到预算内（见trim_to_tokens）
+
+估算方法：
+    不加载分词器，按字符类别计数：中日韩字符与全角标点按每字CJK_TOKENS_PER_CHAR计，
+    其他字符按每OTHER_CHARS_PER_TOKEN个字符1个token计。系数取偏高的值，宁可多估不少估；
+    每次调用后用接口返回的usage记录实际用量（record_usage），统计中的ratio
+    （实际/预估）用于核对系数是否需要调整。
+
+配置（环境变量）：
+    - LLM_CONTEXT_LIMITS: 覆盖或补充模型上下文上限，如 "ep-20250101-xxxx=131072,qwen-max=32768"
+    - LLM_OUTPUT_RESERVE_TOKENS: 为模型输出预留的token数，默认8192
+    - QWEN_LONG_CONTEXT_MODEL / DOUBAO_LONG_CONTEXT_MODEL: 超出上下文时改用的长上下文模型，默认不启用
+
+作者：BidAnalysis Team
+创建时间：2025年
+版本：1.0
+"""
+
+import os
+import re
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+# 中日韩字符、全角标点与全角字符
+CJK_RE = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]')
+
+# 每个中文字符的估算token数（Qwen、豆包分词器约1.3-1.5字/token，这里偏高估计）
+CJK_TOKENS_PER_CHAR = 0.8
+
+# 其他字符每个token的平均字符数
+OTHER_CHARS_PER_TOKEN = 3.5
+
+# 模型上下文上限（tokens）；未列出的模型按前缀匹配，仍未匹配时使用DEFAULT_CONTEXT_TOKENS
+MODEL_CONTEXT_TOKENS = {
+    'qwen-plus': 131072,
+    'qwen-max': 32768,
+    'qwen-turbo': 1000000,
+    'qwen-long': 10000000,
+    'qwen-vl-plus': 131072,
+    'qwen-vl-max': 131072,
+    'doubao-seed-1-6': 262144,
+    'doubao-vision-32k': 32768,
+    'doubao-1-5-pro-32k': 32768,
+    'doubao-1-5-pro-256k': 262144,
+}
+
+# 未知模型（如方舟推理接入点ID）的上下文上限
+DEFAULT_CONTEXT_TOKENS = 32768
+
+# 估算误差余量：可用预算按上限扣除输出预留后再留出该比例
+SAFETY_MARGIN = 0.05
+
+# 保留的最近调用记录数
+RECENT_CALLS = 50
+
+_lock = threading.Lock()
+_usage: Dict[str, Dict[str, int]] = {}
+_recent: deque = deque(maxlen=RECENT_CALLS)
+_plans: Dict[str, int] = {'send': 0, 'route': 0, 'chunk': 0, 'trim': 0, 'over_budget': 0}
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    估算文本的token数
+
+    Args:
+        text (Optional[str]): 文本
+
+    Returns:
+        int: 估算的token数
+    """
+    if not text:
+        return 0
+    _, cjk = CJK_RE.subn('', text)
+    return int(cjk * CJK_TOKENS_PER_CHAR + (len(text) - cjk) / OTHER_CHARS_PER_TOKEN) + 1
+
+
+def context_limit(model: str) -> int:
+    """
+    获取模型的上下文上限（环境变量 > 精确匹配 > 最长前缀匹配 > 默认值）
+
+    Args:
+        model (str): 模型名或接入点ID
+
+    Returns:
+        int: 上下文token上限
+    """
+    limits = dict(MODEL_CONTEXT_TOKENS)
+    limits.update(_env_limits())
+    if model in limits:
+        return limits[model]
+    prefixes = [name for name in limits if model.startswith(name)]
+    if prefixes:
+        return limits[max(prefixes, key=len)]
+    return DEFAULT_CONTEXT_TOKENS
+
+
+def input_budget(model: str) -> int:
+    """
+    模型可用于输入的token预算（上下文上限减去输出预留，再留出估算误差余量）
+
+    Args:
+        model (str): 模型名
+
+    Returns:
+        int: 输入token预算
+    """
+    reserve = int(os.getenv('LLM_OUTPUT_RESERVE_TOKENS', '8192'))
+    return max(0, int((context_limit(model) - reserve) * (1 - SAFETY_MARGIN)))
+
+
+def long_context_model(provider: str) -> Optional[str]:
+    """
+    提供方配置的长上下文模型（未配置时返回None）
+
+    Args:
+        provider (str): 'qwen' 或 'doubao'
+
+    Returns:
+        Optional[str]: 模型名
+    """
+    return os.getenv(f'{provider.upper()}_LONG_CONTEXT_MODEL') or None
+
+
+def plan(model: str, prompt_tokens: int, can_chunk: bool = False, can_trim: bool = False,
+         route_model: Optional[str] = None, max_input_tokens: Optional[int] = None) -> Dict:
+    """
+    决定本次调用的发送方式
+    ======================
+
+    预算内直接发送；超出时依次尝试：改用长上下文模型（整篇上下文不被切断）、
+    分段、截断。都不可用时仍按原样发送并计入over_budget。
+
+    Args:
+        model (str): 当前模型
+        prompt_tokens (int): 估算的提示词token数
+        can_chunk (bool): 调用方是否支持分段
+        can_trim (bool): 调用方是否支持截断正文
+        route_model (Optional[str]): 可改用的长上下文模型
+        max_input_tokens (Optional[int]): 调用方自己的输入上限（如控制耗时），与模型预算取较小值
+
+    Returns:
+        Dict: 决策结果
+            - action: 'send' / 'route' / 'chunk' / 'trim'
+            - model: 实际使用的模型
+            - estimated_tokens: 估算的提示词token数
+            - budget: 实际使用模型的输入预算
+            - over_budget: 是否超出预算仍按原样发送
+    """
+    budget = input_budget(model)
+    if max_input_tokens:
+        budget = min(budget, max_input_tokens)
+
+    decision = {'action': 'send', 'model': model, 'estimated_tokens': prompt_tokens,
+                'budget': budget, 'over_budget': False}
+    if prompt_tokens > budget:
+        route_budget = input_budget(route_model) if route_model else 0
+        if max_input_tokens:
+            route_budget = min(route_budget, max_input_tokens)
+        if route_model and prompt_tokens <= route_budget:
+            decision.update(action='route', model=route_model, budget=route_budget)
+        elif can_chunk:
+            decision['action'] = 'chunk'
+        elif can_trim:
+            decision['action'] = 'trim'
+        else:
+            decision['over_budget'] = True
+
+    with _lock:
+        _plans[decision['action']] += 1
+        if decision['over_budget']:
+            _plans['over_budget'] += 1
+    if decision['action'] != 'send' or decision['over_budget']:
+        print(f"Token预算: {model} 预估输入 {prompt_tokens} tokens，预算 {budget}，"
+              f"处理方式 {decision['action']}{'（超出预算）' if decision['over_budget'] else ''}")
+    return decision
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    把文本截到估算token数不超过max_tokens（尽量在换行处截断）
+
+    Args:
+        text (str): 原文本
+        max_tokens (int): token上限
+
+    Returns:
+        str: 截断后的文本（未超出时原样返回）
+    """
+    if max_tokens <= 0:
+        return ''
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # 估算值随长度单调递增，二分查找最长的前缀
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+
+    newline = text.rfind('\n', low * 9 // 10, low)
+    return text[:newline + 1] if newline != -1 else text[:low]
+
+
+def chars_for_tokens(text: str, max_tokens: int) -> int:
+    """
+    按文本的字符构成，把token预算折算为字符数（用于确定分段长度）
+
+    Args:
+        text (str): 参考文本
+        max_tokens (int): token预算
+
+    Returns:
+        int: 对应的字符数
+    """
+    tokens = estimate_tokens(text)
+    if not tokens:
+        return max_tokens
+    return max(1, int(len(text) * max_tokens / tokens))
+
+
+def record_usage(model: str, estimated_tokens: int, usage: Any):
+    """
+    记录一次调用的预估与实际用量，并输出日志
+
+    Args:
+        model (str): 模型名
+        estimated_tokens (int): 调用前估算的提示词token数
+        usage: 接口返回的usage（含prompt_tokens、completion_tokens），可能为None
+    """
+    prompt_tokens = getattr(usage, 'prompt_tokens', None) if usage is not None else None
+    completion_tokens = getattr(usage, 'completion_tokens', None) if usage is not None else None
+    print(f"模型调用 {model}: 预估输入 {estimated_tokens} tokens，"
+          f"实际输入 {prompt_tokens if prompt_tokens is not None else '未知'}，"
+          f"输出 {completion_tokens if completion_tokens is not None else '未知'}")
+
+    with _lock:
+        stats = _usage.setdefault(model, {'calls': 0, 'estimated_tokens': 0, 'prompt_tokens': 0,
+                                          'completion_tokens': 0, 'reported_calls': 0,
+                                          'reported_estimated_tokens': 0})
+        stats['calls'] += 1
+        stats['estimated_tokens'] += estimated_tokens
+        if prompt_tokens is not None:
+            stats['reported_calls'] += 1
+            stats['reported_estimated_tokens'] += estimated_tokens
+            stats['prompt_tokens'] += prompt_tokens
+            stats['completion_tokens'] += completion_tokens or 0
+        _recent.append({'model': model, 'estimated_tokens': estimated_tokens,
+                        'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens})
+
+
+def get_stats() -> Dict:
+    """
+    获取Token用量统计
+
+    Returns:
+        Dict:
+            - plans: 各处理方式的决策次数
+            - models: 按模型统计的调用次数、预估与实际输入token、输出token，
+                      ratio为实际输入/预估输入（只统计接口返回了usage的调用）
+            - recent: 最近的调用记录
+    """
+    with _lock:
+        models = {}
+        for model, stats in _usage.items():
+            models[model] = dict(stats)
+            estimated = stats['reported_estimated_tokens']
+            models[model]['ratio'] = round(stats['prompt_tokens'] / estimated, 3) if estimated else None
+        return {'plans': dict(_plans), 'models': models, 'recent': list(_recent)}
+
+
+def reset_stats():
+    """清空统计（测试使用）"""
+    with _lock:
+        _usage.clear()
+        _recent.clear()
+        for key in _plans:
+            _plans[key] = 0
+
+
+def _env_limits() -> Dict[str, int]:
+    """解析LLM_CONTEXT_LIMITS"""
+    limits = {}
+    for item in os.getenv('LLM_CONTEXT_LIMITS', '').split(','):
+        name, _, value = item.partition('=')
+        if name.strip() and value.strip().isdigit():
+            limits[name.strip()] = int(value)
+    return limits
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+数据库压缩迁移工具
+==================
+
+将旧版本写入的未压缩files.content与analysis_result压缩存储（一次性迁移）。
+新写入的数据由DatabaseManager自动压缩，旧数据不迁移也可以正常读取，
+迁移只是为了回收磁盘空间。
+
+用法：
+    python compress_db.py                    # 压缩旧数据
+    python compress_db.py --vacuum           # 压缩后执行VACUUM，把释放的空间归还给文件系统，
+                                             # 并把数据库转换为增量回收模式（后台清理可以逐步归还空间）
+    python compress_db.py --db path/to.db    # 指定数据库文件
+
+注意：VACUUM期间数据库被独占锁定，建议在停止服务后执行。
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+
+# 添加项目根目录与backend目录到Python路径（backend内的模块按平铺方式互相导入）
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'backend'))
+
+try:
+    from database import DatabaseManager
+except ImportError:
+    print("❌ 无法导入DatabaseManager，请确保在项目根目录运行此脚本")
+    sys.exit(1)
+
+
+def format_size(size_bytes: int) -> str:
+    """格式化文件大小"""
+    if size_bytes < 1024 * 1024:
+        return f"{size_bytes / 1024:.1f} KB"
+    return f"{size_bytes / (1024 * 1024):.1f} MB"
+
+
+def database_size(db_path: str) -> int:
+    """数据库文件与WAL文件的总大小"""
+    return sum(os.path.getsize(path) for path in (db_path, db_path + '-wal') if os.path.exists(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="压缩数据库中旧版本写入的文本与分析结果")
+    parser.add_argument('--db', default=os.path.join(project_root, 'bid_analysis.db'), help='数据库文件路径')
+    parser.add_argument('--batch-size', type=int, default=200, help='每批处理的行数')
+    parser.add_argument('--vacuum', action='store_true', help='压缩后执行VACUUM回收空间')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"❌ 数据库文件不存在: {args.db}")
+        sys.exit(1)
+
+    size_before = database_size(args.db)
+    print(f"🚀 开始压缩: {args.db}（{format_size(size_before)}）")
+
+    start = time.perf_counter()
+    db = DatabaseManager(args.db)
+    try:
+        report = db.compress_existing_records(batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    for column, stats in report.items():
+        if stats['rows']:
+            ratio = stats['bytes_before'] / stats['bytes_after']
+            print(f"   ✅ {column:32} {stats['rows']:>6} 行  "
+                  f"{format_size(stats['bytes_before'])} -> {format_size(stats['bytes_after'])}（{ratio:.1f}x）")
+        else:
+            print(f"   ✅ {column:32} 无需压缩")
+
+    if args.vacuum:
+        print("🧹 执行VACUUM...")
+        conn = sqlite3.connect(args.db)
+        try:
+            # auto_vacuum模式只能在VACUUM时切换
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        finally:
+            conn.close()
+
+    print(f"🎉 完成，用时 {time.perf_counter() - start:.1f}s，"
+          f"数据库大小 {format_size(size_before)} -> {format_size(database_size(args.db))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,16 +22,22 @@ import shutil
 import argparse
 from typing import List
 
-# 添加项目根目录到Python路径
+# 添加项目根目录与backend目录到Python路径（backend内的模块按平铺方式互相导入）
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
+sys.path.insert(0, os.path.join(project_root, 'backend'))
 
 try:
-    from backend.database import DatabaseManager
+    from database import DatabaseManager
 except ImportError:
     print("❌ 无法导入DatabaseManager，请确保在项目根目录运行此脚本")
     sys.exit(1)
 
+# 可清空的数据库表，按清空顺序排列（先清空引用方，再清空被引用的表）
+# 全文索引file_blocks_fts与analysis_findings_fts由删除触发器同步清除
+TABLES = ['analysis_findings', 'bid_analysis', 'tender_analysis', 'file_blocks', 'files',
+          'upload_chunks', 'upload_sessions']
+
 class QuickCleaner:
     """快速清理工具类"""
     
@@ -114,8 +120,7 @@ class QuickCleaner:
         print("-" * 50)
         
         # 数据库表状态
-        tables = ['files', 'tender_analysis', 'bid_analysis']
-        for table in tables:
+        for table in TABLES:
             count = self.get_table_count(table)
             print(f"  📊 {table:20} : {count:>6} 条记录")
         
@@ -204,10 +209,9 @@ class QuickCleaner:
         print("🚀 清空所有数据库表...")
         
         # 按正确顺序清空（考虑外键约束）
-        tables = ['bid_analysis', 'tender_analysis', 'files']
         success = True
         
-        for table in tables:
+        for table in TABLES:
             if not self.clear_table(table):
                 success = False
         
@@ -344,7 +348,7 @@ def main():
     parser.add_argument('--temp', action='store_true', help='清空temp文件夹')
     parser.add_argument('--uploads', action='store_true', help='清空uploads文件夹')
     parser.add_argument('--all', action='store_true', help='清空所有数据和文件')
-    parser.add_argument('--table', choices=['files', 'tender_analysis', 'bid_analysis'], 
+    parser.add_argument('--table', choices=TABLES, 
                        help='清空指定的数据库表')
     
     args = parser.parse_args()
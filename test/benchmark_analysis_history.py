@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+分析历史查询基准测试
+====================
+
+向tender_analysis/bid_analysis逐步写入分析记录（默认到10万行），
+在每个规模下测量单个文件的分析历史查询耗时，对比：
+    - 原实现：无索引，两次全表扫描后在Python中排序
+    - 当前实现：覆盖索引 + UNION ALL归并 + LIMIT（第一页与深翻页）
+
+用法：
+    python test/benchmark_analysis_history.py [总行数] [文件数]
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from database import DatabaseManager
+
+PAYLOAD = '{"risks": []}'
+REPEAT = 50
+
+
+def legacy_history(conn, file_id):
+    """原实现：两次查询后在Python中合并排序"""
+    history = []
+    for table, kind in (('tender_analysis', 'tender'), ('bid_analysis', 'bid')):
+        cursor = conn.execute(f'''
+            SELECT id, created_time, '{kind}' as type FROM {table}
+            WHERE file_id = ? ORDER BY created_time DESC
+        ''', (file_id,))
+        history.extend(dict(zip(('id', 'created_time', 'type'), row)) for row in cursor.fetchall())
+    history.sort(key=lambda x: x['created_time'], reverse=True)
+    return history
+
+
+def _fill(conn, start, end, files):
+    """写入第start到end-1条分析记录，均匀分布到各个文件"""
+    rows = []
+    for i in range(start, end):
+        created = '2025-01-01 00:00:00' if i % 7 == 0 else f'2025-{1 + i % 12:02d}-{1 + i % 28:02d} {i % 24:02d}:00:00'
+        rows.append((f'analysis-{i:07d}', f'file-{i % files}', PAYLOAD, created))
+    half = len(rows) // 2
+    conn.executemany('INSERT INTO tender_analysis (id, file_id, analysis_result, created_time) VALUES (?, ?, ?, ?)',
+                     rows[:half])
+    conn.executemany('INSERT INTO bid_analysis (id, file_id, analysis_result, created_time) VALUES (?, ?, ?, ?)',
+                     rows[half:])
+
+
+def _time(func):
+    """返回多次执行的平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        func()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    files = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    steps = [total // 100, total // 10, total]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        legacy_path = os.path.join(work_dir, 'legacy.db')
+        indexed_path = os.path.join(work_dir, 'indexed.db')
+
+        # 原实现的表结构：建表后删除迁移创建的索引
+        DatabaseManager(legacy_path).close()
+        legacy = sqlite3.connect(legacy_path)
+        for (name,) in legacy.execute("SELECT name FROM sqlite_master WHERE type = 'index' "
+                                      "AND (tbl_name LIKE '%_analysis') AND sql IS NOT NULL").fetchall():
+            legacy.execute(f'DROP INDEX {name}')
+
+        db = DatabaseManager(indexed_path)
+
+        print(f"文件数: {files}，每次查询重复 {REPEAT} 次，耗时为平均值")
+        print(f"{'分析记录数':>10} | {'原实现(全部)':>12} | {'第一页(20条)':>12} | {'深翻页(20条)':>12}")
+        filled = 0
+        for step in steps:
+            _fill(legacy, filled, step, files)
+            legacy.commit()
+            db.pool.write(lambda conn, a=filled, b=step: _fill(conn, a, b, files))
+            filled = step
+
+            target = 'file-7'
+            first_page = db.get_file_analysis_history(target, limit=20)
+            all_rows = db.get_file_analysis_history(target)
+            middle = all_rows[len(all_rows) // 2]
+            cursor = (middle['created_time'], middle['id'])
+
+            legacy_ms = _time(lambda: legacy_history(legacy, target))
+            first_ms = _time(lambda: db.get_file_analysis_history(target, limit=20))
+            deep_ms = _time(lambda: db.get_file_analysis_history(target, limit=20, before=cursor))
+            assert len(first_page) == min(20, len(all_rows))
+            print(f"{step:>10} | {legacy_ms:>10.3f}ms | {first_ms:>10.3f}ms | {deep_ms:>10.3f}ms")
+
+        legacy.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
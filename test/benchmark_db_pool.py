@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+数据库并发吞吐基准测试
+======================
+
+模拟多个请求线程同时上传文件和保存分析结果，对比：
+    - 逐次连接：每次调用新建sqlite3连接，默认回滚日志模式（原实现）
+    - 连接池：DatabaseManager（WAL + 读连接复用 + 单写线程批量提交）
+
+每个"请求"依次执行：登记文件 -> 写入提取结果 -> 读取文件 -> 保存分析结果 -> 读取分析结果。
+
+用法：
+    python test/benchmark_db_pool.py [线程数] [每线程请求数]
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import tempfile
+import threading
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from database import DatabaseManager
+
+CONTENT = '第一章 招标公告\n' + '本项目采用公开招标方式。' * 400
+ANALYSIS = {'risks': [{'clause': '投标保证金', 'level': 'high'}] * 20}
+
+
+class PerCallDatabase:
+    """原实现的访问方式：每次调用新建连接、无PRAGMA"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def save_file_record(self, file_id):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO files (id, filename, file_path, extraction_status) VALUES (?, ?, ?, 'pending')",
+                         (file_id, 'a.txt', '/nonexistent'))
+            conn.commit()
+        return True
+
+    def update_extraction_status(self, file_id, status, content):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('UPDATE files SET extraction_status = ?, content = ? WHERE id = ?', (status, content, file_id))
+            conn.commit()
+        return True
+
+    def get_file_record(self, file_id):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute('SELECT * FROM files WHERE id = ?', (file_id,)).fetchone()
+            return dict(row) if row else None
+
+    def save_tender_analysis(self, file_id, result):
+        analysis_id = str(uuid.uuid4())
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('INSERT INTO tender_analysis (id, file_id, analysis_result) VALUES (?, ?, ?)',
+                         (analysis_id, file_id, json.dumps(result, ensure_ascii=False)))
+            conn.commit()
+        return analysis_id
+
+    def get_tender_analysis(self, analysis_id):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute('SELECT * FROM tender_analysis WHERE id = ?', (analysis_id,)).fetchone()
+            return dict(row) if row else None
+
+
+def _run(db, threads, requests_per_thread):
+    """并发执行请求，返回(耗时秒数, 失败次数)"""
+    failures = []
+
+    def worker(worker_index):
+        for i in range(requests_per_thread):
+            file_id = f'{worker_index}-{i}'
+            try:
+                if isinstance(db, PerCallDatabase):
+                    db.save_file_record(file_id)
+                else:
+                    db.save_file_record(file_id, 'a.txt', '/nonexistent', None, extraction_status='pending')
+                db.update_extraction_status(file_id, 'done', CONTENT)
+                db.get_file_record(file_id)
+                analysis_id = db.save_tender_analysis(file_id, ANALYSIS)
+                db.get_tender_analysis(analysis_id)
+            except Exception as e:
+                failures.append(e)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, len(failures)
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    requests_per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    total = threads * requests_per_thread
+
+    print(f"并发线程: {threads}，每线程请求: {requests_per_thread}，总请求: {total}")
+    with tempfile.TemporaryDirectory() as work_dir:
+        # 原实现：先用DatabaseManager建表，再切回默认的回滚日志模式
+        legacy_path = os.path.join(work_dir, 'legacy.db')
+        DatabaseManager(legacy_path).close()
+        with sqlite3.connect(legacy_path) as conn:
+            conn.execute('PRAGMA journal_mode = DELETE')
+        elapsed, failed = _run(PerCallDatabase(legacy_path), threads, requests_per_thread)
+        print(f"逐次连接: {elapsed:.2f}s，{total / elapsed:.0f} 请求/秒，失败 {failed}")
+
+        db = DatabaseManager(os.path.join(work_dir, 'pooled.db'))
+        elapsed, failed = _run(db, threads, requests_per_thread)
+        stats = db.pool.get_stats()
+        db.close()
+        print(f"连接池:   {elapsed:.2f}s，{total / elapsed:.0f} 请求/秒，失败 {failed}，"
+              f"平均每批写入 {stats['avg_batch_size']}，累计连接 {stats['connections_opened']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+大模型客户端复用基准测试
+========================
+
+在本机启动一个OpenAI兼容的 /chat/completions 模拟服务，对比：
+    - 原实现：每次调用新建OpenAI客户端（新建连接）
+    - 当前实现：llm_clients.get_client() 共享客户端（复用长连接）
+
+模拟服务在每个新连接建立时等待 HANDSHAKE_MS 毫秒，模拟访问公网接口时
+TCP握手与TLS协商的往返耗时；模型推理耗时不在比较范围内，响应立即返回。
+
+用法：
+    python test/benchmark_llm_clients.py [调用次数] [握手耗时ms]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from openai import OpenAI
+import llm_clients
+
+HANDSHAKE_MS = 40
+
+RESPONSE = json.dumps({
+    'id': 'bench', 'object': 'chat.completion', 'created': 0, 'model': 'bench',
+    'choices': [{'index': 0, 'finish_reason': 'stop',
+                 'message': {'role': 'assistant', 'content': '{"summary": "ok"}'}}],
+}).encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """OpenAI兼容接口的最小实现，支持keep-alive"""
+
+    protocol_version = 'HTTP/1.1'
+    connections = 0
+
+    def setup(self):
+        # 新连接：模拟握手往返
+        type(self).connections += 1
+        time.sleep(HANDSHAKE_MS / 1000)
+        # 关闭Nagle算法，避免响应头与响应体分两次发送时触发延迟确认
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super().setup()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def _call(client):
+    completion = client.chat.completions.create(
+        model='bench', messages=[{'role': 'user', 'content': '分析'}], stream=False, temperature=0.3
+    )
+    return completion.choices[0].message.content
+
+
+def _measure(label, make_client, calls):
+    """依次调用calls次，返回平均耗时与新建连接数"""
+    _Handler.connections = 0
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        client = make_client()
+        _call(client)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(f"{label:24} 平均 {sum(latencies) / calls:7.2f}ms  "
+          f"P50 {latencies[calls // 2]:7.2f}ms  P95 {latencies[int(calls * 0.95) - 1]:7.2f}ms  "
+          f"新建连接 {_Handler.connections}")
+
+
+def main():
+    global HANDSHAKE_MS
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    HANDSHAKE_MS = float(sys.argv[2]) if len(sys.argv) > 2 else HANDSHAKE_MS
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/v1'
+
+    print(f"调用次数: {calls}，模拟握手耗时: {HANDSHAKE_MS}ms")
+    try:
+        _measure('原实现（每次新建客户端）',
+                 lambda: OpenAI(api_key='bench', base_url=base_url), calls)
+        _measure('共享客户端',
+                 lambda: llm_clients.get_client('qwen', base_url=base_url, api_key='bench'), calls)
+    finally:
+        llm_clients.close_all()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+存储压缩基准测试
+================
+
+分别以未压缩（旧格式）和压缩格式写入同样的文件文本与分析结果，对比：
+    - 数据库文件大小
+    - 写入耗时（含压缩）
+    - 读取单个文件全文、单条分析结果的平均耗时（含解压与JSON解析）
+
+用法：
+    python test/benchmark_storage_compression.py [文件数] [每个文件的文本KB数]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+import database
+from database import DatabaseManager
+
+SENTENCES = [
+    '投标人应当按照招标文件的要求编制投标文件。',
+    '投标保证金的数额不得超过招标项目估算价的百分之二。',
+    '未按招标文件要求提交投标保证金的，评标委员会应当否决其投标。',
+    '投标文件应当对招标文件提出的实质性要求和条件作出响应。',
+    '第三章 评标办法（综合评估法）',
+    '项目编号：ZB-2025-0381，项目名称：某市政务云平台扩容采购项目。',
+]
+
+
+# 常用汉字，用于生成随机词语，避免样本文本重复度过高而夸大压缩率
+COMMON_CHARS = (
+    '的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方'
+    '后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开'
+    '它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此'
+)
+
+
+def _sentence(rng):
+    words = [''.join(rng.choice(COMMON_CHARS) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(4, 10))]
+    return rng.choice(SENTENCES) + ''.join(words) + f'（第{rng.randint(1, 300)}条，{rng.randint(1000, 9999999)}元）。'
+
+
+def _document(rng, size_kb):
+    parts = []
+    length = 0
+    while length < size_kb * 1024 // 3:
+        sentence = _sentence(rng)
+        parts.append(sentence)
+        length += len(sentence)
+    return '\n'.join(parts)
+
+
+def _analysis(rng):
+    return {
+        'risks': [{'clause': _sentence(rng), 'level': rng.choice(['high', 'medium', 'low']),
+                   'suggestion': _sentence(rng)} for _ in range(40)],
+        'summary': ''.join(_sentence(rng) for _ in range(20)),
+    }
+
+
+def _db_size(db_path):
+    return sum(os.path.getsize(path) for path in (db_path, db_path + '-wal') if os.path.exists(path))
+
+
+def _run(db_path, files, size_kb, compress):
+    """写入并读取，返回(库大小, 写入秒数, 全文读取毫秒, 分析读取毫秒)"""
+    rng = random.Random(42)
+    original_encode = database.encode_text
+    if not compress:
+        database.encode_text = lambda text: text
+    try:
+        db = DatabaseManager(db_path)
+        documents = [_document(rng, size_kb) for _ in range(files)]
+        analyses = [_analysis(rng) for _ in range(files)]
+
+        start = time.perf_counter()
+        analysis_ids = []
+        for i in range(files):
+            db.save_file_record(f'f{i}', f'{i}.txt', '/nonexistent', None, extraction_status='pending')
+            db.update_extraction_status(f'f{i}', 'done', documents[i])
+            analysis_ids.append(db.save_tender_analysis(f'f{i}', analyses[i]))
+        write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(files):
+            assert len(db.get_file_content(f'f{i}')) == len(documents[i])
+        content_ms = (time.perf_counter() - start) / files * 1000
+
+        start = time.perf_counter()
+        for analysis_id in analysis_ids:
+            db.get_analysis_result(analysis_id)
+        analysis_ms = (time.perf_counter() - start) / files * 1000
+
+        with db.pool.connection() as conn:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        db.close()
+        return _db_size(db_path), write_seconds, content_ms, analysis_ms
+    finally:
+        database.encode_text = original_encode
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    size_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print(f"文件数: {files}，每个文件文本约 {size_kb}KB，每个文件一条分析结果")
+    with tempfile.TemporaryDirectory() as work_dir:
+        for label, compress in (('未压缩', False), ('zlib压缩', True)):
+            size, write_seconds, content_ms, analysis_ms = _run(
+                os.path.join(work_dir, f'{compress}.db'), files, size_kb, compress
+            )
+            print(f"{label:8} 库大小 {size / 1024 / 1024:8.1f}MB | 写入 {write_seconds:6.2f}s | "
+                  f"读全文 {content_ms:6.3f}ms/次 | 读分析结果 {analysis_ms:6.3f}ms/次")
+
+
+if __name__ == "__main__":
+    main()
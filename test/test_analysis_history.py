@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+分析历史查询测试
+================
+
+验证：
+    - 结构迁移记录在PRAGMA user_version中，重复初始化不会重复执行
+    - 招标/投标分析历史合并排序，键集分页不重复、不遗漏
+    - 清理旧记录只删除没有分析记录的旧文件
+    - 按分析ID统一查询招标/投标分析，分析结果可延迟解析
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from database import DatabaseManager, SCHEMA_MIGRATIONS
+
+
+def test_schema_version():
+    """迁移后版本号等于最后一个迁移的版本"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, 'test.db')
+        DatabaseManager(db_path).close()
+        db = DatabaseManager(db_path)
+        try:
+            assert db.get_schema_version() == SCHEMA_MIGRATIONS[-1][0]
+        finally:
+            db.close()
+
+
+def test_history_keyset_pagination():
+    """按时间倒序合并两类分析，逐页读取与一次读取结果一致"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            rows = []
+            for i in range(7):
+                table = 'tender_analysis' if i % 2 else 'bid_analysis'
+                # 部分记录创建时间相同，由id决定先后
+                rows.append((table, f'a{i}', f'2025-01-0{1 + i // 2} 00:00:00'))
+
+            def insert(conn):
+                for table, analysis_id, created_time in rows:
+                    conn.execute(f'INSERT INTO {table} (id, file_id, analysis_result, created_time) '
+                                 f'VALUES (?, ?, ?, ?)', (analysis_id, 'file-1', '{}', created_time))
+            db.pool.write(insert)
+
+            full = db.get_file_analysis_history('file-1')
+            assert [item['id'] for item in full] == ['a6', 'a5', 'a4', 'a3', 'a2', 'a1', 'a0']
+            assert full[0]['type'] == 'bid' and full[1]['type'] == 'tender'
+
+            pages = []
+            before = None
+            while True:
+                page = db.get_file_analysis_history('file-1', limit=3, before=before)
+                pages.extend(page)
+                if len(page) < 3:
+                    break
+                before = (page[-1]['created_time'], page[-1]['id'])
+            assert pages == full
+        finally:
+            db.close()
+
+
+def test_cleanup_keeps_files_with_analyses():
+    """清理旧记录：有分析记录的文件保留"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            db.save_file_record('old', 'old.txt', '/nonexistent', 'x')
+            db.save_file_record('kept', 'kept.txt', '/nonexistent', 'y')
+            db.save_tender_analysis('kept', {})
+            db.pool.execute_write("UPDATE files SET upload_time = datetime('now', '-60 days')")
+
+            db.cleanup_old_records(days=30)
+
+            assert not db.file_exists('old')
+            assert db.file_exists('kept')
+        finally:
+            db.close()
+
+
+def test_unified_analysis_lookup():
+    """一次查询定位分析类型，decode=False时访问分析结果才解析"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            tender_id = db.save_tender_analysis('tender-file', {'risks': [1]})
+            bid_id = db.save_bid_analysis('bid-file', {'issues': []}, tender_id)
+
+            tender = db.get_analysis_result(tender_id)
+            assert tender['type'] == 'tender'
+            assert tender['analysis_result'] == {'risks': [1]}
+            assert 'tender_analysis_id' not in tender
+
+            bid = db.get_analysis_result(bid_id, decode=False)
+            assert bid['type'] == 'bid' and bid['tender_analysis_id'] == tender_id
+            assert 'analysis_result' not in bid
+            assert bid['analysis_result'] == {'issues': []}
+
+            assert db.get_analysis_metadata(bid_id)['file_id'] == 'bid-file'
+            assert db.get_analysis_result('missing') is None
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    test_schema_version()
+    test_history_keyset_pagination()
+    test_cleanup_keeps_files_with_analyses()
+    test_unified_analysis_lookup()
+    print("✅ 分析历史查询测试通过")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+分片上传测试
+============
+
+验证分片上传协议：创建会话、按偏移写入分片、分片校验失败拒收、
+查询进度续传、完成归档、重复完成，以及入库失败后重试完成与过期会话清理。
+"""
+
+import io
+import os
+import sys
+import hashlib
+import tempfile
+import threading
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from file_handler import FileHandler
+from database import DatabaseManager
+from chunked_upload import ChunkedUploadManager
+
+CHUNK = 4
+DATA = b'0123456789abcdefghij'  # 5个分片
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _put(manager, upload_id, offset, data=None, chunk_hash=None):
+    data = DATA[offset:offset + CHUNK] if data is None else data
+    return manager.write_chunk(upload_id, offset, io.BytesIO(data), len(data), chunk_hash or _sha(data))
+
+
+def _register(db):
+    """与app.register_uploaded_file相同的查重与入库流程（不提交提取任务）"""
+
+    def register(file_id, filename, file_path, content_hash):
+        duplicate = db.find_duplicate_file(content_hash)
+        if duplicate:
+            return {'file_id': duplicate['id'], 'filename': duplicate['filename'], 'is_duplicate': True}
+        if not db.save_file_record(file_id, filename, file_path, None, content_hash, extraction_status='pending'):
+            raise RuntimeError('保存文件记录失败')
+        return {'file_id': file_id, 'filename': filename, 'message': '文件上传成功'}
+
+    return register
+
+
+def _setup(work_dir):
+    db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+    uploads = os.path.join(work_dir, 'uploads')
+    return db, ChunkedUploadManager(FileHandler(), db, uploads)
+
+
+def _expect(error_type, fn, *args):
+    try:
+        fn(*args)
+    except error_type as e:
+        return e
+    raise AssertionError(f'应当抛出{error_type.__name__}')
+
+
+def test_upload_resume_and_complete():
+    """分片乱序写入、校验失败拒收、按进度续传，完成后重复提交返回同一文件"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db, manager = _setup(work_dir)
+        try:
+            session = manager.init_upload('投标文件.pdf', len(DATA), CHUNK, _sha(DATA))
+            upload_id = session['upload_id']
+            assert session['total_chunks'] == 5 and session['received_offsets'] == []
+
+            _put(manager, upload_id, 8)
+            _put(manager, upload_id, 0)
+            # 分片摘要不符时拒收，且撤销该偏移此前的接收记录
+            _put(manager, upload_id, 4)
+            _expect(ValueError, _put, manager, upload_id, 4, b'XXXX', _sha(DATA[4:8]))
+            _expect(ValueError, _put, manager, upload_id, 3)
+
+            # 连接中断后按进度只补传缺失分片
+            status = manager.get_status(upload_id)
+            assert status['received_offsets'] == [0, 8] and status['received_bytes'] == 8
+            _expect(ValueError, manager.complete, upload_id, _register(db))
+            for offset in sorted(set(range(0, len(DATA), CHUNK)) - set(status['received_offsets'])):
+                _put(manager, upload_id, offset)
+
+            result = manager.complete(upload_id, _register(db))
+            assert result['file_id'] == upload_id
+            record = db.get_file_record(upload_id)
+            with open(record['file_path'], 'rb') as f:
+                assert f.read() == DATA
+            assert os.path.basename(record['file_path']) == f'{_sha(DATA)}.pdf'
+            assert os.listdir(manager.staging_dir) == []
+
+            again = manager.complete(upload_id, _register(db))
+            assert again['file_id'] == upload_id
+            assert manager.get_status(upload_id)['status'] == 'completed'
+            _expect(ValueError, _put, manager, upload_id, 0)
+            _expect(LookupError, manager.complete, 'missing', _register(db))
+        finally:
+            db.close()
+
+
+def test_invalid_parameters_are_rejected():
+    """非法参数抛出ValueError（接口返回400），整文件校验不符时会话作废"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db, manager = _setup(work_dir)
+        try:
+            _expect(ValueError, manager.init_upload, 'a.exe', 10)
+            _expect(ValueError, manager.init_upload, 'a.pdf', [10])
+            _expect(ValueError, manager.init_upload, 'a.pdf', {'size': 10})
+            _expect(ValueError, manager.init_upload, 'a.pdf', 10, 'big')
+            _expect(ValueError, manager.init_upload, 'a.pdf', 10, None, ['sha'])
+
+            session = manager.init_upload('a.pdf', len(DATA), CHUNK, _sha(b'other'))
+            upload_id = session['upload_id']
+            _expect(ValueError, manager.write_chunk, upload_id, [0], io.BytesIO(DATA[:CHUNK]), CHUNK, _sha(DATA[:CHUNK]))
+            for offset in range(0, len(DATA), CHUNK):
+                _put(manager, upload_id, offset)
+            _expect(ValueError, manager.complete, upload_id, _register(db))
+            assert manager.get_status(upload_id) is None
+        finally:
+            db.close()
+
+
+def test_complete_retries_after_registration_failure():
+    """文件已归档但入库失败时会话保持上传中，重试完成复用已归档的文件"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db, manager = _setup(work_dir)
+        try:
+            upload_id = manager.init_upload('a.pdf', len(DATA), CHUNK)['upload_id']
+            for offset in range(0, len(DATA), CHUNK):
+                _put(manager, upload_id, offset)
+
+            def failing_register(*args):
+                raise RuntimeError('保存文件记录失败')
+
+            _expect(RuntimeError, manager.complete, upload_id, failing_register)
+            session = db.get_upload_session(upload_id)
+            assert session['status'] == 'uploading' and session['content_hash'] == _sha(DATA)
+            assert not os.path.exists(session['partial_path']) and os.path.exists(session['file_path'])
+            # 归档后入库前不再接受分片，后台清理也不会把已归档的文件当作孤立文件
+            _expect(ValueError, _put, manager, upload_id, 0)
+            assert db.get_referenced_paths([session['file_path']]) == {session['file_path']}
+
+            result = manager.complete(upload_id, _register(db))
+            assert result['file_id'] == upload_id
+            assert db.get_file_record(upload_id)['file_path'] == session['file_path']
+        finally:
+            db.close()
+
+
+def test_concurrent_complete_registers_once():
+    """同一会话的并发完成请求串行执行，只入库一次"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db, manager = _setup(work_dir)
+        try:
+            upload_id = manager.init_upload('a.pdf', len(DATA), CHUNK)['upload_id']
+            for offset in range(0, len(DATA), CHUNK):
+                _put(manager, upload_id, offset)
+
+            registered, results, errors = [], [], []
+            register = _register(db)
+
+            def counting_register(*args):
+                registered.append(args)
+                return register(*args)
+
+            def complete():
+                try:
+                    results.append(manager.complete(upload_id, counting_register))
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=complete) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert errors == [] and len(registered) == 1
+            assert {result['file_id'] for result in results} == {upload_id}
+        finally:
+            db.close()
+
+
+def test_stale_sessions_expire():
+    """超过保留时长未更新的会话连同暂存文件一起清理"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db, manager = _setup(work_dir)
+        try:
+            stale = manager.init_upload('a.pdf', len(DATA), CHUNK)
+            fresh = manager.init_upload('b.pdf', len(DATA), CHUNK)
+            _put(manager, stale['upload_id'], 0)
+            db.pool.write(lambda conn: conn.execute(
+                "UPDATE upload_sessions SET updated_time = '2000-01-01 00:00:00' WHERE id = ?",
+                (stale['upload_id'],)))
+            partial_path = db.get_upload_session(stale['upload_id'])['partial_path']
+
+            assert manager.expire_stale_sessions() == 1
+            assert manager.get_status(stale['upload_id']) is None and not os.path.exists(partial_path)
+            assert db.get_upload_chunks(stale['upload_id']) == []
+            assert manager.get_status(fresh['upload_id'])['status'] == 'uploading'
+            _expect(LookupError, _put, manager, stale['upload_id'], 0)
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    test_upload_resume_and_complete()
+    test_invalid_parameters_are_rejected()
+    test_complete_retries_after_registration_failure()
+    test_concurrent_complete_registers_once()
+    test_stale_sessions_expire()
+    print("✅ 分片上传测试通过")
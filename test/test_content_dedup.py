@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+内容哈希去重测试
+================
+
+验证上传文件按内容摘要存储与查重：
+    - 相同内容只在磁盘上保存一份
+    - 大小相同但内容不同的文件不会被误判为重复
+"""
+
+import io
+import os
+import sys
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from werkzeug.datastructures import FileStorage
+from file_handler import FileHandler
+from database import DatabaseManager
+
+
+def _upload(handler, upload_dir, data: bytes, filename: str, file_id: str):
+    storage = FileStorage(stream=io.BytesIO(data), filename=filename)
+    return handler.save_file(storage, file_id, upload_dir)
+
+
+def test_same_content_shares_blob():
+    """相同内容（不同文件名）应得到相同摘要与存储路径"""
+    handler = FileHandler()
+    with tempfile.TemporaryDirectory() as upload_dir:
+        path1, hash1 = _upload(handler, upload_dir, b'tender content', 'a.txt', 'id-1')
+        path2, hash2 = _upload(handler, upload_dir, b'tender content', 'renamed.txt', 'id-2')
+        
+        assert hash1 == hash2
+        assert path1 == path2
+        assert os.path.exists(path1)
+        # 暂存目录中不应残留文件
+        staging_dir = os.path.join(upload_dir, FileHandler.STAGING_DIRNAME)
+        assert os.listdir(staging_dir) == []
+
+
+def test_equal_size_is_not_duplicate():
+    """大小相同但内容不同的文件不应被判定为重复"""
+    handler = FileHandler()
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        path1, hash1 = _upload(handler, work_dir, b'AAAA', 'a.txt', 'id-1')
+        db.save_file_record('id-1', 'a.txt', path1, 'AAAA', hash1)
+        
+        _, hash2 = _upload(handler, work_dir, b'BBBB', 'b.txt', 'id-2')
+        assert db.find_duplicate_file(hash2) is None
+        
+        duplicate = db.find_duplicate_file(hash1)
+        assert duplicate is not None
+        assert duplicate['id'] == 'id-1'
+        assert 'content' not in duplicate
+
+
+if __name__ == "__main__":
+    test_same_content_shares_blob()
+    test_equal_size_is_not_duplicate()
+    print("✅ 内容哈希去重测试通过")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+SQLite连接池测试
+================
+
+验证连接池与写队列：
+    - 连接启用WAL模式，同一线程嵌套借用复用同一连接
+    - 多线程并发写入不出现 "database is locked"
+    - 同一批次中单个写操作失败不影响其他写操作
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from db_pool import ConnectionPool
+from database import DatabaseManager
+
+
+def test_wal_and_nested_connection():
+    """WAL模式、嵌套借用复用同一连接、归还后进入空闲列表"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        pool = ConnectionPool(os.path.join(work_dir, 'test.db'))
+        try:
+            with pool.connection() as conn:
+                assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+                with pool.connection() as inner:
+                    assert inner is conn
+            assert pool.get_stats()['idle_connections'] == 1
+        finally:
+            pool.close()
+
+
+def test_failed_write_does_not_affect_batch():
+    """失败的写操作只回滚自身"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        pool = ConnectionPool(os.path.join(work_dir, 'test.db'))
+        try:
+            pool.execute_write('CREATE TABLE t (id INTEGER PRIMARY KEY)')
+            errors = []
+
+            def insert(value):
+                try:
+                    pool.execute_write('INSERT INTO t (id) VALUES (?)', (value,))
+                except Exception as e:
+                    errors.append(e)
+
+            # 主键冲突的写操作与正常写操作并发提交
+            threads = [threading.Thread(target=insert, args=(i % 10,)) for i in range(20)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            with pool.connection() as conn:
+                assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 10
+            assert len(errors) == 10
+        finally:
+            pool.close()
+
+
+def test_concurrent_database_writes():
+    """多个线程同时上传与保存分析结果"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        failures = []
+
+        def worker(index):
+            file_id = f'file-{index}'
+            if not db.save_file_record(file_id, f'{index}.txt', '/nonexistent', None,
+                                       extraction_status='pending'):
+                failures.append(file_id)
+                return
+            if not db.update_extraction_status(file_id, 'done', f'内容{index}'):
+                failures.append(file_id)
+                return
+            db.save_tender_analysis(file_id, {'index': index})
+
+        try:
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert failures == []
+            for i in range(16):
+                assert db.get_file_record(f'file-{i}')['content'] == f'内容{i}'
+                assert len(db.get_file_analysis_history(f'file-{i}')) == 1
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    test_wal_and_nested_connection()
+    test_failed_write_does_not_affect_batch()
+    test_concurrent_database_writes()
+    print("✅ SQLite连接池测试通过")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Word 97-2003 (.doc) 文本提取器测试
+==================================
+
+测试环境中没有Word，这里按MS-CFB/MS-DOC结构手工构造一个最小的.doc文件，验证：
+    - 压缩(cp1252)与UTF-16片段的拼接
+    - 域代码被去除、只保留域结果
+    - 表格单元格与行结束标记
+    - 通过样式表识别标题层级
+"""
+
+import os
+import sys
+import struct
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from doc_binary_extractor import extract_doc, read_doc_headings
+
+END = 0xFFFFFFFE
+FREE = 0xFFFFFFFF
+STREAM_SIZE = 4096
+
+
+def _papx(istd, sprms=b''):
+    """构造PapxInFkp：cb + GrpPrlAndIstd（长度为2*cb-1）"""
+    body = struct.pack('<H', istd) + sprms
+    cb = (len(body) + 2) // 2
+    return bytes([cb]) + body.ljust(2 * cb - 1, b'\0')
+
+
+def _build_word_streams():
+    """构造WordDocument与1Table流"""
+    ascii_text = 'Intro\r'
+    unicode_text = (
+        '第一章 总则\r'
+        '正文\x13 PAGE \x143\x15内容\r'
+        '单元格A\x07'
+        '单元格B\x07'
+        '\x07'
+        '结束\r'
+    )
+    ascii_fc, unicode_fc = 1024, 1100
+    word = bytearray(STREAM_SIZE)
+    word[ascii_fc:ascii_fc + len(ascii_text)] = ascii_text.encode('cp1252')
+    encoded = unicode_text.encode('utf-16-le')
+    word[unicode_fc:unicode_fc + len(encoded)] = encoded
+
+    # 段落区间（文件偏移）及其属性
+    in_table = struct.pack('<HB', 0x2416, 1)
+    row_end = in_table + struct.pack('<HB', 0x2417, 1)
+    runs = [(ascii_fc, ascii_fc + 6, _papx(0)), (ascii_fc + 6, unicode_fc, None)]
+    fc = unicode_fc
+    for paragraph, props in zip(
+        ['第一章 总则\r', '正文\x13 PAGE \x143\x15内容\r', '单元格A\x07', '单元格B\x07', '\x07', '结束\r'],
+        [_papx(1), _papx(0), _papx(0, in_table), _papx(0, in_table), _papx(0, row_end), _papx(0)],
+    ):
+        runs.append((fc, fc + len(paragraph) * 2, props))
+        fc += len(paragraph) * 2
+
+    # PAPX FKP 页（第3页）
+    page = bytearray(512)
+    crun = len(runs)
+    boundaries = [run[0] for run in runs] + [runs[-1][1]]
+    struct.pack_into(f'<{crun + 1}I', page, 0, *boundaries)
+    offset = 500
+    for i, (_start, _end, props) in enumerate(runs):
+        if props is None:
+            continue
+        offset -= len(props) + (len(props) % 2)
+        page[offset:offset + len(props)] = props
+        page[4 * (crun + 1) + 13 * i] = offset // 2
+    page[511] = crun
+    word[1536:2048] = page
+
+    table = bytearray()
+
+    # 样式表：istd 0 = 正文(sti 0)，istd 1 = 标题1(sti 1)
+    stshi = struct.pack('<HHHHHH', 2, 10, 1, 0, 0, 0).ljust(18, b'\0')
+    stsh = struct.pack('<H', len(stshi)) + stshi
+    for sti, name in ((0, 'Normal'), (1, 'heading 1')):
+        std = struct.pack('<H', sti).ljust(10, b'\0') + struct.pack('<H', len(name)) + name.encode('utf-16-le') + b'\0\0'
+        stsh += struct.pack('<H', len(std)) + std
+    stsh_fc = len(table)
+    table += stsh
+
+    # 片段表：第一段为压缩片段
+    total_chars = len(ascii_text) + len(unicode_text)
+    plc = struct.pack('<3I', 0, len(ascii_text), total_chars)
+    plc += struct.pack('<HIH', 0, (ascii_fc * 2) | 0x40000000, 0)
+    plc += struct.pack('<HIH', 0, unicode_fc, 0)
+    clx_fc = len(table)
+    table += b'\x02' + struct.pack('<I', len(plc)) + plc
+
+    papx_fc = len(table)
+    table += struct.pack('<3I', boundaries[0], boundaries[-1], 3)
+
+    # FIB
+    struct.pack_into('<HH', word, 0, 0xA5EC, 0x00C1)
+    struct.pack_into('<H', word, 0x0A, 0x0200)
+    struct.pack_into('<H', word, 32, 14)
+    lw = 34 + 28
+    struct.pack_into('<H', word, lw, 22)
+    struct.pack_into('<i', word, lw + 2 + 12, total_chars)
+    fc_lcb = lw + 2 + 88
+    struct.pack_into('<H', word, fc_lcb, 93)
+    for index, (value, size) in {1: (stsh_fc, len(stsh)), 13: (papx_fc, 12), 33: (clx_fc, len(plc) + 5)}.items():
+        struct.pack_into('<II', word, fc_lcb + 2 + index * 8, value, size)
+
+    return bytes(word), bytes(table.ljust(STREAM_SIZE, b'\0'))
+
+
+def _build_compound_file(streams):
+    """构造v3复合文档：FAT扇区、目录扇区、各流依次存放"""
+    sectors = []
+    fat = [0xFFFFFFFD, END]
+    entries = [('Root Entry', 5, END, 0)]
+    next_sector = 2
+    for name, data in streams:
+        count = len(data) // 512
+        fat.extend(list(range(next_sector + 1, next_sector + count)) + [END])
+        entries.append((name, 2, next_sector, len(data)))
+        sectors.append(data)
+        next_sector += count
+
+    header = bytearray(512)
+    header[:8] = b'\xD0\xCF\x11\xE0\xA1\xB1\x1A\xE1'
+    struct.pack_into('<HHHHH', header, 24, 0x3E, 3, 0xFFFE, 9, 6)
+    struct.pack_into('<IIII', header, 44, 1, 1, 0, 4096)
+    struct.pack_into('<IIII', header, 60, END, 0, END, 0)
+    struct.pack_into('<109I', header, 76, 0, *([FREE] * 108))
+
+    directory = bytearray(512)
+    for i, (name, kind, start, size) in enumerate(entries):
+        entry = bytearray(128)
+        encoded = name.encode('utf-16-le') + b'\0\0'
+        entry[:len(encoded)] = encoded
+        struct.pack_into('<HB', entry, 64, len(encoded), kind)
+        left, right, child = FREE, FREE, FREE
+        if i == 0:
+            child = 1
+        elif i < len(entries) - 1:
+            right = i + 1
+        struct.pack_into('<III', entry, 68, left, right, child)
+        struct.pack_into('<IQ', entry, 116, start, size)
+        directory[i * 128:(i + 1) * 128] = entry
+
+    fat_sector = struct.pack('<128I', *(fat + [FREE] * (128 - len(fat))))
+    return bytes(header) + fat_sector + bytes(directory) + b''.join(sectors)
+
+
+def test_extract_doc_text_tables_and_headings():
+    """片段拼接、域结果、表格行与标题层级"""
+    word, table = _build_word_streams()
+    data = _build_compound_file([('WordDocument', word), ('1Table', table)])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sample.doc')
+        with open(path, 'wb') as f:
+            f.write(data)
+
+        result = extract_doc(path)
+        headings = read_doc_headings(path)
+
+    assert result['text'].split('\n') == [
+        'Intro',
+        '第一章 总则',
+        '正文3内容',
+        '单元格A | 单元格B',
+        '结束',
+    ]
+    assert result['blocks'][1]['level'] == 1
+    assert result['blocks'][3]['kind'] == 'table_row'
+
+    assert headings == [{'text': '第一章 总则', 'level': 1, 'index': 2, 'cp': 6}]
+
+
+if __name__ == "__main__":
+    test_extract_doc_text_tables_and_headings()
+    print("✅ .doc文本提取器测试通过")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+文档块存储测试
+==============
+
+验证提取结果拆分为file_blocks后的索引查询：
+    - PDF按页切分，前N页按页码查询
+    - 纯文本按行合并，前N页按字符偏移估算
+    - 按标题取整章文本、获取标题大纲
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from database import DatabaseManager
+from document_blocks import build_blocks, TEXT_BLOCK_MAX_CHARS
+from docx_stream_extractor import join_blocks
+
+
+def _save(db, file_id, document):
+    db.save_file_record(file_id, f'{file_id}.bin', f'/tmp/{file_id}', None, extraction_status='pending')
+    db.update_extraction_status(
+        file_id, 'done', document['text'],
+        page_offsets=document.get('page_offsets'),
+        blocks=build_blocks(document)
+    )
+
+
+def test_pdf_front_pages():
+    """PDF页块：前两页只返回第1、2页"""
+    text = '封面\n第二页\n第三页\n'
+    document = {'text': text, 'page_offsets': [0, 3, 7]}
+    blocks = build_blocks(document)
+    assert [block['page'] for block in blocks] == [1, 2, 3]
+    assert [text[block['char_offset']:].startswith(block['text']) for block in blocks] == [True] * 3
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        _save(db, 'pdf-1', document)
+        assert db.get_front_text('pdf-1', pages=2) == '封面\n第二页'
+        # 没有文档块的文件返回None，由调用方回退到全文
+        assert db.get_front_text('missing', pages=2) is None
+        db.close()
+
+
+def test_text_blocks_are_bounded():
+    """纯文本按行合并，单块不超过上限且偏移正确"""
+    text = '\n'.join(f'第{i}行' + 'x' * 100 for i in range(100))
+    blocks = build_blocks({'text': text})
+    assert len(blocks) > 1
+    for block in blocks:
+        assert len(block['text']) <= TEXT_BLOCK_MAX_CHARS
+        assert text[block['char_offset']:].startswith(block['text'])
+
+
+def test_outline_and_section():
+    """标题大纲与按章节取文本（到下一个同级标题为止）"""
+    document = join_blocks([
+        {'kind': 'paragraph', 'level': 1, 'page': None, 'text': '第一章 总则'},
+        {'kind': 'paragraph', 'level': None, 'page': None, 'text': '总则内容'},
+        {'kind': 'paragraph', 'level': 2, 'page': None, 'text': '1.1 适用范围'},
+        {'kind': 'paragraph', 'level': None, 'page': None, 'text': '范围内容'},
+        {'kind': 'paragraph', 'level': 1, 'page': None, 'text': '第二章 评标办法'},
+        {'kind': 'paragraph', 'level': None, 'page': None, 'text': '评标内容'},
+    ])
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        _save(db, 'docx-1', document)
+
+        outline = db.get_file_outline('docx-1')
+        assert [(item['seq'], item['level'], item['text']) for item in outline] == [
+            (0, 1, '第一章 总则'), (2, 2, '1.1 适用范围'), (4, 1, '第二章 评标办法')
+        ]
+
+        section = db.get_section_text('docx-1', 0)
+        assert section['text'] == '第一章 总则\n总则内容\n1.1 适用范围\n范围内容'
+        assert db.get_section_text('docx-1', 4)['text'] == '第二章 评标办法\n评标内容'
+        assert db.get_section_text('docx-1', 1) is None
+        db.close()
+
+
+if __name__ == "__main__":
+    test_pdf_front_pages()
+    test_text_blocks_are_bounded()
+    test_outline_and_section()
+    print("✅ 文档块存储测试通过")
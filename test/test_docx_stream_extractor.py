@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+OOXML流式文本提取器测试
+=======================
+
+使用python-docx生成测试文档，验证：
+    - 段落与表格按正文顺序输出
+    - 横向/纵向合并单元格只输出一次
+    - 标题段落带有标题层级
+"""
+
+import os
+import sys
+import tempfile
+
+import docx
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from docx_stream_extractor import extract_docx
+
+
+def _build_document(path):
+    """生成包含标题、段落和合并单元格表格的文档"""
+    document = docx.Document()
+    document.add_heading('第一章 招标公告', level=1)
+    document.add_paragraph('项目名称：测试项目')
+
+    table = document.add_table(rows=3, cols=3)
+    table.cell(0, 0).merge(table.cell(0, 2)).text = '报价一览表'
+    table.cell(1, 0).merge(table.cell(2, 0)).text = '设备'
+    table.cell(1, 1).text = '名称'
+    table.cell(1, 2).text = '单价'
+    table.cell(2, 1).text = '服务器'
+    table.cell(2, 2).text = '100'
+
+    document.add_paragraph('表格之后的段落')
+    document.save(path)
+
+
+def test_body_order_and_merged_cells():
+    """段落与表格按正文顺序输出，合并单元格不重复"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sample.docx')
+        _build_document(path)
+        result = extract_docx(path)
+
+    lines = result['text'].split('\n')
+    assert lines == [
+        '第一章 招标公告',
+        '项目名称：测试项目',
+        '报价一览表',
+        '设备 | 名称 | 单价',
+        ' | 服务器 | 100',
+        '表格之后的段落',
+    ]
+
+    blocks = result['blocks']
+    assert blocks[0]['level'] == 1
+    assert blocks[1]['level'] is None
+    assert [b['kind'] for b in blocks].count('table_row') == 3
+    for block in blocks:
+        assert result['text'][block['char_offset']:].startswith(block['text'])
+
+
+if __name__ == "__main__":
+    test_body_order_and_merged_cells()
+    print("✅ OOXML流式文本提取器测试通过")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+文本提取结果缓存测试
+====================
+
+验证：
+    - 相同内容的文件第二次提取直接命中缓存
+    - 提取器版本不同视为不同缓存键
+    - 超出容量上限时淘汰最久未访问的条目
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from extraction_cache import ExtractionCache
+from file_handler import FileHandler
+
+
+def test_file_handler_uses_cache():
+    """同一内容的两个文件只解析一次"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ExtractionCache(os.path.join(tmp, 'cache'), 1024 * 1024)
+        handler = FileHandler(cache)
+
+        first = os.path.join(tmp, 'a.txt')
+        second = os.path.join(tmp, 'b.txt')
+        for path in (first, second):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('招标文件正文')
+
+        assert handler.extract_content(first) == '招标文件正文'
+        assert handler.extract_content(second) == '招标文件正文'
+
+        stats = cache.get_stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 1
+        assert stats['entries'] == 1
+
+
+def test_version_is_part_of_key_and_lru_eviction():
+    """版本号区分缓存键，超出容量时淘汰最旧条目"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ExtractionCache(tmp, 1024 * 1024)
+        cache.put('ab' * 32, 'plain-text', '1', {'text': '旧版本结果'})
+        assert cache.get('ab' * 32, 'plain-text', '2') is None
+        assert cache.get('ab' * 32, 'plain-text', '1') == {'text': '旧版本结果'}
+
+        # 不可压缩的内容，确保每个条目接近固定大小
+        small = ExtractionCache(os.path.join(tmp, 'small'), 3000)
+        payload = {'text': os.urandom(1000).hex()}
+        for i, content_hash in enumerate(['01' * 32, '02' * 32]):
+            small.put(content_hash, 'plain-text', '1', payload)
+            os.utime(small._entry_path(content_hash, 'plain-text', '1'), (1000 + i, 1000 + i))
+        small.put('03' * 32, 'plain-text', '1', payload)
+
+        assert small.get('01' * 32, 'plain-text', '1') is None
+        assert small.get('03' * 32, 'plain-text', '1') == payload
+        assert small.get_stats()['evictions'] >= 1
+        assert small.get_stats()['size_bytes'] <= 3000
+
+
+if __name__ == "__main__":
+    test_file_handler_uses_cache()
+    test_version_is_part_of_key_and_lru_eviction()
+    print("✅ 文本提取结果缓存测试通过")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+后台文本提取测试
+================
+
+使用模拟的提取器验证ExtractionWorker：
+    - 状态流转 pending -> running -> done/failed，失败原因写入extraction_error
+    - 线程池有界，同一文件不重复提交
+    - 服务重启后重新排队pending/running状态的文件
+    - wait()超时返回当前状态（分析接口据此返回409），提取失败返回failed（422）
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from database import DatabaseManager
+from extraction_worker import ExtractionWorker
+
+
+class StubExtractor:
+    """模拟FileHandler.extract_document：按路径返回文本或抛出异常，可阻塞到放行"""
+
+    def __init__(self, block=False):
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+        self.started = threading.Semaphore(0)
+        self.running = 0
+        self.peak = 0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def extract_document(self, file_path):
+        with self._lock:
+            self.calls.append(file_path)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        self.started.release()
+        try:
+            self.release.wait(5)
+            if 'broken' in file_path:
+                raise ValueError('无法解析文件')
+            return {'text': f'正文 {file_path}', 'encoding': 'utf-8'}
+        finally:
+            with self._lock:
+                self.running -= 1
+
+
+def _add_file(db, file_id, status='pending'):
+    db.save_file_record(file_id, f'{file_id}.txt', f'/files/{file_id}', None, extraction_status=status)
+
+
+def test_extraction_success_and_failure():
+    """成功时写入文本与状态done；失败时状态为failed并记录原因"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        worker = ExtractionWorker(StubExtractor(), db, max_workers=2)
+        try:
+            _add_file(db, 'good')
+            _add_file(db, 'bad')
+            worker.submit('good', '/files/good')
+            worker.submit('bad', '/files/broken')
+
+            assert worker.wait('good', timeout=5) == 'done'
+            record = db.get_file_record('good')
+            assert record['content'] == '正文 /files/good' and record['encoding'] == 'utf-8'
+            assert db.get_extraction_status('good')['extraction_error'] is None
+
+            assert worker.wait('bad', timeout=5) == 'failed'
+            status = db.get_extraction_status('bad')
+            assert status['extraction_error'] == '无法解析文件'
+
+            # 失败后重新提交，提取成功时清除失败原因
+            worker.submit('bad', '/files/bad')
+            assert worker.wait('bad', timeout=5) == 'done'
+            assert db.get_extraction_status('bad')['extraction_error'] is None
+            assert worker.wait('missing', timeout=0) is None
+        finally:
+            worker.shutdown()
+            db.close()
+
+
+def test_bounded_pool_and_wait_timeout():
+    """同时运行的任务不超过线程池大小；未完成时wait超时返回当前状态"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        extractor = StubExtractor(block=True)
+        worker = ExtractionWorker(extractor, db, max_workers=2)
+        try:
+            for i in range(4):
+                _add_file(db, f'file-{i}')
+            futures = [worker.submit(f'file-{i}', f'/files/file-{i}') for i in range(4)]
+            # 同一文件已有未完成任务时返回同一任务
+            assert worker.submit('file-0', '/files/file-0') is futures[0]
+
+            assert extractor.started.acquire(timeout=5) and extractor.started.acquire(timeout=5)
+            assert worker.wait('file-0', timeout=0.05) == 'running'
+            assert worker.wait('file-3', timeout=0.05) == 'pending'
+
+            extractor.release.set()
+            assert [future.result(timeout=5) for future in futures] == ['done'] * 4
+            assert extractor.peak == 2 and len(extractor.calls) == 4
+        finally:
+            extractor.release.set()
+            worker.shutdown()
+            db.close()
+
+
+def test_recover_unfinished():
+    """重启后pending与running状态的文件重新排队，已完成与失败的不再提取"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        extractor = StubExtractor()
+        worker = ExtractionWorker(extractor, db, max_workers=2)
+        try:
+            _add_file(db, 'queued', 'pending')
+            _add_file(db, 'interrupted', 'running')
+            _add_file(db, 'finished', 'done')
+            _add_file(db, 'broken', 'failed')
+
+            assert worker.recover_unfinished() == 2
+            assert worker.wait('queued', timeout=5) == 'done'
+            assert worker.wait('interrupted', timeout=5) == 'done'
+            assert sorted(extractor.calls) == ['/files/interrupted', '/files/queued']
+            assert db.get_unfinished_extractions() == []
+            assert db.get_extraction_status('broken')['extraction_status'] == 'failed'
+        finally:
+            worker.shutdown()
+            db.close()
+
+
+if __name__ == "__main__":
+    test_extraction_success_and_failure()
+    test_bounded_pool_and_wait_timeout()
+    test_recover_unfinished()
+    print("✅ 后台文本提取测试通过")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+文件记录按需加载测试
+====================
+
+验证get_file_record()只查询元数据，文本内容在访问时才读取。
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from database import DatabaseManager
+
+
+def test_content_is_loaded_lazily():
+    """元数据立即可用，content第一次访问时才加载"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            db.save_file_record('file-1', 'tender.txt', '/nonexistent', '招标正文')
+
+            record = db.get_file_record('file-1')
+            assert record['filename'] == 'tender.txt'
+            assert not record.content_loaded
+
+            assert record.get('content') == '招标正文'
+            assert record.content_loaded
+            assert record['content'] == '招标正文'
+
+            assert db.file_exists('file-1')
+            assert not db.file_exists('missing')
+            assert db.get_file_record('missing') is None
+            assert 'content' not in db.get_file_metadata('file-1')
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    test_content_is_loaded_lazily()
+    print("✅ 文件记录按需加载测试通过")
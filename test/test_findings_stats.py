@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+分析发现项统计测试
+==================
+
+验证招标废标条款、投标合规问题与项目信息错误写入发现项表，
+以及按维度聚合、筛选和键集分页下钻；文件记录删除后其发现项不再被检索和统计。
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from database import DatabaseManager, extract_findings
+
+
+def _set_time(db, analysis_id, created_time):
+    """修改分析记录及其发现项的创建时间"""
+    def update(conn):
+        for table in ('tender_analysis', 'bid_analysis'):
+            conn.execute(f'UPDATE {table} SET created_time = ? WHERE id = ?', (created_time, analysis_id))
+        conn.execute('UPDATE analysis_findings SET created_time = ? WHERE analysis_id = ?',
+                     (created_time, analysis_id))
+    db.pool.write(update)
+
+
+def test_extract_project_info_findings():
+    """项目信息错误按type归类，发现值与正确值写入detail"""
+    findings = extract_findings('project_info', {'errors': [
+        {'type': '项目编号错误', 'found_value': 'ZB-01', 'correct_value': 'ZB-02', 'severity': '高',
+         'description': '项目编号与招标文件不一致'}
+    ]})
+    assert findings == [{'category': '项目编号错误', 'severity': '高',
+                         'description': '项目编号与招标文件不一致', 'detail': '发现值: ZB-01\n正确值: ZB-02'}]
+    assert extract_findings('bid', {'issues': 'not a list'}) == []
+
+
+def test_findings_stats_and_drill_down():
+    """按季度、类别聚合，按筛选条件下钻"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            db.save_file_record('bid-1', 'bid.docx', '/nonexistent', '投标正文')
+            db.save_file_record('bid-2', 'bid2.docx', '/nonexistent', '投标正文')
+            first = db.save_bid_analysis('bid-1', {'issues': [
+                {'category': '资质', 'severity': '高', 'description': '缺少资质证书'},
+                {'category': '报价', 'severity': '中', 'description': '报价超出控制价'},
+            ]})
+            second = db.save_bid_analysis('bid-2', {'issues': [
+                {'category': '资质', 'severity': '高', 'description': '资质等级不足'},
+            ]})
+            _set_time(db, first, '2025-02-10 09:00:00')
+            _set_time(db, second, '2025-05-20 09:00:00')
+            assert db.save_project_info_findings('bid-2', [
+                {'type': '项目名称错误', 'severity': '中', 'description': '项目名称不一致'}
+            ])
+            assert db.save_project_info_findings('bid-2', []) is None
+
+            by_category = db.get_findings_stats(['category'])
+            assert by_category[0] == {'category': '资质', 'count': 2, 'analyses': 2, 'files': 2}
+            assert {g['category'] for g in by_category} == {'资质', '报价', '项目名称错误'}
+
+            quarterly = db.get_findings_stats(['quarter', 'category'], {'type': 'bid'})
+            assert {(g['quarter'], g['category'], g['count']) for g in quarterly} == {
+                ('2025-Q1', '资质', 1), ('2025-Q1', '报价', 1), ('2025-Q2', '资质', 1)}
+
+            ranged = db.get_findings_stats([], {'since': '2025-01-01', 'until': '2025-04-01'})
+            assert ranged == [{'count': 2, 'analyses': 1, 'files': 1}]
+
+            try:
+                db.get_findings_stats(['analysis_result'])
+                assert False, '不支持的维度应抛出ValueError'
+            except ValueError:
+                pass
+
+            page = db.get_findings({'type': 'bid'}, limit=2)
+            assert [f['description'] for f in page] == ['资质等级不足', '报价超出控制价']
+            rest = db.get_findings({'type': 'bid'}, limit=2, before=(page[-1]['created_time'], page[-1]['id']))
+            assert [f['description'] for f in rest] == ['缺少资质证书']
+            assert db.get_findings({'category': '资质', 'file_id': 'bid-1'})[0]['analysis_id'] == first
+
+            overview = db.get_overview_stats()
+            assert overview == {'files': 2, 'tender_analyses': 0, 'bid_analyses': 2, 'findings': 4}
+        finally:
+            db.close()
+
+
+def test_project_info_findings_removed_with_file():
+    """项目信息错误随文件记录删除（含直接删除files表记录），升级时清理已遗留的发现项"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, 'test.db')
+        db = DatabaseManager(db_path)
+        try:
+            for file_id in ('bid-1', 'bid-2'):
+                db.save_file_record(file_id, f'{file_id}.docx', '/nonexistent', '投标正文')
+                assert db.save_project_info_findings(file_id, [
+                    {'type': '项目编号错误', 'severity': '高', 'description': '项目编号与招标文件不一致'}
+                ])
+            assert len(db.search_findings('项目编号')['results']) == 2
+
+            # 与quick_clean相同：关闭外键检查后直接删除文件记录
+            db.pool.write(lambda conn: conn.execute("DELETE FROM files WHERE id = 'bid-1'"))
+            assert [r['file_id'] for r in db.search_findings('项目编号')['results']] == ['bid-2']
+            assert db.get_findings_stats(['file_id']) == [{'file_id': 'bid-2', 'count': 1, 'analyses': 1, 'files': 1}]
+            assert db.get_overview_stats()['findings'] == 1
+        finally:
+            db.close()
+
+        # 退回到迁移7之前的结构，制造删除文件后遗留的发现项
+        conn = sqlite3.connect(db_path)
+        conn.execute('DROP TRIGGER files_findings_ad')
+        conn.execute("DELETE FROM files WHERE id = 'bid-2'")
+        conn.execute('PRAGMA user_version = 6')
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(db_path)
+        try:
+            assert db.get_schema_version() >= 7
+            assert db.search_findings('项目编号')['results'] == []
+            assert db.get_overview_stats()['findings'] == 0
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    test_extract_project_info_findings()
+    test_findings_stats_and_drill_down()
+    test_project_info_findings_removed_with_file()
+    print("✅ 分析发现项统计测试通过")
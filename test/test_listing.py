@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+文件与分析记录列表测试
+======================
+
+验证列表只返回元数据、按时间倒序键集分页，以及类型/大小/时间筛选。
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from database import DatabaseManager
+
+
+def _page_all(fetch, time_key):
+    """按键集分页依次取完所有页"""
+    rows, before = [], None
+    while True:
+        page = fetch(before)
+        rows.extend(page)
+        if len(page) < 2:
+            return rows
+        before = (page[-1][time_key], page[-1]['id'])
+
+
+def test_list_files():
+    """文件列表按上传时间倒序分页，筛选条件生效，不含content"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            for i in range(5):
+                path = os.path.join(work_dir, f'file{i}.bin')
+                with open(path, 'wb') as f:
+                    f.write(b'x' * (i + 1) * 100)
+                db.save_file_record(f'file-{i}', f'doc{i}.{"pdf" if i % 2 else "docx"}', path, '正文' * 100)
+            db.pool.write(lambda conn: conn.execute(
+                "UPDATE files SET upload_time = '2025-0' || (CAST(substr(id, 6) AS INTEGER) + 1) || '-01 08:00:00'"))
+
+            rows = _page_all(lambda before: db.list_files(limit=2, before=before), 'upload_time')
+            assert [r['id'] for r in rows] == ['file-4', 'file-3', 'file-2', 'file-1', 'file-0']
+            assert all('content' not in r for r in rows)
+
+            assert [r['id'] for r in db.list_files({'file_type': 'pdf'})] == ['file-3', 'file-1']
+            assert [r['id'] for r in db.list_files({'min_size': 200, 'max_size': 400})] == ['file-3', 'file-2', 'file-1']
+            assert [r['id'] for r in db.list_files({'since': '2025-02-01', 'until': '2025-04-01'})] == ['file-2', 'file-1']
+        finally:
+            db.close()
+
+
+def test_list_analyses():
+    """招标/投标分析合并分页，附带文件名"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            db.save_file_record('tender-1', 'tender.docx', '/nonexistent', '招标正文')
+            db.save_file_record('bid-1', 'bid.docx', '/nonexistent', '投标正文')
+            tender_id = db.save_tender_analysis('tender-1', {'summary': '招标'})
+            bid_ids = [db.save_bid_analysis('bid-1', {'summary': '投标'}, tender_id) for _ in range(4)]
+
+            rows = _page_all(lambda before: db.list_analyses(limit=2, before=before), 'created_time')
+            assert sorted(r['id'] for r in rows) == sorted(bid_ids + [tender_id])
+            assert len({r['id'] for r in rows}) == 5
+            assert all('analysis_result' not in r for r in rows)
+            bid_row = next(r for r in rows if r['type'] == 'bid')
+            assert bid_row['filename'] == 'bid.docx' and bid_row['tender_analysis_id'] == tender_id
+
+            tenders = db.list_analyses({'type': 'tender'})
+            assert [(r['id'], r['filename']) for r in tenders] == [(tender_id, 'tender.docx')]
+            assert len(db.list_analyses({'file_id': 'bid-1'})) == 4
+            assert db.list_analyses({'until': '2000-01-01'}) == []
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    test_list_files()
+    test_list_analyses()
+    print("✅ 文件与分析记录列表测试通过")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+大模型响应缓存测试
+==================
+
+验证缓存键组成、命中统计、有效期、LRU淘汰与占用统计、bypass/refresh模式，
+以及QwenAnalysisService相同提示词只调用一次模型。
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import tempfile
+from types import SimpleNamespace
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+import llm_cache
+from llm_cache import LLMResponseCache
+
+
+class CountingFetch:
+    """记录调用次数的模型调用替身"""
+
+    def __init__(self, response='{"ok": true}'):
+        self.response = response
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(0.01)
+        return self.response
+
+
+def test_hit_miss_and_key_components():
+    """相同参数命中；模型、温度、图像不同时各自独立"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, 'llm.db'), 1024 * 1024, 3600)
+        try:
+            fetch = CountingFetch()
+            assert cache.call('qwen', 'm1', 0.3, '提示词', fetch) == '{"ok": true}'
+            assert cache.call('qwen', 'm1', 0.3, '提示词', fetch) == '{"ok": true}'
+            assert fetch.calls == 1
+
+            cache.call('qwen', 'm2', 0.3, '提示词', fetch)
+            cache.call('qwen', 'm1', 0.1, '提示词', fetch)
+            cache.call('qwen', 'm1', 0.3, '提示词', fetch, image='aGVsbG8=')
+            cache.call('qwen', 'm1', 0.3, '提示词', fetch, image='d29ybGQ=')
+            assert fetch.calls == 5
+
+            # 空响应不缓存
+            empty = CountingFetch('')
+            cache.call('qwen', 'm1', 0.3, '另一个提示词', empty)
+            cache.call('qwen', 'm1', 0.3, '另一个提示词', empty)
+            assert empty.calls == 2
+
+            stats = cache.get_stats()
+            assert stats['hits'] == 1 and stats['writes'] == 5 and stats['entries'] == 5
+            assert stats['saved_ms'] >= 10
+            assert 0 < stats['hit_rate'] < 1
+        finally:
+            cache.close()
+
+
+def test_ttl_and_lru_eviction():
+    """过期条目视为未命中；超过容量时淘汰最久未访问的条目"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, 'ttl.db'), 1024 * 1024, 0.05)
+        try:
+            fetch = CountingFetch()
+            cache.call('qwen', 'm', 0.3, 'p', fetch)
+            time.sleep(0.1)
+            cache.call('qwen', 'm', 0.3, 'p', fetch)
+            assert fetch.calls == 2
+            assert cache.get_stats()['expired'] == 1
+        finally:
+            cache.close()
+
+        # 随机十六进制响应，压缩后每条约1100字节
+        small = LLMResponseCache(os.path.join(tmp, 'small.db'), 2500, 3600)
+        try:
+            for i in range(2):
+                key = small.make_key('qwen', 'm', 0.3, f'p{i}')
+                small.put(key, 'qwen', 'm', os.urandom(1000).hex())
+                small.pool.execute_write('UPDATE llm_cache SET last_access = ? WHERE key = ?', (1000 + i, key))
+            small.put(small.make_key('qwen', 'm', 0.3, 'p2'), 'qwen', 'm', os.urandom(1000).hex())
+
+            assert small.get(small.make_key('qwen', 'm', 0.3, 'p0')) is None
+            assert small.get(small.make_key('qwen', 'm', 0.3, 'p2')) is not None
+            stats = small.get_stats()
+            assert stats['evictions'] >= 1 and stats['size_bytes'] <= 2500
+        finally:
+            small.close()
+
+
+def test_size_total_tracks_entries():
+    """占用统计随写入、覆盖、删除与淘汰同步更新；旧缓存库打开时按现有条目初始化"""
+    def summed(cache):
+        with cache.pool.connection() as conn:
+            return conn.execute('SELECT COALESCE(SUM(size), 0) FROM llm_cache').fetchone()[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'size.db')
+        cache = LLMResponseCache(path, 2500, 3600)
+        try:
+            key = cache.make_key('qwen', 'm', 0.3, 'p')
+            cache.put(key, 'qwen', 'm', '短响应')
+            cache.put(key, 'qwen', 'm', os.urandom(1000).hex())  # 覆盖同一键
+            for i in range(3):
+                cache.put(cache.make_key('qwen', 'm', 0.3, f'p{i}'), 'qwen', 'm', os.urandom(1000).hex())
+            assert cache.get_stats()['evictions'] >= 1
+            assert cache.get_stats()['size_bytes'] == summed(cache) <= 2500
+
+            cache.pool.execute_write('UPDATE llm_cache SET created_at = 0 WHERE key = ?', (key,))
+            assert cache.get(key) is None
+            assert cache.get_stats()['size_bytes'] == summed(cache)
+
+            cache.clear()
+            assert cache.get_stats()['size_bytes'] == 0
+            cache.put(key, 'qwen', 'm', '响应')
+            expected = summed(cache)
+        finally:
+            cache.close()
+
+        # 去掉统计表与触发器，模拟升级前创建的缓存库
+        conn = sqlite3.connect(path)
+        for name in ('llm_cache_size_ai', 'llm_cache_size_ad', 'llm_cache_size_au'):
+            conn.execute(f'DROP TRIGGER {name}')
+        conn.execute('DROP TABLE llm_cache_meta')
+        conn.commit()
+        conn.close()
+
+        cache = LLMResponseCache(path, 2500, 3600)
+        try:
+            assert expected > 0 and cache.get_stats()['size_bytes'] == expected
+        finally:
+            cache.close()
+
+
+def test_bypass_and_refresh():
+    """bypass不读不写；refresh不读但覆盖缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LLMResponseCache(os.path.join(tmp, 'llm.db'), 1024 * 1024, 3600)
+        try:
+            with llm_cache.bypass():
+                cache.call('qwen', 'm', 0.3, 'p', CountingFetch('旧响应'))
+            assert cache.get_stats()['entries'] == 0
+
+            cache.call('qwen', 'm', 0.3, 'p', CountingFetch('旧响应'))
+            with llm_cache.bypass(refresh=True):
+                assert cache.call('qwen', 'm', 0.3, 'p', CountingFetch('新响应')) == '新响应'
+                with llm_cache.bypass():
+                    assert llm_cache.bypass_mode() == 'bypass'
+                assert llm_cache.bypass_mode() == 'refresh'
+            assert llm_cache.bypass_mode() is None
+
+            fetch = CountingFetch('不应调用')
+            assert cache.call('qwen', 'm', 0.3, 'p', fetch) == '新响应'
+            assert fetch.calls == 0
+
+            stats = cache.get_stats()
+            assert stats['bypassed'] == 1 and stats['refreshed'] == 1
+        finally:
+            cache.close()
+
+
+def test_disabled_cache_calls_through():
+    """容量为0时禁用缓存，不创建数据库文件"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'off.db')
+        cache = LLMResponseCache(path, 0, 3600)
+        fetch = CountingFetch()
+        cache.call('qwen', 'm', 0.3, 'p', fetch)
+        cache.call('qwen', 'm', 0.3, 'p', fetch)
+        assert fetch.calls == 2
+        assert not os.path.exists(path)
+        assert cache.get_stats()['enabled'] is False
+
+
+def test_qwen_service_uses_cache():
+    """分析服务相同提示词只请求一次模型"""
+    from qwen_service import QwenAnalysisService
+
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='响应'))])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = QwenAnalysisService()
+        service.cache = LLMResponseCache(os.path.join(tmp, 'llm.db'), 1024 * 1024, 3600)
+        service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        try:
+            assert service._call_model_api('qwen', '提示词') == '响应'
+            assert service._call_qwen_api('提示词') == '响应'
+            assert len(calls) == 1
+        finally:
+            service.cache.close()
+
+
+if __name__ == "__main__":
+    test_hit_miss_and_key_components()
+    test_ttl_and_lru_eviction()
+    test_size_total_tracks_entries()
+    test_bypass_and_refresh()
+    test_disabled_cache_calls_through()
+    test_qwen_service_uses_cache()
+    print("✅ 大模型响应缓存测试通过")
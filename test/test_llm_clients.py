@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+大模型客户端共享测试
+====================
+
+验证相同 (提供方, base_url, API Key) 复用同一客户端，不同配置各自独立。
+"""
+
+import os
+import sys
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+import llm_clients
+
+
+def test_clients_are_shared_per_key():
+    """别名归一化后相同配置返回同一客户端"""
+    llm_clients.close_all()
+    try:
+        first = llm_clients.get_client('qwen', api_key='key-a')
+        assert llm_clients.get_client('dashscope', api_key='key-a') is first
+        assert llm_clients.get_client('qwen', api_key='key-b') is not first
+        assert llm_clients.get_client('ark', api_key='key-a') is not first
+        assert llm_clients.get_client('qwen', base_url='http://127.0.0.1:1/v1', api_key='key-a') is not first
+
+        assert str(first.base_url).startswith('https://dashscope.aliyuncs.com/')
+        stats = llm_clients.get_stats()
+        assert stats['clients'] == 4 and stats['reused'] == 1
+        assert all('key-a' not in str(key) for key in llm_clients._clients)
+    finally:
+        llm_clients.close_all()
+
+
+def test_normalize_provider():
+    """未知提供方回退到qwen"""
+    assert llm_clients.normalize_provider('VOLC') == 'doubao'
+    assert llm_clients.normalize_provider(None) == 'qwen'
+    assert llm_clients.normalize_provider('unknown') == 'qwen'
+
+
+if __name__ == "__main__":
+    test_clients_are_shared_per_key()
+    test_normalize_provider()
+    print("✅ 大模型客户端共享测试通过")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+大模型异步执行核心测试
+======================
+
+验证按提供方限制并发、超时与取消、同步门面，以及Word图片分离的AI命名在同一个事件循环上并发执行。
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from llm_executor import LLMExecutor
+from llm_cache import LLMResponseCache
+
+
+class FakeClient:
+    """模拟AsyncOpenAI：记录同时进行的调用数"""
+
+    def __init__(self, delay=0.02, content='响应'):
+        self.delay = delay
+        self.content = content
+        self.running = 0
+        self.peak = 0
+        self.cancelled = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.running -= 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.content))], usage=None)
+
+
+def test_per_provider_limits_and_facade():
+    """同一提供方的并发调用不超过上限，不同提供方互不占用名额"""
+    executor = LLMExecutor(limits={'qwen': 2, 'ark': 3})
+    try:
+        qwen, doubao = FakeClient(), FakeClient()
+        results = executor.run_all(
+            [executor.chat('qwen', qwen, model='m') for _ in range(6)]
+            + [executor.chat('volc', doubao, model='m') for _ in range(6)]
+        )
+        assert len(results) == 12 and all(r.choices[0].message.content == '响应' for r in results)
+        assert qwen.peak == 2 and doubao.peak == 3
+
+        stats = executor.get_stats()['providers']
+        assert stats['qwen']['started'] == 6 and stats['qwen']['in_flight'] == 0
+        assert stats['doubao']['limit'] == 3
+
+        # 单次调用
+        completion = executor.run(executor.chat('qwen', qwen, model='m'))
+        assert completion.choices[0].message.content == '响应'
+    finally:
+        executor.shutdown()
+
+
+def test_timeout_and_cancellation():
+    """超时取消调用；run_all中单个失败不影响其他；事件循环线程上同步等待报错"""
+    executor = LLMExecutor(limits={'qwen': 4}, timeout=0.05)
+    try:
+        slow = FakeClient(delay=1)
+        started = time.perf_counter()
+        try:
+            executor.run(executor.chat('qwen', slow, model='m'))
+            raise AssertionError('应当超时')
+        except TimeoutError:
+            pass
+        assert time.perf_counter() - started < 0.5
+        assert executor.get_stats()['providers']['qwen']['timeouts'] == 1
+
+        fast = FakeClient(delay=0)
+        results = executor.run_all([executor.chat('qwen', fast, model='m'), executor.chat('qwen', slow, model='m')])
+        assert results[0].choices[0].message.content == '响应' and isinstance(results[1], TimeoutError)
+
+        # 调用方放弃等待时取消协程
+        patient = LLMExecutor(limits={'qwen': 1}, timeout=5)
+        try:
+            client = FakeClient(delay=5)
+            try:
+                patient.run(patient.chat('qwen', client, model='m'), timeout=0.05)
+                raise AssertionError('应当超时')
+            except TimeoutError:
+                pass
+            time.sleep(0.05)
+            assert client.cancelled == 1 and client.running == 0
+        finally:
+            patient.shutdown()
+
+        async def nested():
+            return executor.run(asyncio.sleep(0))
+
+        try:
+            executor.run(nested())
+            raise AssertionError('应当报错')
+        except RuntimeError:
+            pass
+    finally:
+        executor.shutdown()
+
+
+def test_iterate_closes_stream():
+    """同步迭代中途停止时关闭异步生成器，释放并发名额"""
+    executor = LLMExecutor(limits={'qwen': 1})
+    closed = []
+
+    async def numbers():
+        try:
+            for index in range(10):
+                await asyncio.sleep(0)
+                yield index
+        finally:
+            closed.append(threading.current_thread().name)
+
+    try:
+        assert list(executor.iterate(numbers())) == list(range(10))
+        iterator = executor.iterate(numbers())
+        assert next(iterator) == 0
+        iterator.close()
+        assert closed == ['llm-executor', 'llm-executor']
+    finally:
+        executor.shutdown()
+
+
+def _write_docx_with_images(path, count):
+    """生成每张图片前都有一个标题和一段说明文字（不构成连续图片组）的Word文档"""
+    from io import BytesIO
+    from docx import Document
+    from PIL import Image
+
+    document = Document()
+    document.add_paragraph('投标文件')
+    for i in range(count):
+        image = BytesIO()
+        Image.new('RGB', (8, 8), (i * 40, 0, 0)).save(image, 'PNG')
+        image.seek(0)
+        document.add_heading(f'第{i + 1}节 资质证明', level=2)
+        document.add_paragraph(f'营业执照副本扫描件第{i + 1}份，已加盖投标单位公章，复印件与原件一致。')
+        document.add_picture(image)
+    document.save(path)
+
+
+def test_image_naming_runs_concurrently():
+    """Word图片分离时各图片的AI命名批量提交，在事件循环上并发执行"""
+    import tempfile
+    from ai_agents import word_image_separator
+
+    executor = LLMExecutor(limits={'doubao': 3})
+    client = FakeClient(content='营业执照')
+    original = (word_image_separator.init_ai_client, word_image_separator.get_executor)
+    word_image_separator.init_ai_client = lambda: client
+    word_image_separator.get_executor = lambda: executor
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            input_file = os.path.join(work_dir, '投标文件.docx')
+            _write_docx_with_images(input_file, 5)
+            output_doc, output_images, image_count = word_image_separator.extract_and_separate(input_file)
+
+            assert image_count == 5
+            assert sorted(os.listdir(output_images)) == [f'{i}营业执照.png' for i in range(1, 6)]
+            assert executor.get_stats()['providers']['doubao']['started'] == 5
+            assert client.peak == 3
+    finally:
+        word_image_separator.init_ai_client, word_image_separator.get_executor = original
+        executor.shutdown()
+
+
+if __name__ == "__main__":
+    test_per_provider_limits_and_facade()
+    test_timeout_and_cancellation()
+    test_iterate_closes_stream()
+    test_image_naming_runs_concurrently()
+    print("✅ 大模型异步执行核心测试通过")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+PDF并行提取引擎测试
+===================
+
+验证页码区间切分与分页文本拼接：
+    - 区间连续且覆盖全部页面
+    - 拼接结果与逐页累加的旧实现一致
+    - 每页偏移指向该页文本的起始位置
+    - 多页PDF并行提取（spawn子进程）与串行提取结果一致
+"""
+
+import os
+import sys
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+import pdf_extractor
+from pdf_extractor import _split_ranges, _join_pages, extract_pdf
+
+
+def _write_pdf(path, page_count):
+    """生成每页一行文本的最小PDF（Helvetica字体，无需第三方库）"""
+    font_id = 3 + page_count * 2
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [' + b' '.join(b'%d 0 R' % (3 + i * 2) for i in range(page_count))
+        + b'] /Count %d >>' % page_count,
+    ]
+    for i in range(page_count):
+        stream = b'BT /F1 12 Tf 72 720 Td (Page %d tender clause %d) Tj ET' % (i + 1, i * 7)
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       b'/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>' % (font_id, 4 + i * 2))
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+    objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+
+    data = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(data)
+    data += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    data += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    data += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(bytes(data))
+
+
+def test_split_ranges_cover_all_pages():
+    """页码区间应连续、不重叠并覆盖全部页面"""
+    for page_count in (1, 7, 64, 333, 600):
+        for workers in (1, 2, 8):
+            ranges = _split_ranges(page_count, workers)
+            assert ranges[0][0] == 0
+            assert ranges[-1][1] == page_count
+            for (_, prev_end), (next_start, _) in zip(ranges, ranges[1:]):
+                assert prev_end == next_start
+
+
+def test_join_pages_matches_serial_concatenation():
+    """拼接结果与逐页累加一致，偏移指向各页起始"""
+    pages = ['  第一页', '', '第二页内容', '第三页\n']
+    
+    expected = ""
+    for page_text in pages:
+        if page_text:
+            expected += page_text + "\n"
+    
+    result = _join_pages(pages)
+    assert result['text'] == expected.strip()
+    assert result['page_count'] == 4
+    
+    offsets = result['page_offsets']
+    assert result['text'][offsets[0]:].startswith('第一页')
+    assert offsets[1] == offsets[2]
+    assert result['text'][offsets[2]:].startswith('第二页内容')
+    assert result['text'][offsets[3]:].startswith('第三页')
+
+
+def test_parallel_extraction_matches_serial():
+    """达到并行阈值的多页PDF在进程池中提取，结果与串行提取一致"""
+    page_count = pdf_extractor.PARALLEL_MIN_PAGES + 8
+    previous = os.environ.get('PDF_EXTRACTION_PROCESSES')
+    os.environ['PDF_EXTRACTION_PROCESSES'] = '2'
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            path = os.path.join(work_dir, 'tender.pdf')
+            _write_pdf(path, page_count)
+
+            serial = extract_pdf(path, parallel=False)
+            parallel = extract_pdf(path, parallel=True)
+            assert serial['page_count'] == page_count
+            assert 'Page 1 tender clause 0' in serial['text']
+            assert parallel == serial
+
+            pool, workers = pdf_extractor._get_pool()
+            assert workers == 2 and pool._mp_context.get_start_method() == 'spawn'
+    finally:
+        if pdf_extractor._pool is not None:
+            pdf_extractor._pool.shutdown()
+            pdf_extractor._pool = None
+        if previous is None:
+            del os.environ['PDF_EXTRACTION_PROCESSES']
+        else:
+            os.environ['PDF_EXTRACTION_PROCESSES'] = previous
+
+
+if __name__ == "__main__":
+    test_split_ranges_cover_all_pages()
+    test_join_pages_matches_serial_concatenation()
+    test_parallel_extraction_matches_serial()
+    print("✅ PDF并行提取引擎测试通过")
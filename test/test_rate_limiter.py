@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+大模型调用限流测试
+==================
+
+验证RPM/TPM令牌桶、AIMD自适应并发、429退避重试，以及执行器与ProjectInfoAgent的接入。
+"""
+
+import os
+import sys
+import time
+import asyncio
+from types import SimpleNamespace
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from rate_limiter import RateLimiter, RateLimitExhausted, TokenBucket, parse_limits, classify_error
+from llm_executor import LLMExecutor
+
+
+class FakeStatusError(Exception):
+    """模拟openai.APIStatusError"""
+
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f'status {status_code}')
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers={'retry-after': retry_after} if retry_after else {})
+
+
+def test_parse_limits_and_config():
+    """提供方别名归一化，模型配置按最长前缀覆盖提供方配置"""
+    limits = parse_limits('ark:rpm=100:tpm=5000, qwen:rpm=600,qwen/qwen-vl:rpm=60:concurrency=2,bad:rpm=x')
+    assert limits['ark'] == {'rpm': 100, 'tpm': 5000} and 'bad' not in limits
+
+    limiter = RateLimiter(limits, default_concurrency=8, max_retries=0)
+    assert limiter.config('doubao', 'ep-1') == {'rpm': 100, 'tpm': 5000}
+    assert limiter.config('qwen', 'qwen-vl-plus') == {'rpm': 60, 'concurrency': 2}
+    assert limiter.config('qwen', 'qwen-plus') == {'rpm': 600}
+    assert limiter.for_model('qwen', 'qwen-vl-plus').max_concurrency == 2
+    assert limiter.for_model('qwen', 'qwen-plus').max_concurrency == 8
+
+    assert classify_error(FakeStatusError(429)) == 'throttle'
+    assert classify_error(FakeStatusError(503)) == 'throttle'
+    assert classify_error(FakeStatusError(400)) is None
+    assert classify_error(ValueError('x')) is None
+
+
+def test_token_bucket_and_usage_settlement():
+    """令牌不足时给出等待时间；按实际用量退回多扣的令牌"""
+    bucket = TokenBucket(60)  # 每秒补1个
+    bucket.take(60)
+    assert 0.9 < bucket.delay(1) <= 1.0
+    # 超过容量的请求只需桶满
+    assert bucket.delay(1000) <= 60
+
+    async def scenario():
+        limiter = RateLimiter({'qwen': {'tpm': 6000}}, default_concurrency=4, max_retries=0)
+
+        async def call():
+            return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=100, completion_tokens=50))
+
+        await limiter.call('qwen', 'm', 4000, call)
+        # 预扣4000，实际150，退回后余额接近6000-150
+        tokens = limiter.for_model('qwen', 'm').tpm.tokens
+        assert 5800 < tokens <= 6000
+
+        # RPM限制：每分钟120次即每0.5秒1次，桶内只剩1次时第二次要等待
+        paced = RateLimiter({'qwen': {'rpm': 120}}, default_concurrency=4, max_retries=0)
+        paced.for_model('qwen', 'm').rpm.tokens = 1
+        started = time.monotonic()
+        await asyncio.gather(paced.call('qwen', 'm', 1, call), paced.call('qwen', 'm', 1, call))
+        assert time.monotonic() - started >= 0.4
+
+    asyncio.run(scenario())
+
+
+def test_aimd_backoff_and_retry():
+    """429时并发上限减半（同一轮只减一次）并退避重试，成功后加性恢复；重试用尽抛出RateLimitExhausted"""
+
+    async def scenario():
+        limiter = RateLimiter({}, default_concurrency=8, max_retries=3, backoff_base=0.01, backoff_max=0.05)
+        failures = {'left': 4}
+        peak = {'now': 0, 'max': 0}
+
+        async def call():
+            peak['now'] += 1
+            peak['max'] = max(peak['max'], peak['now'])
+            try:
+                await asyncio.sleep(0.01)
+                if failures['left'] > 0:
+                    failures['left'] -= 1
+                    raise FakeStatusError(429)
+                return SimpleNamespace(usage=None)
+            finally:
+                peak['now'] -= 1
+
+        results = await asyncio.gather(*(limiter.call('qwen', 'm', 10, call) for _ in range(8)))
+        assert len(results) == 8
+        model = limiter.for_model('qwen', 'm')
+        # 8个并发请求中的4个同时收到429，只减半一次
+        assert model.stats['throttled'] == 4 and model.stats['retries'] == 4
+        assert 4 <= model.limit < 8 and model.epoch == 1
+
+        # 减半后新一轮的并发不超过上限
+        peak['max'] = 0
+        limit = int(model.limit)
+        await asyncio.gather(*(limiter.call('qwen', 'm', 10, call) for _ in range(16)))
+        assert peak['max'] <= 8 and peak['max'] >= limit
+
+        # Retry-After优先
+        assert limiter.backoff(0, 0.2) >= 0.2
+        assert limiter.backoff(10) <= 0.05
+
+        async def always_throttled():
+            raise FakeStatusError(503)
+
+        try:
+            await limiter.call('qwen', 'other', 10, always_throttled)
+            raise AssertionError('应当抛出RateLimitExhausted')
+        except RateLimitExhausted as error:
+            assert error.attempts == 4 and isinstance(error.error, FakeStatusError)
+        assert limiter.for_model('qwen', 'other').limit == 1.0
+
+        # 非限流错误不重试
+        async def bad_request():
+            raise FakeStatusError(400)
+
+        try:
+            await limiter.call('qwen', 'bad', 10, bad_request)
+            raise AssertionError('应当抛出原错误')
+        except FakeStatusError:
+            pass
+        assert limiter.for_model('qwen', 'bad').stats['retries'] == 0
+
+    asyncio.run(scenario())
+
+
+def test_executor_routes_calls_through_limiter():
+    """执行器的调用经过限流器：429后退避重试成功，统计出现在rate_limits中"""
+    os.environ['LLM_BACKOFF_BASE'] = '0.01'
+    try:
+        executor = LLMExecutor(limits={'qwen': 2})
+    finally:
+        del os.environ['LLM_BACKOFF_BASE']
+    attempts = []
+
+    async def create(**kwargs):
+        attempts.append(kwargs)
+        if len(attempts) == 1:
+            raise FakeStatusError(429)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='响应'))],
+                               usage=SimpleNamespace(prompt_tokens=5, completion_tokens=1))
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    try:
+        completion = executor.run(executor.chat('qwen', client, model='qwen-plus',
+                                                messages=[{'role': 'user', 'content': '提示词'}], max_tokens=50))
+        assert completion.choices[0].message.content == '响应' and len(attempts) == 2
+        stats = executor.get_stats()['rate_limits']['qwen/qwen-plus']
+        assert stats['retries'] == 1 and stats['succeeded'] == 1 and stats['max_concurrency'] == 2
+    finally:
+        executor.shutdown()
+
+
+def test_project_info_agent_stops_on_exhausted_rate_limit():
+    """限流重试用尽后ProjectInfoAgent不再立即重试"""
+    from ai_agents.project_info_agent import ProjectInfoAgent
+
+    agent = ProjectInfoAgent()
+    calls = []
+
+    def call_model_api(provider, prompt):
+        calls.append(prompt)
+        raise RateLimitExhausted('qwen', 'qwen-plus', 5, FakeStatusError(429))
+
+    agent._ai_service = SimpleNamespace(_call_model_api=call_model_api)
+    assert agent._extract_by_ai_with_retry('招标文件正文', 'tender') == {}
+    assert agent._extract_by_ai_with_retry_for_detection('提示词') == {'errors': []}
+    assert len(calls) == 2
+
+
+if __name__ == "__main__":
+    test_parse_limits_and_config()
+    test_token_bucket_and_usage_settlement()
+    test_aimd_backoff_and_retry()
+    test_executor_routes_calls_through_limiter()
+    test_project_info_agent_stops_on_exhausted_rate_limit()
+    print("✅ 大模型调用限流测试通过")
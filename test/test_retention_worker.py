@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+后台数据清理测试
+================
+
+验证过期记录按批删除、不再被引用的上传文件与工作目录被删除、
+仍在使用、刚写入或刚被重新上传复用的文件保留，以及数据库空闲页的增量回收。
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from database import DatabaseManager
+from file_handler import FileHandler
+from retention_worker import RetentionWorker
+
+OLD = '2000-01-01 00:00:00'
+
+
+def _write_file(path, size=1024, age_seconds=7200):
+    """写入测试文件，并把修改时间调到宽限期之前"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    past = time.time() - age_seconds
+    os.utime(path, (past, past))
+    return path
+
+
+def _age(path, age_seconds=7200):
+    past = time.time() - age_seconds
+    os.utime(path, (past, past))
+
+
+def test_retention_run_once():
+    """过期记录、孤立文件和工作目录被清理，仍在使用的保留"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        uploads = os.path.join(work_dir, 'uploads')
+        temp_dir = os.path.join(work_dir, 'temp')
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            old_path = _write_file(os.path.join(uploads, 'aa', 'bb', 'aabb-old.pdf'))
+            kept_path = _write_file(os.path.join(uploads, 'cc', 'dd', 'ccdd-kept.pdf'))
+            orphan_path = _write_file(os.path.join(uploads, 'ee', 'ff', 'eeff-orphan.pdf'))
+            fresh_orphan = _write_file(os.path.join(uploads, 'ee', 'ff', 'eeff-fresh.pdf'), age_seconds=0)
+            staging = _write_file(os.path.join(uploads, '.staging', 'upload.part'))
+
+            db.save_file_record('old-file', 'old.pdf', old_path, '旧文件')
+            db.save_file_record('kept-file', 'kept.pdf', kept_path, '新文件')
+            for i in range(5):
+                db.save_tender_analysis('old-file', {'invalid_items': [{'category': '资质', 'description': f'过期{i}'}]})
+            db.save_tender_analysis('kept-file', {'invalid_items': [{'category': '资质', 'description': '保留'}]})
+            db.pool.write(lambda conn: conn.execute(
+                "UPDATE tender_analysis SET created_time = ? WHERE file_id = 'old-file'", (OLD,)))
+            db.pool.write(lambda conn: conn.execute(
+                "UPDATE files SET upload_time = ? WHERE id = 'old-file'", (OLD,)))
+
+            old_work_dir = os.path.join(temp_dir, 'old-file')
+            _write_file(os.path.join(old_work_dir, 'toc.md'))
+            _write_file(os.path.join(temp_dir, 'kept-file', 'toc.md'))
+            _write_file(os.path.join(temp_dir, 'ghost', 'toc.md'))
+            _age(os.path.join(temp_dir, 'kept-file'))
+            _age(os.path.join(temp_dir, 'ghost'))
+
+            worker = RetentionWorker(db, uploads, temp_dir, retention_days=30, interval_minutes=0, batch_size=2)
+            report = worker.run_once()
+
+            assert report['analyses_deleted'] == 5
+            assert report['files_deleted'] == 1
+            assert report['upload_files_removed'] == 2
+            assert report['work_dirs_removed'] == 2
+            assert report['disk_bytes_reclaimed'] == 4 * 1024
+            assert report['errors'] == []
+
+            assert not os.path.exists(old_path) and not os.path.exists(orphan_path)
+            assert os.path.exists(kept_path) and os.path.exists(fresh_orphan) and os.path.exists(staging)
+            assert not os.path.exists(old_work_dir) and not os.path.exists(os.path.join(temp_dir, 'ghost'))
+            assert os.path.exists(os.path.join(temp_dir, 'kept-file'))
+
+            assert db.get_file_record('old-file') is None
+            assert db.file_exists('kept-file')
+            assert db.search_findings('过期0')['results'] == []
+            assert db.search_findings('保留')['results']
+
+            stats = worker.get_stats()
+            assert stats['totals']['runs'] == 1 and stats['last_report'] is report
+            assert not worker.start()
+        finally:
+            db.close()
+
+
+def test_reused_blob_survives_purge():
+    """过期记录的文件刚被相同内容的上传复用时不删除（复用刷新修改时间，宽限期重新计算）"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        uploads = os.path.join(work_dir, 'uploads')
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        handler = FileHandler()
+        try:
+            content_hash = 'ab' * 32
+            blob_path = _write_file(handler.get_blob_path(content_hash, '.pdf', uploads))
+            db.save_file_record('old-file', 'old.pdf', blob_path, '旧文件', content_hash)
+            db.pool.write(lambda conn: conn.execute(
+                "UPDATE files SET upload_time = ? WHERE id = 'old-file'", (OLD,)))
+
+            # 新上传的相同内容在入库前复用已有文件
+            staging_path = _write_file(os.path.join(uploads, '.staging', 'new.pdf.part'), age_seconds=0)
+            assert handler.store_blob(staging_path, content_hash, '.pdf', uploads) == blob_path
+            assert not os.path.exists(staging_path)
+
+            worker = RetentionWorker(db, uploads, os.path.join(work_dir, 'temp'),
+                                     retention_days=30, interval_minutes=0)
+            report = worker.run_once()
+            assert report['files_deleted'] == 1 and report['upload_files_removed'] == 0
+            assert os.path.exists(blob_path)
+        finally:
+            db.close()
+
+
+def test_incremental_vacuum():
+    """删除数据后空闲页被逐批回收"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            for i in range(50):
+                db.save_file_record(f'file-{i}', 'a.txt', '/nonexistent', os.urandom(20000).hex())
+            db.pool.write(lambda conn: conn.execute('DELETE FROM files'))
+
+            first = db.incremental_vacuum(max_pages=10)
+            assert first['pages'] == 10 and first['bytes'] > 0 and first['free_pages'] > 0
+            while db.incremental_vacuum()['free_pages']:
+                pass
+            assert db.incremental_vacuum()['pages'] == 0
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    test_retention_run_once()
+    test_reused_blob_survives_purge()
+    test_incremental_vacuum()
+    print("✅ 后台数据清理测试通过")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+全文检索测试
+============
+
+验证文档块与分析发现项的FTS5索引随写入/删除同步，检索结果带转义后的高亮片段，
+以及旧数据库升级时对已有数据的回填。
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from database import DatabaseManager
+
+BLOCKS = [
+    {'seq': 0, 'kind': 'paragraph', 'level': 1, 'page': 1, 'char_offset': 0,
+     'text': '项目编号：ZB-2025-0417 某市政道路工程施工'},
+    {'seq': 1, 'kind': 'paragraph', 'level': None, 'page': 2, 'char_offset': 30,
+     'text': '投标人须具备市政公用工程施工总承包资质'},
+]
+
+TENDER_RESULT = {'invalid_items': [
+    {'category': '资质要求', 'description': '未提供施工总承包资质证书', 'requirement': '二级及以上', 'severity': '高'}
+]}
+
+BID_RESULT = {'issues': [
+    {'category': '项目信息', 'description': '项目编号ZB-2025-0417与招标文件不一致', 'severity': '高',
+     'suggestion': '核对封面项目编号', 'location': '封面'}
+]}
+
+
+def _populate(db):
+    """写入一份招标文件、一份投标文件及其分析结果"""
+    db.save_file_record('tender-1', 'tender.docx', '/nonexistent', '招标正文')
+    db.save_file_record('bid-1', 'bid.docx', '/nonexistent', '投标正文')
+    db.update_extraction_status('bid-1', 'done', '投标正文', blocks=BLOCKS)
+    tender_id = db.save_tender_analysis('tender-1', TENDER_RESULT)
+    bid_id = db.save_bid_analysis('bid-1', BID_RESULT, tender_id)
+    return tender_id, bid_id
+
+
+def test_search_documents():
+    """按项目编号检索投标文件，长词走FTS排序，短词走子串匹配"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            _populate(db)
+
+            found = db.search_documents('ZB-2025-0417')
+            assert [r['file_id'] for r in found['results']] == ['bid-1']
+            assert found['results'][0]['filename'] == 'bid.docx'
+            assert found['results'][0]['page'] == 1
+            assert '<mark>ZB-2025-0417</mark>' in found['results'][0]['snippet']
+            assert found['has_more'] is False
+
+            assert db.search_documents('ZB-2025-0417', role='bid')['results']
+            assert not db.search_documents('ZB-2025-0417', role='tender')['results']
+
+            # 两个字的中文词低于trigram的最小长度，退化为子串匹配
+            short = db.search_documents('资质')['results']
+            assert len(short) == 1 and '<mark>资质</mark>' in short[0]['snippet']
+            assert len(db.search_documents('总承包 资质')['results']) == 1
+            assert not db.search_documents('总承包 监理')['results']
+
+            # FTS5语法字符按普通文本处理
+            assert db.search_documents('"OR" NEAR(')['results'] == []
+
+            # 重新提取时替换文档块，索引同步更新
+            db.update_extraction_status('bid-1', 'done', '新正文', blocks=[dict(BLOCKS[1], seq=0)])
+            assert not db.search_documents('ZB-2025-0417')['results']
+        finally:
+            db.close()
+
+
+def test_snippets_are_escaped():
+    """片段中的文档内容经HTML转义，只有高亮标记是标签；多个短词一次高亮，互不嵌套"""
+    from database import _highlight
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            db.save_file_record('bid-1', 'bid.docx', '/nonexistent', '投标正文')
+            db.update_extraction_status('bid-1', 'done', '投标正文', blocks=[
+                dict(BLOCKS[0], text='<script>alert(1)</script> 项目编号 ZB-0417 & 资质')])
+
+            for query in ('ZB-0417', '资质'):
+                snippet = db.search_documents(query)['results'][0]['snippet']
+                assert f'<mark>{query}</mark>' in snippet and '&amp;' in snippet and '&gt;' in snippet
+                assert '<' not in snippet.replace('<mark>', '').replace('</mark>', '')
+        finally:
+            db.close()
+
+    assert _highlight('mark ar', ['ma', 'ar']) == '<mark>ma</mark>rk <mark>ar</mark>'
+    assert _highlight('a<b>', ['b']) == 'a&lt;<mark>b</mark>&gt;'
+
+
+def test_search_findings_and_pagination():
+    """发现项随分析记录写入与删除，分页返回has_more"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, 'test.db')
+        db = DatabaseManager(db_path)
+        try:
+            tender_id, bid_id = _populate(db)
+
+            found = db.search_findings('0417')['results']
+            assert [(r['analysis_id'], r['analysis_type']) for r in found] == [(bid_id, 'bid')]
+            assert found[0]['detail'] == '核对封面项目编号\n封面'
+            assert db.search_findings('资质证书', analysis_type='tender')['results'][0]['analysis_id'] == tender_id
+            assert not db.search_findings('资质证书', analysis_type='bid')['results']
+
+            for i in range(5):
+                db.save_bid_analysis('bid-1', BID_RESULT)
+            first = db.search_findings('不一致', limit=4)
+            second = db.search_findings('不一致', limit=4, offset=4)
+            assert len(first['results']) == 4 and first['has_more']
+            assert len(second['results']) == 2 and not second['has_more']
+
+            db.pool.write(lambda conn: conn.execute('DELETE FROM bid_analysis WHERE id = ?', (bid_id,)))
+            assert len(db.search_findings('不一致', limit=10)['results']) == 5
+        finally:
+            db.close()
+
+
+def test_migration_backfills_existing_data():
+    """从版本2升级时，已有的文档块与分析结果被编入索引"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, 'test.db')
+        db = DatabaseManager(db_path)
+        _populate(db)
+        db.close()
+
+        # 退回到迁移3之前的结构
+        conn = sqlite3.connect(db_path)
+        for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+            conn.execute(f'DROP TRIGGER {name}')
+        conn.execute('DROP TABLE file_blocks_fts')
+        conn.execute('DROP TABLE analysis_findings_fts')
+        conn.execute('DROP TABLE analysis_findings')
+        conn.execute('PRAGMA user_version = 2')
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(db_path)
+        try:
+            assert db.get_schema_version() >= 3
+            assert db.search_documents('ZB-2025-0417')['results']
+            assert db.search_findings('资质证书')['results']
+            assert db.search_findings('不一致')['results']
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    test_search_documents()
+    test_snippets_are_escaped()
+    test_search_findings_and_pagination()
+    test_migration_backfills_existing_data()
+    print("✅ 全文检索测试通过")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+存储压缩测试
+============
+
+验证：
+    - 长文本压缩为带格式标记的BLOB，短文本保持原样
+    - 旧版本写入的未压缩数据可以直接读取，迁移后内容不变
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from database import DatabaseManager
+from storage_codec import encode_text, decode_text, is_compressed
+
+LONG_TEXT = '第一章 招标公告\n' + '投标人须在截止时间前递交投标文件。' * 200
+
+
+def test_encode_decode():
+    """长文本压缩、短文本原样保存"""
+    encoded = encode_text(LONG_TEXT)
+    assert is_compressed(encoded)
+    assert len(encoded) < len(LONG_TEXT.encode('utf-8')) / 3
+    assert decode_text(encoded) == LONG_TEXT
+
+    assert encode_text('短文本') == '短文本'
+    assert decode_text('短文本') == '短文本'
+    assert encode_text(None) is None and decode_text(None) is None
+
+
+def test_legacy_rows_and_migration():
+    """旧的TEXT数据可读，迁移后变为压缩存储且读取结果不变"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        db = DatabaseManager(os.path.join(work_dir, 'test.db'))
+        try:
+            analysis = {'summary': LONG_TEXT}
+
+            # 模拟旧版本直接写入的未压缩数据
+            def insert_legacy(conn):
+                conn.execute("INSERT INTO files (id, filename, file_path, content) VALUES ('old', 'a.txt', '/x', ?)",
+                             (LONG_TEXT,))
+                conn.execute("INSERT INTO tender_analysis (id, file_id, analysis_result) VALUES ('t1', 'old', ?)",
+                             (json.dumps(analysis, ensure_ascii=False),))
+            db.pool.write(insert_legacy)
+
+            assert db.get_file_content('old') == LONG_TEXT
+            assert db.get_analysis_result('t1')['analysis_result'] == analysis
+
+            report = db.compress_existing_records()
+            assert report['files.content']['rows'] == 1
+            assert report['tender_analysis.analysis_result']['rows'] == 1
+
+            with db.pool.connection() as conn:
+                assert conn.execute("SELECT typeof(content) FROM files WHERE id = 'old'").fetchone()[0] == 'blob'
+            assert db.get_file_content('old') == LONG_TEXT
+            assert db.get_tender_analysis('t1')['analysis_result'] == analysis
+
+            # 再次执行不会重复处理
+            assert db.compress_existing_records()['files.content']['rows'] == 0
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    test_encode_decode()
+    test_legacy_rows_and_migration()
+    print("✅ 存储压缩测试通过")
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+流式分析测试
+============
+
+验证流式JSON增量解析、响应缓存的流式读写，以及流式分析边输出边产出条款。
+"""
+
+import os
+import sys
+import json
+import tempfile
+from types import SimpleNamespace
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+from json_stream import ArrayItemParser
+from llm_cache import LLMResponseCache
+
+TENDER_RESPONSE = json.dumps({
+    "summary": "摘要",
+    "invalid_items": [
+        {"category": "资质要求", "description": "须提供{营业执照}副本\"加盖公章\"", "severity": "高"},
+        {"category": "商务要求", "description": "投标保证金须按时缴纳", "severity": "中"},
+    ],
+    "suggestions": ["核对资质"],
+}, ensure_ascii=False)
+
+
+class AsyncChunks:
+    """模拟AsyncStream：异步逐个产出数据块"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.chunks)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def split_text(text, size):
+    return [text[index:index + size] for index in range(0, len(text), size)]
+
+
+def test_array_item_parser():
+    """对象完整输出后立即取出，不受字符串中的括号与转义影响"""
+    parser = ArrayItemParser('invalid_items')
+    items = []
+    for piece in split_text('```json\n' + TENDER_RESPONSE + '\n```', 7):
+        items.extend(parser.feed(piece))
+    assert [item['category'] for item in items] == ['资质要求', '商务要求']
+    assert items[0]['description'] == '须提供{营业执照}副本"加盖公章"'
+    assert parser.done
+
+    # 第一个对象闭合时即可取出
+    parser = ArrayItemParser('issues')
+    assert parser.feed('{"summary": "x", "iss') == []
+    assert parser.feed('ues": [{"category": "a"}, {"category"') == [{'category': 'a'}]
+
+
+def test_cache_stream():
+    """流式响应完整输出后写入缓存，命中时一次性返回"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = LLMResponseCache(os.path.join(directory, 'cache.db'), 1024 * 1024, 3600)
+        calls = []
+
+        def fetch_stream():
+            calls.append(1)
+            yield from ['第一段', '第二段']
+
+        assert list(cache.stream('qwen', 'qwen-plus', 0.3, 'prompt', fetch_stream)) == ['第一段', '第二段']
+        assert list(cache.stream('qwen', 'qwen-plus', 0.3, 'prompt', fetch_stream)) == ['第一段第二段']
+        assert len(calls) == 1
+
+        # 中途放弃的流不写入缓存
+        partial = cache.stream('qwen', 'qwen-plus', 0.3, 'other', fetch_stream)
+        next(partial)
+        partial.close()
+        assert cache.get(cache.make_key('qwen', 'qwen-plus', 0.3, 'other')) is None
+        cache.close()
+
+
+def test_stream_tender_and_bid_analysis():
+    """流式分析以stream=True调用模型，条款在输出过程中产出，最终结果与非流式解析一致"""
+    from qwen_service import QwenAnalysisService
+
+    service = QwenAnalysisService()
+    service.cache = LLMResponseCache('', 0, 0)  # 容量为0即禁用缓存
+    requests = []
+
+    async def create(**kwargs):
+        requests.append(kwargs)
+        response = TENDER_RESPONSE
+        if '"issues"' in kwargs['messages'][0]['content']:
+            response = json.dumps({"summary": "投标摘要", "issues": [{"category": "格式", "description": "缺少签章"}]},
+                                  ensure_ascii=False)
+        chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+                  for piece in split_text(response, 5)]
+        chunks.append(SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=10, completion_tokens=20)))
+        return AsyncChunks(chunks)
+
+    service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    events = list(service.stream_tender_analysis('招标文件正文', include_tokens=True))
+    names = [event['event'] for event in events]
+    assert names[0] == 'start' and names[-1] == 'result'
+    assert requests[0]['stream'] is True
+    # 第一个条款在输出结束前产出
+    assert names.index('item') < len(names) - 2 and 'token' in names[names.index('item') + 1:]
+    items = [event['data']['item'] for event in events if event['event'] == 'item']
+    result = events[-1]['data']['result']
+    assert items == result['invalid_items'] and len(items) == 2
+    assert ''.join(event['data']['text'] for event in events if event['event'] == 'token') == TENDER_RESPONSE
+
+    events = list(service.stream_bid_analysis('投标文件正文'))
+    issues = [event['data']['item'] for event in events if event['event'] == 'item']
+    assert [issue['description'] for issue in issues] == ['缺少签章']
+    assert events[-1]['data']['result']['issues'] == issues
+
+
+if __name__ == "__main__":
+    test_array_item_parser()
+    test_cache_stream()
+    test_stream_tender_and_bid_analysis()
+    print("✅ 流式分析测试通过")
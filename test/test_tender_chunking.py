@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+长招标文件分段分析测试
+======================
+
+验证分段在结构边界处切分并带重叠，分段结果并发分析后合并去重。
+"""
+
+import os
+import sys
+import json
+import asyncio
+import threading
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+import llm_cache
+from document_chunker import split_document
+
+
+def build_document(sections=6, lines=20):
+    """构造带章节标题的文档，返回 (全文, 标题偏移列表)"""
+    parts, offsets, position = [], [], 0
+    for index in range(sections):
+        heading = f"第{index + 1}章 投标人资格要求\n"
+        body = ''.join(f"第{index + 1}章第{line}条 投标人须提供有效的资质证明材料。\n" for line in range(lines))
+        offsets.append(position)
+        parts.append(heading + body)
+        position += len(heading) + len(body)
+    return ''.join(parts), offsets
+
+
+def test_split_prefers_structural_boundaries():
+    """优先在标题处切分；各段首尾相接，重叠对齐行首且总长不超过上限"""
+    content, headings = build_document()
+    chunks = split_document(content, headings, max_chars=1500, overlap_chars=100)
+
+    assert len(chunks) > 1
+    assert chunks[0]['start'] == 0 and chunks[-1]['end'] == len(content)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk['start'] == previous['end']
+        assert chunk['start'] in headings
+        assert chunk['text_start'] < chunk['start']
+        assert content[chunk['text_start'] - 1] == '\n'
+    assert all(len(chunk['text']) <= 1500 for chunk in chunks)
+
+    # 没有结构边界时在换行处切分
+    plain = split_document(content, None, max_chars=1000, overlap_chars=0)
+    assert all(content[chunk['end'] - 1] == '\n' for chunk in plain[:-1])
+    assert ''.join(chunk['text'] for chunk in plain) == content
+
+    assert len(split_document('短文档', None, 1000, 100)) == 1
+
+
+def test_chunked_analysis_merges_and_deduplicates():
+    """分段并发分析，重复条款合并并保留较高严重程度，报告每段耗时"""
+    from qwen_service import QwenAnalysisService
+
+    service = QwenAnalysisService()
+    prompts = []
+    threads = set()
+    modes = []
+    running = [0, 0]  # 进行中的段数、峰值
+
+    async def fake_call(provider, prompt, cache_mode=None):
+        prompts.append(prompt)
+        threads.add(threading.current_thread().name)
+        modes.append(cache_mode)
+        running[0] += 1
+        running[1] = max(running)
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        chapter = prompt.count('第1章')
+        items = [{"category": "资质要求", "description": "投标人须提供有效的资质证明材料。",
+                  "severity": "高" if chapter else "中", "keywords": ["资质"]}]
+        if '第6章' in prompt:
+            items.append({"category": "商务要求", "description": "投标保证金须按时缴纳", "severity": "高"})
+        return json.dumps({"summary": "本部分摘要", "invalid_items": items, "suggestions": ["核对资质证明"]},
+                          ensure_ascii=False)
+
+    service._acall_model_api = fake_call
+    content, headings = build_document()
+    with llm_cache.bypass(refresh=True):
+        result = service.analyze_tender_document_chunked(
+            content, boundaries=headings, chunk_chars=1500, overlap_chars=100, max_workers=3
+        )
+
+    chunking = result['chunking']
+    assert len(chunking['chunks']) == len(prompts) > 1
+    assert chunking['concurrency'] == 3
+    assert all(chunk['error'] is None and chunk['seconds'] >= 0 for chunk in chunking['chunks'])
+    assert all(mode == 'refresh' for mode in modes)
+    # 各段在同一个事件循环上并发执行，同时进行的段数不超过并发上限
+    assert threads == {'llm-executor'}
+    assert running[1] == 3
+    assert any('第1/' in prompt for prompt in prompts)
+
+    descriptions = [item['description'] for item in result['invalid_items']]
+    assert descriptions.count('投标人须提供有效的资质证明材料。') == 1
+    assert result['invalid_items'][0]['severity'] == '高'
+    assert '投标保证金须按时缴纳' in descriptions
+    assert result['suggestions'] == ['核对资质证明']
+
+    # 不超过分段长度时走整篇分析，结果不含chunking
+    prompts.clear()
+    short = service.analyze_tender_document_chunked('招标文件正文', chunk_chars=1500)
+    assert 'chunking' not in short and len(prompts) == 1
+
+
+if __name__ == "__main__":
+    test_split_prefers_structural_boundaries()
+    test_chunked_analysis_merges_and_deduplicates()
+    print("✅ 长招标文件分段分析测试通过")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+文本编码检测测试
+================
+
+验证单遍检测对常见编码的判断，以及纯ASCII前缀较长时仍能正确识别后续的GBK内容。
+"""
+
+import io
+import os
+import sys
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+from text_encoding import decode_stream
+
+SAMPLE_TEXT = '招标编号：ZB-2025-001\n投标截止时间：2025年10月1日\n'
+
+
+def test_detects_common_encodings():
+    """BOM、UTF-8、GBK、无BOM的UTF-16"""
+    cases = [
+        (SAMPLE_TEXT.encode('utf-8'), 'utf-8'),
+        (SAMPLE_TEXT.encode('utf-8-sig'), 'utf-8-sig'),
+        (SAMPLE_TEXT.encode('gbk'), 'gb18030'),
+        (SAMPLE_TEXT.encode('utf-16'), 'utf-16'),
+        (SAMPLE_TEXT.encode('utf-16-le'), 'utf-16-le'),
+    ]
+    for data, expected in cases:
+        result = decode_stream(io.BytesIO(data))
+        assert result['encoding'] == expected, (expected, result['encoding'])
+        assert result['text'] == SAMPLE_TEXT
+
+
+def test_ascii_prefix_then_gbk_with_small_blocks():
+    """ASCII前缀跨越多个读取块，多字节字符跨块边界"""
+    text = 'log line\n' * 50 + SAMPLE_TEXT * 20
+    result = decode_stream(io.BytesIO(text.encode('gbk')), block_size=37)
+    assert result['encoding'] == 'gb18030'
+    assert result['text'] == text
+
+    result = decode_stream(io.BytesIO(text.encode('utf-8')), block_size=37)
+    assert result['encoding'] == 'utf-8'
+    assert result['text'] == text
+
+
+if __name__ == "__main__":
+    test_detects_common_encodings()
+    test_ascii_prefix_then_gbk_with_small_blocks()
+    print("✅ 文本编码检测测试通过")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Token预算测试
+=============
+
+验证中英文估算、模型上下文上限查找、发送/改用/分段/截断决策、投标分析按预算截断与用量记录。
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+# 添加backend路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+backend_path = os.path.join(project_root, 'backend')
+if backend_path not in sys.path:
+    sys.path.insert(0, backend_path)
+
+os.environ.setdefault('DASHSCOPE_API_KEY', 'test-key')
+
+import token_budget
+from llm_cache import LLMResponseCache
+
+
+def test_estimate_and_context_limits():
+    """中文按字计、英文按词长计；模型上限按前缀匹配并可由环境变量覆盖"""
+    assert token_budget.estimate_tokens('') == 0
+    chinese = token_budget.estimate_tokens('投标人须提供有效的资质证明材料' * 100)
+    english = token_budget.estimate_tokens('bidder shall provide valid licenses ' * 100)
+    assert 1000 <= chinese <= 1500
+    assert 800 <= english <= 1100
+
+    assert token_budget.context_limit('qwen-plus-2025-04-28') == 131072
+    assert token_budget.context_limit('ep-20250101-abcd') == token_budget.DEFAULT_CONTEXT_TOKENS
+    os.environ['LLM_CONTEXT_LIMITS'] = 'ep-20250101-abcd=65536'
+    try:
+        assert token_budget.context_limit('ep-20250101-abcd') == 65536
+    finally:
+        del os.environ['LLM_CONTEXT_LIMITS']
+    assert token_budget.input_budget('qwen-max') < 32768
+
+
+def test_plan_and_trim():
+    """超出预算时依次考虑改用长上下文模型、分段、截断"""
+    token_budget.reset_stats()
+    budget = token_budget.input_budget('qwen-max')
+    assert token_budget.plan('qwen-max', budget)['action'] == 'send'
+    assert token_budget.plan('qwen-max', budget + 1, route_model='qwen-long')['action'] == 'route'
+    assert token_budget.plan('qwen-max', budget + 1, can_chunk=True, can_trim=True)['action'] == 'chunk'
+    assert token_budget.plan('qwen-max', budget + 1, can_trim=True)['action'] == 'trim'
+    assert token_budget.plan('qwen-max', 5000, can_trim=True, max_input_tokens=1000)['budget'] == 1000
+    assert token_budget.plan('qwen-max', budget + 1)['over_budget'] is True
+    assert token_budget.get_stats()['plans'] == {'send': 2, 'route': 1, 'chunk': 1, 'trim': 2, 'over_budget': 1}
+
+    text = '第一章 投标人资格要求\n' * 500
+    trimmed = token_budget.trim_to_tokens(text, 1000)
+    assert token_budget.estimate_tokens(trimmed) <= 1000
+    assert trimmed.endswith('\n') and text.startswith(trimmed)
+    assert token_budget.trim_to_tokens('短文本', 1000) == '短文本'
+
+
+def test_record_usage_and_service_integration():
+    """分析服务调用后记录预估与实际用量"""
+    from qwen_service import QwenAnalysisService
+
+    token_budget.reset_stats()
+    service = QwenAnalysisService()
+    service.cache = LLMResponseCache('', 0, 0)  # 容量为0即禁用缓存
+
+    async def create(**kwargs):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='{}'))],
+            usage=SimpleNamespace(prompt_tokens=90, completion_tokens=5),
+        )
+
+    service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    service._call_qwen_api('请分析以下招标文件内容' * 10)
+
+    stats = token_budget.get_stats()['models'][service.model]
+    assert stats['calls'] == 1 and stats['prompt_tokens'] == 90 and stats['completion_tokens'] == 5
+    assert stats['ratio'] == round(90 / stats['estimated_tokens'], 3)
+
+    # 没有usage时只记录预估值
+    token_budget.record_usage('doubao-vision-32k', 10, None)
+    assert token_budget.get_stats()['models']['doubao-vision-32k']['ratio'] is None
+
+
+def test_bid_analysis_trims_to_budget():
+    """投标分析提示词超出输入预算时截取正文，发送的提示词不超过预算"""
+    from qwen_service import QwenAnalysisService
+
+    service = QwenAnalysisService()
+    service.cache = LLMResponseCache('', 0, 0)
+    prompts = []
+
+    async def create(**kwargs):
+        prompts.append(kwargs['messages'][0]['content'])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{"issues": []}'))],
+                               usage=None)
+
+    service.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    content = '第一章 投标函\n' + '投标人承诺满足招标文件全部技术要求。\n' * 2000
+    tender_analysis = {'invalid_items': [{'category': '资质', 'description': '须具备施工总承包资质'}]}
+    os.environ['LLM_CONTEXT_LIMITS'] = f'{service.model}=20000'
+    os.environ['LLM_OUTPUT_RESERVE_TOKENS'] = '4000'
+    try:
+        budget = token_budget.input_budget(service.model)
+        assert token_budget.estimate_tokens(service._build_bid_prompt(content, tender_analysis)) > budget
+        service.analyze_bid_document_with_model(content, tender_analysis)
+    finally:
+        del os.environ['LLM_CONTEXT_LIMITS']
+        del os.environ['LLM_OUTPUT_RESERVE_TOKENS']
+
+    assert len(prompts) == 1 and token_budget.estimate_tokens(prompts[0]) <= budget
+    assert '第一章 投标函' in prompts[0] and '须具备施工总承包资质' in prompts[0]
+
+
+if __name__ == "__main__":
+    test_estimate_and_context_limits()
+    test_plan_and_trim()
+    test_record_usage_and_service_integration()
+    test_bid_analysis_trims_to_budget()
+    print("✅ Token预算测试通过")